@@ -0,0 +1,471 @@
+# accounts/activity_tracker.py
+# Write-coalescing activity tracker
+
+"""
+Activity tracker.
+
+High-frequency, low-value writes (last activity heartbeats, session
+activity, company page views) are buffered in the cache and written to the
+database in batches instead of one UPDATE per request:
+
+    user activity      -> User.last_activity              (bulk_update)
+    session activity   -> UserSession.last_activity       (bulk_update)
+    company views      -> RecentlyViewedCompany           (bulk_update / bulk_create)
+                          UserActivity COMPANY_VIEWED     (bulk_create)
+    API key usage      -> APIKey.usage_count / last_used  (bulk_update)
+
+Buffers are flushed at most every FLUSH_INTERVAL seconds. The first
+request that finds the interval elapsed starts the flush in a background
+thread (see UpdateLastActivityMiddleware), so no request waits for the
+bulk writes. They can also be flushed from cron / on shutdown with:
+
+    python manage.py flush_activity
+
+Buffer layout: entries are written into the current generation. The first
+write of an identifier in a generation (cache.add) appends it to the
+generation's journal (slot numbers from cache.incr), so no identifier is
+lost to concurrent writers. A flush starts a new generation and drains
+the generations that ended at least one flush earlier: nobody writes to
+those any more, so reading and then deleting them loses nothing. Writes
+therefore reach the database within about two FLUSH_INTERVALs. A final
+flush (flush_activity) also drains the generation it just ended, after a
+short grace period.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityTracker:
+    """
+    Buffers activity writes in the cache and flushes them in batches.
+    """
+
+    KEY_PREFIX = 'activity'
+    FLUSH_INTERVAL = 30
+    # Buffered entries outlive a few missed flushes, then expire
+    ENTRY_TTL = 600
+    # Writers still holding the previous generation finish within this
+    GENERATION_GRACE = 2
+    # Do not log the same company view as UserActivity more than once per hour
+    VIEW_LOG_INTERVAL = 3600
+    MAX_RECENT_VIEWS = 20
+    BATCH_SIZE = 500
+
+    MAX_PENDING_GENERATIONS = 4
+
+    LOCK_TIMEOUT = 5
+    LOCK_WAIT = 1
+
+    KIND_USER = 'user'
+    KIND_SESSION = 'session'
+    KIND_VIEWS = 'views'
+    KIND_API_KEY = 'apikey'
+    KINDS = (KIND_USER, KIND_SESSION, KIND_VIEWS, KIND_API_KEY)
+
+    # =========================================================================
+    # BUFFERING
+    # =========================================================================
+
+    @classmethod
+    def _generation_key(cls):
+        return f'{cls.KEY_PREFIX}:generation'
+
+    @classmethod
+    def _drained_key(cls):
+        return f'{cls.KEY_PREFIX}:drained'
+
+    @classmethod
+    def _entry_key(cls, kind, ident, generation):
+        return f'{cls.KEY_PREFIX}:{kind}:{generation}:{ident}'
+
+    @classmethod
+    def _journal_key(cls, kind, generation, slot=None):
+        if slot is None:
+            return f'{cls.KEY_PREFIX}:{kind}:{generation}:journal'
+        return f'{cls.KEY_PREFIX}:{kind}:{generation}:journal:{slot}'
+
+    @classmethod
+    def _count_key(cls, key_id):
+        return f'{cls.KEY_PREFIX}:apikey_count:{key_id}'
+
+    @classmethod
+    def _generation(cls):
+        generation = cache.get(cls._generation_key())
+        if generation is None:
+            cache.add(cls._generation_key(), 1, None)
+            generation = cache.get(cls._generation_key()) or 1
+        return generation
+
+    @classmethod
+    @contextmanager
+    def _locked(cls, name, timeout=None):
+        """
+        Short cache lock (read-modify-write of one entry, flushes). Yields
+        whether it was acquired within LOCK_WAIT.
+        """
+        lock_key = f'{cls.KEY_PREFIX}:lock:{name}'
+        timeout = timeout or cls.LOCK_TIMEOUT
+        deadline = time.monotonic() + cls.LOCK_WAIT
+        acquired = cache.add(lock_key, 1, timeout)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(0.005)
+            acquired = cache.add(lock_key, 1, timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+
+    @classmethod
+    def _buffer(cls, kind, ident, value, generation=None):
+        """Store a pending value in the current generation, journaling new identifiers."""
+        generation = generation or cls._generation()
+        entry_key = cls._entry_key(kind, ident, generation)
+        if not cache.add(entry_key, value, cls.ENTRY_TTL):
+            # Already journaled in this generation
+            cache.set(entry_key, value, cls.ENTRY_TTL)
+            return
+
+        journal_key = cls._journal_key(kind, generation)
+        cache.add(journal_key, 0, cls.ENTRY_TTL)
+        try:
+            slot = cache.incr(journal_key)
+        except ValueError:
+            # Journal expired in between; start it again
+            cache.add(journal_key, 0, cls.ENTRY_TTL)
+            slot = cache.incr(journal_key)
+        cache.set(cls._journal_key(kind, generation, slot), ident, cls.ENTRY_TTL)
+
+    @staticmethod
+    def _pop_many(keys):
+        """
+        Read and delete entries, keeping only those this caller deleted:
+        of concurrent readers of an entry, one gets it.
+
+        Returns:
+            {key: value}
+        """
+        values = cache.get_many(keys)
+        return {key: value for key, value in values.items() if cache.delete(key)}
+
+    @classmethod
+    def _drain_generation(cls, kind, generation):
+        """
+        Take every entry of an ended generation out of the buffer.
+
+        Returns:
+            {ident: value}
+        """
+        journal_key = cls._journal_key(kind, generation)
+        size = cache.get(journal_key) or 0
+        if not size:
+            return {}
+
+        slot_keys = [cls._journal_key(kind, generation, slot) for slot in range(1, size + 1)]
+        idents = set(cache.get_many(slot_keys).values())
+        keys = {cls._entry_key(kind, ident, generation): ident for ident in idents}
+        if kind == cls.KIND_VIEWS:
+            # flush_company_views(user_ids=...) takes views concurrently
+            values = cls._pop_many(keys.keys())
+            cache.delete_many([journal_key, *slot_keys])
+        else:
+            values = cache.get_many(keys.keys())
+            cache.delete_many([journal_key, *slot_keys, *keys.keys()])
+        return {keys[key]: value for key, value in values.items()}
+
+    @classmethod
+    def _pending_generations(cls, until):
+        """Generations below `until` that have not been drained yet."""
+        drained = cache.get(cls._drained_key()) or 0
+        # A lost drained marker must not make us walk every past generation
+        return range(max(drained + 1, until - cls.MAX_PENDING_GENERATIONS), until)
+
+    @classmethod
+    def _take(cls, kind, idents):
+        """
+        Take specific identifiers out of every pending generation (oldest
+        first). Callers hold the identifiers' entry lock; entries are popped
+        (_pop_many) as flush() may drain the same generation meanwhile.
+
+        Returns:
+            {ident: [value, ...]}
+        """
+        current = cls._generation()
+        taken = {}
+        for generation in cls._pending_generations(current + 1):
+            keys = {cls._entry_key(kind, ident, generation): ident for ident in idents}
+            values = cls._pop_many(keys.keys())
+            for key, value in values.items():
+                taken.setdefault(keys[key], []).append(value)
+        return taken
+
+    @classmethod
+    def record_user_activity(cls, user_id, when=None):
+        cls._buffer(cls.KIND_USER, user_id, when or timezone.now())
+
+    @classmethod
+    def record_session_activity(cls, session_key, when=None):
+        cls._buffer(cls.KIND_SESSION, session_key, when or timezone.now())
+
+    @classmethod
+    def record_company_view(cls, user, report, record_id, company_name, country=None, category=None):
+        """
+        Buffer a company page view (RecentlyViewedCompany + UserActivity).
+        Repeated views of the same company are merged.
+        """
+        log_activity = cache.add(
+            f'{cls.KEY_PREFIX}:viewlog:{user.pk}:{report.report_id}:{record_id}',
+            True, cls.VIEW_LOG_INTERVAL
+        )
+        view_key = f'{report.report_id}:{record_id}'
+
+        # The user's pending views are one entry: read-modify-write under a lock
+        with cls._locked(f'{cls.KIND_VIEWS}:{user.pk}'):
+            generation = cls._generation()
+            pending = cache.get(cls._entry_key(cls.KIND_VIEWS, user.pk, generation)) or {}
+            previous = pending.get(view_key)
+
+            pending[view_key] = {
+                'report_pk': report.pk,
+                'report_id': str(report.report_id),
+                'report_title': report.title,
+                'record_id': record_id,
+                'company_name': company_name,
+                'country': country,
+                'category': category,
+                'viewed_at': timezone.now(),
+                'log_activity': log_activity or bool(previous and previous['log_activity']),
+            }
+            cls._buffer(cls.KIND_VIEWS, user.pk, pending, generation)
+
+    @classmethod
+    def record_api_key_usage(cls, key_id, ip_address=None):
+        """Count an API key request; the count is added to usage_count on flush."""
+        # Counter without expiry: flushes subtract what they wrote
+        count_key = cls._count_key(key_id)
+        cache.add(count_key, 0, None)
+        cache.incr(count_key)
+        cls._buffer(cls.KIND_API_KEY, key_id, {'when': timezone.now(), 'ip': ip_address})
+
+    # =========================================================================
+    # FLUSHING
+    # =========================================================================
+
+    @classmethod
+    def maybe_flush(cls):
+        """
+        Start a flush in a background thread if FLUSH_INTERVAL has passed
+        since the last one. The calling request does not wait for it.
+        """
+        if not cache.add(f'{cls.KEY_PREFIX}:flush_lock', True, cls.FLUSH_INTERVAL):
+            return False
+        threading.Thread(target=cls._background_flush, name='activity-flush', daemon=True).start()
+        return True
+
+    @classmethod
+    def _background_flush(cls):
+        try:
+            cls.flush()
+        except Exception as e:
+            logger.warning(f"Activity flush failed: {e}")
+        finally:
+            connection.close()
+
+    @classmethod
+    def flush(cls, final=False):
+        """
+        Write all buffered activity to the database.
+
+        Args:
+            final: also drain the generation ended by this flush (after
+                   GENERATION_GRACE), e.g. on shutdown
+
+        Returns:
+            dict with the number of users, sessions and company views written
+        """
+        result = {'users': 0, 'sessions': 0, 'company_views': 0, 'api_keys': 0}
+        with cls._locked('flush', timeout=cls.ENTRY_TTL) as acquired:
+            if not acquired:
+                return result  # another process is flushing
+
+            cls._generation()
+            ended = cache.incr(cls._generation_key()) - 1
+            if final:
+                time.sleep(cls.GENERATION_GRACE)
+            else:
+                # In-flight writers may still hold the generation that just ended
+                ended -= 1
+
+            for generation in cls._pending_generations(ended + 1):
+                result['users'] += cls.flush_user_activity(generation)
+                result['sessions'] += cls.flush_session_activity(generation)
+                result['company_views'] += cls.flush_company_views(generation=generation)
+                result['api_keys'] += cls.flush_api_key_usage(generation)
+                cache.set(cls._drained_key(), generation, None)
+        return result
+
+    @classmethod
+    def flush_user_activity(cls, generation):
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+
+        pending = cls._drain_generation(cls.KIND_USER, generation)
+        if not pending:
+            return 0
+
+        users = [User(pk=user_id, last_activity=when) for user_id, when in pending.items()]
+        User.objects.bulk_update(users, ['last_activity'], batch_size=cls.BATCH_SIZE)
+        return len(users)
+
+    @classmethod
+    def flush_session_activity(cls, generation):
+        from .security_models import UserSession
+
+        pending = cls._drain_generation(cls.KIND_SESSION, generation)
+        if not pending:
+            return 0
+
+        sessions = list(UserSession.objects.filter(session_key__in=pending.keys()).only('id', 'session_key'))
+        for session in sessions:
+            session.last_activity = pending[session.session_key]
+        UserSession.objects.bulk_update(sessions, ['last_activity'], batch_size=cls.BATCH_SIZE)
+        return len(sessions)
+
+    @classmethod
+    def flush_api_key_usage(cls, generation):
+        from django.db.models import F
+        from .security_models import APIKey
+
+        pending = cls._drain_generation(cls.KIND_API_KEY, generation)
+        if not pending:
+            return 0
+
+        count_keys = {key_id: cls._count_key(key_id) for key_id in pending}
+        counts = cache.get_many(count_keys.values())
+
+        keys = []
+        for key_id, usage in pending.items():
+            count = counts.get(count_keys[key_id]) or 0
+            if count:
+                # Subtract what is written, keeping requests counted meanwhile
+                try:
+                    cache.decr(count_keys[key_id], count)
+                except ValueError:
+                    pass
+            keys.append(APIKey(
+                id=key_id,
+                usage_count=F('usage_count') + count,
+                last_used_at=usage['when'],
+                last_used_ip=usage['ip'],
+            ))
+
+        APIKey.objects.bulk_update(
+            keys, ['usage_count', 'last_used_at', 'last_used_ip'], batch_size=cls.BATCH_SIZE
+        )
+        return len(keys)
+
+    @classmethod
+    def flush_company_views(cls, user_ids=None, generation=None):
+        """
+        Upsert buffered company views.
+
+        Args:
+            user_ids: only flush these users' views, from every pending
+                      generation (used before reading a user's recently
+                      viewed list)
+            generation: flush this ended generation (flush())
+        """
+        from dashboard.models import RecentlyViewedCompany, UserActivity, ActivityType
+
+        if user_ids is None:
+            pending = cls._drain_generation(cls.KIND_VIEWS, generation)
+        else:
+            pending = {}
+            for user_id in user_ids:
+                with cls._locked(f'{cls.KIND_VIEWS}:{user_id}'):
+                    taken = cls._take(cls.KIND_VIEWS, [user_id]).get(user_id, [])
+                # Merge generations oldest first, keeping the activity log flag
+                merged = {}
+                for views in taken:
+                    for view_key, view in views.items():
+                        previous = merged.get(view_key)
+                        view['log_activity'] = view['log_activity'] or bool(previous and previous['log_activity'])
+                        merged[view_key] = view
+                if merged:
+                    pending[user_id] = merged
+        if not pending:
+            return 0
+
+        views = [
+            (user_id, view)
+            for user_id, user_views in pending.items()
+            for view in user_views.values()
+        ]
+
+        existing = {
+            (obj.user_id, obj.report_id, obj.record_id): obj
+            for obj in RecentlyViewedCompany.objects.filter(
+                user_id__in=pending.keys(),
+                record_id__in={view['record_id'] for _, view in views},
+            )
+        }
+
+        to_update, to_create, activities = [], [], []
+        for user_id, view in views:
+            fields = {
+                'company_name': view['company_name'],
+                'country': view['country'],
+                'category': view['category'],
+                'viewed_at': view['viewed_at'],
+            }
+            obj = existing.get((user_id, view['report_pk'], view['record_id']))
+            if obj:
+                for name, value in fields.items():
+                    setattr(obj, name, value)
+                to_update.append(obj)
+            else:
+                to_create.append(RecentlyViewedCompany(
+                    user_id=user_id,
+                    report_id=view['report_pk'],
+                    record_id=view['record_id'],
+                    **fields
+                ))
+
+            if view['log_activity']:
+                activities.append(UserActivity(
+                    user_id=user_id,
+                    activity_type=ActivityType.COMPANY_VIEWED,
+                    company_name=view['company_name'],
+                    report_title=view['report_title'],
+                    report_id=view['report_id'],
+                    record_id=view['record_id'],
+                    country=view['country'],
+                ))
+
+        with transaction.atomic():
+            RecentlyViewedCompany.objects.bulk_update(
+                to_update, ['company_name', 'country', 'category', 'viewed_at'], batch_size=cls.BATCH_SIZE
+            )
+            RecentlyViewedCompany.objects.bulk_create(to_create, batch_size=cls.BATCH_SIZE)
+            UserActivity.objects.bulk_create(activities, batch_size=cls.BATCH_SIZE)
+
+            # Keep only the most recent entries per user
+            for user_id in pending:
+                stale_ids = list(
+                    RecentlyViewedCompany.objects.filter(user_id=user_id)
+                    .order_by('-viewed_at')
+                    .values_list('id', flat=True)[cls.MAX_RECENT_VIEWS:]
+                )
+                if stale_ids:
+                    RecentlyViewedCompany.objects.filter(id__in=stale_ids).delete()
+
+        return len(views)
@@ -0,0 +1,316 @@
+# accounts/analytics_services.py
+# Pre-aggregated login / audit analytics
+
+"""
+Login and audit analytics rollups.
+
+Dashboard analytics (login trends, failure rate, device/browser breakdown,
+most active users) are served from two daily rollup tables instead of
+scanning AuditLog / LoginHistory and parsing user agents on every request:
+
+    AuditEventDailyRollup   (date, event_type, role, device, browser, os) -> count
+    UserLoginDailyRollup    (date, user) -> login_count, failed_count, last_login_at
+
+Rows are incremented when audit entries are written (accounts/signals.py).
+Historical data, or gaps after a bulk import, are filled with:
+
+    python manage.py rebuild_login_analytics --days 90
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=2048)
+def classify_user_agent(user_agent):
+    """
+    Classify a user agent string into (device_type, browser, os).
+
+    Memoized: the same handful of user agents account for almost all
+    traffic, so each distinct string is only parsed once per process.
+    """
+    ua = (user_agent or '').lower()
+    if not ua:
+        return ('', '', '')
+
+    # Device detection
+    if 'mobile' in ua or 'android' in ua or 'iphone' in ua:
+        device_type = 'Mobile'
+    elif 'tablet' in ua or 'ipad' in ua:
+        device_type = 'Tablet'
+    else:
+        device_type = 'Desktop'
+
+    # Browser detection
+    if 'chrome' in ua and 'edg' not in ua:
+        browser = 'Chrome'
+    elif 'firefox' in ua:
+        browser = 'Firefox'
+    elif 'safari' in ua and 'chrome' not in ua:
+        browser = 'Safari'
+    elif 'edg' in ua:
+        browser = 'Edge'
+    elif 'opera' in ua or 'opr' in ua:
+        browser = 'Opera'
+    else:
+        browser = 'Other'
+
+    # OS detection
+    if 'windows' in ua:
+        os_name = 'Windows'
+    elif 'mac os' in ua or 'macintosh' in ua:
+        os_name = 'macOS'
+    elif 'linux' in ua and 'android' not in ua:
+        os_name = 'Linux'
+    elif 'android' in ua:
+        os_name = 'Android'
+    elif 'iphone' in ua or 'ipad' in ua:
+        os_name = 'iOS'
+    else:
+        os_name = 'Other'
+
+    return (device_type, browser, os_name)
+
+
+class LoginAnalyticsService:
+    """
+    Maintains and queries the login / audit analytics rollups.
+    """
+
+    REBUILD_BATCH_SIZE = 1000
+
+    # =========================================================================
+    # INGEST
+    # =========================================================================
+
+    @classmethod
+    def _increment(cls, model, lookup, increments, extra_updates=None):
+        """
+        Add `increments` to the counters of the bucket identified by `lookup`,
+        creating the bucket on first use.
+        """
+        updates = {field: F(field) + value for field, value in increments.items()}
+        updates.update(extra_updates or {})
+
+        if model.objects.filter(**lookup).update(**updates):
+            return
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, **increments, **(extra_updates or {}))
+        except IntegrityError:
+            # Another request created the bucket in the meantime
+            model.objects.filter(**lookup).update(**updates)
+
+    @classmethod
+    def record_audit_event(cls, audit_log):
+        """Count an AuditLog entry into its daily bucket."""
+        from .security_models import AuditEventDailyRollup
+
+        device_type, browser, os_name = classify_user_agent(audit_log.user_agent)
+        role = audit_log.user.role if audit_log.user_id else ''
+
+        cls._increment(
+            AuditEventDailyRollup,
+            lookup={
+                'date': timezone.localdate(audit_log.timestamp),
+                'event_type': audit_log.event_type,
+                'role': role or '',
+                'device_type': device_type,
+                'browser': browser,
+                'os': os_name,
+            },
+            increments={'count': 1},
+        )
+
+    @classmethod
+    def record_login(cls, login_history):
+        """Count a LoginHistory entry into the user's daily bucket."""
+        from .security_models import UserLoginDailyRollup
+
+        if login_history.success:
+            increments = {'login_count': 1}
+            extra_updates = {'last_login_at': login_history.login_time}
+        else:
+            increments = {'failed_count': 1}
+            extra_updates = None
+
+        cls._increment(
+            UserLoginDailyRollup,
+            lookup={
+                'date': timezone.localdate(login_history.login_time),
+                'user_id': login_history.user_id,
+            },
+            increments=increments,
+            extra_updates=extra_updates,
+        )
+
+    # =========================================================================
+    # REBUILD
+    # =========================================================================
+
+    @classmethod
+    def rebuild(cls, start_date, end_date=None):
+        """
+        Recompute all rollup rows between start_date and end_date (inclusive)
+        from the raw AuditLog / LoginHistory tables.
+
+        Returns:
+            dict with the number of audit entries, login entries and rollup
+            rows written
+        """
+        from .models import LoginHistory
+        from .security_models import AuditLog, AuditEventDailyRollup, UserLoginDailyRollup
+
+        end_date = end_date or timezone.localdate()
+        tz = timezone.get_current_timezone()
+        start_dt = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+        end_dt = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+
+        # Audit events: user agents are classified in Python (memoized)
+        buckets = Counter()
+        audit_count = 0
+        audit_rows = AuditLog.objects.filter(
+            timestamp__gte=start_dt, timestamp__lt=end_dt
+        ).values_list('timestamp', 'event_type', 'user__role', 'user_agent')
+
+        for timestamp, event_type, role, user_agent in audit_rows.iterator(chunk_size=2000):
+            audit_count += 1
+            buckets[(timezone.localdate(timestamp), event_type, role or '') + classify_user_agent(user_agent)] += 1
+
+        event_rollups = [
+            AuditEventDailyRollup(
+                date=date, event_type=event_type, role=role,
+                device_type=device_type, browser=browser, os=os_name, count=count
+            )
+            for (date, event_type, role, device_type, browser, os_name), count in buckets.items()
+        ]
+
+        # Logins: aggregated entirely in the database
+        login_rows = LoginHistory.objects.filter(
+            login_time__gte=start_dt, login_time__lt=end_dt
+        ).annotate(
+            date=TruncDate('login_time')
+        ).values('date', 'user_id').annotate(
+            login_count=Count('id', filter=Q(success=True)),
+            failed_count=Count('id', filter=Q(success=False)),
+            last_login_at=Max('login_time', filter=Q(success=True)),
+        )
+
+        login_rollups = []
+        login_count = 0
+        for row in login_rows:
+            login_count += row['login_count'] + row['failed_count']
+            login_rollups.append(UserLoginDailyRollup(**row))
+
+        with transaction.atomic():
+            AuditEventDailyRollup.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+            UserLoginDailyRollup.objects.filter(date__gte=start_date, date__lte=end_date).delete()
+            AuditEventDailyRollup.objects.bulk_create(event_rollups, batch_size=cls.REBUILD_BATCH_SIZE)
+            UserLoginDailyRollup.objects.bulk_create(login_rollups, batch_size=cls.REBUILD_BATCH_SIZE)
+
+        return {
+            'audit_entries': audit_count,
+            'login_entries': login_count,
+            'event_rollups': len(event_rollups),
+            'login_rollups': len(login_rollups),
+        }
+
+    # =========================================================================
+    # QUERIES
+    # =========================================================================
+
+    @classmethod
+    def days_ago(cls, days):
+        """First date of a window covering the last `days` days."""
+        return timezone.localdate() - timedelta(days=days)
+
+    @classmethod
+    def event_total(cls, event_type, start_date, end_date=None):
+        from .security_models import AuditEventDailyRollup
+
+        queryset = AuditEventDailyRollup.objects.filter(event_type=event_type, date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lt=end_date)
+        return queryset.aggregate(total=Sum('count'))['total'] or 0
+
+    @classmethod
+    def daily_event_counts(cls, event_types, start_date):
+        """
+        Returns:
+            {date: {event_type: count}} for the requested event types
+        """
+        from .security_models import AuditEventDailyRollup
+
+        rows = AuditEventDailyRollup.objects.filter(
+            event_type__in=event_types, date__gte=start_date
+        ).values('date', 'event_type').annotate(total=Sum('count'))
+
+        result = {}
+        for row in rows:
+            result.setdefault(row['date'], {})[row['event_type']] = row['total']
+        return result
+
+    @classmethod
+    def client_breakdown(cls, event_type, start_date):
+        """
+        Returns:
+            (devices, browsers, operating_systems) Counters for an event type
+        """
+        from .security_models import AuditEventDailyRollup
+
+        rows = AuditEventDailyRollup.objects.filter(
+            event_type=event_type, date__gte=start_date
+        ).exclude(device_type='').values('device_type', 'browser', 'os').annotate(total=Sum('count'))
+
+        devices, browsers, operating_systems = Counter(), Counter(), Counter()
+        for row in rows:
+            devices[row['device_type']] += row['total']
+            browsers[row['browser']] += row['total']
+            operating_systems[row['os']] += row['total']
+        return devices, browsers, operating_systems
+
+    @classmethod
+    def daily_logins(cls, start_date):
+        """Successful logins per day, as [{'date', 'count'}]."""
+        from .security_models import UserLoginDailyRollup
+
+        return list(
+            UserLoginDailyRollup.objects.filter(
+                date__gte=start_date, login_count__gt=0
+            ).values('date').annotate(count=Sum('login_count')).order_by('date')
+        )
+
+    @classmethod
+    def login_summary(cls, start_date):
+        """Total successful logins and unique users who logged in since start_date."""
+        from .security_models import UserLoginDailyRollup
+
+        return UserLoginDailyRollup.objects.filter(
+            date__gte=start_date, login_count__gt=0
+        ).aggregate(
+            total_logins=Sum('login_count'),
+            active_users=Count('user', distinct=True),
+        )
+
+    @classmethod
+    def top_users(cls, start_date, limit=10):
+        """Users with the most successful logins since start_date."""
+        from .security_models import UserLoginDailyRollup
+
+        return list(
+            UserLoginDailyRollup.objects.filter(
+                date__gte=start_date, login_count__gt=0
+            ).values('user_id').annotate(
+                login_count=Sum('login_count'),
+                last_login=Max('last_login_at'),
+            ).order_by('-login_count')[:limit]
+        )
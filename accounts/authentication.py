@@ -0,0 +1,152 @@
+# accounts/authentication.py
+# API key authentication for DRF
+
+"""
+API key authentication.
+
+Integration clients send their key with every request:
+
+    Authorization: Api-Key <key>
+    X-API-Key: <key>
+
+Keys are looked up by their indexed 8 character prefix and verified with a
+constant time comparison of the SHA-256 hash. The prefix resolution (key id,
+hash, user, scopes, expiry) is cached for RESOLUTION_TTL seconds and
+dropped whenever an API key is saved or deleted (see accounts/signals.py).
+
+Usage is counted through ActivityTracker (flushed in batches), so an
+authenticated call costs no database write.
+
+Keys without a 'write:*' or 'admin' scope can only make safe (read)
+requests. `request.auth` is the resolved APIKeyCredentials.
+"""
+
+import hashlib
+import hmac
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.permissions import SAFE_METHODS
+
+from .activity_tracker import ActivityTracker
+
+
+class APIKeyCredentials:
+    """Resolved API key attached to request.auth"""
+
+    def __init__(self, key_id, scopes, expires_at):
+        self.key_id = key_id
+        self.scopes = scopes
+        self.expires_at = expires_at
+
+    def has_scope(self, scope):
+        return 'admin' in self.scopes or scope in self.scopes
+
+    @property
+    def can_write(self):
+        return 'admin' in self.scopes or any(scope.startswith('write:') for scope in self.scopes)
+
+
+class APIKeyAuthentication(BaseAuthentication):
+    """
+    Authenticate requests carrying an API key.
+    """
+
+    keyword = 'Api-Key'
+    header = 'HTTP_X_API_KEY'
+    KEY_PREFIX = 'api_key'
+    RESOLUTION_TTL = 60
+
+    @classmethod
+    def _resolution_key(cls, prefix):
+        return f'{cls.KEY_PREFIX}:prefix:{prefix}'
+
+    @classmethod
+    def invalidate(cls, prefix):
+        cache.delete(cls._resolution_key(prefix))
+
+    def get_key(self, request):
+        auth = get_authorization_header(request).split()
+        if auth and auth[0].lower() == self.keyword.lower().encode():
+            if len(auth) != 2:
+                raise exceptions.AuthenticationFailed('Invalid API key header.')
+            try:
+                return auth[1].decode()
+            except UnicodeError:
+                raise exceptions.AuthenticationFailed('Invalid API key header.')
+        return request.META.get(self.header) or None
+
+    def authenticate(self, request):
+        key = self.get_key(request)
+        if not key:
+            return None
+
+        key_hash = hashlib.sha256(key.encode()).hexdigest()
+        match = None
+        for candidate in self.resolve(key[:8]):
+            if hmac.compare_digest(candidate['key_hash'], key_hash):
+                match = candidate
+                break
+
+        if match is None or not match['is_active']:
+            raise exceptions.AuthenticationFailed('Invalid API key.')
+        if match['expires_at'] and timezone.now() > match['expires_at']:
+            raise exceptions.AuthenticationFailed('API key has expired.')
+
+        user = match['user']
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        credentials = APIKeyCredentials(match['id'], match['scopes'], match['expires_at'])
+        if request.method not in SAFE_METHODS and not credentials.can_write:
+            raise exceptions.PermissionDenied('This API key is read-only.')
+
+        ActivityTracker.record_api_key_usage(match['id'], self._client_ip(request))
+        ActivityTracker.maybe_flush()
+        return (user, credentials)
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+    def resolve(self, prefix):
+        """
+        Keys sharing a prefix, with their users (cached).
+
+        Returns:
+            list of dicts: id, key_hash, scopes, is_active, expires_at, user
+        """
+        from .security_models import APIKey
+
+        cache_key = self._resolution_key(prefix)
+        candidates = cache.get(cache_key)
+        if candidates is not None:
+            return candidates
+
+        keys = list(
+            APIKey.objects.filter(key_prefix=prefix)
+            .values('id', 'key_hash', 'scopes', 'is_active', 'expires_at', 'user_id')
+        )
+        users = get_user_model().objects.in_bulk({key['user_id'] for key in keys})
+        candidates = [
+            {
+                'id': str(key['id']),
+                'key_hash': key['key_hash'],
+                'scopes': key['scopes'] or [],
+                'is_active': key['is_active'],
+                'expires_at': key['expires_at'],
+                'user': users.get(key['user_id']),
+            }
+            for key in keys
+        ]
+        cache.set(cache_key, candidates, self.RESOLUTION_TTL)
+        return candidates
+
+    @staticmethod
+    def _client_ip(request):
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if x_forwarded_for:
+            return x_forwarded_for.split(',')[0].strip()
+        return request.META.get('REMOTE_ADDR')
@@ -1,17 +1,27 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from .presence import PresenceConsumerMixin
 
-class UserStatusConsumer(AsyncWebsocketConsumer):
+
+class UserStatusConsumer(PresenceConsumerMixin, AsyncWebsocketConsumer):
     """WebSocket consumer for real-time user status updates"""
 
     async def connect(self):
         await self.channel_layer.group_add("user_status", self.channel_name)
         await self.accept()
+
+        user = self.scope.get('user')
+        if user and user.is_authenticated:
+            await self.start_presence(user)
         print(f"✅ User status WebSocket connected")
 
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard("user_status", self.channel_name)
+
+        user = self.scope.get('user')
+        if user and user.is_authenticated:
+            await self.stop_presence(user)
         print(f"❌ User status WebSocket disconnected")
 
     async def user_status_update(self, event):
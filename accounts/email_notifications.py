@@ -6,52 +6,7 @@ import hashlib
 from django.conf import settings
 from django.utils import timezone
 
-
-def get_location_from_ip(ip_address):
-    """
-    Get location information from IP address using free API.
-    Returns dict with city, region, country, or 'Unknown' values on failure.
-    """
-    import requests
-    
-    # Skip for localhost/private IPs
-    if ip_address in ['127.0.0.1', 'localhost', '::1'] or ip_address.startswith('192.168.') or ip_address.startswith('10.'):
-        return {
-            'city': 'Local Network',
-            'region': '',
-            'country': '',
-            'display': 'Local Network'
-        }
-    
-    try:
-        # Using ip-api.com (free, no API key needed, 45 requests/minute)
-        response = requests.get(f'http://ip-api.com/json/{ip_address}', timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('status') == 'success':
-                city = data.get('city', 'Unknown')
-                region = data.get('regionName', '')
-                country = data.get('country', 'Unknown')
-                
-                # Build display string
-                parts = [p for p in [city, region, country] if p]
-                display = ', '.join(parts) if parts else 'Unknown Location'
-                
-                return {
-                    'city': city,
-                    'region': region,
-                    'country': country,
-                    'display': display
-                }
-    except Exception as e:
-        print(f"Failed to get location from IP: {e}")
-    
-    return {
-        'city': 'Unknown',
-        'region': '',
-        'country': '',
-        'display': 'Unknown Location'
-    }
+from .geoip import get_location_from_ip
 
 
 def parse_user_agent(user_agent):
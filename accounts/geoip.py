@@ -0,0 +1,261 @@
+# accounts/geoip.py
+# Offline IP geolocation
+
+"""
+Offline GeoIP lookup.
+
+Resolves IP addresses to country / region / city from a local database file
+instead of calling an external HTTP API on login and security email paths.
+
+Supported files (settings.GEOIP_DATABASE_PATH):
+
+    *.csv   IP range table, one range per row:
+                start, end, country_code, country, region, city
+            start / end are dotted / colon addresses or integers, so the
+            free IP2Location LITE (DB3) and DB-IP lite CSVs can be used
+            after dropping extra columns. A header row is skipped.
+    *.mmdb  MaxMind / DB-IP MMDB file (requires the optional `maxminddb`
+            package)
+
+CSV ranges are loaded once per process into sorted integer arrays (IPv4 and
+IPv6 separately) and looked up with a binary search; a bounded LRU sits in
+front of the lookup. Without a database file every public address resolves
+to 'Unknown' (a warning is logged once when the configured file is missing
+or cannot be loaded; set GEOIP_DATABASE_PATH to '' to disable lookups).
+
+Usage:
+    from accounts.geoip import get_location_from_ip, geolocate
+    get_location_from_ip('8.8.8.8')['display']   # 'Mountain View, California, United States'
+    geolocate('8.8.8.8')                         # ('US', 'United States', 'California', 'Mountain View')
+"""
+
+import csv
+import ipaddress
+import logging
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = ('', '', '', '')
+LOCAL = ('', '', '', 'Local Network')
+
+LRU_SIZE = 4096
+
+
+class GeoIPDatabase:
+    """
+    Sorted IP range table with binary search lookups.
+    """
+
+    def __init__(self):
+        # Per IP version: range starts / ends (sorted by start) and an index
+        # into `locations` for every range
+        self.starts = {4: array('L'), 6: []}
+        self.ends = {4: array('L'), 6: []}
+        self.location_ids = {4: array('L'), 6: array('L')}
+        self.locations = []
+        self.reader = None
+
+    def __len__(self):
+        return len(self.starts[4]) + len(self.starts[6])
+
+    @staticmethod
+    def _parse_address(value):
+        value = value.strip()
+        if value.isdigit():
+            number = int(value)
+            return (4 if number < 2 ** 32 else 6), number
+        address = ipaddress.ip_address(value)
+        return address.version, int(address)
+
+    @classmethod
+    def from_csv(cls, path):
+        database = cls()
+        location_index = {}
+        rows = {4: [], 6: []}
+
+        with open(path, newline='', encoding='utf-8') as handle:
+            for row in csv.reader(handle):
+                if len(row) < 3:
+                    continue
+                try:
+                    version, start = cls._parse_address(row[0])
+                    _, end = cls._parse_address(row[1])
+                except ValueError:
+                    continue  # header / malformed row
+
+                country_code = row[2].strip().upper()
+                if country_code in ('', '-', 'ZZ'):
+                    continue
+                location = (
+                    country_code,
+                    row[3].strip() if len(row) > 3 else '',
+                    row[4].strip() if len(row) > 4 else '',
+                    row[5].strip() if len(row) > 5 else '',
+                )
+                location_id = location_index.setdefault(location, len(location_index))
+                rows[version].append((start, end, location_id))
+
+        database.locations = list(location_index)
+        for version, version_rows in rows.items():
+            version_rows.sort()
+            for start, end, location_id in version_rows:
+                database.starts[version].append(start)
+                database.ends[version].append(end)
+                database.location_ids[version].append(location_id)
+        return database
+
+    @classmethod
+    def from_mmdb(cls, path):
+        import maxminddb  # optional dependency
+
+        database = cls()
+        database.reader = maxminddb.open_database(path)
+        return database
+
+    def lookup(self, address):
+        """
+        Returns:
+            (country_code, country, region, city) or None
+        """
+        if self.reader is not None:
+            return self._lookup_mmdb(address)
+
+        version, number = address.version, int(address)
+        position = bisect_right(self.starts[version], number) - 1
+        if position < 0 or number > self.ends[version][position]:
+            return None
+        return self.locations[self.location_ids[version][position]]
+
+    def _lookup_mmdb(self, address):
+        record = self.reader.get(str(address))
+        if not record:
+            return None
+        country = record.get('country') or {}
+        subdivisions = record.get('subdivisions') or [{}]
+        names = lambda item: (item.get('names') or {}).get('en', '')
+        return (
+            country.get('iso_code', ''),
+            names(country),
+            names(subdivisions[0]),
+            names(record.get('city') or {}),
+        )
+
+
+_database = None
+_database_lock = threading.Lock()
+
+
+def get_database():
+    """Load the configured database once per process (None if unavailable)."""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = _load_database()
+    return _database or None
+
+
+def _load_database():
+    path = getattr(settings, 'GEOIP_DATABASE_PATH', '')
+    if not path:
+        return False
+    if not os.path.exists(path):
+        logger.warning(
+            f"GeoIP database not found at {path} (settings.GEOIP_DATABASE_PATH); "
+            f"IP locations will resolve to 'Unknown'"
+        )
+        return False
+
+    try:
+        if str(path).endswith('.mmdb'):
+            database = GeoIPDatabase.from_mmdb(path)
+        else:
+            database = GeoIPDatabase.from_csv(path)
+        logger.info(f"GeoIP database loaded from {path} ({len(database)} ranges)")
+        return database
+    except ImportError:
+        logger.warning("maxminddb not installed, GeoIP disabled. Run: pip install maxminddb")
+    except Exception as e:
+        logger.warning(f"Failed to load GeoIP database {path}, IP locations will resolve to 'Unknown': {e}")
+    return False
+
+
+def reload_database():
+    """Drop the loaded database and the lookup cache (after replacing the file)."""
+    global _database
+    with _database_lock:
+        _database = None
+    geolocate.cache_clear()
+
+
+@lru_cache(maxsize=LRU_SIZE)
+def geolocate(ip_address):
+    """
+    Resolve an IP address.
+
+    Returns:
+        (country_code, country, region, city); LOCAL for private /
+        loopback addresses, UNKNOWN when the address cannot be resolved
+    """
+    try:
+        address = ipaddress.ip_address((ip_address or '').strip())
+    except ValueError:
+        return LOCAL if ip_address == 'localhost' else UNKNOWN
+
+    if address.is_private or address.is_loopback or address.is_link_local:
+        return LOCAL
+
+    database = get_database()
+    if database is None:
+        return UNKNOWN
+    return database.lookup(address) or UNKNOWN
+
+
+def get_location_from_ip(ip_address):
+    """
+    Get location information for an IP address from the local database.
+    Returns dict with city, region, country, or 'Unknown' values on failure.
+    """
+    location = geolocate(ip_address)
+    if location == LOCAL:
+        return {
+            'city': 'Local Network',
+            'region': '',
+            'country': '',
+            'display': 'Local Network'
+        }
+
+    country_code, country, region, city = location
+    if not country_code:
+        return {
+            'city': 'Unknown',
+            'region': '',
+            'country': '',
+            'display': 'Unknown Location'
+        }
+
+    country = country or country_code
+    parts = [p for p in [city, region, country] if p]
+    return {
+        'city': city or 'Unknown',
+        'region': region,
+        'country': country,
+        'display': ', '.join(parts)
+    }
+
+
+def geo_fields(ip_address):
+    """Model field values (country_code, country, city) for an IP address."""
+    country_code, country, _, city = geolocate(ip_address) if ip_address else UNKNOWN
+    return {
+        'country_code': country_code,
+        'country': (country or country_code)[:100],
+        'city': city[:100],
+    }
@@ -0,0 +1,77 @@
+# accounts/management/commands/backfill_login_geo.py
+"""
+Management command to resolve the location (country / city) of login
+history and audit log rows written before GeoIP lookup was available, or
+after the GeoIP database file was replaced.
+
+New rows are resolved when they are saved (see accounts/geoip.py).
+
+Requires the GeoIP database file (settings.GEOIP_DATABASE_PATH, an IP range
+CSV or MMDB file, see .env.production.example); without it only private
+addresses resolve and the other rows are left as they are.
+
+Usage:
+    # Fill rows that have no location yet
+    python manage.py backfill_login_geo
+
+    # Re-resolve every row (after updating the GeoIP database)
+    python manage.py backfill_login_geo --all
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.geoip import geo_fields, get_database
+from accounts.models import LoginHistory
+from accounts.security_models import AuditLog
+
+
+class Command(BaseCommand):
+    help = 'Resolve country/city of login history and audit log rows from their IP address'
+
+    BATCH_SIZE = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-resolve rows that already have a location',
+        )
+
+    def handle(self, *args, **options):
+        if get_database() is None:
+            self.stdout.write(self.style.WARNING(
+                "⚠️ No GeoIP database loaded (settings.GEOIP_DATABASE_PATH); only private addresses will resolve"
+            ))
+            if options['all']:
+                self.stdout.write(self.style.ERROR("❌ Refusing --all without a database: it would clear resolved locations"))
+                return
+
+        for model in (LoginHistory, AuditLog):
+            updated = self.backfill(model, options['all'])
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {model._meta.verbose_name_plural}: resolved {updated} rows"
+            ))
+
+    def backfill(self, model, all_rows):
+        queryset = model.objects.exclude(ip_address__isnull=True)
+        if not all_rows:
+            queryset = queryset.filter(country_code='', city='')
+
+        updated = 0
+        batch = []
+        for obj in queryset.only('pk', 'ip_address').iterator(chunk_size=self.BATCH_SIZE):
+            fields = geo_fields(obj.ip_address)
+            if not any(fields.values()) and not all_rows:
+                continue
+            for field, value in fields.items():
+                setattr(obj, field, value)
+            batch.append(obj)
+            if len(batch) >= self.BATCH_SIZE:
+                model.objects.bulk_update(batch, ['country_code', 'country', 'city'])
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            model.objects.bulk_update(batch, ['country_code', 'country', 'city'])
+            updated += len(batch)
+        return updated
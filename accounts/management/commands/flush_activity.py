@@ -0,0 +1,33 @@
+# accounts/management/commands/flush_activity.py
+"""
+Management command to write buffered activity (last activity heartbeats,
+session activity, company views, API key usage) to the database.
+
+Requests start a background flush every ActivityTracker.FLUSH_INTERVAL
+seconds; run this on deploy / shutdown, or from cron on low-traffic sites
+where requests may be too sparse to trigger a flush. It also writes the
+most recent activity, which periodic flushes leave for the next round.
+
+Usage:
+    python manage.py flush_activity
+
+Scheduling (Linux cron - every minute):
+    * * * * * cd /path/to/project && python manage.py flush_activity
+"""
+
+from django.core.management.base import BaseCommand
+from accounts.activity_tracker import ActivityTracker
+
+
+class Command(BaseCommand):
+    help = 'Write buffered user/session activity, company views and API key usage to the database'
+
+    def handle(self, *args, **options):
+        result = ActivityTracker.flush(final=True)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Flushed activity for {result['users']} users, "
+                f"{result['sessions']} sessions, {result['company_views']} company views "
+                f"and {result['api_keys']} API keys"
+            )
+        )
@@ -0,0 +1,54 @@
+# accounts/management/commands/rebuild_login_analytics.py
+"""
+Management command to (re)build the login / audit analytics rollups
+from the raw AuditLog and LoginHistory tables.
+
+The rollups are normally kept up to date as audit entries are written;
+run this once after deploying, or to repair gaps (e.g. after bulk imports
+or if rollup updates failed).
+
+Usage:
+    # Rebuild the last 90 days (default)
+    python manage.py rebuild_login_analytics
+
+    # Rebuild a specific number of days
+    python manage.py rebuild_login_analytics --days 30
+
+Note: days older than the audit log retention period no longer have raw
+data, so rebuilding them would erase their rollups. Keep --days within
+SecuritySettings.audit_retention_days.
+
+Scheduling (optional nightly catch-up, Linux cron):
+    30 2 * * * cd /path/to/project && python manage.py rebuild_login_analytics --days 2
+"""
+
+from django.core.management.base import BaseCommand
+from accounts.analytics_services import LoginAnalyticsService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily login / audit analytics rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='Number of days to rebuild, including today (default: 90)',
+        )
+
+    def handle(self, *args, **options):
+        days = max(options['days'], 1)
+        start_date = LoginAnalyticsService.days_ago(days - 1)
+
+        self.stdout.write(f"Rebuilding login analytics since {start_date}...")
+        result = LoginAnalyticsService.rebuild(start_date)
+
+        self.stdout.write(
+            f"Processed {result['audit_entries']} audit entries and {result['login_entries']} logins"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Wrote {result['event_rollups']} event rollups and {result['login_rollups']} user login rollups"
+            )
+        )
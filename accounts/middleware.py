@@ -8,6 +8,9 @@ from django.http import JsonResponse
 from django.core.cache import cache
 from datetime import timedelta
 
+from .presence import PresenceRegistry
+from .activity_tracker import ActivityTracker
+
 User = get_user_model()
 
 # Cache key for security settings
@@ -32,8 +35,10 @@ def get_cached_security_settings():
 
 class UpdateLastActivityMiddleware:
     """
-    Middleware to update user's last_activity timestamp.
-    OPTIMIZED: Only updates if more than 60 seconds since last update.
+    Middleware to update user's last_activity timestamp and send the
+    presence heartbeat.
+    OPTIMIZED: Only updates if more than 60 seconds since last update,
+    and the database write is coalesced by ActivityTracker.
     """
     
     # Only update if this many seconds have passed
@@ -52,12 +57,18 @@ class UpdateLastActivityMiddleware:
             last_update = cache.get(cache_key)
             
             if last_update is None:
-                # Update database and set cache
-                User.objects.filter(pk=request.user.pk).update(
-                    last_activity=timezone.now()
-                )
+                # Buffer the update (written in batches) and set cache
+                ActivityTracker.record_user_activity(request.user.pk)
                 cache.set(cache_key, True, self.UPDATE_INTERVAL)
 
+                # Presence heartbeat (see accounts/presence.py)
+                PresenceRegistry.heartbeat(
+                    request.user, request.META.get('HTTP_USER_AGENT')
+                )
+
+            # Start a background flush of buffered activity (at most every FLUSH_INTERVAL)
+            ActivityTracker.maybe_flush()
+
         return response
 
 
@@ -156,15 +167,10 @@ class SessionTimeoutMiddleware:
         request.session.modified = True
         
         # Also update UserSession model for accurate display in admin panel
+        # (buffered, written in batches by ActivityTracker)
         session_key = request.session.session_key
         if session_key:
-            try:
-                from .security_models import UserSession
-                UserSession.objects.filter(session_key=session_key).update(
-                    last_activity=now
-                )
-            except Exception:
-                pass  # Don't fail the request if UserSession update fails
+            ActivityTracker.record_session_activity(session_key, now)
     
     def _check_session_timeout(self, request):
         """
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_alter_defaultusersettings_default_header_color_scheme_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEventDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('event_type', models.CharField(max_length=50)),
+                ('role', models.CharField(blank=True, default='', max_length=20)),
+                ('device_type', models.CharField(blank=True, default='', max_length=20)),
+                ('browser', models.CharField(blank=True, default='', max_length=30)),
+                ('os', models.CharField(blank=True, default='', max_length=30)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Audit Event Daily Rollup',
+                'verbose_name_plural': 'Audit Event Daily Rollups',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['event_type', 'date'], name='accounts_au_event_t_3d69a2_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'event_type', 'role', 'device_type', 'browser', 'os'), name='unique_audit_event_daily_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserLoginDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('login_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('last_login_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='login_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Login Daily Rollup',
+                'verbose_name_plural': 'User Login Daily Rollups',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'user'), name='unique_user_login_daily_bucket')],
+            },
+        ),
+    ]
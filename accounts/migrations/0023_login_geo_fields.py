@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_login_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='city',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='country',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='country_code',
+            field=models.CharField(blank=True, max_length=2),
+        ),
+        migrations.AddField(
+            model_name='loginhistory',
+            name='city',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='loginhistory',
+            name='country',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='loginhistory',
+            name='country_code',
+            field=models.CharField(blank=True, max_length=2),
+        ),
+        migrations.AddIndex(
+            model_name='loginhistory',
+            index=models.Index(fields=['country_code', '-login_time'], name='accounts_lo_country_e0f1c6_idx'),
+        ),
+    ]
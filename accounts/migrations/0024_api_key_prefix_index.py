@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_login_geo_fields'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='apikey',
+            name='key_prefix',
+            field=models.CharField(db_index=True, max_length=8),
+        ),
+    ]
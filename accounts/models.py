@@ -9,7 +9,7 @@ import string
 from .security_models import (
     SecuritySettings, UserTOTPDevice, TwoFactorBackupCode,
     UserSession, PasswordHistory, APIKey, IPWhitelist, IPBlacklist,
-    FailedLoginAttempt, AuditLog
+    FailedLoginAttempt, AuditLog, AuditEventDailyRollup, UserLoginDailyRollup
 )
 
 # Import user settings models
@@ -201,6 +201,11 @@ class LoginHistory(models.Model):
     user_agent = models.TextField(blank=True, null=True)
     success = models.BooleanField(default=True)
 
+    # Resolved from ip_address on save (accounts.geoip)
+    country_code = models.CharField(max_length=2, blank=True)
+    country = models.CharField(max_length=100, blank=True)
+    city = models.CharField(max_length=100, blank=True)
+
     class Meta:
         verbose_name = 'Login History'
         verbose_name_plural = 'Login Histories'
@@ -208,7 +213,15 @@ class LoginHistory(models.Model):
         indexes = [
             models.Index(fields=['-login_time']),
             models.Index(fields=['user', '-login_time']),
+            models.Index(fields=['country_code', '-login_time']),
         ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.login_time.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"{self.user.username} - {self.login_time.strftime('%Y-%m-%d %H:%M')}"
+
+    def save(self, *args, **kwargs):
+        if self.ip_address and not self.country_code and not self.city:
+            from .geoip import geo_fields
+            for field, value in geo_fields(self.ip_address).items():
+                setattr(self, field, value)
+        super().save(*args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,249 @@
+# accounts/presence.py
+# Online presence registry
+
+"""
+Online presence registry.
+
+Keeps an expiring set of online users in the cache so "who is online"
+never has to decode session data:
+
+    presence:user:<id>    {user_id, name, email, role, device_type, since, last_seen}
+                          expires PRESENCE_TTL seconds after the last heartbeat
+    presence:index        set of user ids that may be online
+    presence:ws:<id>      number of open websocket connections of the user
+
+Fed by:
+    - UpdateLastActivityMiddleware   heartbeat on authenticated requests (throttled)
+    - UserStatusConsumer /
+      MultiplexConsumer              websocket connect / disconnect, and a
+                                     heartbeat every REFRESH_INTERVAL while
+                                     the socket is open (PresenceConsumerMixin)
+    - logout_view                    explicit offline
+
+Reads cost one cache get for the index plus one get_many over its members,
+i.e. O(online users). The index is only changed under a short cache lock
+(users coming online, logout, pruning expired users), so concurrent
+heartbeats and reads do not overwrite each other's changes.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.utils import timezone
+
+
+class PresenceRegistry:
+    """
+    Cache-backed registry of online users.
+    """
+
+    KEY_PREFIX = 'presence'
+    # A user is considered offline this long after their last heartbeat
+    PRESENCE_TTL = 300
+    # Open websockets heartbeat this often
+    REFRESH_INTERVAL = 100
+    # Presence kept after the last socket closes (page reloads, further
+    # browsing): longer than the throttled HTTP heartbeat
+    # (UpdateLastActivityMiddleware.UPDATE_INTERVAL, 60 s)
+    DISCONNECT_GRACE = 90
+    LOCK_TIMEOUT = 5
+    LOCK_WAIT = 1
+    # Daily peak counters are kept a little longer than a day
+    PEAK_TTL = 60 * 60 * 26
+
+    @classmethod
+    def _user_key(cls, user_id):
+        return f'{cls.KEY_PREFIX}:user:{user_id}'
+
+    @classmethod
+    def _index_key(cls):
+        return f'{cls.KEY_PREFIX}:index'
+
+    @classmethod
+    def _connections_key(cls, user_id):
+        return f'{cls.KEY_PREFIX}:ws:{user_id}'
+
+    @classmethod
+    def _peak_key(cls, date=None):
+        return f'{cls.KEY_PREFIX}:peak:{(date or timezone.localdate()).isoformat()}'
+
+    @classmethod
+    @contextmanager
+    def _index_locked(cls):
+        """Serialize read-modify-write of the index."""
+        lock_key = f'{cls.KEY_PREFIX}:index_lock'
+        deadline = time.monotonic() + cls.LOCK_WAIT
+        acquired = cache.add(lock_key, 1, cls.LOCK_TIMEOUT)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(0.005)
+            acquired = cache.add(lock_key, 1, cls.LOCK_TIMEOUT)
+        try:
+            yield
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+
+    # =========================================================================
+    # WRITES
+    # =========================================================================
+
+    @classmethod
+    def heartbeat(cls, user, user_agent=None):
+        """
+        Mark a user as online (or extend their presence).
+
+        Args:
+            user: authenticated User
+            user_agent: optional User-Agent header, used for the device breakdown
+        """
+        from .analytics_services import classify_user_agent
+
+        now = timezone.now().isoformat()
+        user_key = cls._user_key(user.pk)
+        entry = cache.get(user_key)
+
+        if entry is None:
+            entry = {
+                'user_id': user.pk,
+                'name': user.get_full_name() or user.username,
+                'email': user.email,
+                'role': user.role,
+                'device_type': '',
+                'since': now,
+            }
+        entry['last_seen'] = now
+        if user_agent:
+            entry['device_type'] = classify_user_agent(user_agent)[0]
+
+        cache.set(user_key, entry, cls.PRESENCE_TTL)
+
+        if user.pk not in (cache.get(cls._index_key()) or set()):
+            with cls._index_locked():
+                index = cls._prune(cache.get(cls._index_key()) or set())
+                index.add(user.pk)
+                cache.set(cls._index_key(), index, None)
+            cls._record_peak(len(index))
+
+    @classmethod
+    def mark_offline(cls, user_id):
+        """Remove a user from the registry (logout)."""
+        cache.delete_many([cls._user_key(user_id), cls._connections_key(user_id)])
+
+        if user_id in (cache.get(cls._index_key()) or set()):
+            with cls._index_locked():
+                index = cache.get(cls._index_key()) or set()
+                index.discard(user_id)
+                cache.set(cls._index_key(), index, None)
+
+    @classmethod
+    def connect(cls, user):
+        """A websocket of the user was opened."""
+        connections_key = cls._connections_key(user.pk)
+        if not cache.add(connections_key, 1, None):
+            cache.incr(connections_key)
+        cls.heartbeat(user)
+
+    @classmethod
+    def refresh(cls, user):
+        """Periodic heartbeat of an open websocket."""
+        if (cache.get(cls._connections_key(user.pk)) or 0) > 0:
+            cls.heartbeat(user)
+
+    @classmethod
+    def disconnect(cls, user):
+        """
+        A websocket of the user was closed. The user only goes offline when
+        their last socket closes and no HTTP heartbeat arrives within
+        DISCONNECT_GRACE.
+        """
+        connections_key = cls._connections_key(user.pk)
+        try:
+            remaining = cache.decr(connections_key)
+        except ValueError:
+            remaining = 0
+
+        if remaining <= 0:
+            cache.delete(connections_key)
+            entry = cache.get(cls._user_key(user.pk))
+            if entry is not None:
+                # Let the entry expire after a grace period (page reloads,
+                # the next throttled HTTP heartbeat extends it again)
+                cache.set(cls._user_key(user.pk), entry, cls.DISCONNECT_GRACE)
+
+    # =========================================================================
+    # READS
+    # =========================================================================
+
+    @classmethod
+    def _prune(cls, index):
+        """Drop ids whose presence entry has expired."""
+        alive = cache.get_many([cls._user_key(user_id) for user_id in index])
+        return {user_id for user_id in index if cls._user_key(user_id) in alive}
+
+    @classmethod
+    def _record_peak(cls, count):
+        peak_key = cls._peak_key()
+        if count > (cache.get(peak_key) or 0):
+            cache.set(peak_key, count, cls.PEAK_TTL)
+
+    @classmethod
+    def get_online(cls):
+        """
+        Returns:
+            list of presence entries of the users currently online
+        """
+        index = cache.get(cls._index_key()) or set()
+        if not index:
+            return []
+
+        entries = cache.get_many([cls._user_key(user_id) for user_id in index])
+        if len(entries) < len(index):
+            # Some users expired: shrink the index (re-read under the lock,
+            # keeping users that came online meanwhile)
+            with cls._index_locked():
+                cache.set(cls._index_key(), cls._prune(cache.get(cls._index_key()) or set()), None)
+
+        return list(entries.values())
+
+    @classmethod
+    def is_online(cls, user_id):
+        return cache.get(cls._user_key(user_id)) is not None
+
+    @classmethod
+    def count_by_role(cls, entries=None):
+        by_role = {}
+        for entry in cls.get_online() if entries is None else entries:
+            by_role[entry['role']] = by_role.get(entry['role'], 0) + 1
+        return by_role
+
+    @classmethod
+    def get_peak_today(cls):
+        return cache.get(cls._peak_key()) or 0
+
+
+class PresenceConsumerMixin:
+    """
+    Websocket consumer mixin keeping the user's presence alive while the
+    socket is open. Call start_presence() after accepting and
+    stop_presence() on disconnect.
+    """
+
+    presence_task = None
+
+    async def start_presence(self, user):
+        await sync_to_async(PresenceRegistry.connect)(user)
+        self.presence_task = asyncio.ensure_future(self._keep_presence(user))
+
+    async def stop_presence(self, user):
+        if self.presence_task:
+            self.presence_task.cancel()
+            self.presence_task = None
+        await sync_to_async(PresenceRegistry.disconnect)(user)
+
+    async def _keep_presence(self, user):
+        while True:
+            await asyncio.sleep(PresenceRegistry.REFRESH_INTERVAL)
+            await sync_to_async(PresenceRegistry.refresh)(user)
@@ -9,6 +9,7 @@ from django.contrib.auth.hashers import make_password, check_password
 import secrets
 import string
 import hashlib
+import hmac
 import uuid
 
 
@@ -296,7 +297,7 @@ class APIKey(models.Model):
         related_name='acc_api_keys'
     )
     name = models.CharField(max_length=100)
-    key_prefix = models.CharField(max_length=8)  # First 8 chars for identification
+    key_prefix = models.CharField(max_length=8, db_index=True)  # First 8 chars for identification
     key_hash = models.CharField(max_length=128)  # SHA256 hash of the full key
     
     # Permissions/Scopes
@@ -359,7 +360,7 @@ class APIKey(models.Model):
     
     def verify_key(self, key):
         """Verify if a key matches this API key"""
-        return self.key_hash == hashlib.sha256(key.encode()).hexdigest()
+        return hmac.compare_digest(self.key_hash, hashlib.sha256(key.encode()).hexdigest())
     
     def record_usage(self, ip_address=None):
         """Record API key usage"""
@@ -566,6 +567,10 @@ class AuditLog(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
+    # Resolved from ip_address on save (accounts.geoip)
+    country_code = models.CharField(max_length=2, blank=True)
+    country = models.CharField(max_length=100, blank=True)
+    city = models.CharField(max_length=100, blank=True)
     
     # What
     description = models.TextField(blank=True)
@@ -586,6 +591,13 @@ class AuditLog(models.Model):
     def __str__(self):
         return f"{self.get_event_type_display()} - {self.timestamp}"
     
+    def save(self, *args, **kwargs):
+        if self.ip_address and not self.country_code and not self.city:
+            from .geoip import geo_fields
+            for field, value in geo_fields(self.ip_address).items():
+                setattr(self, field, value)
+        super().save(*args, **kwargs)
+    
     @classmethod
     def log(cls, event_type, user=None, target_user=None, ip_address=None, 
             user_agent='', description='', details=None, severity='info'):
@@ -633,3 +645,65 @@ class AuditLog(models.Model):
             description=description,
             details=details or {}
         )
+
+
+class AuditEventDailyRollup(models.Model):
+    """
+    Pre-aggregated audit event counts per day.
+
+    One row per (date, event type, user role, device, browser, OS). Filled
+    incrementally when AuditLog rows are written (see accounts/signals.py)
+    and rebuilt by `python manage.py rebuild_login_analytics`, so dashboard
+    analytics read a few hundred rows instead of scanning the audit log.
+    """
+    date = models.DateField()
+    event_type = models.CharField(max_length=50)
+    role = models.CharField(max_length=20, blank=True, default='')
+    device_type = models.CharField(max_length=20, blank=True, default='')
+    browser = models.CharField(max_length=30, blank=True, default='')
+    os = models.CharField(max_length=30, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Audit Event Daily Rollup'
+        verbose_name_plural = 'Audit Event Daily Rollups'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'event_type', 'role', 'device_type', 'browser', 'os'],
+                name='unique_audit_event_daily_bucket'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['event_type', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.event_type}: {self.count}"
+
+
+class UserLoginDailyRollup(models.Model):
+    """
+    Per-user daily login counts, filled from LoginHistory.
+    Used for "most active users" and unique active user counts.
+    """
+    date = models.DateField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='login_rollups'
+    )
+    login_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_login_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'User Login Daily Rollup'
+        verbose_name_plural = 'User Login Daily Rollups'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'user'], name='unique_user_login_daily_bucket'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.user_id}: {self.login_count}"
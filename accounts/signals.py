@@ -0,0 +1,52 @@
+# accounts/signals.py
+"""
+Model signal handlers for the accounts app.
+
+Keeps the login / audit analytics rollups (see analytics_services.py) up to
+date as audit entries are written, and drops cached API key resolutions
+when keys change.
+"""
+
+import logging
+
+from django.db.models.signals import post_save, post_delete
+
+from .models import LoginHistory
+from .security_models import AuditLog, APIKey
+from .analytics_services import LoginAnalyticsService
+from .authentication import APIKeyAuthentication
+
+logger = logging.getLogger(__name__)
+
+
+def rollup_audit_event(sender, instance, created, **kwargs):
+    if not created:
+        return
+    try:
+        LoginAnalyticsService.record_audit_event(instance)
+    except Exception as e:
+        # Analytics must never break the action being audited;
+        # rebuild_login_analytics repairs missed buckets.
+        logger.warning(f"Failed to update audit rollup for AuditLog {instance.pk}: {e}")
+
+
+def rollup_login(sender, instance, created, **kwargs):
+    if not created:
+        return
+    try:
+        LoginAnalyticsService.record_login(instance)
+    except Exception as e:
+        logger.warning(f"Failed to update login rollup for LoginHistory {instance.pk}: {e}")
+
+
+post_save.connect(rollup_audit_event, sender=AuditLog, dispatch_uid='audit_event_rollup')
+post_save.connect(rollup_login, sender=LoginHistory, dispatch_uid='user_login_rollup')
+
+
+def invalidate_api_key_resolution(sender, instance, **kwargs):
+    """Revoked / edited keys stop (or start) working without waiting for the cache TTL."""
+    APIKeyAuthentication.invalidate(instance.key_prefix)
+
+
+post_save.connect(invalidate_api_key_resolution, sender=APIKey, dispatch_uid='api_key_resolution_save')
+post_delete.connect(invalidate_api_key_resolution, sender=APIKey, dispatch_uid='api_key_resolution_delete')
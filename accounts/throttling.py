@@ -0,0 +1,211 @@
+# accounts/throttling.py
+# Token bucket throttling for DRF
+
+"""
+Token bucket throttling.
+
+Every (scope, client) pair has a bucket holding up to `capacity` tokens that
+refills continuously at `capacity / period`. A request takes `cost` tokens;
+when the bucket cannot cover it the request is rejected with 429 and a
+`Retry-After` header telling the client when enough tokens are back.
+
+Clients are identified by API key (each key has its own bucket), then by
+user, then by IP address for anonymous requests. Bucket state lives in the
+shared cache, so limits hold across workers and processes.
+
+Taking tokens (read, refill, write back) runs under a short per-bucket lock
+(cache.add), so parallel requests of one client cannot all spend the same
+tokens. If the lock is not free within LOCK_WAIT (holder stuck or crashed)
+the take goes ahead without it and can overspend by the requests racing in
+that moment. With LocMemCache (development) buckets and locks are per
+process, so each worker enforces the limit on its own.
+
+Rates are configured per scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+using the DRF format ('<capacity>/<period>', period one of s/m/h/d).
+
+Views opt in with a scope and may weight requests:
+
+    class ClientReportDataAPIView(generics.ListAPIView):
+        throttle_scope = 'report_data'
+
+        def get_throttle_cost(self, request):
+            return page_size // 100
+
+Costs only known after the work is done (e.g. exported rows) are charged
+with `charge(request, view, cost)`; the bucket may go into debt, which
+delays the client's next requests.
+
+Function views / service code can use a bucket directly:
+
+    bucket = TokenBucket.for_scope('company_research')
+    allowed, wait = bucket.consume(client_identity(request))
+"""
+
+import math
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'120/min' -> (120, 60)"""
+    if not rate:
+        return None, None
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+def client_identity(request):
+    """Bucket identity: API key, then user, then IP address."""
+    key_id = getattr(request.auth, 'key_id', None)
+    if key_id:
+        return f'key:{key_id}'
+    if request.user and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        return f"ip:{x_forwarded_for.split(',')[0].strip()}"
+    return f"ip:{request.META.get('REMOTE_ADDR')}"
+
+
+class TokenBucket:
+    """
+    Token bucket stored in the cache as (tokens, updated_at).
+    """
+
+    KEY_PREFIX = 'throttle'
+
+    LOCK_TIMEOUT = 2      # seconds a crashed lock holder can block a bucket
+    LOCK_WAIT = 0.5       # seconds to wait for the lock before going ahead without it
+    LOCK_POLL = 0.005
+
+    def __init__(self, scope, capacity, period):
+        self.scope = scope
+        self.capacity = capacity
+        self.period = period
+        self.refill_rate = capacity / period  # tokens per second
+
+    @classmethod
+    def for_scope(cls, scope):
+        """Bucket configured in DEFAULT_THROTTLE_RATES (None when unlimited)."""
+        capacity, period = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+        if capacity is None:
+            return None
+        return cls(scope, capacity, period)
+
+    def _key(self, identity):
+        return f'{self.KEY_PREFIX}:{self.scope}:{identity}'
+
+    def _load(self, identity, now):
+        state = cache.get(self._key(identity))
+        if state is None:
+            return float(self.capacity)
+        tokens, updated_at = state
+        return min(self.capacity, tokens + (now - updated_at) * self.refill_rate)
+
+    def _store(self, identity, tokens, now):
+        # Expire once the bucket would be full again - a missing bucket is full
+        timeout = math.ceil((self.capacity - tokens) / self.refill_rate) + 1
+        cache.set(self._key(identity), (tokens, now), timeout)
+
+    @contextmanager
+    def _locked(self, identity):
+        """Serialize load + store of one bucket (see module docstring)."""
+        lock_key = f'{self._key(identity)}:lock'
+        deadline = time.monotonic() + self.LOCK_WAIT
+        acquired = cache.add(lock_key, 1, self.LOCK_TIMEOUT)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(self.LOCK_POLL)
+            acquired = cache.add(lock_key, 1, self.LOCK_TIMEOUT)
+        try:
+            yield
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+
+    def tokens(self, identity):
+        """Tokens currently available."""
+        return self._load(identity, time.time())
+
+    def wait_time(self, tokens, cost=1):
+        """Seconds until a bucket holding `tokens` can cover `cost`."""
+        return max(0, (min(cost, self.capacity) - tokens) / self.refill_rate)
+
+    def consume(self, identity, cost=1):
+        """
+        Take `cost` tokens if available.
+
+        Returns:
+            (allowed, wait) - wait is the seconds until `cost` tokens are
+            available (0 when allowed)
+        """
+        with self._locked(identity):
+            now = time.time()
+            tokens = self._load(identity, now)
+            # A request larger than the bucket can never fit; let it through on
+            # a full bucket and keep the remainder as debt
+            needed = min(cost, self.capacity)
+
+            if tokens < needed:
+                return False, self.wait_time(tokens, cost)
+
+            self._store(identity, max(tokens - cost, -self.capacity), now)
+            return True, 0
+
+    def charge(self, identity, cost):
+        """Take `cost` tokens unconditionally (the bucket may go into debt)."""
+        if cost <= 0:
+            return
+        with self._locked(identity):
+            now = time.time()
+            tokens = self._load(identity, now)
+            self._store(identity, max(tokens - cost, -self.capacity), now)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle views that declare a `throttle_scope`.
+
+    Views without a scope (or with a scope that has no configured rate) are
+    not throttled. The request cost comes from `view.get_throttle_cost(request)`
+    when the view defines it, otherwise 1.
+    """
+
+    scope_attr = 'throttle_scope'
+
+    def __init__(self):
+        self.wait_time = None
+
+    def get_bucket(self, view):
+        scope = getattr(view, self.scope_attr, None)
+        return TokenBucket.for_scope(scope) if scope else None
+
+    def get_cost(self, request, view):
+        get_cost = getattr(view, 'get_throttle_cost', None)
+        return max(1, int(get_cost(request))) if get_cost else 1
+
+    def allow_request(self, request, view):
+        bucket = self.get_bucket(view)
+        if bucket is None:
+            return True
+
+        allowed, self.wait_time = bucket.consume(
+            client_identity(request), self.get_cost(request, view)
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+def charge(request, view, cost):
+    """Charge extra tokens to the view's bucket after the request was served."""
+    bucket = TokenBucketThrottle().get_bucket(view)
+    if bucket is not None:
+        bucket.charge(client_identity(request), cost)
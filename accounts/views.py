@@ -1283,6 +1283,10 @@ def logout_view(request):
         user.is_online = False
         user.save(update_fields=['is_online'])
 
+        # REMOVE FROM PRESENCE REGISTRY
+        from .presence import PresenceRegistry
+        PresenceRegistry.mark_offline(user.id)
+
         # BROADCAST STATUS
         broadcast_user_status(user.id, user.username, False)
 
@@ -2524,39 +2528,20 @@ def user_activity_stats(request):
             user['full_name'] = user['username']
             user['initials'] = user['username'][0].upper() if user['username'] else '?'
 
-    # Get login trends (last 30 days)
-    login_history_30d = LoginHistory.objects.filter(
-        login_time__gte=thirty_days_ago,
-        success=True
-    ).extra(select={'date': 'DATE(login_time)'}).values('date').annotate(
-        count=Count('id')
-    ).order_by('date')
-
-    # Get login trends (last 7 days)
-    login_history_7d = LoginHistory.objects.filter(
-        login_time__gte=seven_days_ago,
-        success=True
-    ).extra(select={'date': 'DATE(login_time)'}).values('date').annotate(
-        count=Count('id')
-    ).order_by('date')
+    # Login trends and totals come from the daily login rollups
+    from .analytics_services import LoginAnalyticsService
+
+    login_history_30d = LoginAnalyticsService.daily_logins(timezone.localdate(thirty_days_ago))
+    login_history_7d = [item for item in login_history_30d if item['date'] >= timezone.localdate(seven_days_ago)]
 
     # Get total stats
     total_users = User.objects.filter(is_active=True).count()
-    total_logins_30d = LoginHistory.objects.filter(
-        login_time__gte=thirty_days_ago,
-        success=True
-    ).count()
-
-    total_logins_7d = LoginHistory.objects.filter(
-        login_time__gte=seven_days_ago,
-        success=True
-    ).count()
+    summary_30d = LoginAnalyticsService.login_summary(timezone.localdate(thirty_days_ago))
+    total_logins_30d = summary_30d['total_logins'] or 0
+    total_logins_7d = sum(item['count'] for item in login_history_7d)
 
     # Get unique active users in last 30 days
-    active_users_30d = LoginHistory.objects.filter(
-        login_time__gte=thirty_days_ago,
-        success=True
-    ).values('user').distinct().count()
+    active_users_30d = summary_30d['active_users']
 
     return Response({
         'most_active_users': list(most_active_users),
@@ -2819,53 +2804,6 @@ Best regards,
         })
 
 
-def get_location_from_ip(ip_address):
-    """
-    Get location information from IP address using free API.
-    Returns dict with city, region, country, or 'Unknown' values on failure.
-    """
-    import requests
-    
-    # Skip for localhost/private IPs
-    if ip_address in ['127.0.0.1', 'localhost', '::1'] or ip_address.startswith('192.168.') or ip_address.startswith('10.'):
-        return {
-            'city': 'Local Network',
-            'region': '',
-            'country': '',
-            'display': 'Local Network'
-        }
-    
-    try:
-        # Using ip-api.com (free, no API key needed, 45 requests/minute)
-        response = requests.get(f'http://ip-api.com/json/{ip_address}', timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('status') == 'success':
-                city = data.get('city', 'Unknown')
-                region = data.get('regionName', '')
-                country = data.get('country', 'Unknown')
-                
-                # Build display string
-                parts = [p for p in [city, region, country] if p]
-                display = ', '.join(parts) if parts else 'Unknown Location'
-                
-                return {
-                    'city': city,
-                    'region': region,
-                    'country': country,
-                    'display': display
-                }
-    except Exception as e:
-        print(f"Failed to get location from IP: {e}")
-    
-    return {
-        'city': 'Unknown',
-        'region': '',
-        'country': '',
-        'display': 'Unknown Location'
-    }
-
-
 def parse_user_agent(user_agent):
     """
     Parse user agent string to extract browser and OS information.
@@ -4,7 +4,7 @@ from .models import ChatRoom, ChatMessage, TypingStatus
 
 @admin.register(ChatRoom)
 class ChatRoomAdmin(admin.ModelAdmin):
-    list_display = ['room_id', 'client', 'assigned_staff', 'room_type', 'is_active', 'created_at']
+    list_display = ['room_id', 'client', 'assigned_staff', 'room_type', 'is_active', 'last_activity_at', 'created_at']
     list_filter = ['room_type', 'is_active', 'created_at']
     search_fields = ['client__username', 'client__email', 'subject']
     raw_id_fields = ['client', 'assigned_staff']
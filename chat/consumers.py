@@ -3,6 +3,7 @@
 import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 
 
@@ -30,30 +31,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
         print(f"✅ {self.user.username} connected to room {self.room_id}")
 
         # Broadcast that this user is online
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'user_status',
-                'user_id': self.user.id,
-                'username': self.user.username,
-                'is_online': True
-            }
-        )
+        await self.broadcast_room_presence(self.room_id, True)
 
     async def disconnect(self, close_code):
         if hasattr(self, 'room_group_name'):
             await self.update_typing_status(False)
 
             # Broadcast that this user is offline
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'user_status',
-                    'user_id': self.user.id,
-                    'username': self.user.username,
-                    'is_online': False
-                }
-            )
+            await self.broadcast_room_presence(self.room_id, False)
 
             await self.channel_layer.group_discard(
                 self.room_group_name,
@@ -64,59 +49,81 @@ class ChatConsumer(AsyncWebsocketConsumer):
     async def receive(self, text_data):
         try:
             data = json.loads(text_data)
-            message_type = data.get('type')
-
-            if message_type == 'chat_message':
-                message = await self.create_message(data)
-                if message:
-                    message_data = self.serialize_message(message)
+            await self.handle_room_frame(self.room_id, data)
+        except Exception as e:
+            print(f"❌ Error in receive: {e}")
+            import traceback
+            traceback.print_exc()
 
-                    # Broadcast to room
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
-                        {
-                            'type': 'chat_message',
-                            'message': message_data
-                        }
-                    )
+    async def broadcast_room_presence(self, room_id, is_online):
+        await self.channel_layer.group_send(
+            f'chat_{room_id}',
+            {
+                'type': 'user_status',
+                'room_id': str(room_id),
+                'user_id': self.user.id,
+                'username': self.user.username,
+                'is_online': is_online
+            }
+        )
 
-                    # Send notification
-                    await self.send_chat_notification(message_data)
-                    print(f"✅ Message sent and notification created")
+    async def handle_room_frame(self, room_id, data):
+        """
+        Handle a client frame for a room (shared with the multiplexed
+        consumer, which serves several rooms over one connection).
+        """
+        room_group_name = f'chat_{room_id}'
+        message_type = data.get('type')
 
-            elif message_type == 'typing':
-                is_typing = data.get('is_typing', False)
-                await self.update_typing_status(is_typing)
+        if message_type == 'chat_message':
+            message = await self.create_message(data, room_id)
+            if message:
+                message_data = self.serialize_message(message)
 
+                # Broadcast to room
                 await self.channel_layer.group_send(
-                    self.room_group_name,
+                    room_group_name,
                     {
-                        'type': 'typing_indicator',
-                        'user_id': self.user.id,
-                        'username': self.user.username,
-                        'is_typing': is_typing
+                        'type': 'chat_message',
+                        'room_id': str(room_id),
+                        'message': message_data
                     }
                 )
 
-            elif message_type == 'mark_read':
-                message_id = data.get('message_id')
-                if message_id:
-                    await self.mark_message_read(message_id)
+                # Send notification
+                await self.send_chat_notification(message_data, room_id)
+                print(f"✅ Message sent and notification created")
 
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
-                        {
-                            'type': 'message_read',
-                            'message_id': str(message_id),
-                            'user_id': self.user.id
-                        }
-                    )
-                    print(f"✅ Message {message_id} marked as read")
+        elif message_type == 'typing':
+            is_typing = data.get('is_typing', False)
+            await self.update_typing_status(is_typing, room_id)
 
-        except Exception as e:
-            print(f"❌ Error in receive: {e}")
-            import traceback
-            traceback.print_exc()
+            await self.channel_layer.group_send(
+                room_group_name,
+                {
+                    'type': 'typing_indicator',
+                    'room_id': str(room_id),
+                    'user_id': self.user.id,
+                    'username': self.user.username,
+                    'is_typing': is_typing
+                }
+            )
+
+        elif message_type == 'mark_read':
+            message_id = data.get('message_id')
+            if message_id:
+                await self.mark_message_read(message_id)
+
+                await self.channel_layer.group_send(
+                    room_group_name,
+                    {
+                        'type': 'message_read',
+                        'room_id': str(room_id),
+                        'message_id': str(message_id),
+                        'user_id': self.user.id
+                    }
+                )
+                print(f"✅ Message {message_id} marked as read")
 
     def serialize_message(self, message_data):
         """Convert UUID fields to strings"""
@@ -174,25 +181,25 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     # Database operations
     @database_sync_to_async
-    def check_room_access(self):
+    def check_room_access(self, room_id=None):
         from .models import ChatRoom
         try:
-            room = ChatRoom.objects.get(room_id=self.room_id)
+            room = ChatRoom.objects.get(room_id=room_id or self.room_id)
             if room.client == self.user:
                 return True
             if self.user.role in ['SUPERADMIN', 'STAFF_ADMIN']:
                 return True
             return False
-        except ChatRoom.DoesNotExist:
+        except (ChatRoom.DoesNotExist, ValidationError):
             return False
 
     @database_sync_to_async
-    def create_message(self, data):
+    def create_message(self, data, room_id=None):
         from .models import ChatRoom, ChatMessage
         from .serializers import ChatMessageSerializer
 
         try:
-            room = ChatRoom.objects.get(room_id=self.room_id)
+            room = ChatRoom.objects.get(room_id=room_id or self.room_id)
 
             # --- *** THIS IS THE FIX *** ---
             # If the room is inactive, a new message reactivates it
@@ -208,8 +215,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 message_type=data.get('message_type', 'TEXT'),
                 content=data.get('content', '')
             )
-            # This save updates the 'updated_at' timestamp, bumping it to the top
-            room.save()
+            # ChatMessage.save() updates the room's last message / activity,
+            # bumping it to the top
 
             serializer = ChatMessageSerializer(message)
             return serializer.data
@@ -218,7 +225,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return None
 
     @database_sync_to_async
-    def send_chat_notification(self, message_data):
+    def send_chat_notification(self, message_data, room_id=None):
         """
         Send notification using your existing notifications app
         Compatible with your notification types: 'message'
@@ -245,7 +252,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 print(f"🚫 In-app chat notification blocked by type settings")
                 return False
 
-            room = ChatRoom.objects.get(room_id=self.room_id)
+            room = ChatRoom.objects.get(room_id=room_id or self.room_id)
 
             # Determine recipients
             if self.user == room.client:
@@ -316,10 +323,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return False
 
     @database_sync_to_async
-    def update_typing_status(self, is_typing):
+    def update_typing_status(self, is_typing, room_id=None):
         from .models import ChatRoom, TypingStatus
         try:
-            room = ChatRoom.objects.get(room_id=self.room_id)
+            room = ChatRoom.objects.get(room_id=room_id or self.room_id)
             typing_status, created = TypingStatus.objects.get_or_create(
                 room=room,
                 user=self.user
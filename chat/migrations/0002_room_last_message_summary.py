@@ -0,0 +1,77 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:15
+# + backfill of the denormalized last message fields
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_room_summaries(apps, schema_editor):
+    """Copy each room's latest message into the new summary fields"""
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    ChatMessage = apps.get_model('chat', 'ChatMessage')
+
+    for room in ChatRoom.objects.all().iterator():
+        message = (
+            ChatMessage.objects.filter(room=room)
+            .select_related('sender')
+            .order_by('-created_at')
+            .first()
+        )
+        if message:
+            room.last_message_id = message.message_id
+            room.last_message_preview = message.content[:100]
+            room.last_message_sender_name = message.sender.username
+            room.last_message_at = message.created_at
+            room.last_activity_at = message.created_at
+        else:
+            room.last_activity_at = room.updated_at
+        room.save(update_fields=[
+            'last_message_id', 'last_message_preview', 'last_message_sender_name',
+            'last_message_at', 'last_activity_at',
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='chatroom',
+            options={'ordering': ['-last_activity_at']},
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_activity_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_id',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_sender_name',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['room', 'created_at'], name='chat_chatme_room_id_466ea2_idx'),
+        ),
+        migrations.RunPython(backfill_room_summaries, migrations.RunPython.noop),
+    ]
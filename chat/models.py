@@ -32,8 +32,16 @@ class ChatRoom(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized summary of the latest message (maintained by ChatMessage.save)
+    # so room lists never have to load messages
+    last_message_id = models.UUIDField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=100, blank=True)
+    last_message_sender_name = models.CharField(max_length=150, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_activity_at = models.DateTimeField(default=timezone.now, db_index=True)
+
     class Meta:
-        ordering = ['-updated_at']
+        ordering = ['-last_activity_at']
 
     def __str__(self):
         return f"{self.room_type} - {self.client.username}"
@@ -41,6 +49,22 @@ class ChatRoom(models.Model):
     def get_last_message(self):
         return self.messages.order_by('-created_at').first()
 
+    def record_message(self, message):
+        """Store a new message as the room's latest message"""
+        self.last_message_id = message.message_id
+        self.last_message_preview = message.content[:100]
+        self.last_message_sender_name = message.sender.username
+        self.last_message_at = message.created_at
+        self.last_activity_at = message.created_at
+        ChatRoom.objects.filter(room_id=self.room_id).update(
+            last_message_id=self.last_message_id,
+            last_message_preview=self.last_message_preview,
+            last_message_sender_name=self.last_message_sender_name,
+            last_message_at=self.last_message_at,
+            last_activity_at=self.last_activity_at,
+            updated_at=timezone.now(),
+        )
+
 
 class ChatMessage(models.Model):
     """Individual chat message"""
@@ -77,10 +101,19 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['room', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.sender.username}: {self.content[:50]}"
 
+    def save(self, *args, **kwargs):
+        is_new = self._state.adding
+        super().save(*args, **kwargs)
+        if is_new:
+            self.room.record_message(self)
+
     def mark_as_read(self):
         if not self.is_read:
             self.is_read = True
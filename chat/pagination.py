@@ -0,0 +1,79 @@
+# chat/pagination.py
+
+"""
+Cursor pagination for chat message history
+"""
+
+from django.db.models import Q
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class MessageCursorPagination(BasePagination):
+    """
+    "Before message X, limit N" pagination for chat history.
+
+    Query parameters:
+        before: message_id; only messages older than this one are returned
+        limit:  number of messages (default 50, max 200)
+
+    Each page holds the most recent messages before the cursor, in
+    chronological order:
+        {
+            "results": [...],
+            "has_more": true,            # older messages exist
+            "next_before": "<message_id>" # cursor for the next (older) page
+        }
+    """
+    default_limit = 50
+    max_limit = 200
+    before_query_param = 'before'
+    limit_query_param = 'limit'
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, self.default_limit))
+        except (TypeError, ValueError):
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        limit = self.get_limit(request)
+
+        before = request.query_params.get(self.before_query_param)
+        if before:
+            try:
+                cursor = queryset.filter(message_id=before).values('created_at', 'message_id').first()
+            except Exception:
+                cursor = None
+            if cursor is None:
+                self.has_more, self.next_before = False, None
+                return []
+            queryset = queryset.filter(
+                Q(created_at__lt=cursor['created_at']) |
+                Q(created_at=cursor['created_at'], message_id__lt=cursor['message_id'])
+            )
+
+        page = list(queryset.order_by('-created_at', '-message_id')[:limit + 1])
+        self.has_more = len(page) > limit
+        page = page[:limit]
+        page.reverse()
+        self.next_before = str(page[0].message_id) if page and self.has_more else None
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'has_more': self.has_more,
+            'next_before': self.next_before,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'results': schema,
+                'has_more': {'type': 'boolean'},
+                'next_before': {'type': 'string', 'nullable': True},
+            },
+        }
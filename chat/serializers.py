@@ -86,21 +86,23 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         fields = [
             'room_id', 'room_type', 'client', 'assigned_staff',
             'subject', 'is_active', 'created_at', 'updated_at',
-            'last_message', 'unread_count'
+            'last_activity_at', 'last_message', 'unread_count'
         ]
-        read_only_fields = ['room_id', 'created_at', 'updated_at']
+        read_only_fields = ['room_id', 'created_at', 'updated_at', 'last_activity_at']
 
     def get_last_message(self, obj):
-        last_msg = obj.get_last_message()
-        if last_msg:
+        if obj.last_message_at:
             return {
-                'content': last_msg.content[:100],
-                'sender': last_msg.sender.username,
-                'created_at': last_msg.created_at,
+                'content': obj.last_message_preview,
+                'sender': obj.last_message_sender_name,
+                'created_at': obj.last_message_at,
             }
         return None
 
     def get_unread_count(self, obj):
+        # Annotated by ChatRoomViewSet.get_queryset
+        if hasattr(obj, 'unread_messages'):
+            return obj.unread_messages
         request = self.context.get('request')
         if request and request.user:
             return obj.messages.filter(is_read=False).exclude(sender=request.user).count()
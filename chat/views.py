@@ -7,6 +7,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.db.models import Q, Count
 from .models import ChatRoom, ChatMessage, TypingStatus
+from .pagination import MessageCursorPagination
 from .serializers import (
     ChatRoomSerializer,
     ChatMessageSerializer,
@@ -37,7 +38,14 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
 
-        return queryset.select_related('client', 'assigned_staff').prefetch_related('messages')
+        # Last message fields are denormalized on the room; unread counts are
+        # a single aggregate, so no messages are loaded
+        return queryset.select_related('client', 'assigned_staff').annotate(
+            unread_messages=Count(
+                'messages',
+                filter=Q(messages__is_read=False) & ~Q(messages__sender=user)
+            )
+        )
 
     def create(self, request, *args, **kwargs):
         """Create a new chat room"""
@@ -162,9 +170,15 @@ class ChatRoomViewSet(viewsets.ModelViewSet):
 
 
 class ChatMessageViewSet(viewsets.ModelViewSet):
-    """ViewSet for chat messages"""
+    """
+    ViewSet for chat messages
+
+    History is cursor paginated: ?room_id=<room>&before=<message_id>&limit=<n>
+    returns the n messages preceding the given one (see MessageCursorPagination).
+    """
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    pagination_class = MessageCursorPagination
 
     def get_serializer_class(self):
         if self.action == 'create':
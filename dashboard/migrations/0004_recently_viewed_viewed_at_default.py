@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_notificationtypeconfig_notificationsettings'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recentlyviewedcompany',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -164,7 +164,8 @@ class RecentlyViewedCompany(models.Model):
     )
     
     # Timestamps
-    viewed_at = models.DateTimeField(auto_now=True)
+    # Set by the writer: buffered views are flushed later (see ActivityTracker)
+    viewed_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         verbose_name = "Recently Viewed Company"
@@ -12,6 +12,7 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 
 from accounts.decorators import staff_required
+from accounts.activity_tracker import ActivityTracker
 from .models import UserActivity, RecentlyViewedCompany, ActivityType, ThemeSettings, NotificationSettings, NotificationTypeConfig
 from .serializers import (
     UserActivitySerializer,
@@ -206,6 +207,9 @@ def recent_activities(request):
     """
     limit = int(request.query_params.get('limit', 10))
     
+    # Company views are logged through ActivityTracker; write pending ones first
+    ActivityTracker.flush_company_views(user_ids=[request.user.pk])
+    
     activities = UserActivity.objects.filter(
         user=request.user
     ).order_by('-created_at')[:limit]
@@ -223,6 +227,9 @@ def recently_viewed_companies(request):
     """
     limit = int(request.query_params.get('limit', 8))
     
+    # Write this user's buffered views first so the list is up to date
+    ActivityTracker.flush_company_views(user_ids=[request.user.pk])
+    
     companies = RecentlyViewedCompany.objects.filter(
         user=request.user
     ).select_related('report').order_by('-viewed_at')[:limit]
@@ -260,8 +267,9 @@ def track_company_view(request):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Add to recently viewed
-    RecentlyViewedCompany.add_view(
+    # Add to recently viewed and log the activity (at most once per hour).
+    # Buffered and written in batches by ActivityTracker.
+    ActivityTracker.record_company_view(
         user=request.user,
         report=report,
         record_id=str(record_id),
@@ -270,25 +278,6 @@ def track_company_view(request):
         category=category
     )
     
-    # Create activity log - only if not viewed in the last hour
-    recent_view = UserActivity.objects.filter(
-        user=request.user,
-        activity_type=ActivityType.COMPANY_VIEWED,
-        record_id=str(record_id),
-        created_at__gte=timezone.now() - timedelta(hours=1)
-    ).exists()
-    
-    if not recent_view:
-        UserActivity.objects.create(
-            user=request.user,
-            activity_type=ActivityType.COMPANY_VIEWED,
-            company_name=company_name,
-            report_title=report.title,
-            report_id=report.report_id,
-            record_id=str(record_id),
-            country=country
-        )
-    
     return Response({'success': True})
 
 
@@ -13,6 +13,7 @@
 import React, { useState, useEffect } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import api from '../../utils/api';
+import { subscribe } from '../../utils/streamSocket';
 import { useAuth } from '../../contexts/AuthContext';
 import DeleteConfirmationModal from '../modals/DeleteConfirmationModal';
 import { 
@@ -54,55 +55,24 @@ const NotesTab = ({
   useEffect(() => {
     if (!siteId) return;
     
-    // Connect to WebSocket for notifications
-    const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-    const wsUrl = `${wsProtocol}//${window.location.host}/ws/notifications/`;
-    
-    const ws = new WebSocket(wsUrl);
-    
-    ws.onopen = () => {
-      console.log('📡 WebSocket connected for notes');
-    };
-    
-    ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      console.log('📨 Received WebSocket message:', data);
-      
-      if (String(data.site_id) === String(siteId)) {  
-        console.log('✅ MATCH! Processing notification');
-
-        if (data.type === 'note_created') {
-          queryClient.invalidateQueries(['site-notes', siteId]);
-          info(`New note from ${data.note.created_by_name}`);
-        } else if (data.type === 'note_updated') {
-          queryClient.invalidateQueries(['site-notes', siteId]);
-          info('Note was updated');
-        } else if (data.type === 'note_deleted') {
-          queryClient.invalidateQueries(['site-notes', siteId]);
-          info('Note was deleted');
-        }
-      } else {
-        console.log('❌ NO MATCH:', {
-          received: data.site_id,
-          expected: siteId
-        });
+    // Note events arrive on the notifications stream of the tab's shared socket
+    const unsubscribe = subscribe('notifications', (data) => {
+      if (String(data.site_id) !== String(siteId)) return;
+
+      if (data.type === 'note_created') {
+        queryClient.invalidateQueries(['site-notes', siteId]);
+        info(`New note from ${data.note.created_by_name}`);
+      } else if (data.type === 'note_updated') {
+        queryClient.invalidateQueries(['site-notes', siteId]);
+        info('Note was updated');
+      } else if (data.type === 'note_deleted') {
+        queryClient.invalidateQueries(['site-notes', siteId]);
+        info('Note was deleted');
       }
-    };
-    
-    ws.onerror = (error) => {
-      console.error('❌ WebSocket error:', error);
-    };
-    
-    ws.onclose = () => {
-      console.log('📡 WebSocket disconnected');
-    };
+    });
     
     // Cleanup on unmount
-    return () => {
-      if (ws.readyState === WebSocket.OPEN) {
-        ws.close();
-      }
-    };
+    return unsubscribe;
   }, [siteId, queryClient, info]);
 
   // ============================================================================
@@ -7,6 +7,7 @@ import { useUserSettings } from '../../contexts/UserSettingsContext';
 import { useNavigate, useLocation } from 'react-router-dom';
 import axios from 'axios';
 import useChatUnreadCount from '../../hooks/useChatUnreadCount';
+import { subscribe } from '../../utils/streamSocket';
 import Breadcrumb from '../Breadcrumb';
 import ThemeToggle from '../common/ThemeToggle';
 import {
@@ -126,23 +127,12 @@ const DataCollectorLayout = ({ children, pageTitle, headerActions, pageSubtitleT
   useEffect(() => {
     fetchNotifications();
 
-    // WebSocket for real-time notifications
-    const wsScheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
-    const notifWsUrl = `${wsScheme}://${window.location.hostname}:8000/ws/notifications/`;
-    const notifWs = new WebSocket(notifWsUrl);
-
-    notifWs.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+    // Real-time notifications on the tab's shared stream socket
+    return subscribe('notifications', (data) => {
       if (data.type === 'notification') {
         fetchNotifications();
       }
-    };
-
-    return () => {
-      if (notifWs.readyState === WebSocket.OPEN) {
-        notifWs.close();
-      }
-    };
+    });
   }, []);
 
   const markAsRead = async (id) => {
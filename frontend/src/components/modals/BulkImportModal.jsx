@@ -16,6 +16,7 @@ const BulkImportModal = ({ isOpen, onClose, projectId, projectName }) => {
   const [selectedFile, setSelectedFile] = useState(null);
   const [previewData, setPreviewData] = useState(null);
   const [isDragging, setIsDragging] = useState(false);
+  const [stagingProgress, setStagingProgress] = useState(null);
 
   // Preview mutation
   const previewMutation = useMutation({
@@ -30,8 +31,24 @@ const BulkImportModal = ({ isOpen, onClose, projectId, projectName }) => {
           'Content-Type': 'multipart/form-data',
         },
       });
-      return response.data;
+
+      // The file is staged in the background: poll the session until it is done
+      let session = response.data;
+      setStagingProgress(session.progress);
+      while (session.status === 'PARSING') {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const status = await api.get(`/api/import-export/sessions/${session.session_id}/`);
+        session = status.data;
+        setStagingProgress(session.progress);
+      }
+      if (session.status === 'FAILED') {
+        const error = new Error(session.error_message);
+        error.response = { data: { error: session.error_message } };
+        throw error;
+      }
+      return session;
     },
+    onSettled: () => setStagingProgress(null),
     onSuccess: (data) => {
       setPreviewData(data);
       setStep(3);
@@ -46,6 +63,7 @@ const BulkImportModal = ({ isOpen, onClose, projectId, projectName }) => {
   const confirmMutation = useMutation({
     mutationFn: async () => {
       const response = await api.post('/api/import-export/confirm/', {
+        session_id: previewData?.session_id,
         project_id: projectId,
       });
       return response.data;
@@ -508,7 +526,9 @@ const BulkImportModal = ({ isOpen, onClose, projectId, projectName }) => {
                         disabled={!selectedFile || previewMutation.isPending}
                         className="px-6 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
                       >
-                        {previewMutation.isPending ? 'Validating...' : 'Next: Preview'}
+                        {previewMutation.isPending
+                          ? `Validating...${stagingProgress != null ? ` ${Math.round(stagingProgress)}%` : ''}`
+                          : 'Next: Preview'}
                       </button>
                     </>
                   )}
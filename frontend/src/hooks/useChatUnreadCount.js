@@ -1,5 +1,6 @@
 import { useState, useEffect, useCallback } from 'react';
 import api from '../utils/api';
+import { subscribe } from '../utils/streamSocket';
 
 export const useChatUnreadCount = () => {
   const [unreadCount, setUnreadCount] = useState(0);
@@ -43,21 +44,8 @@ export const useChatUnreadCount = () => {
     console.log('🔵 useChatUnreadCount: Initializing...');
     fetchUnreadCount();
 
-    // Connect to notification WebSocket for INSTANT updates
-    const wsScheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
-    const notifWsUrl = `${wsScheme}://${window.location.hostname}:8000/ws/notifications/`;
-
-    console.log('💬 Chat Badge: Connecting to notifications WebSocket:', notifWsUrl);
-    const notifWs = new WebSocket(notifWsUrl);
-
-    notifWs.onopen = () => {
-      console.log('✅ Chat Badge: WebSocket connected');
-    };
-
-    notifWs.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      console.log('📨 Chat Badge: WebSocket message received:', data);
-
+    // Notifications arrive on the tab's shared stream socket for INSTANT updates
+    const unsubscribe = subscribe('notifications', (data) => {
       // Update chat badge INSTANTLY when message notification arrives
       if (data.type === 'notification' &&
           data.notification &&
@@ -65,24 +53,12 @@ export const useChatUnreadCount = () => {
         console.log('💬 Chat Badge: Message notification detected! Fetching count...');
         console.log('💬 Notification details:', data.notification);
         fetchUnreadCount();
-      } else {
-        console.log('ℹ️ Chat Badge: Non-message notification, ignoring');
       }
-    };
-
-    notifWs.onerror = (error) => {
-      console.error('❌ Chat Badge: WebSocket error:', error);
-    };
-
-    notifWs.onclose = () => {
-      console.log('🔴 Chat Badge: WebSocket disconnected');
-    };
+    });
 
     return () => {
       console.log('🔵 useChatUnreadCount: Cleaning up...');
-      if (notifWs.readyState === WebSocket.OPEN) {
-        notifWs.close();
-      }
+      unsubscribe();
     };
   }, [fetchUnreadCount]);
 
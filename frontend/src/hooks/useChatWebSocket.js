@@ -2,105 +2,65 @@
 // ENHANCED VERSION WITH AUTO MARK AS READ
 
 import { useEffect, useRef, useState, useCallback } from 'react';
+import { joinRoom } from '../utils/streamSocket';
 
 export const useChatWebSocket = (roomId, onMessage, onTyping, onUserStatus, onMessageRead) => {
-  const wsRef = useRef(null);
+  // The room is joined on the tab's shared stream socket, which reconnects by itself
+  const roomRef = useRef(null);
+  const handlersRef = useRef({});
   const [isConnected, setIsConnected] = useState(false);
   const [error, setError] = useState(null);
-  const reconnectTimeoutRef = useRef(null);
-  const reconnectAttemptsRef = useRef(0);
-  const MAX_RECONNECT_ATTEMPTS = 5;
 
-  const connect = useCallback(() => {
-    if (!roomId) return;
+  handlersRef.current = { onMessage, onTyping, onUserStatus, onMessageRead };
 
-    try {
-      const wsScheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
-      const wsUrl = `${wsScheme}://${window.location.hostname}:8000/ws/chat/${roomId}/`;
+  const disconnect = useCallback(() => {
+    if (roomRef.current) {
+      roomRef.current.close();
+      roomRef.current = null;
+    }
 
-      console.log('Connecting to WebSocket:', wsUrl);
+    setIsConnected(false);
+  }, []);
 
-      const ws = new WebSocket(wsUrl);
+  const connect = useCallback(() => {
+    if (!roomId) return;
+
+    disconnect();
 
-      ws.onopen = () => {
-        console.log('WebSocket connected');
+    roomRef.current = joinRoom(roomId, {
+      onOpen: () => {
         setIsConnected(true);
         setError(null);
-        reconnectAttemptsRef.current = 0;
-      };
-
-      ws.onmessage = (event) => {
-        try {
-          const data = JSON.parse(event.data);
-
-          switch (data.type) {
-            case 'chat_message':
-              onMessage?.(data.message);
-              break;
-            case 'typing_indicator':
-              onTyping?.(data);
-              break;
-            case 'user_status':
-              onUserStatus?.(data);
-              break;
-            case 'message_read':
-              onMessageRead?.(data);
-              break;
-            default:
-              console.log('Unknown message type:', data.type);
-          }
-        } catch (err) {
-          console.error('Error parsing WebSocket message:', err);
-        }
-      };
-
-      ws.onerror = (error) => {
-        console.error('WebSocket error:', error);
-        setError('Connection error occurred');
-      };
-
-      ws.onclose = (event) => {
-        console.log('WebSocket disconnected:', event.code, event.reason);
-        setIsConnected(false);
-
-        // Attempt to reconnect
-        if (reconnectAttemptsRef.current < MAX_RECONNECT_ATTEMPTS) {
-          reconnectAttemptsRef.current += 1;
-          const delay = Math.min(1000 * Math.pow(2, reconnectAttemptsRef.current), 30000);
-
-          console.log(`Reconnecting in ${delay}ms (attempt ${reconnectAttemptsRef.current})`);
-
-          reconnectTimeoutRef.current = setTimeout(() => {
-            connect();
-          }, delay);
-        } else {
-          setError('Failed to connect after multiple attempts');
+      },
+      onClose: () => setIsConnected(false),
+      onMessage: (data) => {
+        const handlers = handlersRef.current;
+
+        switch (data.type) {
+          case 'chat_message':
+            handlers.onMessage?.(data.message);
+            break;
+          case 'typing_indicator':
+            handlers.onTyping?.(data);
+            break;
+          case 'user_status':
+            handlers.onUserStatus?.(data);
+            break;
+          case 'message_read':
+            handlers.onMessageRead?.(data);
+            break;
+          case 'error':
+            setError(data.error);
+            break;
+          default:
+            console.log('Unknown message type:', data.type);
         }
-      };
-
-      wsRef.current = ws;
-    } catch (err) {
-      console.error('Error creating WebSocket:', err);
-      setError('Failed to establish connection');
-    }
-  }, [roomId, onMessage, onTyping, onUserStatus, onMessageRead]);
-
-  const disconnect = useCallback(() => {
-    if (reconnectTimeoutRef.current) {
-      clearTimeout(reconnectTimeoutRef.current);
-    }
-
-    if (wsRef.current) {
-      wsRef.current.close();
-      wsRef.current = null;
-    }
-
-    setIsConnected(false);
-  }, []);
+      },
+    });
+  }, [roomId, disconnect]);
 
   const sendMessage = useCallback((data) => {
-    if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
-      wsRef.current.send(JSON.stringify(data));
+    if (roomRef.current && roomRef.current.send(data)) {
       return true;
     }
     console.warn('WebSocket not connected');
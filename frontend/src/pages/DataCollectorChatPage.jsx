@@ -24,6 +24,10 @@ const DataCollectorChatPage = () => {
   // State
   const [room, setRoom] = useState(null);
   const [messages, setMessages] = useState([]);
+  const [hasMoreMessages, setHasMoreMessages] = useState(false);
+  const [nextBefore, setNextBefore] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  const keepScrollRef = useRef(false); // Don't jump to the bottom when older messages are prepended
   const [newMessage, setNewMessage] = useState('');
   const [selectedFile, setSelectedFile] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -108,6 +112,10 @@ const DataCollectorChatPage = () => {
 
   // Scroll to bottom when messages change
   useEffect(() => {
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     if (messages.length > 0) {
       scrollToBottom(isInitialLoadRef.current);
       isInitialLoadRef.current = false;
@@ -139,7 +147,10 @@ const DataCollectorChatPage = () => {
   const loadMessages = async (roomId) => {
     try {
       const response = await api.get(`/api/chat/messages/?room_id=${roomId}`);
-      setMessages(response.data || []);
+      // Latest page of the history, see loadOlderMessages
+      setMessages(response.data.results || []);
+      setHasMoreMessages(response.data.has_more);
+      setNextBefore(response.data.next_before);
 
       // Mark messages as read when opening the chat
       await api.post('/api/chat/messages/mark_room_read/', {
@@ -155,6 +166,25 @@ const DataCollectorChatPage = () => {
     }
   };
 
+  // Load the previous page of history (cursor: oldest loaded message)
+  const loadOlderMessages = async (roomId) => {
+    if (!nextBefore || loadingOlder) return;
+    try {
+      setLoadingOlder(true);
+      const response = await api.get('/api/chat/messages/', {
+        params: { room_id: roomId, before: nextBefore }
+      });
+      keepScrollRef.current = true;
+      setMessages(prev => [...(response.data.results || []), ...prev]);
+      setHasMoreMessages(response.data.has_more);
+      setNextBefore(response.data.next_before);
+    } catch (error) {
+      console.error('Error loading older messages:', error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const handleSendMessage = async (e) => {
     e.preventDefault();
 
@@ -440,6 +470,17 @@ const DataCollectorChatPage = () => {
             </div>
           ) : (
             <>
+              {hasMoreMessages && (
+                <div className="flex justify-center mb-4">
+                  <button
+                    onClick={() => loadOlderMessages(room.room_id)}
+                    disabled={loadingOlder}
+                    className="text-xs font-medium text-indigo-600 bg-white border border-gray-200 px-3 py-1 rounded-full hover:bg-gray-50 disabled:opacity-50"
+                  >
+                    {loadingOlder ? 'Loading...' : 'Load earlier messages'}
+                  </button>
+                </div>
+              )}
               {messages.map((message, index) => renderMessage(message, index))}
               <div ref={messagesEndRef} />
             </>
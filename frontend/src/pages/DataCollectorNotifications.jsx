@@ -4,6 +4,7 @@ import { useState, useEffect } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { useLocation } from 'react-router-dom';
 import { getBreadcrumbs } from '../utils/breadcrumbConfig';
+import { subscribe } from '../utils/streamSocket';
 import axios from 'axios';
 import { Bell, Check, X, Trash2, CheckCheck, Search } from 'lucide-react';
 import DataCollectorLayout from '../components/layout/DataCollectorLayout';
@@ -56,32 +57,12 @@ const DataCollectorNotifications = () => {
   useEffect(() => {
     fetchNotifications();
 
-    // WebSocket for instant updates
-    const wsScheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
-    const notifWsUrl = `${wsScheme}://${window.location.hostname}:8000/ws/notifications/`;
-
-    const notifWs = new WebSocket(notifWsUrl);
-
-    notifWs.onopen = () => {
-      console.log('✅ Data Collector Notifications: WebSocket connected');
-    };
-
-    notifWs.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+    // Notifications on the tab's shared stream socket for instant updates
+    return subscribe('notifications', (data) => {
       if (data.type === 'notification') {
         fetchNotifications(); // Update instantly
       }
-    };
-
-    notifWs.onerror = (error) => {
-      console.error('❌ Data Collector Notifications: WebSocket error:', error);
-    };
-
-    return () => {
-      if (notifWs.readyState === WebSocket.OPEN) {
-        notifWs.close();
-      }
-    };
+    });
   }, []);
 
   useEffect(() => {
@@ -12,6 +12,7 @@ import {
 } from 'lucide-react';
 import DashboardLayout from '../components/layout/DashboardLayout';
 import api from '../utils/api';
+import { subscribe, joinRoom } from '../utils/streamSocket';
 import { useAuth } from '../contexts/AuthContext';
 
 // --- UserInfoDrawer COMPONENT ---
@@ -213,6 +214,10 @@ const StaffChatPage = () => {
   const [rooms, setRooms] = useState([]);
   const [selectedRoom, setSelectedRoom] = useState(null);
   const [messages, setMessages] = useState([]);
+  const [hasMoreMessages, setHasMoreMessages] = useState(false);
+  const [nextBefore, setNextBefore] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  const keepScrollRef = useRef(false); // Don't jump to the bottom when older messages are prepended
   const [messageText, setMessageText] = useState('');
   const [searchQuery, setSearchQuery] = useState('');
   const [availableUsers, setAvailableUsers] = useState([]);
@@ -240,33 +245,22 @@ const StaffChatPage = () => {
   const [drawerSubscriptions, setDrawerSubscriptions] = useState([]);
   const drawerUserIdRef = useRef(null);
 
-  // WebSocket
-  const wsRef = useRef(null);
+  // Chat room joined on the tab's shared stream socket
+  const roomRef = useRef(null);
   const messagesEndRef = useRef(null);
   const fileInputRef = useRef(null);
 
-  // Load rooms on mount and connect to notification WebSocket
+  // Load rooms on mount and subscribe to notifications
   useEffect(() => {
     fetchRooms(true);
     fetchAvailableUsers();
 
-    const wsScheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
-    const notifWsUrl = `${wsScheme}://${window.location.hostname}:8000/ws/notifications/`;
-
-    console.log('🔔 Connecting to notifications WebSocket');
-    const notifWs = new WebSocket(notifWsUrl);
-
-    notifWs.onopen = () => console.log('✅ Notifications WebSocket connected');
-    notifWs.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      console.log('🔔 Notification received:', data);
+    const unsubscribe = subscribe('notifications', (data) => {
       if (data.type === 'notification') {
         console.log('📨 Refreshing rooms due to notification');
         fetchRooms(false);
       }
-    };
-    notifWs.onerror = (error) => console.error('❌ Notifications WebSocket error:', error);
-    notifWs.onclose = () => console.log('🔴 Notifications WebSocket disconnected');
+    });
 
     const pollInterval = setInterval(() => fetchRooms(false), 2000);
     const handleVisibilityChange = () => {
@@ -275,17 +269,17 @@ const StaffChatPage = () => {
     document.addEventListener('visibilitychange', handleVisibilityChange);
 
     return () => {
-      if (notifWs.readyState === WebSocket.OPEN) notifWs.close();
+      unsubscribe();
       clearInterval(pollInterval);
       document.removeEventListener('visibilitychange', handleVisibilityChange);
     };
   }, []);
 
-  // Connect to WebSocket when room is selected
+  // Join the chat room when it is selected
   useEffect(() => {
     if (selectedRoom) {
       setIsClientOnline(false);
-      connectWebSocket(selectedRoom.room_id);
+      joinChatRoom(selectedRoom.room_id);
       fetchMessages(selectedRoom.room_id);
       markRoomAsRead(selectedRoom.room_id);
       fetchRooms(false);
@@ -304,15 +298,19 @@ const StaffChatPage = () => {
       drawerUserIdRef.current = null;
       setDrawerUserData(null);
       setDrawerSubscriptions([]);
-      if (wsRef.current) wsRef.current.close();
+      if (roomRef.current) roomRef.current.close();
     }
 
     return () => {
-      if (wsRef.current) wsRef.current.close();
+      if (roomRef.current) roomRef.current.close();
     };
   }, [selectedRoom?.room_id]); // Depend only on the room_id
 
   useEffect(() => {
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
@@ -342,12 +340,34 @@ const fetchAvailableUsers = async () => {
       const response = await api.get('/api/chat/messages/', {
         params: { room_id: roomId }
       });
-      setMessages(response.data.results || response.data);
+      // Latest page of the history, see loadOlderMessages
+      setMessages(response.data.results || []);
+      setHasMoreMessages(response.data.has_more);
+      setNextBefore(response.data.next_before);
     } catch (error) {
       console.error('Error fetching messages:', error);
     }
   };
 
+  // Load the previous page of history (cursor: oldest loaded message)
+  const loadOlderMessages = async (roomId) => {
+    if (!nextBefore || loadingOlder) return;
+    try {
+      setLoadingOlder(true);
+      const response = await api.get('/api/chat/messages/', {
+        params: { room_id: roomId, before: nextBefore }
+      });
+      keepScrollRef.current = true;
+      setMessages(prev => [...(response.data.results || []), ...prev]);
+      setHasMoreMessages(response.data.has_more);
+      setNextBefore(response.data.next_before);
+    } catch (error) {
+      console.error('Error loading older messages:', error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const markRoomAsRead = async (roomId) => {
     try {
       await api.post('/api/chat/messages/mark_room_read/',
@@ -362,16 +382,10 @@ const fetchAvailableUsers = async () => {
     }
   };
 
-  const connectWebSocket = (roomId) => {
-    if (wsRef.current) wsRef.current.close();
-
-    const wsScheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
-    const wsUrl = `${wsScheme}://${window.location.hostname}:8000/ws/chat/${roomId}/`;
-    const ws = new WebSocket(wsUrl);
+  const joinChatRoom = (roomId) => {
+    if (roomRef.current) roomRef.current.close();
 
-    ws.onopen = () => console.log('✅ WebSocket connected');
-    ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+    const chatRoom = joinRoom(roomId, { onMessage: (data) => {
       switch (data.type) {
         case 'chat_message':
           setMessages(prev => {
@@ -392,8 +406,7 @@ const fetchAvailableUsers = async () => {
             }
             return updatedRooms;
           });
-          if (data.message.sender.id !== user.id && ws.readyState === WebSocket.OPEN) {
-            ws.send(JSON.stringify({ type: 'mark_read', message_id: data.message.message_id }));
+          if (data.message.sender.id !== user.id && chatRoom.send({ type: 'mark_read', message_id: data.message.message_id })) {
             setRooms(prevRooms => prevRooms.map(r => r.room_id === roomId ? { ...r, unread_count: 0 } : r));
           }
           break;
@@ -411,10 +424,8 @@ const fetchAvailableUsers = async () => {
         default:
           console.log('Unknown WS message type:', data.type);
       }
-    };
-    ws.onerror = (error) => console.error('❌ WebSocket error:', error);
-    ws.onclose = () => console.log('🔴 WebSocket disconnected');
-    wsRef.current = ws;
+    } });
+    roomRef.current = chatRoom;
   };
 
   const handleTypingIndicator = (data) => {
@@ -440,8 +451,8 @@ const fetchAvailableUsers = async () => {
   };
 
   const sendTypingIndicator = (isTyping) => {
-    if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
-      wsRef.current.send(JSON.stringify({ type: 'typing', is_typing: isTyping }));
+    if (roomRef.current) {
+      roomRef.current.send({ type: 'typing', is_typing: isTyping });
     }
   };
 
@@ -473,8 +484,7 @@ const fetchAvailableUsers = async () => {
         setMessageText('');
         clearFile();
       } else {
-        if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
-          wsRef.current.send(JSON.stringify({ type: 'chat_message', message_type: 'TEXT', content: messageText.trim() }));
+        if (roomRef.current && roomRef.current.send({ type: 'chat_message', message_type: 'TEXT', content: messageText.trim() })) {
           setMessageText('');
         }
       }
@@ -788,6 +798,17 @@ const fetchAvailableUsers = async () => {
 
               {/* Messages Area */}
               <div className="flex-1 overflow-y-auto p-6 space-y-4" style={{ backgroundImage: 'url("data:image/svg+xml,%3Csvg width=\'60\' height=\'60\' viewBox=\'0 0 60 60\' xmlns=\'http://www.w3.org/2000/svg\'%3E%3Cg fill=\'none\' fill-rule=\'evenodd\'%3E%3Cg fill=\'%239C92AC\' fill-opacity=\'0.05\'%3E%3Cpath d=\'M36 34v-4h-2v4h-4v2h4v4h2v-4h4v-2h-4zm0-30V0h-2v4h-4v2h4v4h2V6h4V4h-4zM6 34v-4H4v4H0v2h4v4h2v-4h4v-2H6zM6 4V0H4v4H0v2h4v4h2V6h4V4H6z\'/%3E%3C/g%3E%3C/g%3E%3C/svg%3E")' }}>
+                {hasMoreMessages && (
+                  <div className="flex justify-center mb-4">
+                    <button
+                      onClick={() => loadOlderMessages(selectedRoom.room_id)}
+                      disabled={loadingOlder}
+                      className="text-xs font-medium text-indigo-600 bg-white border border-gray-200 px-3 py-1 rounded-full hover:bg-gray-50 disabled:opacity-50"
+                    >
+                      {loadingOlder ? 'Loading...' : 'Load earlier messages'}
+                    </button>
+                  </div>
+                )}
                 {messages.map((message, index) => {
                   const isOwn = message.sender.id === user.id;
                   const prevMessage = messages[index - 1];
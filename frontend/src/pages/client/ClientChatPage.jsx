@@ -10,6 +10,7 @@ import {
 } from 'lucide-react';
 import ClientDashboardLayout from '../../components/layout/ClientDashboardLayout';
 import api from '../../utils/api';
+import { subscribe, joinRoom } from '../../utils/streamSocket';
 import { useAuth } from '../../contexts/AuthContext';
 
 const ClientChatPage = () => {
@@ -20,6 +21,10 @@ const ClientChatPage = () => {
   // State
   const [room, setRoom] = useState(null);
   const [messages, setMessages] = useState([]);
+  const [hasMoreMessages, setHasMoreMessages] = useState(false);
+  const [nextBefore, setNextBefore] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  const keepScrollRef = useRef(false); // Don't jump to the bottom when older messages are prepended
   const [messageText, setMessageText] = useState('');
   // const [searchQuery, setSearchQuery] = useState(''); // Removed
   // const [availableAdmins, setAvailableAdmins] = useState([]); // Removed
@@ -34,44 +39,23 @@ const ClientChatPage = () => {
   const messagesEndRef = useRef(null);
   const fileInputRef = useRef(null);
   const typingTimeoutRef = useRef(null);
-  const wsRef = useRef(null);
+  const roomRef = useRef(null); // Chat room joined on the tab's shared stream socket
 
   useEffect(() => {
     fetchRoom(true); // Show loading spinner on initial load
     // fetchAvailableAdmins(); // Removed
 
-    // Connect to notification WebSocket for instant updates
-    const wsScheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
-    const notifWsUrl = `${wsScheme}://${window.location.hostname}:8000/ws/notifications/`;
-
-    console.log('🔔 Connecting to notifications WebSocket');
-    const notifWs = new WebSocket(notifWsUrl);
-
-    notifWs.onopen = () => {
-      console.log('✅ Notifications WebSocket connected');
-    };
-
-    notifWs.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      console.log('🔔 Notification received:', data);
-
+    // Subscribe to notifications for instant updates
+    const unsubscribe = subscribe('notifications', (data) => {
       // Refresh room when notification arrives (usually admin reply)
       if (data.type === 'notification') {
         console.log('📨 Refreshing room due to notification');
         fetchRoom(false); // Background refresh, no loading spinner
       }
-    };
-
-    notifWs.onerror = (error) => {
-      console.error('❌ Notifications WebSocket error:', error);
-    };
-
-    notifWs.onclose = () => {
-      console.log('🔴 Notifications WebSocket disconnected');
-    };
+    });
 
     // Backup: Poll every 2 seconds to catch any missed updates
-    // This ensures messages always appear even if WebSocket fails
+    // This ensures messages always appear even if the socket fails
     const pollInterval = setInterval(() => {
       fetchRoom(false); // Background refresh, no loading spinner
     }, 2000); // 2 seconds for near-instant updates
@@ -85,9 +69,7 @@ const ClientChatPage = () => {
     document.addEventListener('visibilitychange', handleVisibilityChange);
 
     return () => {
-      if (notifWs.readyState === WebSocket.OPEN) {
-        notifWs.close();
-      }
+      unsubscribe();
       clearInterval(pollInterval);
       document.removeEventListener('visibilitychange', handleVisibilityChange);
     };
@@ -95,19 +77,23 @@ const ClientChatPage = () => {
 
   useEffect(() => {
     if (room) {
-      connectWebSocket(room.room_id);
+      joinChatRoom(room.room_id);
       fetchMessages(room.room_id);
       markRoomAsRead(room.room_id);
     }
 
     return () => {
-      if (wsRef.current) {
-        wsRef.current.close();
+      if (roomRef.current) {
+        roomRef.current.close();
       }
     };
   }, [room?.room_id]); // Only reconnect if room_id changes, not if room object updates
 
   useEffect(() => {
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     scrollToBottom();
   }, [messages]);
 
@@ -144,12 +130,34 @@ const ClientChatPage = () => {
       const response = await api.get('/api/chat/messages/', {
         params: { room_id: roomId }
       });
-      setMessages(response.data.results || response.data);
+      // Latest page of the history, see loadOlderMessages
+      setMessages(response.data.results || []);
+      setHasMoreMessages(response.data.has_more);
+      setNextBefore(response.data.next_before);
     } catch (error) {
       console.error('Error fetching messages:', error);
     }
   };
 
+  // Load the previous page of history (cursor: oldest loaded message)
+  const loadOlderMessages = async (roomId) => {
+    if (!nextBefore || loadingOlder) return;
+    try {
+      setLoadingOlder(true);
+      const response = await api.get('/api/chat/messages/', {
+        params: { room_id: roomId, before: nextBefore }
+      });
+      keepScrollRef.current = true;
+      setMessages(prev => [...(response.data.results || []), ...prev]);
+      setHasMoreMessages(response.data.has_more);
+      setNextBefore(response.data.next_before);
+    } catch (error) {
+      console.error('Error loading older messages:', error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const markRoomAsRead = async (roomId) => {
     try {
       // This endpoint is provided by your ChatMessageViewSet
@@ -162,57 +170,39 @@ const ClientChatPage = () => {
     }
   };
 
-  const connectWebSocket = (roomId) => {
-    if (wsRef.current) {
-      wsRef.current.close();
+  const joinChatRoom = (roomId) => {
+    if (roomRef.current) {
+      roomRef.current.close();
     }
 
-    const wsScheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
-    const wsUrl = `${wsScheme}://${window.location.hostname}:8000/ws/chat/${roomId}/`;
-
-    const ws = new WebSocket(wsUrl);
-
-    ws.onopen = () => {
-      console.log('✅ WebSocket connected');
-      setIsConnected(true);
-    };
-
-    ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-
-      if (data.type === 'chat_message') {
-        setMessages(prev => {
-          if (prev.some(msg => msg.message_id === data.message.message_id)) {
-            return prev;
+    const chatRoom = joinRoom(roomId, {
+      onOpen: () => setIsConnected(true),
+      onClose: () => setIsConnected(false),
+      onMessage: (data) => {
+        if (data.type === 'chat_message') {
+          setMessages(prev => {
+            if (prev.some(msg => msg.message_id === data.message.message_id)) {
+              return prev;
+            }
+            return [...prev, data.message];
+          });
+
+          if (data.message.sender.id !== user.id) {
+            chatRoom.send({
+              type: 'mark_read',
+              message_id: data.message.message_id
+            });
           }
-          return [...prev, data.message];
-        });
 
-        if (data.message.sender.id !== user.id && ws.readyState === WebSocket.OPEN) {
-          ws.send(JSON.stringify({
-            type: 'mark_read',
-            message_id: data.message.message_id
-          }));
+        } else if (data.type === 'typing_indicator') {
+          handleTypingIndicator(data);
+        } else if (data.type === 'message_read') {
+          updateMessageReadStatus(data.message_id);
         }
+      },
+    });
 
-      } else if (data.type === 'typing_indicator') {
-        handleTypingIndicator(data);
-      } else if (data.type === 'message_read') {
-        updateMessageReadStatus(data.message_id);
-      }
-    };
-
-    ws.onerror = (error) => {
-      console.error('❌ WebSocket error:', error);
-      setIsConnected(false);
-    };
-
-    ws.onclose = () => {
-      console.log('🔴 WebSocket disconnected');
-      setIsConnected(false);
-    };
-
-    wsRef.current = ws;
+    roomRef.current = chatRoom;
   };
 
   const handleTypingIndicator = (data) => {
@@ -239,11 +229,11 @@ const ClientChatPage = () => {
   };
 
   const sendTypingIndicator = (isTyping) => {
-    if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
-      wsRef.current.send(JSON.stringify({
+    if (roomRef.current) {
+      roomRef.current.send({
         type: 'typing',
         is_typing: isTyping
-      }));
+      });
     }
   };
 
@@ -288,12 +278,11 @@ const ClientChatPage = () => {
         setMessageText('');
         clearFile();
       } else {
-        if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
-          wsRef.current.send(JSON.stringify({
-            type: 'chat_message',
-            message_type: 'TEXT',
-            content: messageText.trim()
-          }));
+        if (roomRef.current && roomRef.current.send({
+          type: 'chat_message',
+          message_type: 'TEXT',
+          content: messageText.trim()
+        })) {
           setMessageText('');
         }
       }
@@ -541,6 +530,17 @@ const ClientChatPage = () => {
                   </div>
                 )}
 
+                {hasMoreMessages && (
+                  <div className="flex justify-center mb-4">
+                    <button
+                      onClick={() => loadOlderMessages(room.room_id)}
+                      disabled={loadingOlder}
+                      className="text-xs font-medium text-indigo-600 bg-white border border-gray-200 px-3 py-1 rounded-full hover:bg-gray-50 disabled:opacity-50"
+                    >
+                      {loadingOlder ? 'Loading...' : 'Load earlier messages'}
+                    </button>
+                  </div>
+                )}
                 {messages.map((message, index) => {
                   const isOwn = message.sender.id === user.id;
 
@@ -0,0 +1,188 @@
+// frontend/src/utils/streamSocket.js
+// Shared multiplexed WebSocket (ws/stream/, see zeugma_core/consumers.py)
+//
+// One connection per browser tab carries the user's notifications, presence
+// updates and the chat rooms the tab has joined. Components subscribe to a
+// stream or join a room; the socket opens with the first subscriber, closes
+// shortly after the last one is gone and reconnects (re-joining its rooms)
+// when the connection drops.
+//
+//   const unsubscribe = subscribe('notifications', (data) => { ... });
+//   const room = joinRoom(roomId, { onMessage, onOpen, onClose });
+//   room.send({ type: 'typing', is_typing: true });
+//   room.close();
+//
+// Handlers receive the same payloads the dedicated sockets (ws/chat/<room>/,
+// ws/notifications/, ws/user-status/) sent.
+
+const MAX_RECONNECT_DELAY = 30000;
+const IDLE_CLOSE_DELAY = 1000;
+
+let socket = null;
+let reconnectTimeout = null;
+let idleTimeout = null;
+let reconnectAttempts = 0;
+
+const streamHandlers = {
+  notifications: new Set(),
+  presence: new Set(),
+};
+const rooms = new Map(); // room_id -> Set of room handles
+
+const streamUrl = () => {
+  const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+  // In development React runs on :5173 and Django on :8000
+  const host = window.location.port === '5173'
+    ? `${window.location.hostname}:8000`
+    : window.location.host;
+  return `${protocol}//${host}/ws/stream/`;
+};
+
+const hasSubscribers = () =>
+  rooms.size > 0 || Object.values(streamHandlers).some(handlers => handlers.size > 0);
+
+const isOpen = () => socket !== null && socket.readyState === WebSocket.OPEN;
+
+const sendFrames = (frames) => {
+  if (!isOpen()) return false;
+  socket.send(JSON.stringify(frames));
+  return true;
+};
+
+const dispatch = (frame) => {
+  if (frame.stream === 'chat') {
+    rooms.get(frame.room_id)?.forEach(handle => handle.receive(frame.payload));
+    return;
+  }
+  streamHandlers[frame.stream]?.forEach(handler => {
+    try {
+      handler(frame.payload);
+    } catch (err) {
+      console.error(`Error handling ${frame.stream} stream message:`, err);
+    }
+  });
+};
+
+const connect = () => {
+  clearTimeout(reconnectTimeout);
+  reconnectTimeout = null;
+  if (socket) return;
+
+  const ws = new WebSocket(streamUrl());
+  socket = ws;
+
+  ws.onopen = () => {
+    reconnectAttempts = 0;
+    // (Re-)join the rooms of this tab
+    if (rooms.size > 0) {
+      sendFrames([...rooms.keys()].map(roomId => ({ stream: 'chat', action: 'join', room_id: roomId })));
+    }
+  };
+
+  ws.onmessage = (event) => {
+    let frames;
+    try {
+      frames = JSON.parse(event.data);
+    } catch (err) {
+      console.error('Error parsing stream message:', err);
+      return;
+    }
+    (Array.isArray(frames) ? frames : [frames]).forEach(dispatch);
+  };
+
+  ws.onerror = (error) => {
+    console.error('Stream WebSocket error:', error);
+  };
+
+  ws.onclose = () => {
+    if (socket === ws) socket = null;
+    rooms.forEach(handles => handles.forEach(handle => handle.disconnected()));
+
+    if (hasSubscribers()) {
+      const delay = Math.min(1000 * Math.pow(2, reconnectAttempts), MAX_RECONNECT_DELAY);
+      reconnectAttempts += 1;
+      reconnectTimeout = setTimeout(connect, delay);
+    }
+  };
+};
+
+const ensureConnected = () => {
+  clearTimeout(idleTimeout);
+  idleTimeout = null;
+  if (!socket && !reconnectTimeout) connect();
+};
+
+const closeWhenIdle = () => {
+  if (hasSubscribers() || idleTimeout) return;
+  // Short grace period: the next page usually subscribes right away
+  idleTimeout = setTimeout(() => {
+    idleTimeout = null;
+    if (hasSubscribers()) return;
+    clearTimeout(reconnectTimeout);
+    reconnectTimeout = null;
+    if (socket) {
+      const ws = socket;
+      socket = null;
+      ws.close();
+    }
+  }, IDLE_CLOSE_DELAY);
+};
+
+/**
+ * Receive the payloads of a server stream ('notifications' or 'presence').
+ * Returns the unsubscribe function.
+ */
+export const subscribe = (stream, handler) => {
+  streamHandlers[stream].add(handler);
+  ensureConnected();
+
+  return () => {
+    streamHandlers[stream].delete(handler);
+    closeWhenIdle();
+  };
+};
+
+/**
+ * Join a chat room on the shared connection.
+ *
+ * Returns a handle: send(data) sends a room frame (false while the room is
+ * not joined), isOpen() tells whether it is joined, close() leaves it.
+ */
+export const joinRoom = (roomId, { onMessage, onOpen, onClose } = {}) => {
+  const handle = {
+    joined: false,
+    receive(payload) {
+      if (payload.type === 'joined') {
+        handle.joined = true;
+        onOpen?.();
+      } else if (payload.type !== 'left') {
+        onMessage?.(payload);
+      }
+    },
+    disconnected() {
+      if (!handle.joined) return;
+      handle.joined = false;
+      onClose?.();
+    },
+    send: (data) => handle.joined && sendFrames([{ ...data, stream: 'chat', room_id: roomId }]),
+    isOpen: () => handle.joined,
+    close: () => {
+      const handles = rooms.get(roomId);
+      if (!handles || !handles.delete(handle)) return;
+      if (handles.size === 0) {
+        rooms.delete(roomId);
+        sendFrames([{ stream: 'chat', action: 'leave', room_id: roomId }]);
+      }
+      handle.disconnected();
+      closeWhenIdle();
+    },
+  };
+
+  if (!rooms.has(roomId)) rooms.set(roomId, new Set());
+  rooms.get(roomId).add(handle);
+
+  ensureConnected();
+  // Joined rooms answer "joined" again, so every handle learns it is open
+  sendFrames([{ stream: 'chat', action: 'join', room_id: roomId }]);
+  return handle;
+};
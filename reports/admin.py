@@ -41,6 +41,7 @@ from .company_models import (
     Company, ProductionSite, ProductionSiteVersion,
     CompanyNote, CompanyHistory
 )
+from .services.site_counters import SiteCounterService
 
 @admin.register(SuperdatabaseRecord)
 class SuperdatabaseRecordAdmin(admin.ModelAdmin):
@@ -348,7 +349,8 @@ class UnverifiedSiteAdmin(admin.ModelAdmin):
     
     def approve_sites(self, request, queryset):
         """Bulk approve selected unverified sites"""
-        count = queryset.filter(verification_status='PENDING').update(
+        count = SiteCounterService.update_sites(
+            queryset.filter(verification_status='PENDING'),
             verification_status='APPROVED',
             verified_by=request.user,
             verified_date=timezone.now()
@@ -358,7 +360,8 @@ class UnverifiedSiteAdmin(admin.ModelAdmin):
     
     def reject_sites(self, request, queryset):
         """Bulk reject selected unverified sites"""
-        count = queryset.filter(verification_status='PENDING').update(
+        count = SiteCounterService.update_sites(
+            queryset.filter(verification_status='PENDING'),
             verification_status='REJECTED',
             verified_by=request.user,
             verified_date=timezone.now()
@@ -368,19 +371,19 @@ class UnverifiedSiteAdmin(admin.ModelAdmin):
     
     def mark_under_review(self, request, queryset):
         """Mark sites as under review"""
-        count = queryset.update(verification_status='UNDER_REVIEW')
+        count = SiteCounterService.update_sites(queryset, verification_status='UNDER_REVIEW')
         self.message_user(request, f'{count} sites marked for review.')
     mark_under_review.short_description = "🔍 Mark as under review"
     
     def mark_high_priority(self, request, queryset):
         """Mark selected sites as high priority"""
-        count = queryset.update(priority='HIGH')
+        count = SiteCounterService.update_sites(queryset, priority='HIGH')
         self.message_user(request, f'{count} sites marked as high priority.')
     mark_high_priority.short_description = "⚡ Mark as HIGH priority"
     
     def mark_low_priority(self, request, queryset):
         """Mark selected sites as low priority"""
-        count = queryset.update(priority='LOW')
+        count = SiteCounterService.update_sites(queryset, priority='LOW')
         self.message_user(request, f'{count} sites marked as low priority.')
     mark_low_priority.short_description = "⬇️ Mark as LOW priority"
 
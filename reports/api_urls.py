@@ -11,6 +11,7 @@ from .views import (
     EnhancedDashboardStatsAPIView,
     FilterOptionsAPIView,
     TechnicalFilterOptionsAPIView,
+    RangeStatsAPIView,
     DatabaseStatsAPIView,
     DashboardWidgetViewSet,
     EnabledWidgetsAPIView,
@@ -47,6 +48,7 @@ from .import_export_views import (
     export_sites,
     import_preview,
     import_confirm,
+    import_session_status,
 )
 
 # Dashboard stats views (real data for widgets)
@@ -77,6 +79,7 @@ from .dashboard_stats_views import (
     widget_failed_logins_detail,
     widget_blocked_ips,
     widget_suspicious_activity,
+    widget_cache_stats,
 )
 
 # Management API (for running commands)
@@ -106,6 +109,7 @@ urlpatterns = [
     # Filter options (now query Company Database)
     path('filter-options/', FilterOptionsAPIView.as_view(), name='api-filter-options'),
     path('technical-filter-options/', TechnicalFilterOptionsAPIView.as_view(), name='api-technical-filter-options'),
+    path('range-stats/', RangeStatsAPIView.as_view(), name='api-range-stats'),
     
     # Database stats (queries Company Database)
     path('database-stats/', DatabaseStatsAPIView.as_view(), name='api-database-stats'),
@@ -155,6 +159,7 @@ urlpatterns = [
     path('import-export/export/', export_sites, name='export-sites'),
     path('import-export/preview/', import_preview, name='import-preview'),
     path('import-export/confirm/', import_confirm, name='import-confirm'),
+    path('import-export/sessions/<uuid:session_id>/', import_session_status, name='import-session-status'),
 
     # Help Center Feedback Admin
     path('help-center-feedback/', HelpArticleFeedbackAdminAPIView.as_view(), name='help-center-feedback-admin'),
@@ -193,6 +198,7 @@ urlpatterns = [
     path('dashboard/widgets/failed-logins-detail/', widget_failed_logins_detail, name='widget-failed-logins-detail'),
     path('dashboard/widgets/blocked-ips/', widget_blocked_ips, name='widget-blocked-ips'),
     path('dashboard/widgets/suspicious-activity/', widget_suspicious_activity, name='widget-suspicious-activity'),
+    path('dashboard/widgets/cache-stats/', widget_cache_stats, name='widget-cache-stats'),
     
     # =========================================================================
     # MANAGEMENT API ENDPOINTS (Superadmin only)
@@ -10,7 +10,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
@@ -22,7 +22,7 @@ import uuid
 import logging
 logger = logging.getLogger(__name__)
 
-from .models import CallLog, FieldConfirmation, UnverifiedSite
+from .models import CallLog, FieldConfirmation, UnverifiedSite, WorkQueue
 from .calling_serializers import (
     CallLogSerializer,
     CallLogCreateSerializer,
@@ -38,6 +38,8 @@ from .calling_serializers import (
 
 )
 from .permissions import IsStaffOrDataCollector
+from .services.site_counters import SiteCounterService
+from .services.work_queue import WorkQueueService
 from .project_permissions import user_can_access_site 
 from accounts.models import UserRole
 
@@ -199,54 +201,9 @@ def bulk_update_field_confirmations(request, site_id):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     confirmations_data = serializer.validated_data['confirmations']
-    updated_confirmations = []
     
-    # Process each confirmation
-    for conf_data in confirmations_data:
-        field_name = conf_data['field_name']
-        
-        # Get or create confirmation
-        confirmation, created = FieldConfirmation.objects.get_or_create(
-            site=site,
-            field_name=field_name,
-            defaults={'confirmed_by': user}
-        )
-        
-        # Update fields
-        if 'is_confirmed' in conf_data:
-            confirmation.is_confirmed = conf_data['is_confirmed']
-            if conf_data['is_confirmed'] and not confirmation.confirmed_at:
-                confirmation.confirmed_at = timezone.now()
-                confirmation.confirmed_by = user
-        
-        if 'is_new_data' in conf_data:
-            confirmation.is_new_data = conf_data['is_new_data']
-        
-        # Handle is_pre_filled - once true, stays true       
-        if 'is_pre_filled' in conf_data:
-            new_value = conf_data['is_pre_filled']
-            
-            if new_value:
-                # Setting to True - always allow
-                confirmation.is_pre_filled = True
-            else:
-                # Trying to set to False
-                if confirmation.is_pre_filled:
-
-                    # Currently False - allow setting to False
-                    confirmation.is_pre_filled = False
-                    # If already True, keep it True (pre-filled cannot be unchecked)
-
-               
-        # Handle last_selected (determines field color)
-        if 'last_selected' in conf_data:
-            confirmation.last_selected = conf_data['last_selected']
-        
-        if 'notes' in conf_data:
-            confirmation.notes = conf_data['notes']
-        
-        confirmation.save()
-        updated_confirmations.append(confirmation)        
+    # One read + bulk writes for the whole payload (autosave sends every field)
+    updated_confirmations = FieldConfirmation.bulk_upsert(site, confirmations_data, user)
     
     # Return updated confirmations
     response_serializer = FieldConfirmationSerializer(updated_confirmations, many=True)
@@ -304,30 +261,37 @@ def get_calling_stats(request, project_id=None):
     """
     user = request.user
     
-    # Base queryset
-    queryset = UnverifiedSite.objects.all()
-    
-    # Filter by project if specified
-    if project_id:
-        queryset = queryset.filter(project_id=project_id)
-    
-    # Filter by user role
     if user.role == UserRole.DATA_COLLECTOR:
-        queryset = queryset.filter(collected_by=user)
+        # Own sites only - not a counter scope, count them in one grouped query
+        queryset = UnverifiedSite.objects.filter(collected_by=user)
+        if project_id:
+            queryset = queryset.filter(project_id=project_id)
+        
+        by_calling_status = dict(
+            queryset.values_list('calling_status').annotate(count=Count('pk')).order_by()
+        )
+        total_sites = sum(by_calling_status.values())
+        total_calls = queryset.aggregate(total=Sum('total_calls'))['total'] or 0
+    else:
+        # Project or global site counters
+        counts = SiteCounterService.get_counts(project_id or None)
+        by_calling_status = counts['calling']
+        total_sites = counts['total']
+        total_calls = int(counts['sum']['total_calls'])
     
     # Calculate statistics
     stats = {
-        'total_sites': queryset.count(),
-        'not_started': queryset.filter(calling_status='NOT_STARTED').count(),
-        'yellow_status': queryset.filter(calling_status='YELLOW').count(),
-        'red_status': queryset.filter(calling_status='RED').count(),
-        'purple_status': queryset.filter(calling_status='PURPLE').count(),
-        'blue_status': queryset.filter(calling_status='BLUE').count(),
-        'green_status': queryset.filter(calling_status='GREEN').count(),
-        'avg_calls_per_site': queryset.aggregate(Avg('total_calls'))['total_calls__avg'] or 0,
-        'total_calls_made': queryset.aggregate(models.Sum('total_calls'))['total_calls__sum'] or 0,
-        'sites_needing_attention': queryset.filter(calling_status='YELLOW').count(),
-        'sites_ready_for_review': queryset.filter(calling_status='GREEN').count(),
+        'total_sites': total_sites,
+        'not_started': by_calling_status.get('NOT_STARTED', 0),
+        'yellow_status': by_calling_status.get('YELLOW', 0),
+        'red_status': by_calling_status.get('RED', 0),
+        'purple_status': by_calling_status.get('PURPLE', 0),
+        'blue_status': by_calling_status.get('BLUE', 0),
+        'green_status': by_calling_status.get('GREEN', 0),
+        'avg_calls_per_site': total_calls / total_sites if total_sites else 0,
+        'total_calls_made': total_calls,
+        'sites_needing_attention': by_calling_status.get('YELLOW', 0),
+        'sites_ready_for_review': by_calling_status.get('GREEN', 0),
     }
     
     serializer = CallingStatsSerializer(stats)
@@ -360,6 +324,11 @@ def get_yellow_status_sites(request):
         'calling_status_changed_by'
     ).order_by('-calling_status_changed_at')
     
+    # Hide sites other admins have claimed from the alternative numbers queue
+    # unless ?include_claimed=true
+    if request.query_params.get('include_claimed', 'false').lower() != 'true':
+        yellow_sites = WorkQueueService.exclude_leased(yellow_sites, WorkQueue.ALTERNATIVE_NUMBERS, user)
+    
     # Serialize
     from .project_serializers import UnverifiedSiteSerializer
     serializer = UnverifiedSiteSerializer(yellow_sites, many=True)
@@ -7,11 +7,13 @@ from django.urls import path
 from .client_views import (
     ClientSubscriptionsAPIView,
     ClientReportDataAPIView,
+    ClientReportChangesAPIView,
     ClientReportStatsAPIView,
     ClientFilterOptionsAPIView,
     ClientReportExportAPIView,
     ClientReportColumnsAPIView,
     ClientTechnicalFilterOptionsAPIView,
+    ClientRangeStatsAPIView,
     ClientMaterialStatsAPIView,
     HelpArticleFeedbackAPIView,
     ReportFeedbackAPIView,
@@ -55,6 +57,9 @@ urlpatterns = [
     # Get filtered records for a specific report
     path('report-data/', ClientReportDataAPIView.as_view(), name='client-report-data'),
 
+    # Sites added / modified / removed since a cursor (NDJSON delta sync)
+    path('report-changes/', ClientReportChangesAPIView.as_view(), name='client-report-changes'),
+
     # Get stats for a specific report
     path('report-stats/', ClientReportStatsAPIView.as_view(), name='client-report-stats'),
 
@@ -64,6 +69,9 @@ urlpatterns = [
     # NEW: Get technical filter options for a specific report
     path('technical-filter-options/', ClientTechnicalFilterOptionsAPIView.as_view(), name='client-technical-filters'),
 
+    # Min/max, null counts and histograms of all technical fields in one request
+    path('range-stats/', ClientRangeStatsAPIView.as_view(), name='client-range-stats'),
+
     path('report-export/', ClientReportExportAPIView.as_view(), name='client-report-export'),
 
     path('saved-searches/', SavedSearchListCreateAPIView.as_view(), name='client-saved-searches'),
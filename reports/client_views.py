@@ -4,7 +4,8 @@
 from django.db import models
 from django.db.models import Q, Count
 from django.utils import timezone
-from django.http import HttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -13,15 +14,23 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
 from accounts.models import UserRole
+from accounts.throttling import charge
 from .models import Subscription, CustomReport, SubscriptionStatus, ReportFeedback
 from .company_models import Company, ProductionSiteVersion, CompanyStatus
 from .company_serializers import CompanyListSerializer
 from .pagination import CustomPagination
 import csv
 import json
+import math
 from .client_serializers import ClientReportRecordSerializer, ClientReportRecordListSerializer
 from .company_models import Company, ProductionSite, ProductionSiteVersion, CompanyStatus
 from .models import HelpArticleFeedback
+from .services.facet_index import FacetIndexService
+from .services.range_stats import RangeStatsService
+from .services.company_search import CompanySearchService
+from .services.company_detail import CompanyDetailService
+from .services.change_feed import ChangeFeedService
+from .filters import CompanySearchFilter, apply_site_filter_groups, filter_report_sites
 import datetime
 from .fields import (
     COMMON_FIELDS,
@@ -98,9 +107,17 @@ class ClientReportDataAPIView(generics.ListAPIView):
     """
     permission_classes = [IsAuthenticated]
     serializer_class = ClientReportRecordListSerializer  # OPTIMIZED: Use lightweight serializer
-    filter_backends = [SearchFilter]
-    search_fields = ['company__company_name', 'company__country', 'company__address_1']
+    filter_backends = [CompanySearchFilter]
+    search_company_path = 'company'
     pagination_class = CustomPagination
+    throttle_scope = 'report_data'
+
+    # Rows per throttle token: a 10,000 row page costs as much as 100 small pages
+    THROTTLE_ROWS_PER_TOKEN = 100
+
+    def get_throttle_cost(self, request):
+        page_size = self.pagination_class().get_page_size(request)
+        return math.ceil(page_size / self.THROTTLE_ROWS_PER_TOKEN)
 
     def get_queryset(self):
         """
@@ -152,174 +169,12 @@ class ClientReportDataAPIView(generics.ListAPIView):
             to_attr='prefetched_current_version'
         )
         
-        queryset = ProductionSite.objects.exclude(
-            company__status=CompanyStatus.DELETED
-        ).select_related('company').prefetch_related(
+        queryset = ProductionSite.objects.select_related('company').prefetch_related(
             current_version_prefetch
         )
 
-        # ========================================
-        # CRITICAL FIX: Only include ACTIVE production sites
-        # Filter out production sites where current version is_active=False
-        # ========================================
-        queryset = queryset.filter(
-            versions__is_current=True,
-            versions__is_active=True
-        )
-
-        # ========================================
-        # Apply report's STATUS filter (Company status like COMPLETE/INCOMPLETE)
-        # ========================================
-        if 'status' in filter_criteria:
-            status_filter = filter_criteria['status']
-            if isinstance(status_filter, list) and len(status_filter) > 0:
-                queryset = queryset.filter(company__status__in=status_filter)
-            elif isinstance(status_filter, str) and status_filter:
-                queryset = queryset.filter(company__status=status_filter)
-
-        # ========================================
-        # Apply report's CATEGORY filter with active check
-        # Note: This is done FIRST because category + active are linked
-        # ========================================
-        report_categories = None
-        if 'categories' in filter_criteria:
-            report_categories = filter_criteria['categories']
-        elif 'category' in filter_criteria:
-            report_categories = filter_criteria['category']
-        
-        if report_categories:
-            if isinstance(report_categories, list) and len(report_categories) > 0:
-                queryset = queryset.filter(category__in=report_categories)
-            elif isinstance(report_categories, str) and report_categories:
-                queryset = queryset.filter(category=report_categories)
-
-        # ========================================
-        # STEP 1: Apply report's FILTER GROUPS (if exists)
-        # ========================================
-        if 'filter_groups' in filter_criteria:
-            filter_groups = filter_criteria['filter_groups']
-            if isinstance(filter_groups, list):
-                for group in filter_groups:
-                    if not isinstance(group, dict):
-                        continue
-
-                    filters = group.get('filters', {})
-                    technical_filters = group.get('technicalFilters', {})
-
-                    if not filters and not technical_filters:
-                        continue
-
-                    # Build OR query for all filters within this group
-                    group_query = Q()
-
-                    # Handle boolean filters (query current version)
-                    for field_name, field_value in filters.items():
-                        try:
-                            ProductionSiteVersion._meta.get_field(field_name)
-
-                            if field_value is True:
-                                group_query |= Q(
-                                    versions__is_current=True,
-                                    **{f'versions__{field_name}': True}
-                                )
-                            elif field_value is False:
-                                group_query |= (
-                                    Q(
-                                        versions__is_current=True,
-                                        **{f'versions__{field_name}': False}
-                                    ) |
-                                    Q(
-                                        versions__is_current=True,
-                                        **{f'versions__{field_name}__isnull': True}
-                                    )
-                                )
-                        except Exception:
-                            continue
-
-                    # Handle technical filters (with equals and range modes)
-                    for field_name, filter_config in technical_filters.items():
-                        if not isinstance(filter_config, dict):
-                            continue
-
-                        try:
-                            field = ProductionSiteVersion._meta.get_field(field_name)
-                            mode = filter_config.get('mode', 'range')
-
-                            if mode == 'equals':
-                                equals_val = filter_config.get('equals', '')
-                                if equals_val != '' and equals_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            equals_val = float(equals_val)
-                                        else:
-                                            equals_val = int(equals_val)
-                                        group_query |= Q(
-                                            versions__is_current=True,
-                                            **{f'versions__{field_name}': equals_val}
-                                        )
-                                    except (ValueError, TypeError):
-                                        pass
-
-                            elif mode == 'range':
-                                min_val = filter_config.get('min', '')
-                                max_val = filter_config.get('max', '')
-                                range_query = Q(versions__is_current=True)
-
-                                if min_val != '' and min_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            min_val = float(min_val)
-                                        else:
-                                            min_val = int(min_val)
-                                        range_query &= Q(**{f'versions__{field_name}__gte': min_val})
-                                    except (ValueError, TypeError):
-                                        pass
-
-                                if max_val != '' and max_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            max_val = float(max_val)
-                                        else:
-                                            max_val = int(max_val)
-                                        range_query &= Q(**{f'versions__{field_name}__lte': max_val})
-                                    except (ValueError, TypeError):
-                                        pass
-
-                                group_query |= range_query
-                        except Exception:
-                            continue
-
-                    # AND this group with the queryset
-                    if group_query:
-                        queryset = queryset.filter(group_query).distinct()
-
-        # ========================================
-        # STEP 2: Apply report's BASE FILTERS (legacy support)
-        # ========================================
-        # Handle categories (filter at ProductionSite level)
-        report_categories = None
-        if 'categories' in filter_criteria:
-            report_categories = filter_criteria['categories']
-        elif 'category' in filter_criteria:
-            report_categories = filter_criteria['category']
-        
-        if report_categories:
-            if isinstance(report_categories, list) and len(report_categories) > 0:
-                queryset = queryset.filter(
-                    category__in=report_categories  # ✅ Changed from production_sites__category__in
-                )
-            elif isinstance(report_categories, str) and report_categories:
-                queryset = queryset.filter(
-                    category=report_categories  # ✅ Changed from production_sites__category
-                )
-
-        # Handle country filter (filter by company's country)
-        if 'country' in filter_criteria:
-            countries = filter_criteria['country']
-            if isinstance(countries, list) and len(countries) > 0:
-                queryset = queryset.filter(company__country__in=countries)  # ✅ Changed to company__country__in
-            elif isinstance(countries, str) and countries:
-                queryset = queryset.filter(company__country=countries)  # ✅ Changed to company__country
+        # Active sites of non-deleted companies matching the report's criteria
+        queryset = filter_report_sites(queryset, filter_criteria)
 
         # ========================================
         # STEP 3: Apply USER'S FILTER GROUPS (from query params)
@@ -328,100 +183,7 @@ class ClientReportDataAPIView(generics.ListAPIView):
         if user_filter_groups_param:
             try:
                 user_filter_groups = json.loads(user_filter_groups_param)
-                if isinstance(user_filter_groups, list):
-                    for group in user_filter_groups:
-                        if not isinstance(group, dict):
-                            continue
-
-                        filters = group.get('filters', {})
-                        technical_filters = group.get('technicalFilters', {})
-
-                        if not filters and not technical_filters:
-                            continue
-
-                        # Build OR query for all filters within this group
-                        group_query = Q()
-
-                        # Handle boolean filters
-                        for field_name, field_value in filters.items():
-                            try:
-                                ProductionSiteVersion._meta.get_field(field_name)
-
-                                if field_value is True:
-                                    group_query |= Q(
-                                        versions__is_current=True,
-                                        **{f'versions__{field_name}': True}
-                                    )
-                                elif field_value is False:
-                                    group_query |= (
-                                        Q(
-                                            versions__is_current=True,
-                                            **{f'versions__{field_name}': False}
-                                        ) |
-                                        Q(
-                                            versions__is_current=True,
-                                            **{f'versions__{field_name}__isnull': True}
-                                        )
-                                    )
-                            except Exception:
-                                continue
-
-                        # Handle technical filters
-                        for field_name, filter_config in technical_filters.items():
-                            if not isinstance(filter_config, dict):
-                                continue
-
-                            try:
-                                field = ProductionSiteVersion._meta.get_field(field_name)
-                                mode = filter_config.get('mode', 'range')
-
-                                if mode == 'equals':
-                                    equals_val = filter_config.get('equals', '')
-                                    if equals_val != '' and equals_val is not None:
-                                        try:
-                                            if field.get_internal_type() == 'FloatField':
-                                                equals_val = float(equals_val)
-                                            else:
-                                                equals_val = int(equals_val)
-                                            group_query |= Q(
-                                                versions__is_current=True,
-                                                **{f'versions__{field_name}': equals_val}
-                                            )
-                                        except (ValueError, TypeError):
-                                            pass
-
-                                elif mode == 'range':
-                                    min_val = filter_config.get('min', '')
-                                    max_val = filter_config.get('max', '')
-                                    range_query = Q(versions__is_current=True)
-
-                                    if min_val != '' and min_val is not None:
-                                        try:
-                                            if field.get_internal_type() == 'FloatField':
-                                                min_val = float(min_val)
-                                            else:
-                                                min_val = int(min_val)
-                                            range_query &= Q(**{f'versions__{field_name}__gte': min_val})
-                                        except (ValueError, TypeError):
-                                            pass
-
-                                    if max_val != '' and max_val is not None:
-                                        try:
-                                            if field.get_internal_type() == 'FloatField':
-                                                max_val = float(max_val)
-                                            else:
-                                                max_val = int(max_val)
-                                            range_query &= Q(**{f'versions__{field_name}__lte': max_val})
-                                        except (ValueError, TypeError):
-                                            pass
-
-                                    group_query |= range_query
-                            except Exception:
-                                continue
-
-                        # AND this group with the queryset
-                        if group_query:
-                            queryset = queryset.filter(group_query).distinct()
+                queryset = apply_site_filter_groups(queryset, user_filter_groups)
             except json.JSONDecodeError:
                 pass
 
@@ -486,12 +248,138 @@ class ClientReportDataAPIView(generics.ListAPIView):
         return queryset.distinct()
 
 
+class ClientReportChangesAPIView(ClientReportDataAPIView):
+    """
+    Change feed of a client report (delta sync for integrations).
+
+    Streams, as NDJSON, the production sites added to, modified in or
+    removed from the report's filtered set since a cursor:
+
+        GET /api/client/report-changes/?report_id=<uuid>&cursor=<cursor>&limit=5000
+
+        {"op": "added" | "modified", "id": "<site id>", "change_id": 1, "changed_at": "...", "record": {...}}
+        {"op": "removed", "id": "<site id>", "change_id": 2, "changed_at": "..."}
+        {"op": "cursor", "cursor": "<next cursor>", "has_more": false}
+
+    Without a cursor the feed starts at the beginning of the change log
+    (every existing site is in it), which gives a full initial sync; a bare
+    ISO timestamp may be passed as the cursor as well. The same report and
+    user filter params as report-data apply. Keep requesting with the
+    returned cursor while has_more is true.
+
+    Consistency: changes are served once no earlier change can still
+    appear. On PostgreSQL this is exact (see
+    ChangeFeedService.readable_log()); changes show up once the write
+    transactions running when they were made have finished, so a long
+    import delays the feed. On other databases changes younger than
+    SAFETY_LAG (5 s) are held back: a write transaction committing more
+    than SAFETY_LAG after writing its change log rows can be skipped. The
+    bulk write paths write those rows right before committing
+    (ChangeFeedService.atomic()), so the remaining window is their commit
+    itself. changed_at is the time the log row was written, not the commit
+    time.
+
+    See reports/services/change_feed.py.
+    """
+    throttle_scope = 'report_changes'
+
+    # Changes per throttle token
+    THROTTLE_ROWS_PER_TOKEN = 1000
+
+    # Changed sites looked up in the report set per query
+    LOOKUP_CHUNK_SIZE = 500
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get('limit', ChangeFeedService.DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            limit = ChangeFeedService.DEFAULT_LIMIT
+        return max(1, min(limit, ChangeFeedService.MAX_LIMIT))
+
+    def get_throttle_cost(self, request):
+        return math.ceil(self.get_limit(request) / self.THROTTLE_ROWS_PER_TOKEN)
+
+    def get(self, request, *args, **kwargs):
+        # Only allow clients to access this
+        if request.user.role != UserRole.CLIENT:
+            return Response(
+                {"error": "Only clients can access this endpoint"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        report_id = request.query_params.get('report_id')
+        if not report_id:
+            return Response(
+                {"error": "report_id is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        today = timezone.now().date()
+        if not Subscription.objects.filter(
+            client=request.user,
+            report__report_id=report_id,
+            status=SubscriptionStatus.ACTIVE,
+            start_date__lte=today,
+            end_date__gte=today
+        ).exists():
+            return Response(
+                {"error": "No active subscription found for this report"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        raw_cursor = request.query_params.get('cursor', '')
+        try:
+            cursor = ChangeFeedService.parse_cursor(raw_cursor)
+        except ValueError:
+            return Response(
+                {"error": "Invalid cursor. Use the cursor returned by the previous request or an ISO timestamp."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        changes, next_cursor, has_more = ChangeFeedService.changes_since(cursor, self.get_limit(request))
+        queryset = self.get_queryset().order_by()
+
+        response = StreamingHttpResponse(
+            self._stream(changes, queryset, cursor[0], next_cursor or raw_cursor, has_more),
+            content_type='application/x-ndjson'
+        )
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    def _stream(self, changes, queryset, since, next_cursor, has_more):
+        """Yield one JSON line per changed site, then the next cursor."""
+        for start in range(0, len(changes), self.LOOKUP_CHUNK_SIZE):
+            chunk = changes[start:start + self.LOOKUP_CHUNK_SIZE]
+            in_report = {
+                production_site.pk: production_site
+                for production_site in queryset.filter(pk__in=[change.production_site_pk for change in chunk])
+            }
+
+            for change in chunk:
+                line = {
+                    'id': str(change.site_id),
+                    'change_id': change.change_id,
+                    'changed_at': change.changed_at,
+                }
+                production_site = in_report.get(change.production_site_pk)
+                if production_site is None:
+                    line['op'] = 'removed'
+                else:
+                    is_new = since is None or production_site.created_at > since
+                    line['op'] = 'added' if is_new else 'modified'
+                    line['record'] = ClientReportRecordListSerializer(production_site).data
+                yield json.dumps(line, cls=DjangoJSONEncoder) + '\n'
+
+        yield json.dumps({'op': 'cursor', 'cursor': next_cursor, 'has_more': has_more}) + '\n'
+
+
 class ClientReportStatsAPIView(APIView):
     """
     Returns statistics for a specific client report.
     NOW USES: Company Database
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'report_stats'
 
     def get(self, request):
         # Only allow clients to access this
@@ -529,162 +417,36 @@ class ClientReportStatsAPIView(APIView):
         report = subscription.report
         filter_criteria = report.filter_criteria or {}
 
-        # Build BASE queryset with ONLY report criteria (not user filters)
-        base_queryset = Company.objects.exclude(status=CompanyStatus.DELETED)
+        # Report criteria and user filters are evaluated on the facet bitmap
+        # index (one bit per company / production site) instead of SQL joins
+        index = FacetIndexService.get_index()
 
         # ========================================
-        # CRITICAL FIX: Apply report's STATUS filter first
+        # BASE set: report criteria only (not user filters)
         # ========================================
-        if 'status' in filter_criteria:
-            status_filter = filter_criteria['status']
-            if isinstance(status_filter, list) and len(status_filter) > 0:
-                base_queryset = base_queryset.filter(status__in=status_filter)
-            elif isinstance(status_filter, str) and status_filter:
-                base_queryset = base_queryset.filter(status=status_filter)
+        # Companies need at least one ACTIVE production site (in the
+        # report's categories, if it has any)
+        report_categories = filter_criteria.get('categories', filter_criteria.get('category'))
+        active_sites = index.active_sites
+        if isinstance(report_categories, str) and report_categories:
+            report_categories = [report_categories]
+        if isinstance(report_categories, list) and report_categories:
+            active_sites &= index.union(index.site_categories, report_categories)
+
+        base_companies = index.live_companies() & index.sites_to_companies(active_sites)
+        base_companies = index.filter_companies(filter_criteria, base_companies)
+
+        # Country counts of the base set (for filter sidebar)
+        base_country_counts = index.company_counts_by_country(base_companies)
+        all_countries_with_counts_for_sidebar = [
+            {'country': country, 'count': count}
+            for country, count in sorted(base_country_counts.items(), key=lambda x: x[0] or '')
+            if country
+        ]
+        all_countries = [item['country'] for item in all_countries_with_counts_for_sidebar]
 
-        # Apply report's filter groups
-        if 'filter_groups' in filter_criteria:
-            filter_groups = filter_criteria['filter_groups']
-            if isinstance(filter_groups, list):
-                for group in filter_groups:
-                    if not isinstance(group, dict):
-                        continue
-
-                    filters = group.get('filters', {})
-                    technical_filters = group.get('technicalFilters', {})
-
-                    if not filters and not technical_filters:
-                        continue
-
-                    group_query = Q()
-
-                    # Handle boolean filters
-                    for field_name, field_value in filters.items():
-                        try:
-                            ProductionSiteVersion._meta.get_field(field_name)
-                            if field_value is True:
-                                group_query |= Q(
-                                    production_sites__versions__is_current=True,
-                                    **{f'production_sites__versions__{field_name}': True}
-                                )
-                            elif field_value is False:
-                                group_query |= (
-                                    Q(
-                                        production_sites__versions__is_current=True,
-                                        **{f'production_sites__versions__{field_name}': False}
-                                    ) |
-                                    Q(
-                                        production_sites__versions__is_current=True,
-                                        **{f'production_sites__versions__{field_name}__isnull': True}
-                                    )
-                                )
-                        except Exception:
-                            continue
-
-                    # Handle technical filters
-                    for field_name, filter_config in technical_filters.items():
-                        if not isinstance(filter_config, dict):
-                            continue
-
-                        try:
-                            field = ProductionSiteVersion._meta.get_field(field_name)
-                            mode = filter_config.get('mode', 'range')
-
-                            if mode == 'equals':
-                                equals_val = filter_config.get('equals', '')
-                                if equals_val != '' and equals_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            equals_val = float(equals_val)
-                                        else:
-                                            equals_val = int(equals_val)
-                                        group_query |= Q(
-                                            production_sites__versions__is_current=True,
-                                            **{f'production_sites__versions__{field_name}': equals_val}
-                                        )
-                                    except (ValueError, TypeError):
-                                        pass
-
-                            elif mode == 'range':
-                                min_val = filter_config.get('min', '')
-                                max_val = filter_config.get('max', '')
-                                range_query = Q(production_sites__versions__is_current=True)
-
-                                if min_val != '' and min_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            min_val = float(min_val)
-                                        else:
-                                            min_val = int(min_val)
-                                        range_query &= Q(**{f'production_sites__versions__{field_name}__gte': min_val})
-                                    except (ValueError, TypeError):
-                                        pass
-
-                                if max_val != '' and max_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            max_val = float(max_val)
-                                        else:
-                                            max_val = int(max_val)
-                                        range_query &= Q(**{f'production_sites__versions__{field_name}__lte': max_val})
-                                    except (ValueError, TypeError):
-                                        pass
-
-                                group_query |= range_query
-                        except Exception:
-                            continue
-
-                    if group_query:
-                        base_queryset = base_queryset.filter(group_query).distinct()
-
-        # Apply report's category filters (handle both singular 'category' and plural 'categories' keys)
-        # CRITICAL FIX: Also filter for ACTIVE production sites in the specified categories
-        report_categories = None
-        if 'categories' in filter_criteria:
-            report_categories = filter_criteria['categories']
-        elif 'category' in filter_criteria:
-            report_categories = filter_criteria['category']
-        
-        if report_categories:
-            if isinstance(report_categories, list) and len(report_categories) > 0:
-                # Only include companies with ACTIVE production sites in the specified categories
-                base_queryset = base_queryset.filter(
-                    production_sites__category__in=report_categories,
-                    production_sites__versions__is_current=True,
-                    production_sites__versions__is_active=True
-                ).distinct()
-            elif isinstance(report_categories, str) and report_categories:
-                base_queryset = base_queryset.filter(
-                    production_sites__category=report_categories,
-                    production_sites__versions__is_current=True,
-                    production_sites__versions__is_active=True
-                ).distinct()
-        else:
-            # No category filter - still require at least one active production site
-            base_queryset = base_queryset.filter(
-                production_sites__versions__is_current=True,
-                production_sites__versions__is_active=True
-            ).distinct()
-
-        # Apply report's country filters
-        if 'country' in filter_criteria:
-            countries = filter_criteria['country']
-            if isinstance(countries, list) and len(countries) > 0:
-                base_queryset = base_queryset.filter(country__in=countries)
-            elif isinstance(countries, str) and countries:
-                base_queryset = base_queryset.filter(country=countries)
-
-        # Get all countries from base queryset (for filter sidebar)
-        all_countries = list(
-            base_queryset.values_list('country', flat=True)
-            .distinct()
-            .exclude(country__isnull=True)
-            .exclude(country='')
-            .order_by('country')
-        )
-
-        # ===== FIX: Get available_categories from report configuration, not from data =====
-        # Get configured categories from report's filter_criteria
+        # ===== Get available_categories from report configuration, not from data =====
+        base_category_counts = index.company_counts_by_category(base_companies)
         if 'categories' in filter_criteria:
             categories_config = filter_criteria['categories']
             if isinstance(categories_config, list):
@@ -696,52 +458,19 @@ class ClientReportStatsAPIView(APIView):
         elif 'category' in filter_criteria:
             available_categories = [filter_criteria['category']]
         else:
-            # If no category filter is set in report, get all distinct categories from data
-            available_categories = list(
-                base_queryset.filter(production_sites__versions__is_current=True)
-                .values_list('production_sites__category', flat=True)
-                .distinct()
-                .exclude(production_sites__category__isnull=True)
-                .exclude(production_sites__category='')
-                .order_by('production_sites__category')
-            )
+            # If no category filter is set in report, use all categories present in the data
+            available_categories = sorted(base_category_counts)
 
-        # ===== NEW: Get category counts from base queryset (before user filters) =====
-        # This provides counts for the filter sidebar checkboxes
-        category_counts_raw = list(
-            base_queryset.filter(production_sites__versions__is_current=True)
-            .values('production_sites__category')
-            .annotate(count=Count('id', distinct=True))
-            .order_by('production_sites__category')
-        )
-        category_counts_map = {
-            item['production_sites__category']: item['count']
-            for item in category_counts_raw if item['production_sites__category']
-        }
-        
-        # Build available_categories_with_counts maintaining the configured order
+        # Category counts of the base set (for filter sidebar), in configured order
         available_categories_with_counts = [
-            {'category': cat, 'count': category_counts_map.get(cat, 0)}
+            {'category': cat, 'count': base_category_counts.get(cat, 0)}
             for cat in available_categories
         ]
 
-        # ===== NEW: Get country counts from base queryset (before user filters) =====
-        # This provides counts for the filter sidebar checkboxes
-        country_counts_raw = list(
-            base_queryset.values('country')
-            .annotate(count=Count('id'))
-            .filter(country__isnull=False, country__gt='')
-            .order_by('country')
-        )
-        all_countries_with_counts_for_sidebar = [
-            {'country': item['country'], 'count': item['count']}
-            for item in country_counts_raw
-        ]
-
         # ========================================
-        # Now apply USER FILTERS on top of base queryset for filtered stats
+        # Now apply USER FILTERS on top of the base set for filtered stats
         # ========================================
-        filtered_queryset = base_queryset
+        filtered_companies = base_companies
 
         # Apply user's filter groups
         user_filter_groups_param = request.query_params.get('filter_groups')
@@ -749,362 +478,141 @@ class ClientReportStatsAPIView(APIView):
             try:
                 user_filter_groups = json.loads(user_filter_groups_param)
                 if isinstance(user_filter_groups, list):
-                    for group in user_filter_groups:
-                        if not isinstance(group, dict):
-                            continue
-
-                        filters = group.get('filters', {})
-                        technical_filters = group.get('technicalFilters', {})
-
-                        if not filters and not technical_filters:
-                            continue
-
-                        group_query = Q()
-
-                        # Handle boolean filters
-                        for field_name, field_value in filters.items():
-                            try:
-                                ProductionSiteVersion._meta.get_field(field_name)
-
-                                if field_value is True:
-                                    group_query |= Q(
-                                        production_sites__versions__is_current=True,
-                                        **{f'production_sites__versions__{field_name}': True}
-                                    )
-                                elif field_value is False:
-                                    group_query |= (
-                                        Q(
-                                            production_sites__versions__is_current=True,
-                                            **{f'production_sites__versions__{field_name}': False}
-                                        ) |
-                                        Q(
-                                            production_sites__versions__is_current=True,
-                                            **{f'production_sites__versions__{field_name}__isnull': True}
-                                        )
-                                    )
-                            except Exception:
-                                continue
-
-                        # Handle technical filters
-                        for field_name, filter_config in technical_filters.items():
-                            if not isinstance(filter_config, dict):
-                                continue
-
-                            try:
-                                field = ProductionSiteVersion._meta.get_field(field_name)
-                                mode = filter_config.get('mode', 'range')
-
-                                if mode == 'equals':
-                                    equals_val = filter_config.get('equals', '')
-                                    if equals_val != '' and equals_val is not None:
-                                        try:
-                                            if field.get_internal_type() == 'FloatField':
-                                                equals_val = float(equals_val)
-                                            else:
-                                                equals_val = int(equals_val)
-                                            group_query |= Q(
-                                                production_sites__versions__is_current=True,
-                                                **{f'production_sites__versions__{field_name}': equals_val}
-                                            )
-                                        except (ValueError, TypeError):
-                                            pass
-
-                                elif mode == 'range':
-                                    min_val = filter_config.get('min', '')
-                                    max_val = filter_config.get('max', '')
-                                    range_query = Q(production_sites__versions__is_current=True)
-
-                                    if min_val != '' and min_val is not None:
-                                        try:
-                                            if field.get_internal_type() == 'FloatField':
-                                                min_val = float(min_val)
-                                            else:
-                                                min_val = int(min_val)
-                                            range_query &= Q(**{f'production_sites__versions__{field_name}__gte': min_val})
-                                        except (ValueError, TypeError):
-                                            pass
-
-                                    if max_val != '' and max_val is not None:
-                                        try:
-                                            if field.get_internal_type() == 'FloatField':
-                                                max_val = float(max_val)
-                                            else:
-                                                max_val = int(max_val)
-                                            range_query &= Q(**{f'production_sites__versions__{field_name}__lte': max_val})
-                                        except (ValueError, TypeError):
-                                            pass
-
-                                    group_query |= range_query
-                            except Exception:
-                                continue
-
-                        if group_query:
-                            filtered_queryset = filtered_queryset.filter(group_query).distinct()
+                    filtered_companies = index.filter_companies(
+                        {'filter_groups': user_filter_groups}, filtered_companies
+                    )
             except (json.JSONDecodeError, TypeError):
                 pass
 
         # Apply user's search
         search = request.query_params.get('search', '').strip()
         if search:
-            filtered_queryset = filtered_queryset.filter(
-                Q(company_name__icontains=search) |
-                Q(country__icontains=search)
-            )
+            filtered_companies &= index.search_companies(search, ('name', 'country'))
 
         # Apply user's country filters
         countries_param = request.query_params.get('countries')
         if countries_param:
             country_list = [c.strip() for c in countries_param.split(',') if c.strip()]
             if country_list:
-                filtered_queryset = filtered_queryset.filter(country__in=country_list)
+                filtered_companies &= index.union(index.company_countries, country_list)
 
         # Apply user's status filter
-        status_param = request.query_params.get('status')
-        if status_param:
-            # Check for special "__NONE__" marker indicating empty selection (should return 0 results)
-            if status_param == '__NONE__':
-                # Empty queryset when no status is selected
-                filtered_queryset = Company.objects.none()
-            # Note: Status filtering is legacy from Superdatabase (COMPLETE/INCOMPLETE)
-            # Company Database uses different status model (ACTIVE/INACTIVE/DELETED)
-            # For now, we just handle the __NONE__ case to return empty results
+        # Note: Status filtering is legacy from Superdatabase (COMPLETE/INCOMPLETE);
+        # only the "__NONE__" marker (empty selection -> 0 results) is handled
+        if request.query_params.get('status') == '__NONE__':
+            filtered_companies = 0
 
         # Apply user's category filters
         categories_param = request.query_params.get('categories')
         if categories_param:
             # Check for special "__NONE__" marker indicating empty selection (should return 0 results)
             if categories_param == '__NONE__':
-                # Empty queryset when no categories are selected
-                filtered_queryset = Company.objects.none()
+                filtered_companies = 0
             else:
                 category_list = [c.strip() for c in categories_param.split(',') if c.strip()]
                 if category_list:
-                    filtered_queryset = filtered_queryset.filter(
-                        production_sites__category__in=category_list
-                    ).distinct()
+                    filtered_companies &= index.sites_to_companies(
+                        index.union(index.site_categories, category_list)
+                    )
 
         # Apply user's material filters (from filter sidebar)
         for key in request.query_params.keys():
             if key not in ['report_id', 'search', 'countries', 'categories', 'filter_groups', 'page', 'page_size', 'ordering']:
                 value = request.query_params.get(key)
-                if value in ['true', 'True', True]:
-                    filtered_queryset = filtered_queryset.filter(
-                        production_sites__versions__is_current=True,
-                        **{f'production_sites__versions__{key}': True}
-                    ).distinct()
-                elif value in ['false', 'False', False]:
-                    filtered_queryset = filtered_queryset.filter(
-                        production_sites__versions__is_current=True,
-                        **{f'production_sites__versions__{key}': False}
-                    ).distinct()
+                if value in ['true', 'True']:
+                    site_bits = index.field_bits(key, True)
+                elif value in ['false', 'False']:
+                    site_bits = index.field_bits(key, False)
+                else:
+                    continue
+                if site_bits is not None:
+                    filtered_companies &= index.sites_to_companies(site_bits)
 
         # Calculate stats
-        total_count = filtered_queryset.count()
-        countries_count = filtered_queryset.values('country').distinct().count()
-
-        # Top countries (from filtered queryset) - top 10 for charts
-        top_countries = list(
-            filtered_queryset.values('country')
-            .annotate(count=Count('id'))
-            .filter(country__isnull=False, country__gt='')
-            .order_by('-count')[:10]
-        )
-
-        # ALL countries with counts (for map and full display)
-        all_countries_with_counts = list(
-            filtered_queryset.values('country')
-            .annotate(count=Count('id'))
-            .filter(country__isnull=False, country__gt='')
-            .order_by('-count')
-        )
-
-        # Category breakdown (from filtered queryset)
-        categories = list(
-            filtered_queryset.filter(production_sites__versions__is_current=True)
-            .values('production_sites__category')
-            .annotate(count=Count('id', distinct=True))
-            .order_by('-count')
-        )
-        # Rename key for consistency
-        categories = [
-            {'category': item['production_sites__category'], 'count': item['count']}
-            for item in categories if item['production_sites__category']
+        country_counts = index.company_counts_by_country(filtered_companies)
+        total_count = filtered_companies.bit_count()
+        countries_count = len(country_counts)
+
+        # ALL countries with counts (for map and full display), top 10 for charts
+        all_countries_with_counts = [
+            {'country': country, 'count': count}
+            for country, count in sorted(country_counts.items(), key=lambda x: (-x[1], x[0] or ''))
+            if country
         ]
+        top_countries = all_countries_with_counts[:10]
 
-        return Response({
-            'total_count': total_count,
-            'countries_count': countries_count,
-            'top_countries': top_countries,
-            'all_countries_with_counts': all_countries_with_counts,  # All countries for map (filtered)
-            'all_countries': all_countries,
-            'all_countries_with_counts_for_sidebar': all_countries_with_counts_for_sidebar,  # For sidebar checkboxes (base)
-            'available_categories': available_categories,
-            'available_categories_with_counts': available_categories_with_counts,  # For sidebar checkboxes (base)
-            'categories': categories,
-        })
-
-
-class ClientFilterOptionsAPIView(APIView):
-    """
-    Returns available filter options for a specific report.
-    NOW USES: Company Database (ProductionSiteVersion)
-    """
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        # Only allow clients to access this
-        if request.user.role != UserRole.CLIENT:
-            return Response(
-                {"error": "Only clients can access this endpoint"},
-                status=status.HTTP_403_FORBIDDEN
-            )
-
-        report_id = request.query_params.get('report_id')
-
-        if not report_id:
-            return Response(
-                {"error": "report_id is required"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            # Verify the client has an active subscription
-            today = timezone.now().date()
-            subscription = Subscription.objects.get(
-                client=request.user,
-                report__report_id=report_id,
-                status=SubscriptionStatus.ACTIVE,
-                start_date__lte=today,
-                end_date__gte=today
-            )
-        except Subscription.DoesNotExist:
-            return Response(
-                {"error": "No active subscription found for this report"},
-                status=status.HTTP_403_FORBIDDEN
+        # Category breakdown (from filtered set)
+        categories = [
+            {'category': category, 'count': count}
+            for category, count in sorted(
+                index.company_counts_by_category(filtered_companies).items(), key=lambda x: (-x[1], x[0])
             )
+        ]
 
-        # Get the report and its filter criteria
-        report = subscription.report
-        filter_criteria = report.filter_criteria or {}
-
-        # Build queryset - start with current AND active versions
-        queryset = ProductionSiteVersion.objects.filter(is_current=True, is_active=True)
-
-        # Exclude deleted companies
-        queryset = queryset.exclude(production_site__company__status=CompanyStatus.DELETED)
-
-        # Apply report's status filter
-        if 'status' in filter_criteria:
-            status_filter = filter_criteria['status']
-            if isinstance(status_filter, list) and len(status_filter) > 0:
-                queryset = queryset.filter(production_site__company__status__in=status_filter)
-            elif isinstance(status_filter, str) and status_filter:
-                queryset = queryset.filter(production_site__company__status=status_filter)
-
-        # Apply report's filter groups
-        if 'filter_groups' in filter_criteria:
-            filter_groups = filter_criteria['filter_groups']
-            if isinstance(filter_groups, list):
-                for group in filter_groups:
-                    if not isinstance(group, dict):
-                        continue
-
-                    filters = group.get('filters', {})
-                    technical_filters = group.get('technicalFilters', {})
-
-                    if not filters and not technical_filters:
-                        continue
-
-                    group_query = Q()
-
-                    # Handle boolean filters
-                    for field_name, field_value in filters.items():
-                        try:
-                            ProductionSiteVersion._meta.get_field(field_name)
-                            if field_value is True:
-                                group_query |= Q(**{field_name: True})
-                            elif field_value is False:
-                                group_query |= Q(**{field_name: False}) | Q(**{f'{field_name}__isnull': True})
-                        except Exception:
-                            continue
-
-                    # Handle technical filters
-                    for field_name, filter_config in technical_filters.items():
-                        if not isinstance(filter_config, dict):
-                            continue
-
-                        try:
-                            field = ProductionSiteVersion._meta.get_field(field_name)
-                            mode = filter_config.get('mode', 'range')
-
-                            if mode == 'equals':
-                                equals_val = filter_config.get('equals', '')
-                                if equals_val != '' and equals_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            equals_val = float(equals_val)
-                                        else:
-                                            equals_val = int(equals_val)
-                                        group_query |= Q(**{field_name: equals_val})
-                                    except (ValueError, TypeError):
-                                        pass
+        return Response({
+            'total_count': total_count,
+            'countries_count': countries_count,
+            'top_countries': top_countries,
+            'all_countries_with_counts': all_countries_with_counts,  # All countries for map (filtered)
+            'all_countries': all_countries,
+            'all_countries_with_counts_for_sidebar': all_countries_with_counts_for_sidebar,  # For sidebar checkboxes (base)
+            'available_categories': available_categories,
+            'available_categories_with_counts': available_categories_with_counts,  # For sidebar checkboxes (base)
+            'categories': categories,
+        })
 
-                            elif mode == 'range':
-                                min_val = filter_config.get('min', '')
-                                max_val = filter_config.get('max', '')
-                                range_query = Q()
 
-                                if min_val != '' and min_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            min_val = float(min_val)
-                                        else:
-                                            min_val = int(min_val)
-                                        range_query &= Q(**{f'{field_name}__gte': min_val})
-                                    except (ValueError, TypeError):
-                                        pass
+class ClientFilterOptionsAPIView(APIView):
+    """
+    Returns available filter options for a specific report.
+    NOW USES: Company Database (ProductionSiteVersion)
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_scope = 'report_stats'
 
-                                if max_val != '' and max_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            max_val = float(max_val)
-                                        else:
-                                            max_val = int(max_val)
-                                        range_query &= Q(**{f'{field_name}__lte': max_val})
-                                    except (ValueError, TypeError):
-                                        pass
+    def get(self, request):
+        # Only allow clients to access this
+        if request.user.role != UserRole.CLIENT:
+            return Response(
+                {"error": "Only clients can access this endpoint"},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
-                                if range_query:
-                                    group_query |= range_query
-                        except Exception:
-                            continue
+        report_id = request.query_params.get('report_id')
 
-                    if group_query:
-                        queryset = queryset.filter(group_query)
+        if not report_id:
+            return Response(
+                {"error": "report_id is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Apply report's category filters (handle both singular 'category' and plural 'categories' keys)
-        report_categories = None
-        if 'categories' in filter_criteria:
-            report_categories = filter_criteria['categories']
-        elif 'category' in filter_criteria:
-            report_categories = filter_criteria['category']
-        
-        if report_categories:
-            if isinstance(report_categories, list) and len(report_categories) > 0:
-                queryset = queryset.filter(production_site__category__in=report_categories)
-            elif isinstance(report_categories, str) and report_categories:
-                queryset = queryset.filter(production_site__category=report_categories)
+        try:
+            # Verify the client has an active subscription
+            today = timezone.now().date()
+            subscription = Subscription.objects.get(
+                client=request.user,
+                report__report_id=report_id,
+                status=SubscriptionStatus.ACTIVE,
+                start_date__lte=today,
+                end_date__gte=today
+            )
+        except Subscription.DoesNotExist:
+            return Response(
+                {"error": "No active subscription found for this report"},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
-        # Apply report's country filters
-        if 'country' in filter_criteria:
-            countries = filter_criteria['country']
-            if isinstance(countries, list) and len(countries) > 0:
-                queryset = queryset.filter(production_site__company__country__in=countries)
-            elif isinstance(countries, str) and countries:
-                queryset = queryset.filter(production_site__company__country=countries)
+        # Get the report and its filter criteria
+        report = subscription.report
+        filter_criteria = report.filter_criteria or {}
+
+        # Current AND active sites of non-deleted companies matching the
+        # report criteria, evaluated on the facet bitmap index
+        index = FacetIndexService.get_index()
+        sites = index.filter_sites(filter_criteria)
 
-        # Get categories from the filtered queryset
-        categories = list(queryset.values_list('production_site__category', flat=True).distinct())
+        # Get categories present in the filtered sites
+        categories = index.site_categories_present(sites)
 
         # Map categories to their fields (ordered lists)
         category_fields_map = {
@@ -1146,25 +654,22 @@ class ClientFilterOptionsAPIView(APIView):
             for field in ProductionSiteVersion._meta.fields
         }
 
+        # Count every boolean field with one AND + popcount each
+        counts = index.count_fields(sites, ordered_fields)
+
         # Build filter options in the order defined by fields.py
         # IMPORTANT: Include ALL fields for the category, even if count is 0
         # This matches Admin Portal behavior where all category fields are shown
         filter_options = []
         for field in ordered_fields:
             # Skip non-boolean fields
-            try:
-                field_obj = ProductionSiteVersion._meta.get_field(field)
-                if field_obj.get_internal_type() != 'BooleanField':
-                    continue
-            except:
+            if field not in counts:
                 continue
 
-            count = queryset.filter(**{field: True}).count()
-            # Include ALL fields regardless of count (matching Admin Portal behavior)
             filter_options.append({
                 'field': field,
                 'label': field_labels.get(field, field.replace('_', ' ').title()),
-                'count': count
+                'count': counts[field]
             })
 
         # NOTE: Do NOT sort by count - maintain fields.py order
@@ -1182,6 +687,7 @@ class ClientTechnicalFilterOptionsAPIView(APIView):
     IMPORTANT: Only returns technical fields relevant to the report's categories.
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'report_stats'
     
     # Map categories to their fields (from fields.py)
     CATEGORY_FIELD_MAP = {
@@ -1257,10 +763,14 @@ class ClientTechnicalFilterOptionsAPIView(APIView):
         'twin_screws',
     ]
 
-    def get(self, request):
+    def get_subscribed_report(self, request):
+        """
+        Returns (report, None) for a report the client has an active
+        subscription to, or (None, error_response).
+        """
         # Only allow clients to access this
         if request.user.role != UserRole.CLIENT:
-            return Response(
+            return None, Response(
                 {"error": "Only clients can access this endpoint"},
                 status=status.HTTP_403_FORBIDDEN
             )
@@ -1268,7 +778,7 @@ class ClientTechnicalFilterOptionsAPIView(APIView):
         report_id = request.query_params.get('report_id')
 
         if not report_id:
-            return Response(
+            return None, Response(
                 {"error": "report_id is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
@@ -1276,7 +786,7 @@ class ClientTechnicalFilterOptionsAPIView(APIView):
         try:
             # Verify the client has an active subscription
             today = timezone.now().date()
-            subscription = Subscription.objects.get(
+            subscription = Subscription.objects.select_related('report').get(
                 client=request.user,
                 report__report_id=report_id,
                 status=SubscriptionStatus.ACTIVE,
@@ -1284,136 +794,18 @@ class ClientTechnicalFilterOptionsAPIView(APIView):
                 end_date__gte=today
             )
         except Subscription.DoesNotExist:
-            return Response(
+            return None, Response(
                 {"error": "No active subscription found for this report"},
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        # Get the report and its filter criteria
-        report = subscription.report
-        filter_criteria = report.filter_criteria or {}
-
-        # Build queryset - start with current AND active versions
-        queryset = ProductionSiteVersion.objects.filter(is_current=True, is_active=True)
-
-        # Exclude deleted companies
-        queryset = queryset.exclude(production_site__company__status=CompanyStatus.DELETED)
-
-        # Apply report's status filter
-        if 'status' in filter_criteria:
-            status_filter = filter_criteria['status']
-            if isinstance(status_filter, list) and len(status_filter) > 0:
-                queryset = queryset.filter(production_site__company__status__in=status_filter)
-            elif isinstance(status_filter, str) and status_filter:
-                queryset = queryset.filter(production_site__company__status=status_filter)
-
-        # Apply report's filter groups
-        if 'filter_groups' in filter_criteria:
-            filter_groups = filter_criteria['filter_groups']
-            if isinstance(filter_groups, list):
-                for group in filter_groups:
-                    if not isinstance(group, dict):
-                        continue
-
-                    filters = group.get('filters', {})
-                    technical_filters = group.get('technicalFilters', {})
-
-                    if not filters and not technical_filters:
-                        continue
-
-                    group_query = Q()
-
-                    # Handle boolean filters
-                    for field_name, field_value in filters.items():
-                        try:
-                            ProductionSiteVersion._meta.get_field(field_name)
-                            if field_value is True:
-                                group_query |= Q(**{field_name: True})
-                            elif field_value is False:
-                                group_query |= Q(**{field_name: False}) | Q(**{f'{field_name}__isnull': True})
-                        except Exception:
-                            continue
-
-                    # Handle technical filters
-                    for field_name, filter_config in technical_filters.items():
-                        if not isinstance(filter_config, dict):
-                            continue
-
-                        try:
-                            field = ProductionSiteVersion._meta.get_field(field_name)
-                            mode = filter_config.get('mode', 'range')
-
-                            if mode == 'equals':
-                                equals_val = filter_config.get('equals', '')
-                                if equals_val != '' and equals_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            equals_val = float(equals_val)
-                                        else:
-                                            equals_val = int(equals_val)
-                                        group_query |= Q(**{field_name: equals_val})
-                                    except (ValueError, TypeError):
-                                        pass
-
-                            elif mode == 'range':
-                                min_val = filter_config.get('min', '')
-                                max_val = filter_config.get('max', '')
-                                range_query = Q()
-
-                                if min_val != '' and min_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            min_val = float(min_val)
-                                        else:
-                                            min_val = int(min_val)
-                                        range_query &= Q(**{f'{field_name}__gte': min_val})
-                                    except (ValueError, TypeError):
-                                        pass
-
-                                if max_val != '' and max_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            max_val = float(max_val)
-                                        else:
-                                            max_val = int(max_val)
-                                        range_query &= Q(**{f'{field_name}__lte': max_val})
-                                    except (ValueError, TypeError):
-                                        pass
-
-                                if range_query:
-                                    group_query |= range_query
-                        except Exception:
-                            continue
-
-                    if group_query:
-                        queryset = queryset.filter(group_query)
-
-        # Apply report's category filters
-        if 'categories' in filter_criteria:
-            categories = filter_criteria['categories']
-            if isinstance(categories, list) and len(categories) > 0:
-                queryset = queryset.filter(production_site__category__in=categories)
-            elif isinstance(categories, str) and categories:
-                queryset = queryset.filter(production_site__category=categories)
-
-        # Apply report's country filters
-        if 'country' in filter_criteria:
-            countries = filter_criteria['country']
-            if isinstance(countries, list) and len(countries) > 0:
-                queryset = queryset.filter(production_site__company__country__in=countries)
-            elif isinstance(countries, str) and countries:
-                queryset = queryset.filter(production_site__company__country=countries)
-
-        # Get field labels
-        field_labels = {
-            field.name: field.verbose_name
-            for field in ProductionSiteVersion._meta.fields
-        }
+        return subscription.report, None
 
-        # ========================================
-        # CRITICAL: Filter technical fields by report's categories
-        # Only show fields relevant to the categories in this report
-        # ========================================
+    def get_relevant_fields(self, filter_criteria):
+        """
+        CRITICAL: Filter technical fields by report's categories.
+        Only fields relevant to the categories in this report, in TECHNICAL_FIELDS order.
+        """
         report_categories = []
         if 'categories' in filter_criteria:
             cats = filter_criteria['categories']
@@ -1437,50 +829,86 @@ class ClientTechnicalFilterOptionsAPIView(APIView):
             for fields_list in self.CATEGORY_FIELD_MAP.values():
                 valid_category_fields.update(fields_list)
         
-        # Filter TECHNICAL_FIELDS to only include relevant fields for the report's categories
-        relevant_technical_fields = [
+        return [
             field for field in self.TECHNICAL_FIELDS
             if field in valid_category_fields
         ]
 
-        # Build technical filter options using filtered TECHNICAL_FIELDS order
-        # This ensures consistent ordering with Admin Portal (polymer_range_number first)
-        technical_filter_options = []
-        for field in relevant_technical_fields:
-            # Only include IntegerField and FloatField
-            try:
-                field_obj = ProductionSiteVersion._meta.get_field(field)
-                field_type = field_obj.get_internal_type()
+    def get(self, request):
+        report, error_response = self.get_subscribed_report(request)
+        if error_response:
+            return error_response
 
-                if field_type not in ['IntegerField', 'FloatField', 'PositiveIntegerField']:
-                    continue
-            except:
-                continue
+        filter_criteria = report.filter_criteria or {}
+        relevant_technical_fields = self.get_relevant_fields(filter_criteria)
 
-            # Get min and max values for the field
-            aggregation = queryset.aggregate(
-                min_value=models.Min(field),
-                max_value=models.Max(field)
-            )
+        # Min/max of every field over the report's current AND active sites,
+        # computed in one pass and cached per report generation
+        stats = RangeStatsService.get_stats(
+            relevant_technical_fields, filter_criteria=filter_criteria, report=report
+        )
 
-            technical_filter_options.append({
-                'field': field,
-                'label': field_labels.get(field, field.replace('_', ' ').title()),
-                'type': field_type,
-                'min': aggregation['min_value'],
-                'max': aggregation['max_value'],
-            })
+        # Only include IntegerField and FloatField, in TECHNICAL_FIELDS order
+        technical_filter_options = [
+            {
+                'field': item['field'],
+                'label': item['label'],
+                'type': item['type'],
+                'min': item['min'],
+                'max': item['max'],
+            }
+            for item in stats
+            if item['type'] in RangeStatsService.NUMERIC_TYPES
+        ]
 
         # NOTE: Do NOT sort by label - maintain fields.py order
         return Response(technical_filter_options)
 
 
+class ClientRangeStatsAPIView(ClientTechnicalFilterOptionsAPIView):
+    """
+    Range statistics for a client report's technical filter fields: min, max,
+    non-null / null counts and a histogram per field, so range sliders can
+    show distributions.
+
+    Query params:
+        report_id: subscribed report (required)
+        bins: number of histogram bins (default 10, max 50)
+        histogram: 'equi_width' (default) or 'quantile'
+    """
+
+    def get(self, request):
+        report, error_response = self.get_subscribed_report(request)
+        if error_response:
+            return error_response
+
+        filter_criteria = report.filter_criteria or {}
+
+        try:
+            bins = int(request.query_params.get('bins', RangeStatsService.DEFAULT_BINS))
+        except (TypeError, ValueError):
+            bins = RangeStatsService.DEFAULT_BINS
+
+        stats = RangeStatsService.get_stats(
+            self.get_relevant_fields(filter_criteria),
+            filter_criteria=filter_criteria,
+            report=report,
+            bins=bins,
+            mode=request.query_params.get('histogram', RangeStatsService.MODE_EQUI_WIDTH),
+        )
+        return Response([item for item in stats if item['type'] in RangeStatsService.NUMERIC_TYPES])
+
+
 class ClientReportExportAPIView(APIView):
     """
     Export client report data to CSV.
     NOW USES: Company Database
+
+    Throttled by exported rows (charged once the file is written).
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'report_export'
+    THROTTLE_ROWS_PER_TOKEN = 1000
 
     def get(self, request):
         # Only allow clients to access this
@@ -1655,7 +1083,7 @@ class ClientReportExportAPIView(APIView):
         # Apply user filters (search, countries, etc.)
         search = request.query_params.get('search', '').strip()
         if search:
-            queryset = queryset.filter(company_name__icontains=search)
+            queryset = CompanySearchService.filter(queryset, search)
 
         countries_param = request.query_params.get('countries')
         if countries_param:
@@ -1675,7 +1103,9 @@ class ClientReportExportAPIView(APIView):
 
         # Write data
         from .models import CompanyCategory
+        rows = 0
         for company in queryset:
+            rows += 1
             # Get categories from production sites
             categories = list(company.production_sites.values_list('category', flat=True).distinct())
             category_names = [dict(CompanyCategory.choices).get(cat, cat) for cat in categories]
@@ -1697,8 +1127,9 @@ class ClientReportExportAPIView(APIView):
         writer.writerow(['Report', report.title])
         writer.writerow(['Exported by', request.user.username])
         writer.writerow(['Export date', timezone.now().strftime('%Y-%m-%d %H:%M:%S')])
-        writer.writerow(['Total records', queryset.count()])
+        writer.writerow(['Total records', rows])
 
+        charge(request, self, rows // self.THROTTLE_ROWS_PER_TOKEN)
         return response
 
 
@@ -1910,6 +1341,7 @@ class ClientMaterialStatsAPIView(APIView):
     This endpoint calculates material counts from filtered data.
     """
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'report_stats'
 
     def get(self, request):
         # Only allow clients to access this
@@ -2106,10 +1538,7 @@ class ClientMaterialStatsAPIView(APIView):
         # User's search filter
         search = request.query_params.get('search', '').strip()
         if search:
-            queryset = queryset.filter(
-                Q(production_site__company__company_name__icontains=search) |
-                Q(production_site__company__country__icontains=search)
-            )
+            queryset = CompanySearchService.filter(queryset, search, company_path='production_site__company')
 
         # User's country filter
         countries_param = request.query_params.get('countries')
@@ -2526,16 +1955,10 @@ class ClientRecordDetailAPIView(APIView):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        # Find the production site by site_id (UUID) field
+        # Find the production site by site_id (UUID) field; the record is
+        # built from its company's cached detail document
         try:
-            production_site = ProductionSite.objects.select_related('company').prefetch_related(
-                'versions'
-            ).get(site_id=record_id)
-        except ProductionSite.DoesNotExist:
-            return Response(
-                {'error': 'Record not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+            company, record = CompanyDetailService.get_site_record(record_id)
         except Exception as e:
             # Handle invalid UUID format
             return Response(
@@ -2543,13 +1966,11 @@ class ClientRecordDetailAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Verify the company is not deleted
-        if production_site.company.status == CompanyStatus.DELETED:
+        # Verify the record exists and the company is not deleted
+        if company is None or record is None or company.status == CompanyStatus.DELETED:
             return Response(
                 {'error': 'Record not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Serialize the record using the same serializer as the list view
-        serializer = ClientReportRecordSerializer(production_site)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(record)
\ No newline at end of file
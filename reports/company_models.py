@@ -25,6 +25,29 @@ from django.db.models import Q
 User = get_user_model()
 
 
+# =============================================================================
+# QUERY HELPERS
+# =============================================================================
+
+class GroupConcat(models.Aggregate):
+    """
+    Comma-separated list of (distinct) values: STRING_AGG on PostgreSQL,
+    GROUP_CONCAT on SQLite / MySQL. Values must not contain commas.
+    """
+    function = 'GROUP_CONCAT'
+    template = '%(function)s(%(distinct)s%(expressions)s)'
+    allow_distinct = True
+    output_field = models.TextField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            function='STRING_AGG',
+            template="%(function)s(%(distinct)s%(expressions)s::text, ',')",
+            **extra_context
+        )
+
+
 # =============================================================================
 # STATUS CHOICES
 # =============================================================================
@@ -225,6 +248,11 @@ class Company(models.Model):
     
     def _generate_unique_key(self):
         """Generate unique key like ZGM-00001"""
+        return self.allocate_unique_keys(1)[0]
+
+    @classmethod
+    def allocate_unique_keys(cls, count):
+        """Next `count` unique keys (for companies created with bulk_create)"""
         # Use a lock-safe approach
         from django.db import connection
         
@@ -247,7 +275,7 @@ class Company(models.Model):
         else:
             new_num = 1
         
-        return f"ZGM-{str(new_num).zfill(5)}"
+        return [f"ZGM-{str(num).zfill(5)}" for num in range(new_num, new_num + count)]
     
     # ==========================================================================
     # PROPERTIES & METHODS
@@ -312,6 +340,22 @@ class Company(models.Model):
             created_by=created_by
         )
         
+        version = self.build_initial_version(site, created_by, version_data)
+        version.save()
+        
+        return site, version
+    
+    def build_initial_version(self, site, created_by, version_data=None):
+        """
+        Build (without saving) the Initial Version of a production site,
+        including the full company / contact / notes / technical snapshots.
+        
+        Used by add_production_site and by the batch transfer, which saves
+        the versions with bulk_create.
+        
+        Returns:
+            ProductionSiteVersion (unsaved)
+        """
         # Clean version_data - convert empty strings to appropriate defaults
         version_data = version_data or {}
         cleaned_version_data = {}
@@ -382,9 +426,9 @@ class Company(models.Model):
             contact_data_snapshot[f'surname_{i}'] = getattr(self, f'surname_{i}', '') or ''
             contact_data_snapshot[f'position_{i}'] = getattr(self, f'position_{i}', '') or ''
         
-        # Notes Snapshot
+        # Notes Snapshot (a company that is not saved yet has no notes)
         notes_snapshot = []
-        for note in self.notes.all():
+        for note in (self.notes.all() if self.pk else []):
             notes_snapshot.append({
                 'note_id': str(note.note_id),
                 'note_type': note.note_type,
@@ -440,8 +484,8 @@ class Company(models.Model):
                     if callable(technical_data_snapshot[field_name]):
                         technical_data_snapshot[field_name] = None
         
-        # Create Initial Version (version_number=0, is_initial=True)
-        version = ProductionSiteVersion.objects.create(
+        # Initial Version (version_number=0, is_initial=True)
+        return ProductionSiteVersion(
             production_site=site,
             version_number=0,
             is_current=True,
@@ -455,8 +499,6 @@ class Company(models.Model):
             technical_data_snapshot=technical_data_snapshot,
             **cleaned_version_data
         )
-        
-        return site, version
 
 
 # =============================================================================
@@ -1412,4 +1454,52 @@ class CompanyHistory(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.get_action_display()} - {self.company.company_name} by {self.performed_by}"
\ No newline at end of file
+        return f"{self.get_action_display()} - {self.company.company_name} by {self.performed_by}"
+
+# =============================================================================
+# PRODUCTION SITE CHANGE LOG (Client Change Feed)
+# =============================================================================
+
+class SiteChangeAction(models.TextChoices):
+    UPSERT = 'UPSERT', 'Added / Modified'
+    DELETE = 'DELETE', 'Deleted'
+
+
+class ProductionSiteChange(models.Model):
+    """
+    Append-only log of production site changes, read by the client change
+    feed (reports/services/change_feed.py).
+
+    One row is written per changed production site whenever the site, its
+    company or one of its versions is written. change_id is the monotonic
+    cursor of the feed; the site is referenced by value so deletions stay
+    in the log.
+    """
+
+    change_id = models.BigAutoField(primary_key=True)
+
+    production_site_pk = models.BigIntegerField(
+        help_text="Primary key of the changed production site"
+    )
+
+    site_id = models.UUIDField(
+        help_text="Public ID of the changed production site (record id in client reports)"
+    )
+
+    action = models.CharField(
+        max_length=10,
+        choices=SiteChangeAction.choices,
+        default=SiteChangeAction.UPSERT
+    )
+
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['change_id']
+        indexes = [
+            models.Index(fields=['changed_at', 'change_id']),
+            models.Index(fields=['production_site_pk', 'change_id']),
+        ]
+
+    def __str__(self):
+        return f"#{self.change_id} {self.get_action_display()} {self.site_id}"
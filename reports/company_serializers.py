@@ -17,10 +17,12 @@ The serializers support the new company-centric architecture where:
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 from .company_models import (
     Company, ProductionSite, ProductionSiteVersion,
-    CompanyNote, CompanyHistory, CompanyStatus
+    CompanyNote, CompanyHistory, CompanyStatus, GroupConcat
 )
 from .models import CompanyCategory
 from .fields import (
@@ -159,14 +161,23 @@ class ProductionSiteVersionDetailSerializer(serializers.ModelSerializer):
         return category_field_map.get(category, [])
 
 
+# Frozen company/contact/notes/technical copies stored on every version.
+# Large and only needed by the versions page, so never sent with company detail.
+VERSION_SNAPSHOT_FIELDS = [
+    'company_data_snapshot', 'contact_data_snapshot',
+    'notes_snapshot', 'technical_data_snapshot',
+]
+
+
 class ProductionSiteVersionFullSerializer(serializers.ModelSerializer):
     """
     Full serializer for versions - includes ALL technical fields.
     Used when we need to display version data in company detail modal.
+    Snapshot JSON fields are left out (see VERSION_SNAPSHOT_FIELDS).
     """
     class Meta:
         model = ProductionSiteVersion
-        fields = '__all__'
+        exclude = VERSION_SNAPSHOT_FIELDS
 
 
 class ProductionSiteVersionCreateSerializer(serializers.ModelSerializer):
@@ -181,13 +192,13 @@ class ProductionSiteVersionCreateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         from django.db.models import Max
-        from django.db import transaction
+        from .services.change_feed import ChangeFeedService
         
         production_site = self.context['production_site']
         user = self.context['request'].user
         company = production_site.company
         
-        with transaction.atomic():
+        with ChangeFeedService.atomic():
             # Get current version to copy data from (this is always the Initial Version)
             current_version = production_site.current_version
             
@@ -331,9 +342,9 @@ class ProductionSiteWithVersionDataSerializer(serializers.ModelSerializer):
     Used in company detail modal to show technical fields.
     """
     category_display = serializers.CharField(source='get_category_display', read_only=True)
-    current_version = ProductionSiteVersionFullSerializer(read_only=True)
-    is_active = serializers.BooleanField(read_only=True)
-    version_count = serializers.IntegerField(read_only=True)
+    current_version = serializers.SerializerMethodField()
+    is_active = serializers.SerializerMethodField()
+    version_count = serializers.SerializerMethodField()
     
     class Meta:
         model = ProductionSite
@@ -344,6 +355,25 @@ class ProductionSiteWithVersionDataSerializer(serializers.ModelSerializer):
             'current_version'
         ]
         read_only_fields = fields
+    
+    def _get_current_version(self, obj):
+        """Current version from prefetched data (CompanyDetailService) or query"""
+        if hasattr(obj, 'prefetched_current_version'):
+            return obj.prefetched_current_version[0] if obj.prefetched_current_version else None
+        return obj.current_version
+    
+    def get_current_version(self, obj):
+        version = self._get_current_version(obj)
+        return ProductionSiteVersionFullSerializer(version).data if version else None
+    
+    def get_is_active(self, obj):
+        version = self._get_current_version(obj)
+        return bool(version and version.is_active)
+    
+    def get_version_count(self, obj):
+        if hasattr(obj, 'num_versions'):
+            return obj.num_versions
+        return obj.version_count
 
 
 class ProductionSiteDetailSerializer(serializers.ModelSerializer):
@@ -374,8 +404,8 @@ class ProductionSiteDetailSerializer(serializers.ModelSerializer):
 class CompanyListSerializer(serializers.ModelSerializer):
     """List serializer for companies (optimized for list views)
     
-    OPTIMIZED: Uses prefetched data and annotations to avoid N+1 queries.
-    When used with properly optimized queryset, reduces database queries significantly.
+    OPTIMIZED: Reads category lists and site count from annotations; pass
+    the queryset through annotate_queryset() to serialize a page in one query.
     """
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     active_categories = serializers.SerializerMethodField()
@@ -395,6 +425,32 @@ class CompanyListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
     
+    @classmethod
+    def annotate_queryset(cls, queryset):
+        """
+        Annotate a Company queryset with everything this serializer reads, so
+        a page of companies is fetched in one query: category lists and the
+        site count come from correlated aggregates (STRING_AGG / GROUP_CONCAT).
+        """
+        sites = ProductionSite.objects.filter(company=OuterRef('pk')).order_by().values('company')
+        active_sites = sites.filter(versions__is_current=True, versions__is_active=True)
+
+        return queryset.annotate(
+            all_categories_agg=Subquery(
+                sites.annotate(categories=GroupConcat('category', distinct=True)).values('categories')
+            ),
+            active_categories_agg=Subquery(
+                active_sites.annotate(categories=GroupConcat('category', distinct=True)).values('categories')
+            ),
+            production_site_count_annotated=Coalesce(
+                Subquery(sites.annotate(count=Count('pk')).values('count')), 0
+            ),
+        )
+
+    @staticmethod
+    def _split_categories(value):
+        return sorted(value.split(',')) if value else []
+
     def get_production_site_count(self, obj):
         # Use annotated value if available, otherwise fall back to count()
         if hasattr(obj, 'production_site_count_annotated'):
@@ -402,22 +458,15 @@ class CompanyListSerializer(serializers.ModelSerializer):
         return obj.production_sites.count()
     
     def get_all_categories(self, obj):
-        # Use prefetched data if available
-        if hasattr(obj, 'prefetched_sites'):
-            return list(set(site.category for site in obj.prefetched_sites))
+        # Use annotated value if available (see annotate_queryset)
+        if hasattr(obj, 'all_categories_agg'):
+            return self._split_categories(obj.all_categories_agg)
         return list(obj.production_sites.values_list('category', flat=True).distinct())
     
     def get_active_categories(self, obj):
-        # Use prefetched data if available
-        if hasattr(obj, 'prefetched_sites'):
-            active = []
-            for site in obj.prefetched_sites:
-                if hasattr(site, 'current_versions_list') and site.current_versions_list:
-                    for version in site.current_versions_list:
-                        if version.is_active:
-                            active.append(site.category)
-                            break
-            return list(set(active))
+        # Use annotated value if available (see annotate_queryset)
+        if hasattr(obj, 'active_categories_agg'):
+            return self._split_categories(obj.active_categories_agg)
         # Fallback to original method
         return list(
             obj.production_sites.filter(
@@ -432,10 +481,10 @@ class CompanyDetailSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     # Use the new serializer that includes full version data
     production_sites = ProductionSiteWithVersionDataSerializer(many=True, read_only=True)
-    notes = CompanyNoteSerializer(many=True, read_only=True)
+    notes = serializers.SerializerMethodField()
     history = serializers.SerializerMethodField()
-    active_categories = serializers.ListField(read_only=True)
-    all_categories = serializers.ListField(read_only=True)
+    active_categories = serializers.SerializerMethodField()
+    all_categories = serializers.SerializerMethodField()
     created_by_info = UserBasicSerializer(source='created_by', read_only=True)
     last_modified_by_info = UserBasicSerializer(source='last_modified_by', read_only=True)
     
@@ -483,10 +532,39 @@ class CompanyDetailSerializer(serializers.ModelSerializer):
             'legacy_factory_ids'
         ]
     
+    def _get_sites(self, obj):
+        """Prefetched production sites, or None"""
+        return getattr(obj, '_prefetched_objects_cache', {}).get('production_sites')
+    
+    def get_notes(self, obj):
+        if hasattr(obj, 'recent_notes'):
+            notes = obj.recent_notes
+        else:
+            notes = obj.notes.select_related('created_by')
+        return CompanyNoteSerializer(notes, many=True).data
+    
     def get_history(self, obj):
         # Limit to recent history
-        history = obj.history.all()[:20]
+        if hasattr(obj, 'recent_history'):
+            history = obj.recent_history
+        else:
+            history = obj.history.select_related('performed_by')[:20]
         return CompanyHistorySerializer(history, many=True).data
+    
+    def get_all_categories(self, obj):
+        sites = self._get_sites(obj)
+        if sites is None:
+            return obj.all_categories
+        return list(dict.fromkeys(site.category for site in sites))
+    
+    def get_active_categories(self, obj):
+        sites = self._get_sites(obj)
+        if sites is None or not all(hasattr(site, 'prefetched_current_version') for site in sites):
+            return obj.active_categories
+        return list(dict.fromkeys(
+            site.category for site in sites
+            if site.prefetched_current_version and site.prefetched_current_version[0].is_active
+        ))
 
 
 class CompanyCreateSerializer(serializers.ModelSerializer):
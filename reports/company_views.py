@@ -48,6 +48,9 @@ from .company_serializers import (
     DuplicateCheckSerializer, DuplicateCheckResponseSerializer,
     BulkStatusUpdateSerializer, AddProductionSiteSerializer
 )
+from .filters import CompanySearchFilter, CompanySearchOrderingFilter
+from .services.company_search import CompanySearchService
+from .services.company_detail import CompanyDetailService
 from .permissions import IsStaffOnly, CanVerifySites
 from .pagination import CustomPagination
 from accounts.models import UserRole
@@ -66,13 +69,13 @@ class CompanyListCreateAPIView(generics.ListCreateAPIView):
     - status: Complete, Incomplete, Deleted (comma-separated)
     - country: Country name
     - category: Filter by production category
-    - search: Search company name
+    - search: Full-text search (name, addresses, region, country, website, contacts)
     - ordering: company_name, -company_name, created_at, etc.
+      (default: relevance when searching, otherwise -updated_at)
     """
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['company_name']
+    filter_backends = [DjangoFilterBackend, CompanySearchFilter, CompanySearchOrderingFilter]
     ordering_fields = ['company_name', 'country', 'created_at', 'updated_at', 'unique_key']
     ordering = ['-updated_at']
     
@@ -84,9 +87,7 @@ class CompanyListCreateAPIView(generics.ListCreateAPIView):
     def get_queryset(self):
         import json
         
-        queryset = Company.objects.prefetch_related(
-            'production_sites'
-        ).select_related('created_by', 'last_modified_by')
+        queryset = Company.objects.all()
         
         # Filter by status (supports multiple)
         status_param = self.request.query_params.get('status')
@@ -230,7 +231,8 @@ class CompanyListCreateAPIView(generics.ListCreateAPIView):
             except json.JSONDecodeError:
                 pass  # Invalid JSON, ignore
         
-        return queryset
+        # Category lists and site count as annotations (one query per page)
+        return CompanyListSerializer.annotate_queryset(queryset)
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -286,19 +288,12 @@ class CompanyDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
         return CompanyDetailSerializer
     
     def get_queryset(self):
-        return Company.objects.prefetch_related(
-            Prefetch(
-                'production_sites',
-                queryset=ProductionSite.objects.prefetch_related(
-                    Prefetch(
-                        'versions',
-                        queryset=ProductionSiteVersion.objects.select_related('created_by', 'verified_by')
-                    )
-                )
-            ),
-            'notes',
-            'history'
-        ).select_related('created_by', 'last_modified_by', 'source_project')
+        # Sites, versions, notes and history are loaded by CompanyDetailService
+        return Company.objects.select_related('created_by', 'last_modified_by')
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Serve the (cached) detail document"""
+        return Response(CompanyDetailService.get_document(self.get_object()))
     
     def destroy(self, request, *args, **kwargs):
         """Delete company - default is hard delete, ?soft=true for soft delete"""
@@ -1091,7 +1086,7 @@ def company_stats(request):
     - status: Complete, Incomplete, Deleted (comma-separated)
     - country: Country name (comma-separated)
     - category: Filter by production category (comma-separated)
-    - search: Search company name
+    - search: Full-text search (name, addresses, region, country, website, contacts)
     - filter_groups: JSON array of filter groups for material/technical filters
     """
     import json
@@ -1128,7 +1123,7 @@ def company_stats(request):
     # Filter by search (company name only)
     search = request.query_params.get('search')
     if search:
-        queryset = queryset.filter(company_name__icontains=search)
+        queryset = CompanySearchService.filter(queryset, search)
     
     # Handle filter groups (material and technical filters)
     filter_groups_param = request.query_params.get('filter_groups')
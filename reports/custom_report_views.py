@@ -22,6 +22,7 @@ from .serializers import (
 from .company_serializers import CompanyListSerializer
 from .company_models import Company, CompanyStatus, ProductionSite, ProductionSiteVersion
 from .pagination import CustomPagination
+from .services.company_search import CompanySearchService
 from notifications.services import NotificationService
 
 class CustomReportListCreateAPIView(generics.ListCreateAPIView):
@@ -247,7 +248,7 @@ class ReportPreviewAPIView(APIView):
         total_records = queryset.count()
         
         # Get sample companies (first 10)
-        sample_companies = queryset[:10]
+        sample_companies = CompanyListSerializer.annotate_queryset(queryset)[:10]
         
         # Get field breakdown
         field_breakdown = {}
@@ -291,8 +292,8 @@ class ReportRecordsAPIView(generics.ListAPIView):
     Now defaults to Company Database.
     
     OPTIMIZED for PostgreSQL with:
-    - Prefetch related data to avoid N+1 queries
-    - Annotated counts instead of Python property calls
+    - Category lists and site count annotated in the main query
+      (CompanyListSerializer.annotate_queryset), one query per page
     - Proper indexing (see migration 0028)
     """
     pagination_class = CustomPagination
@@ -590,40 +591,15 @@ class ReportRecordsAPIView(generics.ListAPIView):
         # Apply search from query params
         search = self.request.query_params.get('search', '')
         if search:
-            queryset = queryset.filter(
-                Q(company_name__icontains=search) |
-                Q(country__icontains=search) |
-                Q(region__icontains=search)
-            )
+            queryset = CompanySearchService.filter(queryset, search)
 
         # OPTIMIZATION: Prefetch related data to avoid N+1 queries
         # Use Prefetch to only get current versions
         from django.db.models import Prefetch, Count, Subquery, OuterRef, Value
         from django.db.models.functions import Coalesce
         
-        current_versions_prefetch = Prefetch(
-            'production_sites__versions',
-            queryset=ProductionSiteVersion.objects.filter(is_current=True).only(
-                'version_id', 'production_site_id', 'is_current', 'is_active'
-            ),
-            to_attr='current_versions_list'
-        )
-        
-        production_sites_prefetch = Prefetch(
-            'production_sites',
-            queryset=ProductionSite.objects.select_related().only(
-                'site_id', 'company_id', 'category', 'created_at'
-            ),
-            to_attr='prefetched_sites'
-        )
-        
-        # Annotate counts to avoid property calls
-        queryset = queryset.annotate(
-            production_site_count_annotated=Count('production_sites', distinct=True)
-        ).prefetch_related(
-            production_sites_prefetch,
-            current_versions_prefetch
-        ).only(
+        # Category lists and site count as annotations (one query per page)
+        queryset = CompanyListSerializer.annotate_queryset(queryset).only(
             'company_id', 'unique_key', 'company_name', 'country', 'region',
             'status', 'project_code', 'phone_number', 'website',
             'created_at', 'updated_at'
@@ -25,6 +25,9 @@ from .company_models import (
     Company, ProductionSite, ProductionSiteVersion,
     CompanyStatus, CompanyCategory
 )
+from .services.dashboard_snapshot import DashboardSnapshotService
+from .services.widget_cache import WidgetCacheService, cached_widget
+from .permissions import IsStaffOnly
 from accounts.models import UserRole
 
 User = get_user_model()
@@ -39,313 +42,11 @@ User = get_user_model()
 def comprehensive_dashboard_stats(request):
     """
     Returns ALL dashboard statistics in a single API call.
-    This endpoint provides real data for all widgets.
+    Served from the precomputed dashboard snapshot; admins can pass
+    ?refresh=true to recompute it. System health is always checked live.
     """
-    now = timezone.now()
-    today = now.date()
-    thirty_days_ago = now - timedelta(days=30)
-    seven_days_ago = now - timedelta(days=7)
-    
-    stats = {}
-    
-    # =========================================================================
-    # OVERVIEW STATS
-    # =========================================================================
-    
-    # Total companies (excluding deleted)
-    stats['total_companies'] = Company.objects.exclude(
-        status=CompanyStatus.DELETED
-    ).count()
-    
-    # Total production sites
-    stats['total_production_sites'] = ProductionSite.objects.filter(
-        company__status__in=[CompanyStatus.COMPLETE, CompanyStatus.INCOMPLETE, CompanyStatus.NONE]
-    ).count()
-    
-    # Active subscriptions
-    stats['active_subscriptions'] = Subscription.objects.filter(
-        status=SubscriptionStatus.ACTIVE,
-        start_date__lte=today,
-        end_date__gte=today
-    ).count()
-    
-    # Custom reports
-    stats['custom_reports'] = CustomReport.objects.count()
-    
-    # =========================================================================
-    # USER STATS
-    # =========================================================================
-    
-    # Total users
-    stats['total_users'] = User.objects.filter(is_active=True).count()
-    
-    # Users by role
-    stats['total_clients'] = User.objects.filter(role=UserRole.CLIENT, is_active=True).count()
-    stats['staff_members'] = User.objects.filter(
-        role__in=[UserRole.STAFF_ADMIN, UserRole.SUPERADMIN],
-        is_active=True
-    ).count()
-    stats['data_collectors'] = User.objects.filter(role=UserRole.DATA_COLLECTOR, is_active=True).count()
-    stats['guest_users'] = User.objects.filter(role=UserRole.GUEST, is_active=True).count()
-    
-    # New users this month
-    stats['new_users_this_month'] = User.objects.filter(
-        date_joined__gte=thirty_days_ago,
-        is_active=True
-    ).count()
-    
-    # Users by role breakdown
-    stats['users_by_role'] = [
-        {'role': 'Clients', 'count': stats['total_clients'], 'color': '#3B82F6'},
-        {'role': 'Staff', 'count': stats['staff_members'], 'color': '#8B5CF6'},
-        {'role': 'Data Collectors', 'count': stats['data_collectors'], 'color': '#10B981'},
-        {'role': 'Guests', 'count': stats['guest_users'], 'color': '#F59E0B'},
-    ]
-    
-    # =========================================================================
-    # REPORT & SUBSCRIPTION STATS
-    # =========================================================================
-    
-    stats['total_reports'] = CustomReport.objects.count()
-    stats['total_subscriptions'] = Subscription.objects.count()
-    stats['pending_subscriptions'] = Subscription.objects.filter(
-        status=SubscriptionStatus.PENDING
-    ).count()
-    
-    # Expiring subscriptions (next 30 days)
-    expiring_date = today + timedelta(days=30)
-    stats['expiring_soon'] = Subscription.objects.filter(
-        status=SubscriptionStatus.ACTIVE,
-        end_date__gt=today,
-        end_date__lte=expiring_date
-    ).count()
-    
-    # Expiring within 7 days (for alerts)
-    expiring_7_days = today + timedelta(days=7)
-    stats['expiring_7_days'] = Subscription.objects.filter(
-        status=SubscriptionStatus.ACTIVE,
-        end_date__gt=today,
-        end_date__lte=expiring_7_days
-    ).count()
-    
-    # =========================================================================
-    # DATABASE STATS
-    # =========================================================================
-    
-    # Companies by status
-    status_counts = Company.objects.values('status').annotate(count=Count('id'))
-    stats['companies_by_status'] = [
-        {
-            'status': item['status'],
-            'status_display': dict(CompanyStatus.choices).get(item['status'], item['status']),
-            'count': item['count'],
-            'color': {
-                'COMPLETE': '#10B981',
-                'INCOMPLETE': '#F59E0B',
-                'DELETED': '#EF4444',
-                'NONE': '#6B7280',
-            }.get(item['status'], '#6B7280')
-        }
-        for item in status_counts
-    ]
-    
-    # Production sites by category
-    category_counts = ProductionSite.objects.filter(
-        company__status__in=[CompanyStatus.COMPLETE, CompanyStatus.INCOMPLETE, CompanyStatus.NONE]
-    ).values('category').annotate(count=Count('id')).order_by('-count')
-    
-    category_colors = {
-        'INJECTION': '#8B5CF6',
-        'BLOW': '#3B82F6',
-        'ROTO': '#10B981',
-        'PE_FILM': '#F59E0B',
-        'SHEET': '#EF4444',
-        'PIPE': '#EC4899',
-        'TUBE_HOSE': '#06B6D4',
-        'PROFILE': '#84CC16',
-        'CABLE': '#F97316',
-        'COMPOUNDER': '#6366F1',
-        'RECYCLER': '#14B8A6',
-    }
-    
-    stats['records_by_category'] = [
-        {
-            'category': item['category'],
-            'category_display': dict(CompanyCategory.choices).get(item['category'], item['category']),
-            'count': item['count'],
-            'color': category_colors.get(item['category'], '#6B7280')
-        }
-        for item in category_counts if item['category']
-    ]
-    
-    # Top countries
-    country_counts = Company.objects.exclude(
-        status=CompanyStatus.DELETED
-    ).exclude(
-        country__isnull=True
-    ).exclude(
-        country=''
-    ).values('country').annotate(count=Count('id')).order_by('-count')[:10]
-    
-    stats['top_countries'] = [
-        {'country': item['country'], 'count': item['count']}
-        for item in country_counts
-    ]
-    
-    # Multi-category companies
-    from django.db.models import Count as DjCount
-    multi_cat_companies = Company.objects.exclude(
-        status=CompanyStatus.DELETED
-    ).annotate(
-        site_count=DjCount('production_sites')
-    ).filter(site_count__gt=1).count()
-    stats['multi_category_companies'] = multi_cat_companies
-    
-    # New companies this month
-    stats['new_companies_this_month'] = Company.objects.filter(
-        created_at__gte=thirty_days_ago
-    ).exclude(status=CompanyStatus.DELETED).count()
-    
-    # Top materials (boolean fields that are True)
-    materials = [
-        'hdpe', 'ldpe', 'lldpe', 'pp', 'pvc', 'pet', 'ps', 'abs', 'pa', 'pc',
-        'eva', 'xlpe', 'pmma', 'pom', 'tpes', 'pbt', 'rigid_pvc', 'flexible_pvc'
-    ]
-    
-    material_counts = []
-    for material in materials:
-        count = ProductionSiteVersion.objects.filter(
-            is_current=True,
-            **{material: True}
-        ).count()
-        if count > 0:
-            material_counts.append({
-                'material': material.upper().replace('_', ' '),
-                'count': count
-            })
-    
-    material_counts.sort(key=lambda x: x['count'], reverse=True)
-    stats['top_materials'] = material_counts[:10]
-    
-    # Monthly trend (last 6 months)
-    six_months_ago = now - timedelta(days=180)
-    monthly_data = Company.objects.filter(
-        created_at__gte=six_months_ago
-    ).exclude(
-        status=CompanyStatus.DELETED
-    ).annotate(
-        month=TruncMonth('created_at')
-    ).values('month').annotate(count=Count('id')).order_by('month')
-    
-    stats['monthly_trend'] = [
-        {
-            'month': item['month'].strftime('%b %Y') if item['month'] else 'Unknown',
-            'count': item['count']
-        }
-        for item in monthly_data
-    ]
-    
-    # Top regions
-    region_counts = Company.objects.exclude(
-        status=CompanyStatus.DELETED
-    ).exclude(
-        region__isnull=True
-    ).exclude(
-        region=''
-    ).values('region').annotate(count=Count('id')).order_by('-count')[:10]
-    
-    stats['top_regions'] = [
-        {'region': item['region'], 'count': item['count']}
-        for item in region_counts
-    ]
-    
-    # =========================================================================
-    # ACTIVITY STATS
-    # =========================================================================
-    
-    # Recent logins (from audit log or session tracking)
-    try:
-        from accounts.security_models import AuditLog
-        recent_logins = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=seven_days_ago
-        ).select_related('user').order_by('-created_at')[:10]
-        
-        stats['recent_logins'] = [
-            {
-                'user': log.user.username if log.user else 'Unknown',
-                'email': log.user.email if log.user else '',
-                'timestamp': log.created_at.isoformat(),
-                'ip_address': log.ip_address or 'Unknown'
-            }
-            for log in recent_logins
-        ]
-    except:
-        stats['recent_logins'] = []
-    
-    # =========================================================================
-    # PROJECT STATS
-    # =========================================================================
-    
-    stats['total_projects'] = DataCollectionProject.objects.count()
-    stats['active_projects'] = DataCollectionProject.objects.filter(
-        status='IN_PROGRESS'
-    ).count()
-    
-    # Unverified sites pending
-    stats['unverified_sites_pending'] = UnverifiedSite.objects.filter(
-        verification_status='PENDING'
-    ).count()
-    
-    # Verification queue
-    verification_queue = UnverifiedSite.objects.filter(
-        verification_status='PENDING'
-    ).select_related('project').order_by('-created_at')[:10]
-    
-    stats['verification_queue'] = [
-        {
-            'id': str(site.site_id),
-            'company_name': site.company_name,
-            'category': site.category,
-            'project': site.project.project_name if site.project else 'Unknown',
-            'created_at': site.created_at.isoformat(),
-            'days_pending': (now - site.created_at).days
-        }
-        for site in verification_queue
-    ]
-    
-    # Sites by project - use site_id since UnverifiedSite uses site_id as primary key
-    sites_by_project = UnverifiedSite.objects.values(
-        'project__project_name'
-    ).annotate(count=Count('site_id')).order_by('-count')[:5]
-    
-    stats['sites_by_project'] = [
-        {
-            'project': item['project__project_name'] or 'No Project',
-            'count': item['count']
-        }
-        for item in sites_by_project
-    ]
-    
-    # =========================================================================
-    # ALERT STATS
-    # =========================================================================
-    
-    # Failed logins (last 24 hours)
-    try:
-        from accounts.security_models import FailedLoginAttempt
-        twenty_four_hours_ago = now - timedelta(hours=24)
-        stats['failed_logins_24h'] = FailedLoginAttempt.objects.filter(
-            timestamp__gte=twenty_four_hours_ago
-        ).count()
-    except:
-        stats['failed_logins_24h'] = 0
-    
-    # Pending verifications older than 7 days
-    stats['old_pending_verifications'] = UnverifiedSite.objects.filter(
-        verification_status='PENDING',
-        created_at__lt=seven_days_ago
-    ).count()
+    stats = dict(DashboardSnapshotService.get_for_request(request))
+    stats['top_materials'] = stats['top_materials'][:10]
     
     # System health indicators
     stats['system_health'] = {
@@ -376,12 +77,27 @@ def comprehensive_dashboard_stats(request):
     return Response(stats)
 
 
+# =============================================================================
+# WIDGET CACHE STATS
+# =============================================================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsStaffOnly])
+def widget_cache_stats(request):
+    """
+    Per-widget cache statistics (hit rate and compute time).
+    Sorted by average compute time so expensive widgets come first.
+    """
+    return Response(WidgetCacheService.get_stats())
+
+
 # =============================================================================
 # INDIVIDUAL WIDGET DATA ENDPOINTS
 # =============================================================================
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('top_countries')
 def widget_top_countries(request):
     """Get top countries with flag emojis"""
     from dashboard.views import get_flag_for_country
@@ -412,6 +128,7 @@ def widget_top_countries(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('top_materials')
 def widget_top_materials(request):
     """Get top materials used across all production sites"""
     limit = int(request.query_params.get('limit', 10))
@@ -468,6 +185,7 @@ def widget_top_materials(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('monthly_trend')
 def widget_monthly_trend(request):
     """Get monthly company creation trend"""
     months = int(request.query_params.get('months', 6))
@@ -497,6 +215,7 @@ def widget_monthly_trend(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('subscription_expiry')
 def widget_subscription_expiry(request):
     """Get subscriptions expiring soon with details"""
     days = int(request.query_params.get('days', 30))
@@ -529,6 +248,7 @@ def widget_subscription_expiry(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('verification_queue')
 def widget_verification_queue(request):
     """Get sites in verification queue"""
     limit = int(request.query_params.get('limit', 10))
@@ -560,6 +280,7 @@ def widget_verification_queue(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('recent_activity')
 def widget_recent_activity(request):
     """Get recent system activity"""
     from dashboard.models import UserActivity
@@ -586,6 +307,7 @@ def widget_recent_activity(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('system_health')
 def widget_system_health(request):
     """Get system health status"""
     from django.db import connection
@@ -697,187 +419,107 @@ def widget_system_health(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('most_active_users')
 def widget_most_active_users(request):
-    """Get most active users by login count"""
+    """Get most active users by login count (from the daily login rollups)"""
     limit = int(request.query_params.get('limit', 10))
     
-    try:
-        from accounts.security_models import AuditLog
-        from django.db.models import Count, Max
-        
-        # Get login counts per user
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        
-        user_logins = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=thirty_days_ago
-        ).values('user').annotate(
-            login_count=Count('id'),
-            last_login=Max('created_at')
-        ).order_by('-login_count')[:limit]
-        
-        result = []
-        for item in user_logins:
-            user_id = item['user']
-            if user_id:
-                try:
-                    user = User.objects.get(id=user_id)
-                    
-                    # Get last IP
-                    last_log = AuditLog.objects.filter(
-                        user_id=user_id, action='LOGIN'
-                    ).order_by('-created_at').first()
-                    
-                    # Format last login
-                    if item['last_login']:
-                        if item['last_login'].date() == timezone.now().date():
-                            last_login_display = 'Today'
-                        elif item['last_login'].date() == (timezone.now() - timedelta(days=1)).date():
-                            last_login_display = 'Yesterday'
-                        else:
-                            last_login_display = item['last_login'].strftime('%b %d')
-                    else:
-                        last_login_display = 'N/A'
-                    
-                    result.append({
-                        'id': str(user.id),
-                        'name': user.get_full_name() or user.username,
-                        'email': user.email,
-                        'role': user.role,
-                        'role_display': user.get_role_display() if hasattr(user, 'get_role_display') else user.role,
-                        'login_count': item['login_count'],
-                        'last_login': item['last_login'].isoformat() if item['last_login'] else None,
-                        'last_login_display': last_login_display,
-                        'last_ip': last_log.ip_address if last_log else None,
-                    })
-                except User.DoesNotExist:
-                    pass
-        
-        return Response(result)
+    from accounts.analytics_services import LoginAnalyticsService
+    
+    top_users = LoginAnalyticsService.top_users(LoginAnalyticsService.days_ago(30), limit)
+    users_by_id = User.objects.in_bulk([item['user_id'] for item in top_users])
+    
+    today = timezone.localdate()
+    result = []
+    for item in top_users:
+        user = users_by_id.get(item['user_id'])
+        if not user:
+            continue
+        
+        # Format last login
+        if item['last_login']:
+            last_login_date = timezone.localdate(item['last_login'])
+            if last_login_date == today:
+                last_login_display = 'Today'
+            elif last_login_date == today - timedelta(days=1):
+                last_login_display = 'Yesterday'
+            else:
+                last_login_display = item['last_login'].strftime('%b %d')
+        else:
+            last_login_display = 'N/A'
         
-    except Exception as e:
-        # Fallback: just return user list with basic info
-        users = User.objects.filter(is_active=True).order_by('-last_login')[:limit]
-        result = [{
-            'id': str(u.id),
-            'name': u.get_full_name() or u.username,
-            'email': u.email,
-            'role': u.role,
-            'role_display': u.get_role_display() if hasattr(u, 'get_role_display') else u.role,
-            'login_count': 1,
-            'last_login_display': 'N/A',
-            'last_ip': None,
-        } for u in users]
-        return Response(result)
+        result.append({
+            'id': str(user.id),
+            'name': user.get_full_name() or user.username,
+            'email': user.email,
+            'role': user.role,
+            'role_display': user.get_role_display() if hasattr(user, 'get_role_display') else user.role,
+            'login_count': item['login_count'],
+            'last_login': item['last_login'].isoformat() if item['last_login'] else None,
+            'last_login_display': last_login_display,
+            'last_ip': user.last_login_ip,
+        })
+    
+    return Response(result)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('login_activity_trend')
 def widget_login_activity_trend(request):
-    """Get login activity trend over time"""
+    """Get login activity trend over time (from the daily audit rollups)"""
     days = int(request.query_params.get('days', 30))
     
-    try:
-        from accounts.security_models import AuditLog
-        from django.db.models import Count
-        from django.db.models.functions import TruncDate
-        
-        start_date = timezone.now() - timedelta(days=days)
-        
-        # Daily login counts
-        daily_logins = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=start_date
-        ).annotate(
-            date=TruncDate('created_at')
-        ).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')
-        
-        # Total logins
-        total_logins = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=start_date
-        ).count()
-        
-        # Active users (unique users who logged in)
-        active_users = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=start_date
-        ).values('user').distinct().count()
-        
-        # Format daily data
-        daily_data = []
-        for item in daily_logins:
-            if item['date']:
-                daily_data.append({
-                    'date': item['date'].strftime('%b %d'),
-                    'count': item['count']
-                })
-        
-        return Response({
-            'total_logins': total_logins,
-            'avg_per_day': round(total_logins / max(days, 1), 1),
-            'active_users': active_users,
-            'daily_data': daily_data
-        })
-        
-    except Exception as e:
-        return Response({
-            'total_logins': 0,
-            'avg_per_day': 0,
-            'active_users': 0,
-            'daily_data': []
-        })
+    from accounts.analytics_services import LoginAnalyticsService
+    
+    start_date = LoginAnalyticsService.days_ago(days)
+    
+    # Daily login counts
+    daily_logins = LoginAnalyticsService.daily_event_counts(['login_success'], start_date)
+    daily_data = [
+        {'date': date.strftime('%b %d'), 'count': counts['login_success']}
+        for date, counts in sorted(daily_logins.items())
+    ]
+    total_logins = sum(item['count'] for item in daily_data)
+    
+    # Active users (unique users who logged in)
+    active_users = LoginAnalyticsService.login_summary(start_date)['active_users']
+    
+    return Response({
+        'total_logins': total_logins,
+        'avg_per_day': round(total_logins / max(days, 1), 1),
+        'active_users': active_users,
+        'daily_data': daily_data
+    })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('online_users')
 def widget_online_users(request):
-    """Get currently online users"""
-    from django.contrib.sessions.models import Session
-    from django.utils import timezone as tz
+    """Get currently online users (from the presence registry)"""
+    from accounts.presence import PresenceRegistry
     
-    # Get active sessions (not expired)
-    active_sessions = Session.objects.filter(expire_date__gte=tz.now())
+    online = PresenceRegistry.get_online()
     
-    online_user_ids = []
-    for session in active_sessions:
-        data = session.get_decoded()
-        user_id = data.get('_auth_user_id')
-        if user_id:
-            online_user_ids.append(int(user_id))
-    
-    # Get unique user IDs
-    online_user_ids = list(set(online_user_ids))
-    
-    # Get user details
-    users = User.objects.filter(id__in=online_user_ids, is_active=True)
-    
-    # Count by role
-    by_role = {}
-    user_list = []
-    
-    for user in users:
-        role = user.role
-        by_role[role] = by_role.get(role, 0) + 1
-        user_list.append({
-            'id': str(user.id),
-            'name': user.get_full_name() or user.username,
-            'email': user.email,
-            'role': user.role,
-            'role_display': user.get_role_display() if hasattr(user, 'get_role_display') else user.role,
-        })
+    user_list = [{
+        'id': str(entry['user_id']),
+        'name': entry['name'],
+        'email': entry['email'],
+        'role': entry['role'],
+        'role_display': UserRole(entry['role']).label if entry['role'] in UserRole.values else entry['role'],
+    } for entry in online]
     
     return Response({
-        'count': len(online_user_ids),
+        'count': len(online),
         'users': user_list,
-        'by_role': by_role
+        'by_role': PresenceRegistry.count_by_role(online)
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('user_activity_timeline')
 def widget_user_activity_timeline(request):
     """Get recent user activity timeline"""
     limit = int(request.query_params.get('limit', 20))
@@ -925,6 +567,7 @@ def widget_user_activity_timeline(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('new_registrations')
 def widget_new_registrations(request):
     """Get new user registration stats"""
     now = timezone.now()
@@ -977,6 +620,7 @@ def widget_new_registrations(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('inactive_users')
 def widget_inactive_users(request):
     """Get inactive users stats"""
     now = timezone.now()
@@ -1039,107 +683,122 @@ def widget_inactive_users(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('session_stats')
 def widget_session_stats(request):
     """Get session statistics"""
-    from django.contrib.sessions.models import Session
-    from django.utils import timezone as tz
+    from accounts.presence import PresenceRegistry
+    from accounts.security_models import AuditLog, UserSession
+    from django.db.models.functions import ExtractHour
     
-    now = tz.now()
+    now = timezone.now()
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     
-    # Active sessions
-    active_sessions = Session.objects.filter(expire_date__gte=now).count()
+    online = PresenceRegistry.get_online()
     
-    # Sessions created today (approximation)
-    sessions_today = Session.objects.filter(expire_date__gte=today_start).count()
+    # Sessions created today
+    sessions_today = UserSession.objects.filter(created_at__gte=today_start).count()
     
-    # Device breakdown (mock - would need actual device tracking)
-    by_device = {
-        'Desktop': max(0, active_sessions - (active_sessions // 4)),
-        'Mobile': active_sessions // 5,
-        'Tablet': active_sessions // 10,
-    }
+    # Device breakdown of online users
+    by_device = _presence_device_counts(online)
     
     # Peak hour analysis
-    try:
-        from accounts.security_models import AuditLog
-        from django.db.models import Count
-        from django.db.models.functions import ExtractHour
-        
-        peak = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=today_start
-        ).annotate(
-            hour=ExtractHour('created_at')
-        ).values('hour').annotate(
-            count=Count('id')
-        ).order_by('-count').first()
-        
-        peak_hour = f"{peak['hour']}:00" if peak else 'N/A'
-    except:
-        peak_hour = 'N/A'
+    peak = AuditLog.objects.filter(
+        event_type='login_success',
+        timestamp__gte=today_start
+    ).annotate(
+        hour=ExtractHour('timestamp')
+    ).values('hour').annotate(
+        count=Count('id')
+    ).order_by('-count').first()
+    
+    peak_hour = f"{peak['hour']}:00" if peak else 'N/A'
     
     return Response({
-        'active_sessions': active_sessions,
+        'active_sessions': len(online),
         'total_today': sessions_today,
-        'avg_duration': '~30m',  # Placeholder - would need actual session tracking
+        'avg_duration': _presence_avg_duration(online, now),
         'by_device': by_device,
         'peak_hour': peak_hour
     })
 
 
+def _presence_device_counts(online):
+    """Count online users per device type (Desktop / Mobile / Tablet)."""
+    by_device = {'Desktop': 0, 'Mobile': 0, 'Tablet': 0}
+    for entry in online:
+        device_type = entry.get('device_type') or 'Desktop'
+        by_device[device_type] = by_device.get(device_type, 0) + 1
+    return by_device
+
+
+def _presence_avg_duration(online, now):
+    """Average time online users have been present, e.g. '~25m'."""
+    from datetime import datetime
+    
+    if not online:
+        return 'N/A'
+    total_seconds = sum(
+        (now - datetime.fromisoformat(entry['since'])).total_seconds() for entry in online
+    )
+    minutes = int(total_seconds / len(online) // 60)
+    if minutes >= 60:
+        return f"~{minutes // 60}h {minutes % 60}m"
+    return f"~{minutes}m"
+
+
 # =============================================================================
 # SECURITY & ANALYTICS WIDGETS
 # =============================================================================
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('geographic_distribution')
 def widget_geographic_distribution(request):
-    """Get user geographic distribution by IP/country"""
+    """Get user geographic distribution by login country (resolved by accounts.geoip)"""
     try:
-        from accounts.security_models import AuditLog
+        from accounts.models import LoginHistory
         from django.db.models import Count
-        from collections import defaultdict
         
-        # Get login IPs from last 30 days
+        # Logins from last 30 days, grouped by the country stored at login time
         thirty_days_ago = timezone.now() - timedelta(days=30)
         
-        ip_logins = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=thirty_days_ago
-        ).exclude(ip_address__isnull=True).exclude(ip_address='')
-        
-        # Count by country (would need GeoIP for real implementation)
-        # For now, approximate based on IP patterns
-        country_counts = defaultdict(int)
-        unknown_count = 0
-        
-        for log in ip_logins:
-            ip = log.ip_address or ''
-            # Simple heuristic - in production use GeoIP2
-            if ip.startswith('127.') or ip == '::1' or ip.startswith('192.168.'):
-                country_counts['Local'] += 1
-            elif ip:
-                country_counts['Unknown'] += 1
-                unknown_count += 1
-        
-        # Try to get country from user profiles
-        user_countries = User.objects.exclude(
-            country__isnull=True
-        ).exclude(country='').values('country').annotate(
-            count=Count('id')
-        ).order_by('-count')[:10]
+        by_country = LoginHistory.objects.filter(
+            login_time__gte=thirty_days_ago,
+            success=True,
+        ).values('country_code', 'country').annotate(
+            count=Count('user', distinct=True)
+        ).order_by('-count')
         
         countries = []
-        total = sum(item['count'] for item in user_countries) or 1
-        
-        for item in user_countries:
-            countries.append({
-                'name': item['country'],
-                'code': item['country'][:2].upper() if item['country'] else 'XX',
+        unknown_count = 0
+        for item in by_country:
+            if item['country_code']:
+                countries.append(item)
+            else:
+                unknown_count += item['count']
+        countries = countries[:10]
+        
+        if not countries:
+            # No resolved logins (e.g. no GeoIP database): fall back to profile countries
+            countries = [
+                {'country_code': item['country'][:2].upper(), 'country': item['country'], 'count': item['count']}
+                for item in User.objects.exclude(
+                    country__isnull=True
+                ).exclude(country='').values('country').annotate(
+                    count=Count('id')
+                ).order_by('-count')[:10]
+            ]
+        
+        total = sum(item['count'] for item in countries) or 1
+        countries = [
+            {
+                'name': item['country'] or item['country_code'],
+                'code': item['country_code'],
                 'count': item['count'],
                 'percentage': round((item['count'] / total) * 100, 1)
-            })
+            }
+            for item in countries
+        ]
         
         return Response({
             'countries': countries,
@@ -1159,6 +818,7 @@ def widget_geographic_distribution(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('2fa_adoption')
 def widget_2fa_adoption(request):
     """Get 2FA adoption statistics"""
     from accounts.models import UserRole
@@ -1209,270 +869,160 @@ def widget_2fa_adoption(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('device_browser_stats')
 def widget_device_browser_stats(request):
-    """Get device and browser statistics"""
-    try:
-        from accounts.security_models import AuditLog
-        from django.db.models import Count
-        from collections import defaultdict
-        import re
-        
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        
-        # Get user agents from audit logs
-        logs = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=thirty_days_ago
-        ).exclude(user_agent__isnull=True).exclude(user_agent='')
-        
-        devices = defaultdict(int)
-        browsers = defaultdict(int)
-        operating_systems = defaultdict(int)
-        total_sessions = 0
-        
-        for log in logs:
-            ua = (log.user_agent or '').lower()
-            total_sessions += 1
-            
-            # Device detection
-            if 'mobile' in ua or 'android' in ua or 'iphone' in ua:
-                devices['Mobile'] += 1
-            elif 'tablet' in ua or 'ipad' in ua:
-                devices['Tablet'] += 1
-            else:
-                devices['Desktop'] += 1
-            
-            # Browser detection
-            if 'chrome' in ua and 'edg' not in ua:
-                browsers['Chrome'] += 1
-            elif 'firefox' in ua:
-                browsers['Firefox'] += 1
-            elif 'safari' in ua and 'chrome' not in ua:
-                browsers['Safari'] += 1
-            elif 'edg' in ua:
-                browsers['Edge'] += 1
-            elif 'opera' in ua or 'opr' in ua:
-                browsers['Opera'] += 1
-            else:
-                browsers['Other'] += 1
-            
-            # OS detection
-            if 'windows' in ua:
-                operating_systems['Windows'] += 1
-            elif 'mac os' in ua or 'macintosh' in ua:
-                operating_systems['macOS'] += 1
-            elif 'linux' in ua and 'android' not in ua:
-                operating_systems['Linux'] += 1
-            elif 'android' in ua:
-                operating_systems['Android'] += 1
-            elif 'iphone' in ua or 'ipad' in ua:
-                operating_systems['iOS'] += 1
-            else:
-                operating_systems['Other'] += 1
-        
-        def format_stats(data):
-            total = sum(data.values()) or 1
-            return sorted([
-                {'name': k, 'count': v, 'percentage': round((v / total) * 100, 1)}
-                for k, v in data.items()
-            ], key=lambda x: x['count'], reverse=True)
-        
-        return Response({
-            'devices': format_stats(devices),
-            'browsers': format_stats(browsers),
-            'operating_systems': format_stats(operating_systems),
-            'total_sessions': total_sessions
-        })
-        
-    except Exception as e:
-        return Response({
-            'devices': [],
-            'browsers': [],
-            'operating_systems': [],
-            'total_sessions': 0
-        })
+    """Get device and browser statistics (from the daily audit rollups)"""
+    from accounts.analytics_services import LoginAnalyticsService
+    
+    devices, browsers, operating_systems = LoginAnalyticsService.client_breakdown(
+        'login_success', LoginAnalyticsService.days_ago(30)
+    )
+    
+    def format_stats(data):
+        total = sum(data.values()) or 1
+        return sorted([
+            {'name': k, 'count': v, 'percentage': round((v / total) * 100, 1)}
+            for k, v in data.items()
+        ], key=lambda x: x['count'], reverse=True)
+    
+    return Response({
+        'devices': format_stats(devices),
+        'browsers': format_stats(browsers),
+        'operating_systems': format_stats(operating_systems),
+        'total_sessions': sum(devices.values())
+    })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('login_failure_rate')
 def widget_login_failure_rate(request):
-    """Get login failure rate statistics"""
-    try:
-        from accounts.security_models import AuditLog, FailedLoginAttempt
-        from django.db.models import Count
-        from django.db.models.functions import TruncDate
-        
-        now = timezone.now()
-        seven_days_ago = now - timedelta(days=7)
-        fourteen_days_ago = now - timedelta(days=14)
-        
-        # Get successful logins
-        successful_logins = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=seven_days_ago
-        ).count()
-        
-        # Get failed logins
-        failed_logins = FailedLoginAttempt.objects.filter(
-            timestamp__gte=seven_days_ago
-        ).count()
-        
-        total = successful_logins + failed_logins
-        failure_rate = round((failed_logins / max(total, 1)) * 100, 1)
-        
-        # Previous period for comparison
-        prev_successful = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=fourteen_days_ago,
-            created_at__lt=seven_days_ago
-        ).count()
-        prev_failed = FailedLoginAttempt.objects.filter(
-            timestamp__gte=fourteen_days_ago,
-            timestamp__lt=seven_days_ago
-        ).count()
-        prev_total = prev_successful + prev_failed
-        prev_rate = round((prev_failed / max(prev_total, 1)) * 100, 1)
-        
-        trend = round(failure_rate - prev_rate, 1)
-        
-        # Daily failure rate
-        daily_data = []
-        for i in range(6, -1, -1):
-            day = now - timedelta(days=i)
-            day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day_start + timedelta(days=1)
-            
-            day_success = AuditLog.objects.filter(
-                action='LOGIN',
-                created_at__gte=day_start,
-                created_at__lt=day_end
-            ).count()
-            day_failed = FailedLoginAttempt.objects.filter(
-                timestamp__gte=day_start,
-                timestamp__lt=day_end
-            ).count()
-            day_total = day_success + day_failed
-            
-            daily_data.append({
-                'date': day.strftime('%b %d'),
-                'rate': round((day_failed / max(day_total, 1)) * 100, 1),
-                'failed': day_failed,
-                'successful': day_success
-            })
-        
-        return Response({
-            'failure_rate': failure_rate,
-            'successful_logins': successful_logins,
-            'failed_logins': failed_logins,
-            'trend': trend,
-            'daily_data': daily_data
-        })
-        
-    except Exception as e:
-        return Response({
-            'failure_rate': 0,
-            'successful_logins': 0,
-            'failed_logins': 0,
-            'trend': 0,
-            'daily_data': []
+    """Get login failure rate statistics (from the daily audit rollups)"""
+    from accounts.analytics_services import LoginAnalyticsService
+    
+    today = timezone.localdate()
+    seven_days_ago = today - timedelta(days=6)
+    fourteen_days_ago = today - timedelta(days=13)
+    
+    # One read covers both the current and the previous 7-day period
+    daily_counts = LoginAnalyticsService.daily_event_counts(
+        ['login_success', 'login_failed'], fourteen_days_ago
+    )
+    
+    def period_totals(start, end):
+        successful = failed = 0
+        for date, counts in daily_counts.items():
+            if start <= date < end:
+                successful += counts.get('login_success', 0)
+                failed += counts.get('login_failed', 0)
+        return successful, failed
+    
+    successful_logins, failed_logins = period_totals(seven_days_ago, today + timedelta(days=1))
+    total = successful_logins + failed_logins
+    failure_rate = round((failed_logins / max(total, 1)) * 100, 1)
+    
+    # Previous period for comparison
+    prev_successful, prev_failed = period_totals(fourteen_days_ago, seven_days_ago)
+    prev_total = prev_successful + prev_failed
+    prev_rate = round((prev_failed / max(prev_total, 1)) * 100, 1)
+    
+    trend = round(failure_rate - prev_rate, 1)
+    
+    # Daily failure rate
+    daily_data = []
+    for i in range(6, -1, -1):
+        day = today - timedelta(days=i)
+        counts = daily_counts.get(day, {})
+        day_success = counts.get('login_success', 0)
+        day_failed = counts.get('login_failed', 0)
+        day_total = day_success + day_failed
+        
+        daily_data.append({
+            'date': day.strftime('%b %d'),
+            'rate': round((day_failed / max(day_total, 1)) * 100, 1),
+            'failed': day_failed,
+            'successful': day_success
         })
+    
+    return Response({
+        'failure_rate': failure_rate,
+        'successful_logins': successful_logins,
+        'failed_logins': failed_logins,
+        'trend': trend,
+        'daily_data': daily_data
+    })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('active_sessions_detail')
 def widget_active_sessions_detail(request):
     """Get detailed active sessions statistics"""
-    from django.contrib.sessions.models import Session
+    from accounts.presence import PresenceRegistry
+    from accounts.security_models import UserSession
     
     now = timezone.now()
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     
-    # Get active sessions
-    active_sessions = Session.objects.filter(expire_date__gte=now)
-    active_count = active_sessions.count()
-    
-    # Count by device type (approximation)
-    desktop_count = max(0, active_count - (active_count // 3))
-    mobile_count = active_count // 4
-    tablet_count = active_count - desktop_count - mobile_count
-    
-    # Sessions today
-    new_today = Session.objects.filter(expire_date__gte=today_start).count() - active_count
-    new_today = max(0, new_today + active_count // 2)  # Approximation
+    online = PresenceRegistry.get_online()
+    active_count = len(online)
+    by_device = _presence_device_counts(online)
     
-    # Peak sessions today (approximation)
-    peak_today = max(active_count, active_count + (active_count // 3))
+    # Sessions started today
+    new_today = UserSession.objects.filter(created_at__gte=today_start).count()
     
     return Response({
         'active_count': active_count,
-        'desktop_count': desktop_count,
-        'mobile_count': mobile_count,
-        'tablet_count': tablet_count,
-        'avg_duration': '~25m',
-        'peak_today': peak_today,
+        'desktop_count': by_device['Desktop'],
+        'mobile_count': by_device['Mobile'],
+        'tablet_count': by_device['Tablet'],
+        'avg_duration': _presence_avg_duration(online, now),
+        'peak_today': max(active_count, PresenceRegistry.get_peak_today()),
         'new_today': new_today
     })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('successful_logins')
 def widget_successful_logins(request):
     """Get successful login statistics"""
-    try:
-        from accounts.security_models import AuditLog
-        
-        now = timezone.now()
-        twenty_four_hours_ago = now - timedelta(hours=24)
-        forty_eight_hours_ago = now - timedelta(hours=48)
-        seven_days_ago = now - timedelta(days=7)
-        thirty_days_ago = now - timedelta(days=30)
-        
-        # Count for different periods
-        count_24h = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=twenty_four_hours_ago
-        ).count()
-        
-        count_prev_24h = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=forty_eight_hours_ago,
-            created_at__lt=twenty_four_hours_ago
-        ).count()
-        
-        count_7d = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=seven_days_ago
-        ).count()
-        
-        count_30d = AuditLog.objects.filter(
-            action='LOGIN',
-            created_at__gte=thirty_days_ago
-        ).count()
-        
-        # Change percentage
-        if count_prev_24h > 0:
-            change_percent = round(((count_24h - count_prev_24h) / count_prev_24h) * 100, 1)
-        else:
-            change_percent = 100 if count_24h > 0 else 0
-        
-        return Response({
-            'count_24h': count_24h,
-            'count_7d': count_7d,
-            'count_30d': count_30d,
-            'change_percent': change_percent
-        })
-        
-    except Exception as e:
-        return Response({
-            'count_24h': 0,
-            'count_7d': 0,
-            'count_30d': 0,
-            'change_percent': 0
-        })
+    from accounts.security_models import AuditLog
+    from accounts.analytics_services import LoginAnalyticsService
+    
+    now = timezone.now()
+    twenty_four_hours_ago = now - timedelta(hours=24)
+    forty_eight_hours_ago = now - timedelta(hours=48)
+    
+    # Rolling 24h windows need timestamps: two indexed counts on (event_type, timestamp)
+    logins = AuditLog.objects.filter(event_type='login_success')
+    count_24h = logins.filter(timestamp__gte=twenty_four_hours_ago).count()
+    count_prev_24h = logins.filter(
+        timestamp__gte=forty_eight_hours_ago,
+        timestamp__lt=twenty_four_hours_ago
+    ).count()
+    
+    # Longer periods come from the daily rollups
+    count_7d = LoginAnalyticsService.event_total('login_success', LoginAnalyticsService.days_ago(7))
+    count_30d = LoginAnalyticsService.event_total('login_success', LoginAnalyticsService.days_ago(30))
+    
+    # Change percentage
+    if count_prev_24h > 0:
+        change_percent = round(((count_24h - count_prev_24h) / count_prev_24h) * 100, 1)
+    else:
+        change_percent = 100 if count_24h > 0 else 0
+    
+    return Response({
+        'count_24h': count_24h,
+        'count_7d': count_7d,
+        'count_30d': count_30d,
+        'change_percent': change_percent
+    })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('failed_logins_detail')
 def widget_failed_logins_detail(request):
     """Get detailed failed login statistics"""
     try:
@@ -1539,6 +1089,7 @@ def widget_failed_logins_detail(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('blocked_ips')
 def widget_blocked_ips(request):
     """Get blocked IP statistics"""
     try:
@@ -1600,6 +1151,7 @@ def widget_blocked_ips(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_widget('suspicious_activity')
 def widget_suspicious_activity(request):
     """Get suspicious activity alerts"""
     try:
@@ -17,6 +17,7 @@ from .models import ExportTemplate, CustomReport, Subscription, SuperdatabaseRec
 from .serializers import ExportTemplateSerializer, ExportTemplateCreateSerializer
 from .filters import SuperdatabaseRecordFilter
 from accounts.models import UserRole
+from accounts.throttling import charge
 from django.db.models import Q
 
 
@@ -287,6 +288,8 @@ class ExportToExcelAPIView(APIView):
     """Export data to Excel with selected columns"""
 
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'report_export'
+    THROTTLE_ROWS_PER_TOKEN = 1000
 
     def get(self, request):
         """Export data to Excel"""
@@ -391,12 +394,16 @@ class ExportToExcelAPIView(APIView):
 
         # Limit
         max_records = 10000
-        if queryset.count() > max_records:
+        record_count = queryset.count()
+        if record_count > max_records:
             return Response(
                 {"error": f"Export limited to {max_records} records. Please apply more filters."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        # Weight the export by its size
+        charge(request, self, record_count // self.THROTTLE_ROWS_PER_TOKEN)
+
         # Create Excel file
         wb = openpyxl.Workbook()
         ws = wb.active
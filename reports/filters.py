@@ -3,11 +3,252 @@
 
 import django_filters
 from django.db.models import Q
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.settings import api_settings
 from .company_models import Company, ProductionSiteVersion, CompanyStatus
 from .fields import ALL_COMMONS
+from .services.company_search import CompanySearchService
 import json
 
 
+class CompanySearchFilter(SearchFilter):
+    """
+    Full-text company search backend, a drop-in replacement for DRF's
+    SearchFilter on views that list companies or company related rows.
+    Uses the company search index (see services/company_search.py), so
+    `?search=` no longer scans with ILIKE across joins.
+
+    View attributes:
+        search_company_path: lookup path from the view's model to Company
+                             ('' for Company, 'company' for ProductionSite)
+        search_ranking: order by relevance when the request has no explicit
+                        ?ordering= (default True). Pair it with
+                        CompanySearchOrderingFilter rather than DRF's
+                        OrderingFilter, whose default `ordering` would
+                        replace the relevance order
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search = request.query_params.get(self.search_param, '')
+        if not CompanySearchService.terms(search):
+            return queryset
+
+        company_path = getattr(view, 'search_company_path', '')
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM)
+
+        if getattr(view, 'search_ranking', True) and not ordering:
+            return CompanySearchService.rank(queryset, search, company_path).order_by(
+                '-search_rank', *queryset.query.order_by
+            )
+        return CompanySearchService.filter(queryset, search, company_path)
+
+
+class CompanySearchOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that keeps relevance ordering from CompanySearchFilter:
+    on a ranked search the view's default `ordering` only breaks ties
+    between equally ranked rows (an explicit ?ordering= always applies).
+    """
+
+    def get_ordering(self, request, queryset, view):
+        search = request.query_params.get(api_settings.SEARCH_PARAM, '')
+        if (
+            not request.query_params.get(self.ordering_param)
+            and getattr(view, 'search_ranking', True)
+            and CompanySearchService.terms(search)
+        ):
+            return ('-search_rank', *(self.get_default_ordering(view) or ()))
+        return super().get_ordering(request, queryset, view)
+
+
+def apply_site_filter_groups(queryset, filter_groups):
+    """
+    Apply report / user filter groups to a ProductionSite queryset:
+    OR logic within a group, AND logic between groups.
+
+    Each group: {"filters": {field: bool}, "technicalFilters": {field: {"mode": "equals"|"range", ...}}}
+    evaluated against the current ProductionSiteVersion.
+    """
+    if not isinstance(filter_groups, list):
+        return queryset
+
+    for group in filter_groups:
+        if not isinstance(group, dict):
+            continue
+
+        filters = group.get('filters', {})
+        technical_filters = group.get('technicalFilters', {})
+
+        if not filters and not technical_filters:
+            continue
+
+        # Build OR query for all filters within this group
+        group_query = Q()
+
+        # Handle boolean filters (query current version)
+        for field_name, field_value in filters.items():
+            try:
+                ProductionSiteVersion._meta.get_field(field_name)
+
+                if field_value is True:
+                    group_query |= Q(
+                        versions__is_current=True,
+                        **{f'versions__{field_name}': True}
+                    )
+                elif field_value is False:
+                    group_query |= (
+                        Q(
+                            versions__is_current=True,
+                            **{f'versions__{field_name}': False}
+                        ) |
+                        Q(
+                            versions__is_current=True,
+                            **{f'versions__{field_name}__isnull': True}
+                        )
+                    )
+            except Exception:
+                continue
+
+        # Handle technical filters (with equals and range modes)
+        for field_name, filter_config in technical_filters.items():
+            if not isinstance(filter_config, dict):
+                continue
+
+            try:
+                field = ProductionSiteVersion._meta.get_field(field_name)
+                mode = filter_config.get('mode', 'range')
+
+                if mode == 'equals':
+                    equals_val = filter_config.get('equals', '')
+                    if equals_val != '' and equals_val is not None:
+                        try:
+                            if field.get_internal_type() == 'FloatField':
+                                equals_val = float(equals_val)
+                            else:
+                                equals_val = int(equals_val)
+                            group_query |= Q(
+                                versions__is_current=True,
+                                **{f'versions__{field_name}': equals_val}
+                            )
+                        except (ValueError, TypeError):
+                            pass
+
+                elif mode == 'range':
+                    min_val = filter_config.get('min', '')
+                    max_val = filter_config.get('max', '')
+                    range_query = Q(versions__is_current=True)
+
+                    if min_val != '' and min_val is not None:
+                        try:
+                            if field.get_internal_type() == 'FloatField':
+                                min_val = float(min_val)
+                            else:
+                                min_val = int(min_val)
+                            range_query &= Q(**{f'versions__{field_name}__gte': min_val})
+                        except (ValueError, TypeError):
+                            pass
+
+                    if max_val != '' and max_val is not None:
+                        try:
+                            if field.get_internal_type() == 'FloatField':
+                                max_val = float(max_val)
+                            else:
+                                max_val = int(max_val)
+                            range_query &= Q(**{f'versions__{field_name}__lte': max_val})
+                        except (ValueError, TypeError):
+                            pass
+
+                    group_query |= range_query
+            except Exception:
+                continue
+
+        # AND this group with the queryset
+        if group_query:
+            queryset = queryset.filter(group_query).distinct()
+
+    return queryset
+
+
+def filter_report_sites(queryset, filter_criteria):
+    """
+    Restrict a ProductionSite queryset to a report's records: active
+    production sites of non-deleted companies matching the report's
+    filter_criteria (status, categories, filter groups, country).
+    """
+    queryset = queryset.exclude(company__status=CompanyStatus.DELETED)
+
+    # ========================================
+    # CRITICAL FIX: Only include ACTIVE production sites
+    # Filter out production sites where current version is_active=False
+    # ========================================
+    queryset = queryset.filter(
+        versions__is_current=True,
+        versions__is_active=True
+    )
+
+    # ========================================
+    # Apply report's STATUS filter (Company status like COMPLETE/INCOMPLETE)
+    # ========================================
+    if 'status' in filter_criteria:
+        status_filter = filter_criteria['status']
+        if isinstance(status_filter, list) and len(status_filter) > 0:
+            queryset = queryset.filter(company__status__in=status_filter)
+        elif isinstance(status_filter, str) and status_filter:
+            queryset = queryset.filter(company__status=status_filter)
+
+    # ========================================
+    # Apply report's CATEGORY filter with active check
+    # Note: This is done FIRST because category + active are linked
+    # ========================================
+    report_categories = None
+    if 'categories' in filter_criteria:
+        report_categories = filter_criteria['categories']
+    elif 'category' in filter_criteria:
+        report_categories = filter_criteria['category']
+
+    if report_categories:
+        if isinstance(report_categories, list) and len(report_categories) > 0:
+            queryset = queryset.filter(category__in=report_categories)
+        elif isinstance(report_categories, str) and report_categories:
+            queryset = queryset.filter(category=report_categories)
+
+    # ========================================
+    # STEP 1: Apply report's FILTER GROUPS (if exists)
+    # ========================================
+    if 'filter_groups' in filter_criteria:
+        queryset = apply_site_filter_groups(queryset, filter_criteria['filter_groups'])
+
+    # ========================================
+    # STEP 2: Apply report's BASE FILTERS (legacy support)
+    # ========================================
+    # Handle categories (filter at ProductionSite level)
+    report_categories = None
+    if 'categories' in filter_criteria:
+        report_categories = filter_criteria['categories']
+    elif 'category' in filter_criteria:
+        report_categories = filter_criteria['category']
+
+    if report_categories:
+        if isinstance(report_categories, list) and len(report_categories) > 0:
+            queryset = queryset.filter(
+                category__in=report_categories  # ✅ Changed from production_sites__category__in
+            )
+        elif isinstance(report_categories, str) and report_categories:
+            queryset = queryset.filter(
+                category=report_categories  # ✅ Changed from production_sites__category
+            )
+
+    # Handle country filter (filter by company's country)
+    if 'country' in filter_criteria:
+        countries = filter_criteria['country']
+        if isinstance(countries, list) and len(countries) > 0:
+            queryset = queryset.filter(company__country__in=countries)  # ✅ Changed to company__country__in
+        elif isinstance(countries, str) and countries:
+            queryset = queryset.filter(company__country=countries)  # ✅ Changed to company__country
+
+    return queryset
+
+
 class CompanyFilter(django_filters.FilterSet):
     """
     Filter for Company model (replaces SuperdatabaseRecordFilter).
@@ -29,12 +270,7 @@ class CompanyFilter(django_filters.FilterSet):
         if not value:
             return queryset
 
-        return queryset.filter(
-            Q(company_name__icontains=value) |
-            Q(country__icontains=value) |
-            Q(address_1__icontains=value) |
-            Q(address_2__icontains=value)
-        )
+        return CompanySearchService.filter(queryset, value)
 
     def filter_by_categories(self, queryset, name, value):
         """
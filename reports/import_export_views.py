@@ -5,10 +5,9 @@ FIXED VERSION - Properly handles boolean fields (1/0/blank) and prevents NULL co
 """
 
 import logging
-import pandas as pd
-import numpy as np
 import io
 from datetime import datetime
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.http import HttpResponse
 from django.db.models import Q
 from rest_framework import status
@@ -19,7 +18,7 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 
-from .models import UnverifiedSite, DataCollectionProject
+from .models import UnverifiedSite, DataCollectionProject, ImportSession, ImportSessionStatus
 from .fields import (
     COMMON_FIELDS,
     CONTACT_FIELDS,
@@ -35,6 +34,7 @@ from .fields import (
     COMPOUNDER_FIELDS,
 )
 from .field_metadata_view import get_field_metadata
+from .services.site_import import SiteImportService
 
 logger = logging.getLogger(__name__)
 
@@ -381,8 +381,14 @@ def export_sites(request):
 @permission_classes([IsAuthenticated])
 def import_preview(request):
     """
-    Preview and validate import data before confirming
-    FIXED: Properly handles boolean fields - converts blanks to False (not None)
+    Start staging an upload and return its import session.
+
+    The file is parsed once (streamed, in chunks) into an ImportSession in
+    the background; the rows stay on the server until import_confirm
+    promotes them. Answers 202 with the session (status PARSING) at once:
+    poll import-export/sessions/<session_id>/ for the progress and, once
+    the status is READY (or FAILED), the validation preview.
+    See reports/services/site_import.py.
     
     Expects multipart/form-data with:
     - file: Excel/CSV file
@@ -428,316 +434,137 @@ def import_preview(request):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Read file
+    # Expected columns: (field name, header label, field type)
+    columns = [
+        (field_name, verbose_name, get_field_type(UnverifiedSite, field_name))
+        for field_name, verbose_name in get_export_fields_for_category(category)
+    ]
+    
     try:
-        file_ext = uploaded_file.name.split('.')[-1].lower()
-        if file_ext in ['xlsx', 'xls']:
-            df = pd.read_excel(uploaded_file)
-        elif file_ext == 'csv':
-            df = pd.read_csv(uploaded_file)
-        else:
-            return Response(
-                {'error': 'Invalid file format. Please upload .xlsx, .xls, or .csv file'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-    except Exception as e:
-        logger.error(f"Error reading file: {str(e)}")
+        session = SiteImportService.start_staging(uploaded_file, project, category, user, columns)
+    except ValueError as e:
         return Response(
-            {'error': f'Error reading file: {str(e)}'},
+            {'error': str(e)},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Get expected fields for this category
-    export_fields = get_export_fields_for_category(category)
-    field_name_to_verbose = {field_name: verbose_name for field_name, verbose_name in export_fields}
-    verbose_to_field_name = {verbose_name: field_name for field_name, verbose_name in export_fields}
-    
-    # Map column headers to field names
-    df_columns_mapped = {}
-    for col in df.columns:
-        col_stripped = str(col).strip()
-        if col_stripped in verbose_to_field_name:
-            df_columns_mapped[col] = verbose_to_field_name[col_stripped]
-    
-    # Rename columns
-    df.rename(columns=df_columns_mapped, inplace=True)
-    
-    # Replace NaN with None
-    df = df.replace({np.nan: None})
-    
-    # Validate rows
-    errors = []
-    valid_rows = []
-    warnings = []
-    duplicate_rows = []
-    
-    for idx, row in df.iterrows():
-        row_number = idx + 2  # Excel row number
-        row_data = row.to_dict()
-        
-        # Check required fields
-        company_name = str(row_data.get('company_name', '')).strip() if row_data.get('company_name') is not None else ''
-        country = str(row_data.get('country', '')).strip() if row_data.get('country') is not None else ''
-        
-        if not company_name:
-            errors.append({
-                'row': row_number,
-                'field': 'company_name',
-                'error': 'Company name is required'
-            })
-            continue
-        
-        if not country:
-            errors.append({
-                'row': row_number,
-                'field': 'country',
-                'error': 'Country is required'
-            })
-            continue
-        
-        # Check for duplicates
-        duplicate_count = UnverifiedSite.objects.filter(
-            company_name__iexact=company_name,
-            project=project
-        ).count()
-        
-        if duplicate_count > 0:
-            duplicate_rows.append(row_number)
-            warnings.append({
-                'row': row_number,
-                'message': f'Duplicate: "{company_name}" already exists {duplicate_count} time(s) in this project - WILL BE SKIPPED'
-            })
-            continue
-        
-        # FIXED: Process each field based on its type
-        processed_data = {}
-        for field_name, value in row_data.items():
-            if field_name not in [f[0] for f in export_fields]:
-                continue  # Skip unknown fields
-            
-            field_type = get_field_type(UnverifiedSite, field_name)
-            
-            if field_type == 'boolean':
-                # CRITICAL FIX: Convert blanks to False, not None
-                # This prevents the NOT NULL constraint error
-                if value is None or value == '':
-                    processed_data[field_name] = False  # Default to False for blank values
-                elif isinstance(value, str):
-                    value_stripped = value.strip().lower()
-                    if value_stripped == 'nan' or value_stripped == '':
-                        processed_data[field_name] = False  # Default to False
-                    elif value_stripped in ['yes', 'true', '1', 'y']:
-                        processed_data[field_name] = True
-                    elif value_stripped in ['no', 'false', '0', 'n']:
-                        processed_data[field_name] = False
-                    else:
-                        processed_data[field_name] = False  # Default to False for unknown values
-                elif isinstance(value, (int, float)):
-                    # Excel stores 1/0 as numbers
-                    if value == 1:
-                        processed_data[field_name] = True
-                    elif value == 0:
-                        processed_data[field_name] = False
-                    else:
-                        processed_data[field_name] = False  # Default to False
-                elif isinstance(value, bool):
-                    processed_data[field_name] = value
-                else:
-                    processed_data[field_name] = False  # Default to False
-            
-            elif field_type == 'text':
-                # Handle text fields
-                if value is None:
-                    processed_data[field_name] = ''
-                elif isinstance(value, str):
-                    value_stripped = value.strip()
-                    if value_stripped.lower() == 'nan' or value_stripped == '':
-                        processed_data[field_name] = ''
-                    else:
-                        processed_data[field_name] = value_stripped
-                else:
-                    # Convert numbers/other types to string
-                    processed_data[field_name] = str(value).strip()
-            
-            elif field_type == 'number':
-                # Handle numeric fields
-                if value is None or value == '':
-                    processed_data[field_name] = None
-                else:
-                    try:
-                        if isinstance(value, str) and value.strip().lower() == 'nan':
-                            processed_data[field_name] = None
-                        else:
-                            processed_data[field_name] = float(value) if '.' in str(value) else int(value)
-                    except:
-                        processed_data[field_name] = None
-            
-            else:
-                # Other fields - keep as is, but handle "nan"
-                if value is None:
-                    processed_data[field_name] = ''
-                elif isinstance(value, str) and value.strip().lower() == 'nan':
-                    processed_data[field_name] = ''
-                else:
-                    processed_data[field_name] = value
-        
-        valid_rows.append({
-            'row_number': row_number,
-            'data': processed_data
-        })
-    
-    # Prepare preview
-    preview_data = []
-    for row in valid_rows[:10]:
-        preview_data.append({
-            'company_name': row['data'].get('company_name', ''),
-            'country': row['data'].get('country', ''),
-            'address_1': row['data'].get('address_1', ''),
-        })
-    
-    # Store validated data in session
-    request.session[f'import_data_{project_id}'] = {
-        'valid_rows': valid_rows,
-        'category': category,
-        'duplicate_rows': duplicate_rows,
-        'timestamp': datetime.now().isoformat(),
-    }
-    
-    response_data = {
-        'total_rows': len(df),
-        'valid_rows': len(valid_rows),
-        'invalid_rows': len(errors),
-        'duplicate_rows': len(duplicate_rows),
-        'errors': errors[:50],
-        'preview_data': preview_data,
-        'warnings': warnings[:50],
-        'has_more_errors': len(errors) > 50,
-        'has_more_warnings': len(warnings) > 50,
-    }
-    
     logger.info(
-        f"Import preview: {len(valid_rows)} valid, {len(errors)} invalid, {len(duplicate_rows)} duplicate rows "
-        f"for project {project_id} category {category} by {user.username}"
+        f"Import staging started for project {project_id} category {category} "
+        f"by {user.username} (session {session.session_id})"
     )
     
-    return Response(response_data, status=status.HTTP_200_OK)
+    return Response(SiteImportService.summary(session), status=status.HTTP_202_ACCEPTED)
+
+
+def _get_import_session(user, session_id=None, project_id=None):
+    """The user's import session by id, or their latest staged one for a project."""
+    sessions = ImportSession.objects.select_related('project')
+    if user.role not in ['SUPERADMIN', 'STAFF_ADMIN']:
+        sessions = sessions.filter(created_by=user)
+    if session_id:
+        return sessions.filter(session_id=session_id).first()
+    return sessions.filter(
+        project__project_id=project_id,
+        created_by=user,
+        status=ImportSessionStatus.READY,
+    ).order_by('-created_at').first()
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def import_confirm(request):
     """
-    Confirm and execute the import after preview
-    FIXED: Creates sites with proper boolean values (no NULLs)
+    Confirm and execute a staged import (bulk inserts, chunk by chunk)
     
     Body:
     {
-        "project_id": "uuid"
+        "session_id": "uuid",   // from the preview response
+        "project_id": "uuid"    // alternative: latest preview of this project
     }
     """
     
     user = request.user
+    session_id = request.data.get('session_id')
     project_id = request.data.get('project_id')
     
-    if not project_id:
+    if not session_id and not project_id:
         return Response(
-            {'error': 'Project ID is required'},
+            {'error': 'Session ID or Project ID is required'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Get validated data from session
-    import_data = request.session.get(f'import_data_{project_id}')
+    try:
+        session = _get_import_session(user, session_id=session_id, project_id=project_id)
+    except DjangoValidationError:
+        session = None
     
-    if not import_data:
+    if session is None:
         return Response(
             {'error': 'No import data found. Please run preview first.'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Check if data is fresh (within 1 hour)
-    timestamp = datetime.fromisoformat(import_data['timestamp'])
-    if (datetime.now() - timestamp).total_seconds() > 3600:
+    # Staged rows are only valid for a limited time
+    if SiteImportService.is_expired(session):
         return Response(
             {'error': 'Import data expired. Please run preview again.'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
     # Verify project
-    try:
-        project = DataCollectionProject.objects.get(project_id=project_id)
-        if user.role == 'DATA_COLLECTOR' and project.created_by != user:
-            return Response(
-                {'error': 'You do not have access to this project'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-    except DataCollectionProject.DoesNotExist:
+    project = session.project
+    if user.role == 'DATA_COLLECTOR' and project.created_by != user:
         return Response(
-            {'error': 'Project not found'},
-            status=status.HTTP_404_NOT_FOUND
+            {'error': 'You do not have access to this project'},
+            status=status.HTTP_403_FORBIDDEN
         )
     
-    # Import sites
-    valid_rows = import_data['valid_rows']
-    category = import_data['category']
-    duplicate_rows = import_data.get('duplicate_rows', [])
-    imported_sites = []
-    skipped_duplicates = 0
-    
     try:
-        for row in valid_rows:
-            site_data = row['data']
-            company_name = site_data.get('company_name', '')
-            
-            # Double-check for duplicates before creating
-            if UnverifiedSite.objects.filter(
-                company_name__iexact=company_name,
-                project=project
-            ).exists():
-                skipped_duplicates += 1
-                continue
-            
-            # Create site instance
-            site = UnverifiedSite(
-                project=project,
-                collected_by=user,
-                category=category,
-                verification_status='PENDING',
-            )
-            
-            # Set all fields from data
-            for field_name, value in site_data.items():
-                if hasattr(site, field_name):
-                    # IMPORTANT: The value has already been processed in preview
-                    # Boolean fields are True/False (never None)
-                    # Text fields are strings (empty string if blank)
-                    # Number fields can be None
-                    setattr(site, field_name, value)
-            
-            site.save()
-            imported_sites.append(site)
-        
-        # Clear session data
-        del request.session[f'import_data_{project_id}']
-        
-        message = f'{len(imported_sites)} sites imported successfully'
-        if skipped_duplicates > 0:
-            message += f' ({skipped_duplicates} duplicates skipped)'
-        
-        logger.info(
-            f"{len(imported_sites)} sites imported ({skipped_duplicates} skipped) to project {project_id} "
-            f"category {category} by {user.username}"
+        result = SiteImportService.confirm(session, user)
+    except ValueError as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_409_CONFLICT
         )
-        
-        return Response({
-            'success': True,
-            'imported_count': len(imported_sites),
-            'skipped_count': skipped_duplicates,
-            'message': message
-        }, status=status.HTTP_201_CREATED)
-        
     except Exception as e:
-        logger.error(f"Error during import: {str(e)}")
         return Response(
             {'error': f'Error during import: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+    
+    imported_count = result['imported']
+    skipped_duplicates = result['skipped']
+    
+    message = f'{imported_count} sites imported successfully'
+    if skipped_duplicates > 0:
+        message += f' ({skipped_duplicates} duplicates skipped)'
+    
+    logger.info(
+        f"{imported_count} sites imported ({skipped_duplicates} skipped) to project {project.project_id} "
+        f"category {session.category} by {user.username} (session {session.session_id})"
+    )
+    
+    return Response({
+        'success': True,
+        'session_id': str(session.session_id),
+        'imported_count': imported_count,
+        'skipped_count': skipped_duplicates,
+        'message': message
+    }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def import_session_status(request, session_id):
+    """
+    GET: Progress / preview of an import session (poll while a large file
+    is staged or imported)
+    """
+    session = _get_import_session(request.user, session_id=session_id)
+    if session is None:
+        return Response(
+            {'error': 'Import session not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    return Response(SiteImportService.summary(session))
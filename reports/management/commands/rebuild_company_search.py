@@ -0,0 +1,39 @@
+# reports/management/commands/rebuild_company_search.py
+"""
+Management command to (re)build the company full-text search index.
+
+The index is maintained by database triggers, so this is only needed after
+restoring a dump without them, or on SQLite after a migration that rebuilt
+the reports_company table (which drops its triggers).
+
+Usage:
+    python manage.py rebuild_company_search
+    python manage.py rebuild_company_search --reinstall   # also re-create table/column and triggers
+"""
+
+from django.core.management.base import BaseCommand
+from reports.services.company_search import CompanySearchService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the company full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reinstall',
+            action='store_true',
+            help='Re-create the index table/column and its triggers before rebuilding',
+        )
+
+    def handle(self, *args, **options):
+        backend = CompanySearchService.backend()
+        if backend == 'fallback':
+            self.stdout.write(self.style.WARNING('⚠️ No full-text index on this database backend (icontains fallback)'))
+            return
+
+        if options['reinstall']:
+            count = CompanySearchService.install()
+        else:
+            count = CompanySearchService.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Indexed {count} companies ({backend})'))
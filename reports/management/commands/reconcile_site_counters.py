@@ -0,0 +1,57 @@
+# reports/management/commands/reconcile_site_counters.py
+"""
+Management command to check the per-project / global site counters against
+the unverified sites and correct any drift.
+
+The counters are updated by every site write path, so drift only comes from
+writes that bypass them (raw SQL, a queryset.update() on UnverifiedSite,
+restored dumps).
+
+Usage:
+    python manage.py reconcile_site_counters
+    python manage.py reconcile_site_counters --dry-run    # report drift only
+    python manage.py reconcile_site_counters --rebuild    # recreate every row
+
+Run this periodically via cron job:
+    0 3 * * * cd /path/to/project && python manage.py reconcile_site_counters
+"""
+
+from django.core.management.base import BaseCommand
+from reports.services.site_counters import SiteCounterService
+
+
+class Command(BaseCommand):
+    help = 'Reconcile the site counters with the unverified sites'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted counters without correcting them',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Delete and recreate every counter row',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = SiteCounterService.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt {count} site counters'))
+            return
+
+        drift = SiteCounterService.reconcile(dry_run=options['dry_run'])
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('✅ Site counters are in sync'))
+            return
+
+        for (project_id, dimension, value), (count, amount) in sorted(drift.items(), key=str):
+            label = f"{project_id or 'all'} {dimension}:{value}"
+            change = f'{amount:+.2f}' if dimension == 'sum' else f'{count:+d}'
+            self.stdout.write(f'  {label} {change}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'⚠️ {len(drift)} site counters out of sync (dry run, nothing changed)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Corrected {len(drift)} site counters'))
@@ -0,0 +1,25 @@
+"""
+Management command to recompute the admin dashboard statistics snapshot.
+
+Usage:
+    python manage.py refresh_dashboard_snapshot
+
+Run this periodically via cron job so dashboards never wait on a recompute:
+    */10 * * * * cd /path/to/project && python manage.py refresh_dashboard_snapshot
+"""
+
+from django.core.management.base import BaseCommand
+from reports.services.dashboard_snapshot import DashboardSnapshotService
+
+
+class Command(BaseCommand):
+    help = 'Recompute the admin dashboard statistics snapshot'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Refreshing dashboard snapshot...')
+        data = DashboardSnapshotService.refresh()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Snapshot generated at {data['generated_at']} in {data['generation_ms']}ms"
+            )
+        )
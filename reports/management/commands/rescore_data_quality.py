@@ -0,0 +1,84 @@
+# reports/management/commands/rescore_data_quality.py
+"""
+Management command to recalculate the data quality score of unverified
+sites in bulk (e.g. after changing the weights in quality_score_utils).
+
+Scores are computed for whole chunks of sites at once with NumPy and only
+changed scores are written back (bulk_update).
+
+Usage:
+    python manage.py rescore_data_quality
+    python manage.py rescore_data_quality --dry-run              # compare approaches only
+    python manage.py rescore_data_quality --approach weighted
+    python manage.py rescore_data_quality --project PRJ-000001
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.models import UnverifiedSite
+from reports.quality_score_utils import QUALITY_SCORERS, QUALITY_SCORE_APPROACH, rescore_sites
+
+
+class Command(BaseCommand):
+    help = 'Recalculate data quality scores of unverified sites in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--approach',
+            choices=list(QUALITY_SCORERS),
+            default=QUALITY_SCORE_APPROACH,
+            help=f'Scoring approach to store (default: {QUALITY_SCORE_APPROACH})',
+        )
+        parser.add_argument(
+            '--project',
+            type=str,
+            help='Only rescore the sites of this project (project code)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Sites scored per chunk (default: 5000)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the scores without saving them',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        queryset = UnverifiedSite.objects.all()
+        if options['project']:
+            queryset = queryset.filter(project__project_code=options['project'])
+
+        started = time.monotonic()
+        result = rescore_sites(
+            queryset,
+            approach=options['approach'],
+            chunk_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        elapsed = time.monotonic() - started
+
+        averages = result['averages']
+        if result['scored']:
+            self.stdout.write(
+                f"  Average scores - simple: {averages['simple']}%, weighted: {averages['weighted']}%, "
+                f"tiered: {averages['tiered']}%, filled fields: {averages['filled_count']}"
+            )
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {result['changed']} of {result['scored']} sites would change "
+                f"({result['approach']}, dry run, nothing saved) in {elapsed:.1f}s"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Rescored {result['scored']} sites ({result['approach']}), "
+                f"{result['changed']} updated in {elapsed:.1f}s"
+            ))
@@ -0,0 +1,36 @@
+# reports/management/commands/run_saved_search_alerts.py
+"""
+Management command to notify clients of production sites that newly match
+their saved searches (saved searches with alerts enabled).
+
+Only the sites changed since the previous run are evaluated, so it is
+meant to run frequently from cron, e.g. every 15 minutes:
+
+    */15 * * * * cd /path/to/project && python manage.py run_saved_search_alerts
+
+Usage:
+    python manage.py run_saved_search_alerts
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.services.saved_search_alerts import SavedSearchAlertService
+
+
+class Command(BaseCommand):
+    help = 'Evaluate alerting saved searches against changed sites and notify new matches'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        stats = SavedSearchAlertService.run()
+        elapsed = time.monotonic() - started
+
+        if stats['recorded']:
+            self.stdout.write(f"  Recorded current matches of {stats['recorded']} newly enabled saved searches")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Checked {stats['searches']} saved searches against {stats['changed_sites']} changed sites: "
+            f"{stats['new_matches']} new matches, {stats['notified']} notifications in {elapsed:.1f}s"
+        ))
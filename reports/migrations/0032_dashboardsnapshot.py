@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0031_remove_company_rpt_company_stat_cntry_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_key', models.CharField(help_text="Identifier of the snapshot (e.g., 'admin_dashboard')", max_length=50, unique=True)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('generated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('generation_ms', models.PositiveIntegerField(default=0, help_text='Time taken to compute the snapshot, in milliseconds')),
+            ],
+            options={
+                'verbose_name': 'Dashboard Snapshot',
+                'verbose_name_plural': 'Dashboard Snapshots',
+            },
+        ),
+    ]
@@ -0,0 +1,115 @@
+# reports/migrations/0033_company_search_index.py
+#
+# The SQL is frozen here on purpose: later changes to
+# reports/services/company_search.py (indexed fields, trigger bodies) must
+# not change what this migration does. The service's install() / rebuild()
+# (rebuild_company_search command) re-create the index with the current
+# definition.
+
+from django.db import migrations
+
+
+# =============================================================================
+# POSTGRESQL: tsvector column + GIN index, kept up to date by a trigger
+# =============================================================================
+
+POSTGRES_INSTALL = [
+    'ALTER TABLE reports_company ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    'CREATE OR REPLACE FUNCTION reports_company_search_vector_update() RETURNS trigger AS $$ '
+    'BEGIN NEW.search_vector := '
+    "setweight(to_tsvector('simple', concat_ws(' ', NEW.company_name)), 'A') || "
+    "setweight(to_tsvector('simple', concat_ws(' ', NEW.region, NEW.country)), 'B') || "
+    "setweight(to_tsvector('simple', concat_ws(' ', NEW.address_1, NEW.address_2, NEW.address_3, NEW.address_4, NEW.website)), 'C') || "
+    "setweight(to_tsvector('simple', concat_ws(' ', NEW.surname_1, NEW.surname_2, NEW.surname_3, NEW.surname_4)), 'D'); "
+    'RETURN NEW; END '
+    '$$ LANGUAGE plpgsql',
+    'DROP TRIGGER IF EXISTS reports_company_search_vector_trigger ON reports_company',
+    'CREATE TRIGGER reports_company_search_vector_trigger '
+    'BEFORE INSERT OR UPDATE OF company_name, region, country, address_1, address_2, address_3, address_4, '
+    'website, surname_1, surname_2, surname_3, surname_4 ON reports_company '
+    'FOR EACH ROW EXECUTE FUNCTION reports_company_search_vector_update()',
+    'CREATE INDEX IF NOT EXISTS reports_company_search_vector_gin '
+    'ON reports_company USING gin (search_vector)',
+    # Backfill
+    'UPDATE reports_company SET search_vector = '
+    "setweight(to_tsvector('simple', concat_ws(' ', company_name)), 'A') || "
+    "setweight(to_tsvector('simple', concat_ws(' ', region, country)), 'B') || "
+    "setweight(to_tsvector('simple', concat_ws(' ', address_1, address_2, address_3, address_4, website)), 'C') || "
+    "setweight(to_tsvector('simple', concat_ws(' ', surname_1, surname_2, surname_3, surname_4)), 'D')",
+]
+
+POSTGRES_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS reports_company_search_vector_trigger ON reports_company',
+    'DROP FUNCTION IF EXISTS reports_company_search_vector_update()',
+    'DROP INDEX IF EXISTS reports_company_search_vector_gin',
+    'ALTER TABLE reports_company DROP COLUMN IF EXISTS search_vector',
+]
+
+
+# =============================================================================
+# SQLITE: FTS5 table (rowid = company id), kept up to date by triggers
+# =============================================================================
+
+SQLITE_INSTALL = [
+    'CREATE VIRTUAL TABLE IF NOT EXISTS reports_company_fts '
+    'USING fts5(company_name, region, country, address_1, address_2, address_3, address_4, '
+    "website, surname_1, surname_2, surname_3, surname_4, tokenize='unicode61 remove_diacritics 2')",
+    'DROP TRIGGER IF EXISTS reports_company_fts_ai',
+    'DROP TRIGGER IF EXISTS reports_company_fts_ad',
+    'DROP TRIGGER IF EXISTS reports_company_fts_au',
+    'CREATE TRIGGER reports_company_fts_ai AFTER INSERT ON reports_company BEGIN '
+    'INSERT INTO reports_company_fts (rowid, company_name, region, country, address_1, address_2, address_3, '
+    'address_4, website, surname_1, surname_2, surname_3, surname_4) '
+    'VALUES (new.id, new.company_name, new.region, new.country, new.address_1, new.address_2, new.address_3, '
+    'new.address_4, new.website, new.surname_1, new.surname_2, new.surname_3, new.surname_4); END',
+    'CREATE TRIGGER reports_company_fts_ad AFTER DELETE ON reports_company BEGIN '
+    'DELETE FROM reports_company_fts WHERE rowid = old.id; END',
+    'CREATE TRIGGER reports_company_fts_au AFTER UPDATE OF company_name, region, country, address_1, address_2, '
+    'address_3, address_4, website, surname_1, surname_2, surname_3, surname_4 ON reports_company BEGIN '
+    'DELETE FROM reports_company_fts WHERE rowid = old.id; '
+    'INSERT INTO reports_company_fts (rowid, company_name, region, country, address_1, address_2, address_3, '
+    'address_4, website, surname_1, surname_2, surname_3, surname_4) '
+    'VALUES (new.id, new.company_name, new.region, new.country, new.address_1, new.address_2, new.address_3, '
+    'new.address_4, new.website, new.surname_1, new.surname_2, new.surname_3, new.surname_4); END',
+    # Backfill
+    'DELETE FROM reports_company_fts',
+    'INSERT INTO reports_company_fts (rowid, company_name, region, country, address_1, address_2, address_3, '
+    'address_4, website, surname_1, surname_2, surname_3, surname_4) '
+    'SELECT id, company_name, region, country, address_1, address_2, address_3, '
+    'address_4, website, surname_1, surname_2, surname_3, surname_4 FROM reports_company',
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS reports_company_fts_ai',
+    'DROP TRIGGER IF EXISTS reports_company_fts_ad',
+    'DROP TRIGGER IF EXISTS reports_company_fts_au',
+    'DROP TABLE IF EXISTS reports_company_fts',
+]
+
+
+def _run(schema_editor, statements):
+    statements = statements.get(schema_editor.connection.vendor, [])
+    with schema_editor.connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def install_search_index(apps, schema_editor):
+    """Create the company full-text index (tsvector + GIN / FTS5) and its triggers"""
+    _run(schema_editor, {'postgresql': POSTGRES_INSTALL, 'sqlite': SQLITE_INSTALL})
+
+
+def uninstall_search_index(apps, schema_editor):
+    """Reverse: drop the index and triggers"""
+    _run(schema_editor, {'postgresql': POSTGRES_UNINSTALL, 'sqlite': SQLITE_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0032_dashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
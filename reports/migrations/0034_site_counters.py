@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:38
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+# Frozen copy of the counted fields in reports/services/site_counters.py:
+# later changes there must not change what this migration writes. Run
+# `python manage.py reconcile_site_counters --rebuild` to recount with the
+# current definition.
+COUNTED_FIELDS = {
+    'status': 'verification_status',
+    'calling': 'calling_status',
+    'category': 'category',
+    'priority': 'priority',
+    'source': 'source',
+}
+SUMMED_FIELDS = ('data_quality_score', 'total_calls')
+
+
+def build_site_counters(apps, schema_editor):
+    """Count the existing unverified sites into the new counter table"""
+    UnverifiedSite = apps.get_model('reports', 'UnverifiedSite')
+    SiteCounter = apps.get_model('reports', 'SiteCounter')
+
+    counters = defaultdict(lambda: [0, 0.0])
+
+    def add(project_id, dimension, value, count=0, amount=0.0):
+        # Every site counts in its project's rows and in the global (NULL) rows
+        for scope in {None, project_id}:
+            counters[(scope, dimension, value)][0] += count
+            counters[(scope, dimension, value)][1] += amount
+
+    totals = UnverifiedSite.objects.values('project_id').annotate(
+        n=Count('pk'), **{field: Sum(field) for field in SUMMED_FIELDS}
+    )
+    for row in totals:
+        add(row['project_id'], 'total', '', count=row['n'])
+        for field in SUMMED_FIELDS:
+            add(row['project_id'], 'sum', field, amount=float(row[field] or 0))
+
+    for dimension, field in COUNTED_FIELDS.items():
+        for row in UnverifiedSite.objects.values('project_id', field).annotate(n=Count('pk')):
+            add(row['project_id'], dimension, row[field] or '', count=row['n'])
+
+    duplicates = UnverifiedSite.objects.filter(is_duplicate=True).values('project_id').annotate(n=Count('pk'))
+    for row in duplicates:
+        add(row['project_id'], 'duplicate', '', count=row['n'])
+
+    SiteCounter.objects.bulk_create([
+        SiteCounter(project_id=project_id, dimension=dimension, value=value, count=count, amount=amount)
+        for (project_id, dimension, value), (count, amount) in counters.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0033_company_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(help_text="What is counted (e.g., 'status', 'calling', 'category', 'sum')", max_length=20)),
+                ('value', models.CharField(blank=True, max_length=50)),
+                ('count', models.BigIntegerField(default=0)),
+                ('amount', models.FloatField(default=0.0, help_text="Running sum of the field named by value ('sum' rows)")),
+                ('project', models.ForeignKey(blank=True, help_text='Project counted (empty = all sites)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='site_counters', to='reports.datacollectionproject')),
+            ],
+            options={
+                'verbose_name': 'Site Counter',
+                'verbose_name_plural': 'Site Counters',
+                'constraints': [models.UniqueConstraint(fields=('project', 'dimension', 'value'), name='unique_project_site_counter'), models.UniqueConstraint(condition=models.Q(('project__isnull', True)), fields=('dimension', 'value'), name='unique_global_site_counter')],
+            },
+        ),
+        migrations.RunPython(build_site_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0034_site_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteLease',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queue', models.CharField(choices=[('CALLING', 'Calling'), ('ALTERNATIVE_NUMBERS', 'Alternative Numbers'), ('REVIEW', 'Review')], max_length=30)),
+                ('claimed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Site Lease',
+                'verbose_name_plural': 'Site Leases',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='unverifiedsite',
+            index=models.Index(fields=['calling_status', 'priority', 'created_at'], name='unverified__calling_a050cc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='unverifiedsite',
+            index=models.Index(fields=['verification_status', 'priority', 'created_at'], name='unverified__verific_5a0dd8_idx'),
+        ),
+        migrations.AddField(
+            model_name='sitelease',
+            name='holder',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='site_leases', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='sitelease',
+            name='site',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leases', to='reports.unverifiedsite'),
+        ),
+        migrations.AddIndex(
+            model_name='sitelease',
+            index=models.Index(fields=['holder', 'queue', 'expires_at'], name='reports_sit_holder__35bbdb_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='sitelease',
+            constraint=models.UniqueConstraint(fields=('site', 'queue'), name='unique_site_lease'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:47
+
+import django.core.serializers.json
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0035_site_leases'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportSession',
+            fields=[
+                ('session_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('category', models.CharField(choices=[('INJECTION', 'Injection Moulders'), ('BLOW', 'Blow Moulders'), ('ROTO', 'Roto Moulders'), ('PE_FILM', 'PE Film Extruders'), ('SHEET', 'Sheet Extruders'), ('PIPE', 'Pipe Extruders'), ('TUBE_HOSE', 'Tube & Hose Extruders'), ('PROFILE', 'Profile Extruders'), ('CABLE', 'Cable Extruders'), ('COMPOUNDER', 'Compounders'), ('RECYCLER', 'Recyclers')], max_length=20)),
+                ('file_name', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('PARSING', 'Parsing'), ('READY', 'Ready to Import'), ('IMPORTING', 'Importing'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PARSING', max_length=20)),
+                ('expected_rows', models.PositiveIntegerField(blank=True, help_text='Data rows announced by the file, when known before parsing', null=True)),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('valid_rows', models.PositiveIntegerField(default=0)),
+                ('invalid_rows', models.PositiveIntegerField(default=0)),
+                ('duplicate_rows', models.PositiveIntegerField(default=0)),
+                ('imported_rows', models.PositiveIntegerField(default=0)),
+                ('skipped_rows', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_sessions', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_sessions', to='reports.datacollectionproject')),
+            ],
+            options={
+                'verbose_name': 'Import Session',
+                'verbose_name_plural': 'Import Sessions',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportSessionRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_number', models.PositiveIntegerField(help_text='Row number in the uploaded sheet')),
+                ('status', models.CharField(choices=[('VALID', 'Valid'), ('INVALID', 'Invalid'), ('DUPLICATE', 'Duplicate'), ('IMPORTED', 'Imported'), ('SKIPPED', 'Skipped')], max_length=20)),
+                ('data', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('message', models.CharField(blank=True, max_length=500)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='reports.importsession')),
+            ],
+            options={
+                'verbose_name': 'Import Session Row',
+                'verbose_name_plural': 'Import Session Rows',
+                'ordering': ['row_number'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='importsession',
+            index=models.Index(fields=['created_by', 'project', '-created_at'], name='reports_imp_created_81beb4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='importsessionrow',
+            index=models.Index(fields=['session', 'status', 'row_number'], name='reports_imp_session_7486bb_idx'),
+        ),
+    ]
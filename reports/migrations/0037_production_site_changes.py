@@ -0,0 +1,47 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def seed_change_log(apps, schema_editor):
+    """Start the change log with every existing production site, so a feed
+    read from the beginning is a full initial sync."""
+    ProductionSite = apps.get_model('reports', 'ProductionSite')
+    ProductionSiteChange = apps.get_model('reports', 'ProductionSiteChange')
+
+    now = django.utils.timezone.now()
+    changes = (
+        ProductionSiteChange(production_site_pk=pk, site_id=site_id, action='UPSERT', changed_at=now)
+        for pk, site_id in ProductionSite.objects.order_by('pk').values_list('pk', 'site_id').iterator()
+    )
+    while True:
+        batch = [change for _, change in zip(range(5000), changes)]
+        if not batch:
+            break
+        ProductionSiteChange.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0036_import_sessions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductionSiteChange',
+            fields=[
+                ('change_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('production_site_pk', models.BigIntegerField(help_text='Primary key of the changed production site')),
+                ('site_id', models.UUIDField(help_text='Public ID of the changed production site (record id in client reports)')),
+                ('action', models.CharField(choices=[('UPSERT', 'Added / Modified'), ('DELETE', 'Deleted')], default='UPSERT', max_length=10)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['change_id'],
+                'indexes': [models.Index(fields=['changed_at', 'change_id'], name='reports_pro_changed_cf1c59_idx'), models.Index(fields=['production_site_pk', 'change_id'], name='reports_pro_product_f16e6a_idx')],
+            },
+        ),
+        migrations.RunPython(seed_change_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0037_production_site_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='savedsearch',
+            name='alert_change_id',
+            field=models.BigIntegerField(blank=True, help_text='Last change log entry evaluated for alerts (empty = matches not recorded yet)', null=True),
+        ),
+        migrations.AddField(
+            model_name='savedsearch',
+            name='alerts_enabled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='savedsearch',
+            name='last_alert_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='SavedSearchMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('production_site_pk', models.BigIntegerField()),
+                ('matched_at', models.DateTimeField(auto_now_add=True)),
+                ('saved_search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_matches', to='reports.savedsearch')),
+            ],
+            options={
+                'db_table': 'saved_search_matches',
+                'constraints': [models.UniqueConstraint(fields=('saved_search', 'production_site_pk'), name='unique_saved_search_match')],
+            },
+        ),
+    ]
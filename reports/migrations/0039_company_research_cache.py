@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:04
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def make_query_key(company_name, country):
+    # Frozen copy of CompanyResearchResult.make_query_key
+    def normalize(value):
+        value = unicodedata.normalize('NFKC', value or '').casefold()
+        value = re.sub(r'[^\w\s&-]', ' ', value)
+        return ' '.join(value.split())
+    return f"{normalize(company_name)}|{normalize(country)}"[:400]
+
+
+def fill_query_keys(apps, schema_editor):
+    """Make existing research results reusable by the research cache."""
+    CompanyResearchResult = apps.get_model('reports', 'CompanyResearchResult')
+
+    batch = []
+    for result in CompanyResearchResult.objects.only('research_id', 'company_name', 'country').iterator():
+        result.query_key = make_query_key(result.company_name, result.country)
+        batch.append(result)
+        if len(batch) >= 1000:
+            CompanyResearchResult.objects.bulk_update(batch, ['query_key'])
+            batch = []
+    CompanyResearchResult.objects.bulk_update(batch, ['query_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0038_saved_search_alerts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companyresearchresult',
+            name='from_cache',
+            field=models.BooleanField(default=False, help_text='Copy of a recent result for the same company, no AI call was made', verbose_name='Served from Cache'),
+        ),
+        migrations.AddField(
+            model_name='companyresearchresult',
+            name='query_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=400, verbose_name='Query Key'),
+        ),
+        migrations.AddIndex(
+            model_name='companyresearchresult',
+            index=models.Index(fields=['query_key', '-searched_at'], name='reports_com_query_k_d918b6_idx'),
+        ),
+        migrations.RunPython(fill_query_keys, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 # reports/models.py
 
+import re
+import unicodedata
 import uuid
 from django.db import models
 from django.conf import settings
@@ -8,6 +10,7 @@ from django.contrib.auth import get_user_model
 from decimal import Decimal
 from dateutil.relativedelta import relativedelta
 from django.db.models import Q
+from django.core.serializers.json import DjangoJSONEncoder
 
 User = get_user_model()
 
@@ -1071,6 +1074,77 @@ class UserWidgetPreference(models.Model):
         return f"{self.user.username} - {self.widget.title}"
 
 
+# --- Dashboard Snapshot Class ---
+class DashboardSnapshot(models.Model):
+    """
+    Precomputed dashboard statistics.
+    Widgets read from the latest snapshot instead of recounting the database
+    on every load. See reports/services/dashboard_snapshot.py.
+    """
+    snapshot_key = models.CharField(
+        max_length=50,
+        unique=True,
+        help_text="Identifier of the snapshot (e.g., 'admin_dashboard')"
+    )
+    data = models.JSONField(default=dict, blank=True)
+    generated_at = models.DateTimeField(default=timezone.now)
+    generation_ms = models.PositiveIntegerField(
+        default=0,
+        help_text="Time taken to compute the snapshot, in milliseconds"
+    )
+
+    class Meta:
+        verbose_name = 'Dashboard Snapshot'
+        verbose_name_plural = 'Dashboard Snapshots'
+
+    def __str__(self):
+        return f"{self.snapshot_key} @ {self.generated_at:%Y-%m-%d %H:%M:%S}"
+
+
+class SiteCounter(models.Model):
+    """
+    Incrementally maintained count of unverified sites for one project
+    (or all sites when project is empty) and one dimension value, e.g.
+    verification status 'APPROVED'. See reports/services/site_counters.py.
+    """
+    project = models.ForeignKey(
+        'DataCollectionProject',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='site_counters',
+        help_text="Project counted (empty = all sites)"
+    )
+    dimension = models.CharField(
+        max_length=20,
+        help_text="What is counted (e.g., 'status', 'calling', 'category', 'sum')"
+    )
+    value = models.CharField(max_length=50, blank=True)
+    count = models.BigIntegerField(default=0)
+    amount = models.FloatField(
+        default=0.0,
+        help_text="Running sum of the field named by value ('sum' rows)"
+    )
+
+    class Meta:
+        verbose_name = 'Site Counter'
+        verbose_name_plural = 'Site Counters'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'dimension', 'value'],
+                name='unique_project_site_counter'
+            ),
+            models.UniqueConstraint(
+                fields=['dimension', 'value'],
+                condition=Q(project__isnull=True),
+                name='unique_global_site_counter'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.project_id or 'all'} {self.dimension}:{self.value} = {self.count}"
+
+
 # --- Saved Search Class ---
 class SavedSearch(models.Model):
     """
@@ -1111,6 +1185,17 @@ class SavedSearch(models.Model):
     # Whether this is the default search
     is_default = models.BooleanField(default=False)
 
+    # Alerts: notify the user of new sites matching this search
+    alerts_enabled = models.BooleanField(default=False)
+
+    alert_change_id = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Last change log entry evaluated for alerts (empty = matches not recorded yet)"
+    )
+
+    last_alert_at = models.DateTimeField(null=True, blank=True)
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -1129,6 +1214,42 @@ class SavedSearch(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.name}"
 
+    def reset_alerts(self):
+        """Forget recorded matches; the next alert run records the current ones."""
+        self.alert_change_id = None
+        self.alert_matches.all().delete()
+
+
+# --- Saved Search Match Class ---
+class SavedSearchMatch(models.Model):
+    """
+    Production sites currently matching an alerting saved search, so alerts
+    only report sites that are new to the search
+    (see reports/services/saved_search_alerts.py).
+    """
+
+    saved_search = models.ForeignKey(
+        SavedSearch,
+        on_delete=models.CASCADE,
+        related_name='alert_matches'
+    )
+
+    production_site_pk = models.BigIntegerField()
+
+    matched_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'saved_search_matches'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['saved_search', 'production_site_pk'],
+                name='unique_saved_search_match'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.saved_search} - site {self.production_site_pk}"
+
 
 # --- Export Template Class ---
 class ExportTemplate(models.Model):
@@ -1569,6 +1690,111 @@ class ProjectActivityLog(models.Model):
         return f"{self.get_action_display()} - {self.project.project_name} by {self.performed_by}"    
 
 
+# --- Import Session Classes ---
+class ImportSessionStatus(models.TextChoices):
+    PARSING = 'PARSING', 'Parsing'
+    READY = 'READY', 'Ready to Import'
+    IMPORTING = 'IMPORTING', 'Importing'
+    COMPLETED = 'COMPLETED', 'Completed'
+    FAILED = 'FAILED', 'Failed'
+
+
+class ImportRowStatus(models.TextChoices):
+    VALID = 'VALID', 'Valid'
+    INVALID = 'INVALID', 'Invalid'
+    DUPLICATE = 'DUPLICATE', 'Duplicate'
+    IMPORTED = 'IMPORTED', 'Imported'
+    SKIPPED = 'SKIPPED', 'Skipped'
+
+
+class ImportSession(models.Model):
+    """
+    A project site upload staged on the server.
+    The file is parsed and validated once into ImportSessionRow rows;
+    confirming the import promotes the valid rows to UnverifiedSite.
+    See reports/services/site_import.py.
+    """
+    session_id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    project = models.ForeignKey(
+        DataCollectionProject,
+        on_delete=models.CASCADE,
+        related_name='import_sessions'
+    )
+    category = models.CharField(max_length=20, choices=CompanyCategory.choices)
+    file_name = models.CharField(max_length=255, blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='import_sessions'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=ImportSessionStatus.choices,
+        default=ImportSessionStatus.PARSING
+    )
+    
+    # Progress counters (updated after every chunk)
+    expected_rows = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Data rows announced by the file, when known before parsing"
+    )
+    total_rows = models.PositiveIntegerField(default=0)
+    valid_rows = models.PositiveIntegerField(default=0)
+    invalid_rows = models.PositiveIntegerField(default=0)
+    duplicate_rows = models.PositiveIntegerField(default=0)
+    imported_rows = models.PositiveIntegerField(default=0)
+    skipped_rows = models.PositiveIntegerField(default=0)
+    
+    error_message = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Import Session'
+        verbose_name_plural = 'Import Sessions'
+        indexes = [
+            models.Index(fields=['created_by', 'project', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.file_name or self.session_id} ({self.get_status_display()})"
+
+
+class ImportSessionRow(models.Model):
+    """
+    One staged row of an import session, already converted to site field
+    values and flagged valid / invalid / duplicate.
+    """
+    session = models.ForeignKey(
+        ImportSession,
+        on_delete=models.CASCADE,
+        related_name='rows'
+    )
+    row_number = models.PositiveIntegerField(help_text="Row number in the uploaded sheet")
+    status = models.CharField(max_length=20, choices=ImportRowStatus.choices)
+    data = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    errors = models.JSONField(default=list, blank=True)
+    message = models.CharField(max_length=500, blank=True)
+    
+    class Meta:
+        ordering = ['row_number']
+        verbose_name = 'Import Session Row'
+        verbose_name_plural = 'Import Session Rows'
+        indexes = [
+            models.Index(fields=['session', 'status', 'row_number']),
+        ]
+    
+    def __str__(self):
+        return f"Row {self.row_number} ({self.status})"
+
+
 # --- Verification Status Class ---
 class VerificationStatus(models.TextChoices):
     PENDING = 'PENDING', 'Pending Review'
@@ -2325,6 +2551,9 @@ class UnverifiedSite(models.Model):
             models.Index(fields=['verified_by']),
             models.Index(fields=['priority']),
             models.Index(fields=['-created_at']),
+            # Work queue tiers (reports/services/work_queue.py)
+            models.Index(fields=['calling_status', 'priority', 'created_at']),
+            models.Index(fields=['verification_status', 'priority', 'created_at']),
         ]
     
     def __str__(self):
@@ -2372,7 +2601,38 @@ class UnverifiedSite(models.Model):
         self.is_duplicate = False
         self.duplicate_of = None
         return False
-    
+
+    @classmethod
+    def check_for_duplicates_bulk(cls, sites):
+        """
+        check_for_duplicates() for many unsaved sites with a single query
+        (used before bulk_create, which skips save()).
+        """
+        from django.db.models.functions import Lower
+
+        names = {site.company_name.lower() for site in sites if site.company_name and site.country}
+        candidates = {}
+        if names:
+            records = SuperdatabaseRecord.objects.annotate(
+                name_lower=Lower('company_name')
+            ).filter(name_lower__in=names).order_by('pk').values('pk', 'name_lower', 'country', 'address_1')
+            for record in records:
+                candidates.setdefault(record['name_lower'], []).append(record)
+
+        for site in sites:
+            site.is_duplicate = False
+            site.duplicate_of = None
+            if not site.company_name or not site.country:
+                continue
+            for record in candidates.get(site.company_name.lower(), []):
+                if (record['country'] or '').lower() != site.country.lower():
+                    continue
+                if site.address_1 and (record['address_1'] or '').lower() != site.address_1.lower():
+                    continue
+                site.is_duplicate = True
+                site.duplicate_of_id = record['pk']
+                break
+
     def update_calling_status(self, new_status, changed_by, status_notes=''):
         """
         Update calling status and create history entry
@@ -2483,6 +2743,7 @@ class UnverifiedSite(models.Model):
             ValueError: If site is already transferred or not approved
         """
         from django.db import transaction
+        from .services.site_counters import SiteCounterService
         
         # Refresh from database to get the latest status (prevent race conditions)
         self.refresh_from_db(fields=['verification_status'])
@@ -2526,7 +2787,8 @@ class UnverifiedSite(models.Model):
             
             # Update status to TRANSFERRED using direct database update to ensure it persists
             # This bypasses any issues with the model's save() method
-            UnverifiedSite.objects.filter(site_id=self.site_id).update(
+            SiteCounterService.update_sites(
+                UnverifiedSite.objects.filter(site_id=self.site_id),
                 verification_status=VerificationStatus.TRANSFERRED
             )
             
@@ -2549,6 +2811,9 @@ class UnverifiedSite(models.Model):
         Creates or updates a Company with ProductionSite and ProductionSiteVersion.
         Updates status to TRANSFERRED and creates history entry.
         
+        Runs through the batch pipeline (CompanyTransferService) so single and
+        bulk transfers share the same merge rules.
+        
         Args:
             transferred_by: User who performed the transfer
             
@@ -2558,207 +2823,37 @@ class UnverifiedSite(models.Model):
         Raises:
             ValueError: If site is already transferred or not approved
         """
-        from django.db import transaction
-        from .company_models import (
-            Company, ProductionSite, ProductionSiteVersion,
-            CompanyHistory, CompanyStatus
-        )
-        
-        # Refresh from database to get the latest status (prevent race conditions)
-        self.refresh_from_db(fields=['verification_status'])
-        
-        # Check if already transferred
-        if self.verification_status == VerificationStatus.TRANSFERRED:
-            raise ValueError('This site has already been transferred')
-        
-        # Check if approved
-        if self.verification_status != VerificationStatus.APPROVED:
-            raise ValueError(f'Site must be approved before transfer. Current status: {self.get_verification_status_display()}')
-        
-        # Company-level fields to transfer
-        company_fields = {
-            'company_name', 'address_1', 'address_2', 'address_3', 'address_4',
-            'region', 'country', 'geographical_coverage', 'phone_number',
-            'company_email', 'website', 'accreditation', 'parent_company',
-            'title_1', 'initials_1', 'surname_1', 'position_1',
-            'title_2', 'initials_2', 'surname_2', 'position_2',
-            'title_3', 'initials_3', 'surname_3', 'position_3',
-            'title_4', 'initials_4', 'surname_4', 'position_4',
-        }
-        
-        # Fields to exclude from version data (handled at company level or metadata)
-        exclude_from_version = {
-            'site_id', 'verification_status', 'collected_by', 'verified_by',
-            'collected_date', 'verified_date', 'source', 'priority',
-            'notes', 'rejection_reason', 'data_quality_score',
-            'assigned_to', 'is_duplicate', 'duplicate_of',
-            'created_at', 'updated_at', 'project', 'category',
-            'calling_status', 'calling_status_changed_at', 'calling_status_changed_by',
-            'is_pre_filled', 'pre_filled_by', 'pre_filled_at', 'total_calls'
-        } | company_fields  # Also exclude company fields from version
-        
-        with transaction.atomic():
-            # Build company data
-            company_data = {}
-            for field_name in company_fields:
-                if hasattr(self, field_name):
-                    company_data[field_name] = getattr(self, field_name)
-            
-            # Check if company with same name+address+country exists
-            existing_company = Company.objects.filter(
-                company_name_normalized=self.company_name.lower().strip(),
-                country__iexact=self.country
-            ).first()
-            
-            # If found, optionally check address for exact match
-            if existing_company and self.address_1:
-                # Check if address also matches
-                if existing_company.address_1.lower().strip() != self.address_1.lower().strip():
-                    # Different address - create new company
-                    existing_company = None
-            
-            # NEW: Get project code
-            project_code = ''
-            if self.project and self.project.project_code:
-                project_code = self.project.project_code
-
-            if existing_company:
-                company = existing_company
-                is_new_company = False
-                
-                for field_name, value in company_data.items():
-                    setattr(company, field_name, value)
-                company.last_modified_by = transferred_by
-                
-                # NEW: Update project info if not already set
-                if project_code and not company.project_code:
-                    company.project_code = project_code
-                    company.source_project = self.project
-                
-                company.save()
-
-            else:
-                company_data['status'] = CompanyStatus.COMPLETE
-                company_data['created_by'] = transferred_by
-                company_data['last_modified_by'] = transferred_by
-                
-                # NEW: Set project code and source project
-                if self.project:
-                    company_data['project_code'] = project_code
-                    company_data['source_project'] = self.project
-                
-                company = Company.objects.create(**company_data)
-                is_new_company = True
-            
-            category = self.category
-            existing_site = company.production_sites.filter(category=category).first()
-            
-            if existing_site:
-                production_site = existing_site
-                
-                # NEW: Update source_project_code if not set
-                if project_code and not production_site.source_project_code:
-                    production_site.source_project_code = project_code
-                    production_site.save(update_fields=['source_project_code'])
-                
-                current_version = production_site.current_version
-                
-                if current_version:
-                    for field in ProductionSiteVersion._meta.get_fields():
-                        if not hasattr(field, 'column'):
-                            continue
-                        field_name = field.name
-                        if field_name in exclude_from_version:
-                            continue
-                        if hasattr(self, field_name):
-                            setattr(current_version, field_name, getattr(self, field_name))
-                    current_version.save()
-                    version = current_version
-                else:
-                    version = None
-            else:
-                version_data = {}
-                for field in ProductionSiteVersion._meta.get_fields():
-                    if not hasattr(field, 'column'):
-                        continue
-                    field_name = field.name
-                    if field_name in exclude_from_version:
-                        continue
-                    if hasattr(self, field_name):
-                        version_data[field_name] = getattr(self, field_name)
-                
-                production_site, version = company.add_production_site(
-                    category=category,
-                    created_by=transferred_by,
-                    version_data=version_data
-                )
-                
-                # NEW: Set source project code
-                if project_code:
-                    production_site.source_project_code = project_code
-                    production_site.save(update_fields=['source_project_code'])
-
-            # Store project code on Company and ProductionSite
-            if self.project and hasattr(self.project, 'project_code') and self.project.project_code:
-                # Update Company's project_code if this is the first transfer
-                if not company.project_code:
-                    company.project_code = self.project.project_code
-                    company.source_project = self.project
-                    company.save(update_fields=['project_code', 'source_project'])
-                
-                # Always store project code on ProductionSite (tracks per-category source)
-                if not production_site.source_project_code:
-                    production_site.source_project_code = self.project.project_code
-                    production_site.source_project = self.project
-                    production_site.save(update_fields=['source_project_code', 'source_project'])
-            
-            # Create company history entry
-            if is_new_company:
-                CompanyHistory.objects.create(
-                    company=company,
-                    action='CREATED',
-                    performed_by=transferred_by,
-                    description=f'Created from Unverified Site transfer',
-                    related_production_site=production_site,
-                    related_version=version
-                )
-            else:
-                CompanyHistory.objects.create(
-                    company=company,
-                    action='SITE_ADDED' if not existing_site else 'UPDATED',
-                    performed_by=transferred_by,
-                    description=f'Updated from Unverified Site transfer ({category})',
-                    related_production_site=production_site,
-                    related_version=version
-                )
-            
-            # Update UnverifiedSite status to TRANSFERRED
-            UnverifiedSite.objects.filter(site_id=self.site_id).update(
-                verification_status=VerificationStatus.TRANSFERRED
-            )
-            
-            # Refresh the instance to get the updated status
-            self.refresh_from_db()
-            
-            # Create verification history entry
-            VerificationHistory.objects.create(
-                site=self,
-                action='TRANSFERRED',
-                performed_by=transferred_by,
-                comments=f'Transferred to Company Database (Company: {company.unique_key})'
-            )
+        from .services.company_transfer import CompanyTransferService
         
-        return company, production_site, version
+        return CompanyTransferService.transfer_site(self, transferred_by=transferred_by)
 
 
     def save(self, *args, **kwargs):
-        """Auto-calculate quality score and check duplicates on save."""
+        """
+        Auto-calculate quality score and check duplicates on save.
+        The site counters are updated in the same transaction, and work
+        queue leases are released once a status change takes the site out
+        of its queue.
+        """
+        from django.db import transaction
+        from .services.site_counters import SiteCounterService
+        from .services.work_queue import WorkQueueService
+
         # Only calculate quality score and check duplicates if not a partial update
         update_fields = kwargs.get('update_fields')
         if update_fields is None:
             self.calculate_data_quality_score()
             self.check_for_duplicates()
-        super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            old_state = None if self._state.adding else SiteCounterService.locked_state(self)
+            super().save(*args, **kwargs)
+            SiteCounterService.record_save(old_state, self, update_fields)
+            if old_state is not None and (
+                old_state['verification_status'] != self.verification_status
+                or old_state['calling_status'] != self.calling_status
+            ):
+                WorkQueueService.release_finished([self.pk])
 
 
 # =============================================================================
@@ -2772,6 +2867,7 @@ from .company_models import (
     CompanyNote,
     CompanyHistory,
     CompanyStatus,
+    ProductionSiteChange,
 )
 
 
@@ -2837,6 +2933,44 @@ class VerificationHistory(models.Model):
         return f"{self.action} - {self.site.company_name} by {self.performed_by}"    
     
 
+# --- Work Queue Classes ---
+class WorkQueue(models.TextChoices):
+    """Queues sites are handed out from (see reports/services/work_queue.py)"""
+    CALLING = 'CALLING', 'Calling'
+    ALTERNATIVE_NUMBERS = 'ALTERNATIVE_NUMBERS', 'Alternative Numbers'
+    REVIEW = 'REVIEW', 'Review'
+
+
+class SiteLease(models.Model):
+    """
+    Time-limited claim of an unverified site by one user in a work queue.
+    While the lease is active nobody else is handed the site; an expired
+    lease is simply taken over by the next claim.
+    """
+    site = models.ForeignKey('UnverifiedSite', on_delete=models.CASCADE, related_name='leases')
+    queue = models.CharField(max_length=30, choices=WorkQueue.choices)
+    holder = models.ForeignKey(User, on_delete=models.CASCADE, related_name='site_leases')
+    claimed_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Site Lease'
+        verbose_name_plural = 'Site Leases'
+        constraints = [
+            models.UniqueConstraint(fields=['site', 'queue'], name='unique_site_lease'),
+        ]
+        indexes = [
+            models.Index(fields=['holder', 'queue', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.site_id} ({self.queue}) held by {self.holder} until {self.expires_at:%H:%M:%S}"
+
+    @property
+    def is_active(self):
+        return self.expires_at > timezone.now()
+
+
 # --- Call Log Class ---
 class CallLog(models.Model):
     """
@@ -3019,7 +3153,80 @@ class FieldConfirmation(models.Model):
             status.append('New')
         
         status_str = ', '.join(status) if status else 'Unconfirmed'
-        return f"{self.site.company_name} - {self.field_name} ({status_str})"    
+        return f"{self.site.company_name} - {self.field_name} ({status_str})"
+
+    @classmethod
+    def bulk_upsert(cls, site, confirmations_data, user):
+        """
+        Apply a batch of field confirmation changes to a site in a few
+        statements: one read of the existing confirmations, one upsert for
+        the new ones and one bulk update for the rest.
+
+        Returns the confirmations in payload order.
+        """
+        from django.db import transaction
+
+        now = timezone.now()
+        field_names = {conf_data['field_name'] for conf_data in confirmations_data}
+
+        with transaction.atomic():
+            existing = {
+                confirmation.field_name: confirmation
+                for confirmation in cls.objects.filter(
+                    site=site, field_name__in=field_names
+                ).select_related('confirmed_by')
+            }
+            created = {}
+            confirmations = []
+
+            for conf_data in confirmations_data:
+                field_name = conf_data['field_name']
+                confirmation = existing.get(field_name) or created.get(field_name)
+                if confirmation is None:
+                    confirmation = cls(site=site, field_name=field_name, confirmed_by=user)
+                    created[field_name] = confirmation
+
+                if 'is_confirmed' in conf_data:
+                    confirmation.is_confirmed = conf_data['is_confirmed']
+                    if conf_data['is_confirmed'] and not confirmation.confirmed_at:
+                        confirmation.confirmed_at = now
+                        confirmation.confirmed_by = user
+
+                if 'is_new_data' in conf_data:
+                    confirmation.is_new_data = conf_data['is_new_data']
+
+                # Pre-filled: once true, stays true
+                if conf_data.get('is_pre_filled'):
+                    confirmation.is_pre_filled = True
+
+                # last_selected determines the field color
+                if 'last_selected' in conf_data:
+                    confirmation.last_selected = conf_data['last_selected']
+
+                if 'notes' in conf_data:
+                    confirmation.notes = conf_data['notes']
+
+                confirmations.append(confirmation)
+
+            update_fields = [
+                'is_confirmed', 'is_new_data', 'is_pre_filled', 'last_selected',
+                'confirmed_by', 'confirmed_at', 'notes', 'updated_at',
+            ]
+            if created:
+                # A concurrent save may have created the same fields meanwhile
+                cls.objects.bulk_create(
+                    created.values(),
+                    update_conflicts=True,
+                    unique_fields=['site', 'field_name'],
+                    update_fields=update_fields,
+                )
+            if existing:
+                # bulk_update() does not touch auto_now fields
+                for confirmation in existing.values():
+                    confirmation.updated_at = now
+                cls.objects.bulk_update(existing.values(), update_fields)
+
+        return confirmations
 
 
 # --- Company Search Result Class ---
@@ -3100,6 +3307,20 @@ class CompanyResearchResult(models.Model):
         verbose_name="Website"
     )
     
+    # Normalized "<company name>|<country>" for reusing recent results
+    query_key = models.CharField(
+        max_length=400,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Query Key"
+    )
+    from_cache = models.BooleanField(
+        default=False,
+        verbose_name="Served from Cache",
+        help_text="Copy of a recent result for the same company, no AI call was made"
+    )
+    
     # Metadata
     is_favorite = models.BooleanField(
         default=False,
@@ -3118,6 +3339,7 @@ class CompanyResearchResult(models.Model):
         indexes = [
             models.Index(fields=['user', '-searched_at']),
             models.Index(fields=['company_name', 'country']),
+            models.Index(fields=['query_key', '-searched_at']),
             models.Index(fields=['is_favorite']),
         ]
     
@@ -3133,7 +3355,17 @@ class CompanyResearchResult(models.Model):
             self.website = self.result_data.get('website', '')
             self.model_used = self.result_data.get('model_used', '')
         
+        self.query_key = self.make_query_key(self.company_name, self.country)
         super().save(*args, **kwargs)
+    
+    @staticmethod
+    def make_query_key(company_name, country):
+        """'ACME  Corp.', 'Turkey ' -> 'acme corp|turkey'"""
+        def normalize(value):
+            value = unicodedata.normalize('NFKC', value or '').casefold()
+            value = re.sub(r'[^\w\s&-]', ' ', value)
+            return ' '.join(value.split())
+        return f"{normalize(company_name)}|{normalize(country)}"[:400]
 
 
 # --- Report Feedback Class ---
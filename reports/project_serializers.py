@@ -11,6 +11,7 @@ from .models import (
     ReviewNote,
     UnverifiedSite,
     ProjectActivityLog,
+    SiteLease,
     VerificationStatus,
     ProjectStatus
 )
@@ -89,6 +90,27 @@ class ProjectActivityLogSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class SiteLeaseSerializer(serializers.ModelSerializer):
+    """Serializer for work queue leases"""
+    holder_info = UserBasicSerializer(source='holder', read_only=True)
+    queue_display = serializers.CharField(source='get_queue_display', read_only=True)
+    is_active = serializers.BooleanField(read_only=True)
+    
+    class Meta:
+        model = SiteLease
+        fields = [
+            'site',
+            'queue',
+            'queue_display',
+            'holder',
+            'holder_info',
+            'claimed_at',
+            'expires_at',
+            'is_active',
+        ]
+        read_only_fields = fields
+
+
 class DataCollectionProjectListSerializer(serializers.ModelSerializer):
     """Serializer for listing projects (lightweight)"""
     created_by_info = UserBasicSerializer(source='created_by', read_only=True)
@@ -29,6 +29,13 @@ from .project_views import (
     my_tasks,
 )
 
+from .work_queue_views import (
+    claim_next_site,
+    my_leases,
+    renew_lease,
+    release_lease,
+)
+
 from .notes_views import (
     # Review notes CRUD
     SiteReviewNotesListCreateAPIView,
@@ -107,4 +114,18 @@ urlpatterns = [
     
     # Get user's tasks (needs revision or pending review)
     path('my-tasks/', my_tasks, name='my-tasks'),
+    
+    # =========================================================================
+    # WORK QUEUE (leased "next site" for callers and reviewers)
+    # =========================================================================
+    
+    # Lease the next site of a queue (calling, alternative-numbers, review)
+    path('work-queue/<str:queue>/next/', claim_next_site, name='work-queue-next'),
+    
+    # Current user's active leases
+    path('work-queue/leases/', my_leases, name='work-queue-leases'),
+    
+    # Extend / give back a lease
+    path('work-queue/<str:queue>/leases/<uuid:site_id>/renew/', renew_lease, name='work-queue-renew'),
+    path('work-queue/<str:queue>/leases/<uuid:site_id>/release/', release_lease, name='work-queue-release'),
 ]
\ No newline at end of file
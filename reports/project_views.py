@@ -9,10 +9,9 @@ from rest_framework import status, generics, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Avg, Case, When, F, FloatField
+from django.db.models import Q, Count, Avg
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db import transaction
 
 from .models import (
     DataCollectionProject,
@@ -21,7 +20,8 @@ from .models import (
     ProjectActivityLog,
     VerificationStatus,
     ProjectStatus,
-    SuperdatabaseRecord
+    SuperdatabaseRecord,
+    WorkQueue
 )
 from .project_serializers import (
     DataCollectionProjectListSerializer,
@@ -44,6 +44,10 @@ from .permissions import (
 )
 from .project_permissions import user_can_access_project, user_can_access_site
 from .pagination import CustomPagination
+from .services.bulk_verification import BulkVerificationService
+from .services.company_transfer import CompanyTransferService
+from .services.site_counters import SiteCounterService
+from .services.work_queue import WorkQueueService
 from accounts.models import UserRole
 
 
@@ -97,42 +101,8 @@ class ProjectListCreateAPIView(generics.ListCreateAPIView):
         if category_filter:
             queryset = queryset.filter(category=category_filter)
         
-        # CRITICAL: Annotate with site counts
-        queryset = queryset.annotate(
-            total_sites=Count('unverified_sites', distinct=True),
-            pending_sites=Count(
-                Case(When(unverified_sites__verification_status='PENDING', then=1))
-            ),
-            approved_sites=Count(
-                Case(When(unverified_sites__verification_status='APPROVED', then=1))
-            ),
-            rejected_sites=Count(
-                Case(When(unverified_sites__verification_status='REJECTED', then=1))
-            ),
-            under_review_sites=Count(
-                Case(When(unverified_sites__verification_status='UNDER_REVIEW', then=1))
-            ),
-            needs_revision_sites=Count(
-                Case(When(unverified_sites__verification_status='NEEDS_REVISION', then=1))
-            ),
-            transferred_sites=Count(
-                Case(When(unverified_sites__verification_status='TRANSFERRED', then=1))
-            ),
-        )
-        
-        # Add computed fields for completion and approval rates
-        queryset = queryset.annotate(
-            completion_percentage=Case(
-                When(target_count=0, then=0.0),
-                default=F('total_sites') * 100.0 / F('target_count'),
-                output_field=FloatField()
-            ),
-            approval_rate=Case(
-                When(total_sites=0, then=0.0),
-                default=F('approved_sites') * 100.0 / F('total_sites'),
-                output_field=FloatField()
-            )
-        )
+        # CRITICAL: Annotate with site counts (precomputed per project)
+        queryset = SiteCounterService.annotate_projects(queryset)
         
         return queryset.select_related('created_by', 'assigned_to').prefetch_related('assigned_reviewers')
     
@@ -177,40 +147,7 @@ class ProjectDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
             queryset = queryset.filter(Q(created_by=user) | Q(assigned_to=user))
         
         # Add annotations for detail view
-        queryset = queryset.annotate(
-            total_sites=Count('unverified_sites', distinct=True),
-            pending_sites=Count(
-                Case(When(unverified_sites__verification_status='PENDING', then=1))
-            ),
-            approved_sites=Count(
-                Case(When(unverified_sites__verification_status='APPROVED', then=1))
-            ),
-            rejected_sites=Count(
-                Case(When(unverified_sites__verification_status='REJECTED', then=1))
-            ),
-            under_review_sites=Count(
-                Case(When(unverified_sites__verification_status='UNDER_REVIEW', then=1))
-            ),
-            needs_revision_sites=Count(
-                Case(When(unverified_sites__verification_status='NEEDS_REVISION', then=1))
-            ),
-            transferred_sites=Count(
-                Case(When(unverified_sites__verification_status='TRANSFERRED', then=1))
-            ),
-        )
-        
-        queryset = queryset.annotate(
-            completion_percentage=Case(
-                When(target_count=0, then=0.0),
-                default=F('total_sites') * 100.0 / F('target_count'),
-                output_field=FloatField()
-            ),
-            approval_rate=Case(
-                When(total_sites=0, then=0.0),
-                default=F('approved_sites') * 100.0 / F('total_sites'),
-                output_field=FloatField()
-            )
-        )
+        queryset = SiteCounterService.annotate_projects(queryset)
         
         return queryset.select_related('created_by', 'assigned_to').prefetch_related('assigned_reviewers')
     
@@ -679,11 +616,13 @@ class SiteReviewNotesListCreateAPIView(generics.ListCreateAPIView):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, CanVerifySites])
-@transaction.atomic
 def bulk_project_action(request, project_id):
     """
     Perform bulk actions on multiple sites within a project.
-    Actions: approve, reject, transfer, under_review
+    Actions: approve, reject, transfer, under_review, needs_revision
+
+    Status actions are applied set-based by BulkVerificationService (one
+    UPDATE + bulk history insert in a single short transaction).
     """
     project = get_object_or_404(DataCollectionProject, project_id=project_id)
     serializer = BulkProjectActionSerializer(data=request.data)
@@ -695,162 +634,28 @@ def bulk_project_action(request, project_id):
     action = serializer.validated_data['action']
     note = serializer.validated_data.get('note', '')
     
-    # Get sites with select_for_update to prevent race conditions
-    # This locks the rows until the transaction completes
-    sites = UnverifiedSite.objects.select_for_update().filter(
-        site_id__in=site_ids,
-        project=project
-    )
-    
-    if not sites.exists():
+    if not UnverifiedSite.objects.filter(site_id__in=site_ids, project=project).exists():
         return Response(
             {'error': 'No valid sites found'},
             status=status.HTTP_404_NOT_FOUND
         )
     
-    results = {
-        'success': 0,
-        'failed': 0,
-        'errors': []
-    }
-    
-    # Perform action based on type
-    for site in sites:
-        try:
-            if action == 'approve':
-                site.verification_status = VerificationStatus.APPROVED
-                site.verified_by = request.user
-                site.verified_date = timezone.now()
-                site.save()
-                
-                # Log verification history
-                from .models import VerificationHistory
-                VerificationHistory.objects.create(
-                    site=site,
-                    action='APPROVED',
-                    performed_by=request.user,
-                    comments=note
-                )
-                
-                # ✅ NEW: Create review note if provided
-                if note:
-                    ReviewNote.objects.create(
-                        site=site,
-                        note_text=f"[VERIFICATION] {note}",
-                        created_by=request.user,
-                        is_internal=False
-                    )
-                
-            elif action == 'reject':
-                site.verification_status = VerificationStatus.REJECTED
-                site.verified_by = request.user
-                site.verified_date = timezone.now()
-                site.save()
-                
-                from .models import VerificationHistory
-                VerificationHistory.objects.create(
-                    site=site,
-                    action='REJECTED',
-                    performed_by=request.user,
-                    comments=note
-                )
-                
-                # ✅ NEW: Create review note if provided
-                if note:
-                    ReviewNote.objects.create(
-                        site=site,
-                        note_text=f"[VERIFICATION] {note}",
-                        created_by=request.user,
-                        is_internal=False
-                    )
-                
-            elif action == 'transfer':
-                # Re-fetch the site to get the latest status (prevents race conditions)
-                site.refresh_from_db()
-                
-                # Check if already transferred
-                if site.verification_status == VerificationStatus.TRANSFERRED:
-                    results['failed'] += 1
-                    results['errors'].append(
-                        f"Site '{site.company_name}' already transferred"
-                    )
-                    continue
-                
-                # Check if approved
-                if site.verification_status != VerificationStatus.APPROVED:
-                    results['failed'] += 1
-                    results['errors'].append(
-                        f"Site '{site.company_name}' not approved (current status: {site.get_verification_status_display()})"
-                    )
-                    continue
-                
-                # Transfer to Company Database (model method handles status update and history)
-                try:
-                    company, production_site, version = site.transfer_to_company_database(transferred_by=request.user)
-                    results['success'] += 1
-                    continue
-                except ValueError as e:
-                    # ValueError is raised for business logic errors (already transferred, not approved)
-                    results['failed'] += 1
-                    results['errors'].append(f"{site.company_name}: {str(e)}")
-                    continue
-                except Exception as e:
-                    results['failed'] += 1
-                    results['errors'].append(f"Transfer failed for '{site.company_name}': {str(e)}")
-                    continue
-                
-            elif action == 'under_review':
-                site.verification_status = VerificationStatus.UNDER_REVIEW
-                site.verified_by = request.user  # ✅ NEW: Track who started review
-                site.save()
-                
-                # ✅ NEW: Create verification history
-                from .models import VerificationHistory
-                VerificationHistory.objects.create(
-                    site=site,
-                    action='UNDER_REVIEW',
-                    performed_by=request.user,
-                    comments=note or 'Site marked for review'
-                )
-                
-                # ✅ NEW: Create review note if provided
-                if note:
-                    ReviewNote.objects.create(
-                        site=site,
-                        note_text=f"[VERIFICATION] {note}",
-                        created_by=request.user,
-                        is_internal=False
-                    )
-            
-            elif action == 'needs_revision':
-                site.verification_status = VerificationStatus.NEEDS_REVISION
-                site.verified_by = request.user
-                site.verified_date = timezone.now()
-                site.save()
-                
-                # ✅ NEW: Create verification history
-                from .models import VerificationHistory
-                VerificationHistory.objects.create(
-                    site=site,
-                    action='NEEDS_REVISION',
-                    performed_by=request.user,
-                    comments=note or 'Site needs revision'
-                )
-                
-                # Create review note if provided - with [VERIFICATION] prefix
-                if note:
-                    ReviewNote.objects.create(
-                        site=site,
-                        note_text=f"[VERIFICATION] {note}",
-                        created_by=request.user,
-                        is_internal=False
-                    )
-            
-            results['success'] += 1
-            
-        except Exception as e:
-            results['failed'] += 1
-            results['errors'].append(str(e))
+    if BulkVerificationService.supports(action):
+        default_comments = {
+            'under_review': 'Site marked for review',
+            'needs_revision': 'Site needs revision',
+        }
+        results = BulkVerificationService.apply(
+            site_ids,
+            action,
+            request.user,
+            comments=note or default_comments.get(action, ''),
+            review_note=f"[VERIFICATION] {note}" if note else None,
+            project=project,
+        )
+    else:
+        # Transferred in atomic chunks by the batch pipeline
+        results = CompanyTransferService.transfer(site_ids, request.user, project=project)
     
     # Log project activity
     ProjectActivityLog.objects.create(
@@ -866,6 +671,7 @@ def bulk_project_action(request, project_id):
     }, status=status.HTTP_200_OK)
 
 
+
 # ============================================================================
 # STATISTICS VIEWS
 # ============================================================================
@@ -892,62 +698,29 @@ def project_stats(request):
     active_projects = projects.filter(status=ProjectStatus.ACTIVE).count()
     completed_projects = projects.filter(status=ProjectStatus.COMPLETED).count()
     
-    # Sites stats - include sites from assigned projects for data collectors
-    if user.role == UserRole.DATA_COLLECTOR:
-        sites = UnverifiedSite.objects.filter(
-            Q(project__created_by=user) | Q(project__assigned_to=user)
-        )
-    else:
-        sites = UnverifiedSite.objects.filter(project__isnull=False)
-    
-    total_sites = sites.count()
-    pending_sites = sites.filter(verification_status=VerificationStatus.PENDING).count()
-    needs_revision_sites = sites.filter(verification_status=VerificationStatus.NEEDS_REVISION).count()
-    approved_sites = sites.filter(verification_status=VerificationStatus.APPROVED).count()
+    # Sites stats - summed from the per-project site counters
+    site_counts = SiteCounterService.get_counts(projects)
+    total_sites = site_counts['total']
+    pending_sites = site_counts['status'].get(VerificationStatus.PENDING, 0)
+    needs_revision_sites = site_counts['status'].get(VerificationStatus.NEEDS_REVISION, 0)
+    approved_sites = site_counts['status'].get(VerificationStatus.APPROVED, 0)
     
     # By category
-    by_category = {}
-    for category in DataCollectionProject.objects.values_list('category', flat=True).distinct():
-        count = projects.filter(category=category).count()
-        by_category[category] = count
+    by_category = dict.fromkeys(DataCollectionProject.objects.values_list('category', flat=True).distinct(), 0)
+    for row in projects.values('category').annotate(count=Count('pk')):
+        by_category[row['category']] = row['count']
     
     # By status
-    by_status = {}
-    for status_choice in ProjectStatus.choices:
-        count = projects.filter(status=status_choice[0]).count()
-        by_status[status_choice[0]] = count
+    by_status = {status_choice[0]: 0 for status_choice in ProjectStatus.choices}
+    for row in projects.values('status').annotate(count=Count('pk')):
+        by_status[row['status']] = row['count']
     
     # Recent projects with annotations
-    recent_projects = DataCollectionProject.objects.select_related(
-        'created_by'
-    ).prefetch_related(
-        'assigned_reviewers'
-    ).annotate(
-        total_sites=Count('unverified_sites', distinct=True),
-        pending_sites=Count(
-            Case(When(unverified_sites__verification_status='PENDING', then=1))
-        ),
-        approved_sites=Count(
-            Case(When(unverified_sites__verification_status='APPROVED', then=1))
-        ),
-        rejected_sites=Count(
-            Case(When(unverified_sites__verification_status='REJECTED', then=1))
-        ),
-        under_review_sites=Count(
-            Case(When(unverified_sites__verification_status='UNDER_REVIEW', then=1))
-        ),
-        needs_revision_sites=Count(
-            Case(When(unverified_sites__verification_status='NEEDS_REVISION', then=1))
-        ),
-        completion_percentage=Case(
-            When(target_count=0, then=0.0),
-            default=F('total_sites') * 100.0 / F('target_count'),
-            output_field=FloatField()
-        ),
-        approval_rate=Case(
-            When(total_sites=0, then=0.0),
-            default=F('approved_sites') * 100.0 / F('total_sites'),
-            output_field=FloatField()
+    recent_projects = SiteCounterService.annotate_projects(
+        DataCollectionProject.objects.select_related(
+            'created_by'
+        ).prefetch_related(
+            'assigned_reviewers'
         )
     )[:5]
     
@@ -1001,6 +774,9 @@ def my_tasks(request):
             verification_status__in=[VerificationStatus.PENDING, VerificationStatus.UNDER_REVIEW]
         ).select_related('project', 'collected_by').order_by('-created_at')
         
+        # Skip sites another reviewer has claimed from the review queue
+        pending_sites = WorkQueueService.exclude_leased(pending_sites, WorkQueue.REVIEW, user)
+        
         serializer = UnverifiedSiteProjectSerializer(pending_sites, many=True)
         
         return Response({
@@ -1,7 +1,89 @@
 # QUALITY SCORE FIX - Simplified Version
 # Works without get_category_fields dependency
 
-from django.db import models
+import numpy as np
+from django.db import models, transaction
+from django.db.models import F, IntegerField
+from django.db.models.functions import Coalesce, Length, Trim
+
+
+# ===========================================================================
+# FIELD DEFINITIONS (shared by the per-site and batch scorers)
+# ===========================================================================
+
+# Fields counted by the simple percentage / non-empty count
+NON_EMPTY_FIELDS = [
+    # Core fields
+    'company_name', 'country', 'category',
+    # Address fields
+    'address_1', 'address_2', 'address_3', 'address_4', 'region',
+    # Contact fields
+    'phone_number', 'company_email', 'website',
+    'geographical_coverage', 'accreditation', 'parent_company',
+    # Contact persons
+    'title_1', 'initials_1', 'surname_1', 'position_1',
+    'title_2', 'initials_2', 'surname_2', 'position_2',
+    'title_3', 'initials_3', 'surname_3', 'position_3',
+    'title_4', 'initials_4', 'surname_4', 'position_4',
+]
+
+MATERIAL_FIELDS = [
+    'custom', 'proprietary_products', 'in_house', 'other_materials',
+    'main_materials', 'polymer_range_number', 'polymer_range',
+    'compound_in_house', 'buy_in_compounds',
+]
+
+SIMPLE_FIELDS = NON_EMPTY_FIELDS + MATERIAL_FIELDS
+
+# Field weights for the weighted approach (out of 100 points)
+FIELD_WEIGHTS = {
+    # Tier 1: Critical fields (15 points each)
+    'company_name': 15,
+    'country': 15,
+    'category': 10,
+
+    # Tier 2: Very important fields (10 points each)
+    'website': 10,
+    'phone_number': 10,
+    'company_email': 10,
+
+    # Tier 3: Important fields (5 points each)
+    'address_1': 5,
+    'surname_1': 5,
+    'position_1': 5,
+    'region': 5,
+
+    # Tier 4: Nice to have (2 points each)
+    'address_2': 2,
+    'address_3': 2,
+    'address_4': 2,
+    'surname_2': 2,
+    'surname_3': 2,
+    'surname_4': 2,
+    'parent_company': 2,
+    'accreditation': 2,
+}
+
+# Tiers of the tiered approach: (fields, max points)
+QUALITY_TIERS = [
+    # TIER 1: Required Fields (40 points max)
+    (['company_name', 'country', 'category'], 40),
+    # TIER 2: Core Contact Information (30 points max)
+    (['website', 'phone_number', 'company_email', 'surname_1', 'position_1'], 30),
+    # TIER 3: Address & Company Details (20 points max)
+    (['address_1', 'region', 'geographical_coverage', 'parent_company', 'main_materials', 'polymer_range'], 20),
+    # TIER 4: Additional Contacts (10 points max)
+    (['surname_2', 'position_2', 'surname_3', 'position_3', 'surname_4', 'position_4'], 10),
+]
+
+
+def is_filled(value):
+    """A field counts as filled when it is truthy and not blank."""
+    if not value:
+        return False
+    if isinstance(value, bool):
+        return value
+    return bool(str(value).strip())
 
 
 # ===========================================================================
@@ -13,43 +95,8 @@ def calculate_simple_quality_score(site):
     ✅ APPROACH 1: Simple percentage of filled fields
     Most transparent and honest approach.
     """
-    # Define all fields that should be counted
-    all_fields = [
-        # Core fields
-        'company_name', 'country', 'category',
-        # Address fields
-        'address_1', 'address_2', 'address_3', 'address_4', 'region',
-        # Contact fields
-        'phone_number', 'company_email', 'website',
-        'geographical_coverage', 'accreditation', 'parent_company',
-        # Contact persons
-        'title_1', 'initials_1', 'surname_1', 'position_1',
-        'title_2', 'initials_2', 'surname_2', 'position_2',
-        'title_3', 'initials_3', 'surname_3', 'position_3',
-        'title_4', 'initials_4', 'surname_4', 'position_4',
-    ]
-    
-    # Add material fields
-    material_fields = [
-        'custom', 'proprietary_products', 'in_house', 'other_materials',
-        'main_materials', 'polymer_range_number', 'polymer_range',
-        'compound_in_house', 'buy_in_compounds',
-    ]
-    all_fields.extend(material_fields)
-    
-    total_fields = len(all_fields)
-    filled_count = 0
-    
-    for field_name in all_fields:
-        value = getattr(site, field_name, None)
-        if value:
-            # For boolean fields, we count them if they're True
-            if isinstance(value, bool):
-                if value:
-                    filled_count += 1
-            # For other fields, check if they're not empty
-            elif str(value).strip():
-                filled_count += 1
+    total_fields = len(SIMPLE_FIELDS)
+    filled_count = sum(1 for field_name in SIMPLE_FIELDS if is_filled(getattr(site, field_name, None)))
     
     if total_fields == 0:
         return 0.0
@@ -67,47 +114,11 @@ def calculate_weighted_quality_score(site):
     ✅ APPROACH 2: Weighted scoring
     Core fields are worth more points than optional fields.
     """
-    # Define field weights
-    FIELD_WEIGHTS = {
-        # Tier 1: Critical fields (15 points each)
-        'company_name': 15,
-        'country': 15,
-        'category': 10,
-        
-        # Tier 2: Very important fields (10 points each)
-        'website': 10,
-        'phone_number': 10,
-        'company_email': 10,
-        
-        # Tier 3: Important fields (5 points each)
-        'address_1': 5,
-        'surname_1': 5,
-        'position_1': 5,
-        'region': 5,
-        
-        # Tier 4: Nice to have (2 points each)
-        'address_2': 2,
-        'address_3': 2,
-        'address_4': 2,
-        'surname_2': 2,
-        'surname_3': 2,
-        'surname_4': 2,
-        'parent_company': 2,
-        'accreditation': 2,
-        # All other fields: 1 point each
-    }
-    
     total_possible_points = 100
-    earned_points = 0
-    
-    for field_name, weight in FIELD_WEIGHTS.items():
-        value = getattr(site, field_name, None)
-        if value:
-            if isinstance(value, bool):
-                if value:
-                    earned_points += weight
-            elif str(value).strip():
-                earned_points += weight
+    earned_points = sum(
+        weight for field_name, weight in FIELD_WEIGHTS.items()
+        if is_filled(getattr(site, field_name, None))
+    )
     
     quality_score = (earned_points / total_possible_points) * 100
     return round(min(quality_score, 100), 1)
@@ -132,68 +143,9 @@ def calculate_tiered_quality_score(site):
     This gives reasonable scores that reflect actual data quality.
     """
     score = 0.0
-    
-    # TIER 1: Required Fields (40 points max)
-    required_fields = ['company_name', 'country', 'category']
-    required_filled = 0
-    for field_name in required_fields:
-        value = getattr(site, field_name, None)
-        if value and str(value).strip():
-            required_filled += 1
-    
-    tier1_score = (required_filled / len(required_fields)) * 40
-    score += tier1_score
-    
-    # TIER 2: Core Contact Information (30 points max)
-    core_contact_fields = [
-        'website',
-        'phone_number',
-        'company_email',
-        'surname_1',  # Primary contact surname
-        'position_1'   # Primary contact position
-    ]
-    contact_filled = 0
-    for field_name in core_contact_fields:
-        value = getattr(site, field_name, None)
-        if value and str(value).strip():
-            contact_filled += 1
-    
-    tier2_score = (contact_filled / len(core_contact_fields)) * 30
-    score += tier2_score
-    
-    # TIER 3: Address & Company Details (20 points max)
-    address_fields = [
-        'address_1',
-        'region',
-        'geographical_coverage',
-        'parent_company',
-        'main_materials',
-        'polymer_range'
-    ]
-    address_filled = 0
-    for field_name in address_fields:
-        value = getattr(site, field_name, None)
-        if value and str(value).strip():
-            address_filled += 1
-    
-    tier3_score = (address_filled / len(address_fields)) * 20
-    score += tier3_score
-    
-    # TIER 4: Additional Contacts (10 points max)
-    additional_contact_fields = [
-        'surname_2', 'position_2',
-        'surname_3', 'position_3',
-        'surname_4', 'position_4',
-    ]
-    additional_filled = 0
-    for field_name in additional_contact_fields:
-        value = getattr(site, field_name, None)
-        if value and str(value).strip():
-            additional_filled += 1
-    
-    if len(additional_contact_fields) > 0:
-        tier4_score = (additional_filled / len(additional_contact_fields)) * 10
-        score += tier4_score
+    for fields, points in QUALITY_TIERS:
+        filled = sum(1 for field_name in fields if is_filled(getattr(site, field_name, None)))
+        score += (filled / len(fields)) * points
     
     return round(score, 1)
 
@@ -206,48 +158,31 @@ def count_non_empty_fields(site):
     """
     Count how many fields have been filled in for a site.
     """
-    all_fields = [
-        'company_name', 'country', 'category',
-        'address_1', 'address_2', 'address_3', 'address_4', 'region',
-        'phone_number', 'company_email', 'website',
-        'geographical_coverage', 'accreditation', 'parent_company',
-        'title_1', 'initials_1', 'surname_1', 'position_1',
-        'title_2', 'initials_2', 'surname_2', 'position_2',
-        'title_3', 'initials_3', 'surname_3', 'position_3',
-        'title_4', 'initials_4', 'surname_4', 'position_4',
-    ]
-    
-    filled_count = 0
-    for field_name in all_fields:
-        value = getattr(site, field_name, None)
-        if value:
-            if isinstance(value, bool):
-                if value:
-                    filled_count += 1
-            elif str(value).strip():
-                filled_count += 1
-    
-    return filled_count
+    return sum(1 for field_name in NON_EMPTY_FIELDS if is_filled(getattr(site, field_name, None)))
 
 
 # ===========================================================================
 # MAIN FUNCTION: Calculate Quality Score
 # ===========================================================================
 
+# Approach used for UnverifiedSite.data_quality_score:
+# 'simple' (most transparent), 'weighted' (important fields worth more)
+# or 'tiered' (RECOMMENDED) ⭐
+QUALITY_SCORE_APPROACH = 'tiered'
+
+QUALITY_SCORERS = {
+    'simple': calculate_simple_quality_score,
+    'weighted': calculate_weighted_quality_score,
+    'tiered': calculate_tiered_quality_score,
+}
+
+
 def calculate_data_quality_score(site):
     """
     Main function to calculate data quality score.
-    Change the approach by uncommenting the one you want to use.
+    Change the approach with QUALITY_SCORE_APPROACH.
     """
-    
-    # OPTION 1: Simple percentage (most transparent)
-    # return calculate_simple_quality_score(site)
-    
-    # OPTION 2: Weighted scoring (important fields worth more)
-    # return calculate_weighted_quality_score(site)
-    
-    # OPTION 3: Tiered scoring (RECOMMENDED) ⭐
-    return calculate_tiered_quality_score(site)
+    return QUALITY_SCORERS[QUALITY_SCORE_APPROACH](site)
 
 
 # ===========================================================================
@@ -279,4 +214,166 @@ def compare_quality_scores(site):
         'weighted': weighted,
         'tiered': tiered,
         'filled_count': filled_count,
-    }
\ No newline at end of file
+    }
+
+
+# ===========================================================================
+# BATCH SCORING: Rescore Many Sites At Once
+# ===========================================================================
+#
+# The per-site functions above run on every save. To rescore the backlog
+# (e.g. after changing FIELD_WEIGHTS or QUALITY_TIERS), the "is filled"
+# flags of every scored field are computed by the database and read with
+# values_list() into a (sites x fields) NumPy matrix; each approach is then
+# one matrix product. Text fields count as filled when TRIM(value) is not
+# empty (TRIM only strips spaces, str.strip() strips any whitespace).
+
+BATCH_FIELDS = list(dict.fromkeys(
+    SIMPLE_FIELDS + list(FIELD_WEIGHTS) + [f for fields, _ in QUALITY_TIERS for f in fields]
+))
+
+
+def _filled_expression(model, field_name):
+    """SQL expression that is non-zero when the field is filled."""
+    field = model._meta.get_field(field_name)
+    internal_type = field.get_internal_type()
+    if internal_type in ['CharField', 'TextField', 'EmailField', 'URLField', 'SlugField']:
+        return Length(Trim(Coalesce(F(field_name), models.Value(''))))
+    if internal_type == 'BooleanField':
+        return F(field_name)
+    return Coalesce(F(field_name), models.Value(0), output_field=IntegerField())
+
+
+def _field_mask(fields):
+    """Boolean column mask of `fields` within BATCH_FIELDS."""
+    fields = set(fields)
+    return np.array([field_name in fields for field_name in BATCH_FIELDS])
+
+
+def score_matrix(filled):
+    """
+    Scores of every approach for a (sites x BATCH_FIELDS) boolean matrix.
+
+    Returns:
+        dict: approach -> float array, plus 'filled_count' (int array)
+    """
+    filled = filled.astype(np.float64)
+
+    simple = filled @ _field_mask(SIMPLE_FIELDS) / len(SIMPLE_FIELDS) * 100
+
+    weights = np.array([FIELD_WEIGHTS.get(field_name, 0) for field_name in BATCH_FIELDS], dtype=np.float64)
+    weighted = np.minimum(filled @ weights / 100 * 100, 100)
+
+    tiered = np.zeros(len(filled))
+    for fields, points in QUALITY_TIERS:
+        tiered += (filled @ _field_mask(fields)) / len(fields) * points
+
+    return {
+        'simple': np.round(simple, 1),
+        'weighted': np.round(weighted, 1),
+        'tiered': np.round(tiered, 1),
+        'filled_count': (filled @ _field_mask(NON_EMPTY_FIELDS)).astype(np.int64),
+    }
+
+
+def iter_site_scores(queryset=None, chunk_size=5000):
+    """
+    Score sites chunk by chunk (keyset pagination on the primary key).
+
+    Yields:
+        (site_ids, project_ids, current_scores, scores) per chunk, where
+        scores is the score_matrix() result for the chunk
+    """
+    from .models import UnverifiedSite
+
+    if queryset is None:
+        queryset = UnverifiedSite.objects.all()
+
+    flags = {f'filled_{name}': _filled_expression(UnverifiedSite, name) for name in BATCH_FIELDS}
+    rows = queryset.order_by('pk').annotate(**flags).values_list(
+        'pk', 'project_id', 'data_quality_score', *flags
+    )
+
+    last_pk = None
+    while True:
+        chunk = list((rows.filter(pk__gt=last_pk) if last_pk is not None else rows)[:chunk_size])
+        if not chunk:
+            return
+        last_pk = chunk[-1][0]
+
+        site_ids = [row[0] for row in chunk]
+        project_ids = [row[1] for row in chunk]
+        current = np.array([row[2] or 0 for row in chunk], dtype=np.float64)
+        filled = np.array([row[3:] for row in chunk], dtype=np.float64) != 0
+        yield site_ids, project_ids, current, score_matrix(filled)
+
+
+def rescore_sites(queryset=None, approach=None, chunk_size=5000, dry_run=False):
+    """
+    Recalculate data_quality_score for many sites with bulk updates.
+
+    Only sites whose score changes are written. The site counters' quality
+    score sums are adjusted per chunk, as bulk_update() skips save().
+
+    Args:
+        queryset: UnverifiedSite queryset (default: every site)
+        approach: 'simple', 'weighted' or 'tiered' (default: QUALITY_SCORE_APPROACH)
+        chunk_size: sites read and written per chunk
+        dry_run: compute only, write nothing
+
+    Returns:
+        dict: scored / changed counts and the average score of every approach
+    """
+    from collections import defaultdict
+    from .models import UnverifiedSite
+    from .services.site_counters import SiteCounterService
+
+    approach = approach or QUALITY_SCORE_APPROACH
+    if approach not in QUALITY_SCORERS:
+        raise ValueError(f"Unknown quality score approach '{approach}'")
+
+    scored = changed = 0
+    totals = defaultdict(float)
+
+    for site_ids, project_ids, current, scores in iter_site_scores(queryset, chunk_size):
+        scored += len(site_ids)
+        for name, values in scores.items():
+            totals[name] += float(values.sum())
+
+        new_scores = scores[approach]
+        changed_rows = np.flatnonzero(np.abs(new_scores - current) > 1e-9)
+        changed += len(changed_rows)
+        if dry_run or not len(changed_rows):
+            continue
+
+        sites = []
+        deltas = defaultdict(lambda: [0, 0.0])
+        for i in changed_rows:
+            score = float(new_scores[i])
+            sites.append(UnverifiedSite(pk=site_ids[i], data_quality_score=score))
+            delta = score - float(current[i])
+            deltas[(None, 'sum', 'data_quality_score')][1] += delta
+            if project_ids[i] is not None:
+                deltas[(project_ids[i], 'sum', 'data_quality_score')][1] += delta
+
+        with transaction.atomic():
+            UnverifiedSite.objects.bulk_update(sites, ['data_quality_score'], batch_size=1000)
+            SiteCounterService.apply(deltas)
+
+    if changed and not dry_run:
+        transaction.on_commit(_invalidate_derived_data)
+
+    return {
+        'approach': approach,
+        'scored': scored,
+        'changed': changed,
+        'averages': {name: round(total / scored, 1) if scored else 0.0 for name, total in totals.items()},
+    }
+
+
+def _invalidate_derived_data():
+    from .services.dashboard_snapshot import DashboardSnapshotService
+    from .services.widget_cache import WidgetCacheService
+
+    DashboardSnapshotService.mark_stale()
+    WidgetCacheService.invalidate_for_model('reports.UnverifiedSite')
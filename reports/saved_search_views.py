@@ -5,7 +5,7 @@ These handle HTTP requests for managing saved searches.
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
@@ -112,6 +112,7 @@ class SavedSearchListCreateAPIView(APIView):
         report_id = validated_data['report_id']
         filter_params = validated_data['filter_params']
         is_default = validated_data.get('is_default', False)
+        alerts_enabled = validated_data.get('alerts_enabled', False)
 
         # Get the report
         report = get_object_or_404(CustomReport, report_id=report_id)
@@ -158,7 +159,8 @@ class SavedSearchListCreateAPIView(APIView):
             name=name,
             description=description,
             filter_params=filter_params,
-            is_default=is_default
+            is_default=is_default,
+            alerts_enabled=alerts_enabled
         )
 
         # Serialize and return the created saved search
@@ -234,6 +236,18 @@ class SavedSearchDetailAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        # Parsed up front: nothing may change (reset_alerts deletes matches)
+        # before the request is known to be valid. bool('false') is True.
+        alerts_enabled = None
+        if 'alerts_enabled' in request.data:
+            try:
+                alerts_enabled = serializers.BooleanField().to_internal_value(request.data['alerts_enabled'])
+            except serializers.ValidationError:
+                return Response(
+                    {"error": "alerts_enabled must be a boolean"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
         # Update fields if provided in request
         if 'name' in request.data:
             new_name = request.data['name'].strip()
@@ -266,8 +280,18 @@ class SavedSearchDetailAPIView(APIView):
                     {"error": "filter_params must be an object"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            if filter_params != saved_search.filter_params:
+                # Matches recorded for the old filters no longer apply
+                saved_search.reset_alerts()
             saved_search.filter_params = filter_params
 
+        if alerts_enabled is not None:
+            # Alerts start from the current matches, not those of a past run
+            if alerts_enabled and not saved_search.alerts_enabled:
+                saved_search.reset_alerts()
+
+            saved_search.alerts_enabled = alerts_enabled
+
         if 'is_default' in request.data:
             is_default = request.data['is_default']
 
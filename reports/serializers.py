@@ -352,10 +352,12 @@ class SavedSearchSerializer(serializers.ModelSerializer):
             'user',
             'filter_params',
             'is_default',
+            'alerts_enabled',
+            'last_alert_at',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'user', 'last_alert_at', 'created_at', 'updated_at']
 
     def validate_filter_params(self, value):
         if not isinstance(value, dict):
@@ -398,6 +400,7 @@ class SavedSearchCreateSerializer(serializers.Serializer):
     report_id = serializers.UUIDField(required=True)
     filter_params = serializers.JSONField(required=True)
     is_default = serializers.BooleanField(default=False, required=False)
+    alerts_enabled = serializers.BooleanField(default=False, required=False)
 
     def validate_name(self, value):
         if not value or not value.strip():
@@ -2,5 +2,18 @@
 
 from .duplicate_check import DuplicateCheckService
 from .company_import import CompanyImportService
+from .dashboard_snapshot import DashboardSnapshotService
+from .widget_cache import WidgetCacheService
+from .facet_index import FacetIndexService
+from .company_search import CompanySearchService
+from .company_detail import CompanyDetailService
+from .bulk_verification import BulkVerificationService
+from .company_transfer import CompanyTransferService
+from .site_counters import SiteCounterService
+from .work_queue import WorkQueueService
+from .site_import import SiteImportService
+from .change_feed import ChangeFeedService
+from .saved_search_alerts import SavedSearchAlertService
+from .company_research import CompanyResearchService
 
-__all__ = ['DuplicateCheckService', 'CompanyImportService']
+__all__ = ['DuplicateCheckService', 'CompanyImportService', 'DashboardSnapshotService', 'WidgetCacheService', 'FacetIndexService', 'CompanySearchService', 'CompanyDetailService', 'BulkVerificationService', 'CompanyTransferService', 'SiteCounterService', 'WorkQueueService', 'SiteImportService', 'ChangeFeedService', 'SavedSearchAlertService', 'CompanyResearchService']
@@ -0,0 +1,174 @@
+# reports/services/bulk_verification.py
+"""
+Bulk Verification Service
+
+Applies verification status transitions (approve / reject / under review /
+needs revision) to many unverified sites at once with set-based writes:
+
+    1. SELECT ... FOR UPDATE the requested sites (id, name, status only)
+    2. one UPDATE ... WHERE site_id IN (...) for the eligible sites
+    3. bulk_create of the VerificationHistory rows (and ReviewNote rows)
+
+all in one short transaction, instead of a full save() + history insert per
+site. Only status fields change, so the data quality score and duplicate
+flag (recomputed by UnverifiedSite.save()) are left alone.
+
+Because bulk writes bypass model signals, the dashboard snapshot and the
+dependent widget caches are invalidated explicitly after commit. The site
+counters are updated with the status change (SiteCounterService.update_sites).
+
+Transfers are not status-only changes and are not handled here.
+
+Usage:
+    from reports.services.bulk_verification import BulkVerificationService
+
+    results = BulkVerificationService.apply(
+        site_ids, 'approve', request.user, comments='Checked by phone'
+    )
+    results['success'], results['failed'], results['failures']
+"""
+
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class BulkVerificationService:
+    """
+    Set-based verification status transitions for unverified sites.
+    """
+
+    # action -> (new status / history action, stamps verified_date)
+    # Every transition records the reviewer in verified_by.
+    TRANSITIONS = {
+        'approve': ('APPROVED', True),
+        'reject': ('REJECTED', True),
+        'under_review': ('UNDER_REVIEW', False),
+        'needs_revision': ('NEEDS_REVISION', True),
+    }
+
+    # Sites in these statuses cannot be moved by a status transition
+    LOCKED_STATUSES = ('TRANSFERRED',)
+
+    @classmethod
+    def supports(cls, action):
+        return action in cls.TRANSITIONS
+
+    # =========================================================================
+    # APPLY
+    # =========================================================================
+
+    @classmethod
+    def apply(cls, site_ids, action, user, comments='', review_note=None, project=None, set_verified_by=True):
+        """
+        Apply a status transition to a set of sites.
+
+        Args:
+            site_ids: site_id values
+            action: key of TRANSITIONS
+            user: reviewer performing the action
+            comments: VerificationHistory comments (and rejection reason)
+            review_note: ReviewNote text to attach to every site (optional)
+            project: restrict to sites of this DataCollectionProject
+            set_verified_by: record the user as verified_by (the unverified
+                site bulk action leaves it unchanged for under_review)
+
+        Returns:
+            {
+                'success': int,
+                'failed': int,
+                'errors': [str, ...],
+                'failures': [{'site_id', 'company_name', 'error'}, ...],
+                'site_ids': [updated site_id, ...]
+            }
+        """
+        from ..models import UnverifiedSite, VerificationHistory, ReviewNote
+        from .site_counters import SiteCounterService
+        from .work_queue import WorkQueueService
+
+        new_status, stamp_date = cls.TRANSITIONS[action]
+        requested = {str(site_id) for site_id in site_ids}
+        failures = []
+
+        with transaction.atomic():
+            sites = UnverifiedSite.objects.select_for_update().filter(site_id__in=requested)
+            if project is not None:
+                sites = sites.filter(project=project)
+            rows = list(sites.values_list('site_id', 'company_name', 'verification_status'))
+
+            eligible = []
+            for site_id, company_name, old_status in rows:
+                if old_status in cls.LOCKED_STATUSES:
+                    failures.append(cls._failure(site_id, company_name, f"Site '{company_name}' already transferred"))
+                else:
+                    eligible.append((site_id, company_name, old_status))
+
+            found = {str(site_id) for site_id, _, _ in rows}
+            for site_id in sorted(requested - found):
+                failures.append(cls._failure(site_id, '', 'Site not found'))
+
+            if eligible:
+                now = timezone.now()
+                updates = {'verification_status': new_status, 'updated_at': now}
+                if set_verified_by:
+                    updates['verified_by'] = user
+                if stamp_date:
+                    updates['verified_date'] = now
+                if action == 'reject':
+                    updates['rejection_reason'] = comments
+
+                SiteCounterService.update_sites(
+                    UnverifiedSite.objects.filter(site_id__in=[site_id for site_id, _, _ in eligible]),
+                    **updates
+                )
+
+                VerificationHistory.objects.bulk_create([
+                    VerificationHistory(
+                        site_id=site_id,
+                        action=new_status,
+                        performed_by=user,
+                        old_status=old_status,
+                        new_status=new_status,
+                        comments=comments,
+                    )
+                    for site_id, _, old_status in eligible
+                ])
+
+                WorkQueueService.release_finished([site_id for site_id, _, _ in eligible])
+
+                if review_note:
+                    ReviewNote.objects.bulk_create([
+                        ReviewNote(site_id=site_id, note_text=review_note, created_by=user, is_internal=False)
+                        for site_id, _, _ in eligible
+                    ])
+
+                transaction.on_commit(cls._invalidate_derived_data)
+
+        logger.info(f"Bulk {action} by {user}: {len(eligible)} updated, {len(failures)} failed")
+        return {
+            'success': len(eligible),
+            'failed': len(failures),
+            'errors': [failure['error'] for failure in failures],
+            'failures': failures,
+            'site_ids': [str(site_id) for site_id, _, _ in eligible],
+        }
+
+    # =========================================================================
+    # HELPERS
+    # =========================================================================
+
+    @staticmethod
+    def _failure(site_id, company_name, error):
+        return {'site_id': str(site_id), 'company_name': company_name, 'error': error}
+
+    @staticmethod
+    def _invalidate_derived_data():
+        """Signals do not fire for bulk writes; refresh what they would have."""
+        from .dashboard_snapshot import DashboardSnapshotService
+        from .widget_cache import WidgetCacheService
+
+        DashboardSnapshotService.mark_stale()
+        WidgetCacheService.invalidate_for_model('reports.UnverifiedSite')
@@ -0,0 +1,271 @@
+# reports/services/change_feed.py
+"""
+Change Feed Service - Delta sync of client reports
+
+Every write to a production site, its company or one of its versions
+appends a ProductionSiteChange row (UPSERT, or DELETE when the site is
+deleted) in the same transaction as the write. Model signals cover
+saves / deletes; bulk write paths call record_sites() themselves. Write
+paths running in ChangeFeedService.atomic() instead of transaction.atomic()
+buffer their rows and write them as the block's last statements, right
+before it commits.
+
+Clients keep a cursor "<changed_at>|<change_id>" and ask for the changes
+after it. The feed reads the next block of log rows, keeps the latest
+change per site, and checks which of those sites are in the report's
+filtered set right now:
+
+    in the set      -> "added" (created after the cursor) or "modified"
+    not in the set  -> "removed" (deleted, soft deleted, deactivated or
+                       no longer matching the report filters)
+
+A site a client never had can therefore be reported as removed; clients
+ignore removals of unknown ids.
+
+A transaction that took a lower change_id may commit after one that took
+a higher change_id, and a cursor must never move past a change that is
+not visible yet. So only the readable part of the log is served
+(readable_log()):
+
+    PostgreSQL  change_ids up to a fence: the sequence's last value read
+                together with the snapshot xmax. A fence becomes readable
+                once pg_snapshot_xmin() has passed its xmax, i.e. every
+                transaction that could hold a change_id up to it finished.
+                Long-running write transactions delay the feed, they never
+                make it skip a change.
+    others      changes older than SAFETY_LAG. A transaction committing
+                more than SAFETY_LAG after writing its log rows can still be
+                skipped, which atomic() keeps unlikely.
+
+Usage:
+    from reports.services.change_feed import ChangeFeedService
+
+    ChangeFeedService.record_sites([production_site])
+    cursor = ChangeFeedService.parse_cursor(request.query_params.get('cursor'))
+    changes, next_cursor, has_more = ChangeFeedService.changes_since(cursor, limit=5000)
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+# Log rows buffered by the current thread's ChangeFeedService.atomic() block
+_pending = threading.local()
+
+
+class ChangeFeedService:
+    """
+    Writes and reads the production site change log.
+    """
+
+    SAFETY_LAG = timedelta(seconds=5)
+    DEFAULT_LIMIT = 5000
+    MAX_LIMIT = 50000
+
+    # PostgreSQL read fences kept (see readable_log())
+    FENCES_KEY = 'change_feed:fences'
+    MAX_FENCES = 20
+
+    # =========================================================================
+    # WRITE
+    # =========================================================================
+
+    @classmethod
+    @contextmanager
+    def atomic(cls):
+        """
+        transaction.atomic() writing the change log rows recorded inside the
+        block as its last statements, so the log rows' change_ids are taken
+        right before the commit.
+        """
+        rows = getattr(_pending, 'rows', None)
+        if rows is not None:
+            # Nested: the outermost block writes; drop rows of a rolled back savepoint
+            mark = len(rows)
+            try:
+                with transaction.atomic():
+                    yield
+            except BaseException:
+                del rows[mark:]
+                raise
+            return
+
+        _pending.rows = []
+        try:
+            with transaction.atomic():
+                yield
+                rows, _pending.rows = _pending.rows, None
+                cls._write(rows)
+        finally:
+            _pending.rows = None
+
+    @classmethod
+    def record_sites(cls, production_sites, action='UPSERT'):
+        """Log a change of each given ProductionSite instance."""
+        rows = [(production_site.pk, production_site.site_id, action) for production_site in production_sites]
+        pending = getattr(_pending, 'rows', None)
+        if pending is not None:
+            pending.extend(rows)
+        else:
+            cls._write(rows)
+
+    @staticmethod
+    def _write(rows):
+        """Insert log rows [(production site pk, site id, action)]."""
+        from ..company_models import ProductionSiteChange
+
+        if not rows:
+            return
+
+        now = timezone.now()
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Take the transaction id before the change_ids, so the
+                # read fences cover this transaction (see readable_log())
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_current_xact_id()')
+            ProductionSiteChange.objects.bulk_create([
+                ProductionSiteChange(production_site_pk=pk, site_id=site_id, action=action, changed_at=now)
+                for pk, site_id, action in rows
+            ])
+
+    @classmethod
+    def record_site_pks(cls, production_site_pks):
+        """Log a change of production sites given by primary key."""
+        from ..company_models import ProductionSite
+
+        cls.record_sites(ProductionSite.objects.filter(pk__in=production_site_pks).only('pk', 'site_id'))
+
+    @classmethod
+    def record_companies(cls, company_pks):
+        """Log a change of every production site of the given companies."""
+        from ..company_models import ProductionSite
+
+        cls.record_sites(ProductionSite.objects.filter(company_id__in=company_pks).only('pk', 'site_id'))
+
+    # =========================================================================
+    # READ
+    # =========================================================================
+
+    @classmethod
+    def readable_log(cls):
+        """
+        The ProductionSiteChange rows no earlier change_id can appear below
+        anymore, i.e. that a cursor may move past.
+        """
+        from ..company_models import ProductionSiteChange
+
+        log = ProductionSiteChange.objects.all()
+        if connection.vendor != 'postgresql':
+            return log.filter(changed_at__lte=timezone.now() - cls.SAFETY_LAG)
+        return log.filter(change_id__lte=cls._readable_change_id())
+
+    @classmethod
+    def _readable_change_id(cls):
+        """
+        PostgreSQL: highest change_id whose transaction, and every
+        transaction that took a lower one, has finished.
+
+        A fence (xmax, last_value) is taken on every read: last_value is read
+        before the snapshot, so every transaction holding a change_id up to it
+        had its transaction id (taken before its change_ids, see _write())
+        below xmax. Once the oldest running transaction (pg_snapshot_xmin) is
+        at or past xmax, all of them finished. Fences are shared through the
+        cache; a fence lost to a concurrent update only delays the feed.
+        """
+        from ..company_models import ProductionSiteChange
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_sequence_last_value(pg_get_serial_sequence(%s, %s)::regclass)',
+                [ProductionSiteChange._meta.db_table, 'change_id'],
+            )
+            last_value = cursor.fetchone()[0] or 0
+            cursor.execute(
+                'SELECT pg_snapshot_xmin(s)::text::bigint, pg_snapshot_xmax(s)::text::bigint '
+                'FROM pg_current_snapshot() AS s'
+            )
+            xmin, xmax = cursor.fetchone()
+
+        fences = cache.get(cls.FENCES_KEY) or []
+        readable = max([last for fence_xmax, last in fences if fence_xmax <= xmin], default=0)
+        if xmax <= xmin:
+            # No write transaction running
+            readable = max(readable, last_value)
+        pending = [(fence_xmax, last) for fence_xmax, last in fences if fence_xmax > xmin and last > readable]
+        if last_value > readable:
+            pending.append((xmax, last_value))
+        # The readable head is kept as the floor of the next reads
+        cache.set(cls.FENCES_KEY, [(0, readable)] + pending[-cls.MAX_FENCES:], None)
+        return readable
+
+    @staticmethod
+    def format_cursor(changed_at, change_id):
+        return f"{changed_at.isoformat()}|{change_id}"
+
+    @staticmethod
+    def parse_cursor(value):
+        """
+        '<changed_at>|<change_id>' or a bare timestamp -> (changed_at, change_id).
+        None / '' -> (None, None) (start of the log).
+
+        Raises:
+            ValueError: malformed cursor
+        """
+        if not value:
+            return None, None
+
+        timestamp, _, change_id = value.partition('|')
+        changed_at = parse_datetime(timestamp)
+        if changed_at is None:
+            raise ValueError('Invalid cursor')
+        if timezone.is_naive(changed_at):
+            changed_at = timezone.make_aware(changed_at, dt_timezone.utc)
+        if not change_id:
+            return changed_at, None
+        if not change_id.isdigit():
+            raise ValueError('Invalid cursor')
+        return changed_at, int(change_id)
+
+    @classmethod
+    def changes_since(cls, cursor, limit=None):
+        """
+        The next block of the change log after a cursor.
+
+        Args:
+            cursor: (changed_at, change_id) from parse_cursor()
+            limit: maximum log rows read (DEFAULT_LIMIT)
+
+        Returns:
+            (changes, next_cursor, has_more) where changes holds the latest
+            ProductionSiteChange per site, in change_id order, and
+            next_cursor is None when there are no new changes
+        """
+        limit = limit or cls.DEFAULT_LIMIT
+        changed_at, change_id = cursor
+
+        log = cls.readable_log().order_by('change_id')
+        if change_id is not None:
+            log = log.filter(change_id__gt=change_id)
+        elif changed_at is not None:
+            log = log.filter(changed_at__gt=changed_at)
+
+        rows = list(log[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        if not rows:
+            return [], None, False
+
+        latest = {}
+        for row in rows:
+            latest.pop(row.production_site_pk, None)
+            latest[row.production_site_pk] = row
+
+        last = rows[-1]
+        return list(latest.values()), cls.format_cursor(last.changed_at, last.change_id), has_more
@@ -0,0 +1,198 @@
+# reports/services/company_detail.py
+"""
+Company Detail Assembler
+
+Builds the company detail document (CompanyDetailSerializer output) in a
+fixed number of queries, however many sites, versions and notes a company
+has:
+
+    1. company (+ created_by, last_modified_by)       by the caller / get_company()
+    2. production sites, with their version count
+    3. current version of every site (snapshot JSON deferred)
+    4. most recent notes (+ created_by)
+    5. most recent history entries (+ performed_by)
+
+Assembled documents are cached under the company's revision counter, which
+is bumped (see reports/signals.py) on every write to the company, its sites,
+versions, notes or history. A bump makes the old document unreachable, so
+repeated opens of the same company are served from the cache until it
+changes.
+
+Usage:
+    CompanyDetailService.get_document(company)
+    CompanyDetailService.get_site_record(site_id)   # client focus view record
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Prefetch, prefetch_related_objects
+
+from reports.company_models import (
+    Company, ProductionSite, ProductionSiteVersion
+)
+
+
+class CompanyDetailService:
+    """
+    Assembles and caches company detail documents.
+    """
+
+    KEY_PREFIX = 'company_detail'
+    CACHE_TTL = 60 * 60 * 6
+    NOTES_LIMIT = 50
+    HISTORY_LIMIT = 20
+
+    # Version columns that are not part of a client record
+    CLIENT_EXCLUDED_VERSION_FIELDS = {
+        'id', 'version_id', 'production_site', 'version_number',
+        'created_at', 'updated_at', 'is_active', 'is_current',
+        'created_by', 'verified_at', 'verified_by', 'version_notes', 'is_initial',
+    }
+
+    # =========================================================================
+    # REVISIONS
+    # =========================================================================
+
+    @classmethod
+    def _revision_key(cls, company_pk):
+        return f'{cls.KEY_PREFIX}:rev:{company_pk}'
+
+    @classmethod
+    def _document_key(cls, company, revision):
+        return f'{cls.KEY_PREFIX}:{company.pk}:{revision}:{company.updated_at.timestamp()}'
+
+    @classmethod
+    def get_revision(cls, company_pk):
+        """
+        Current revision of a company. A missing counter starts from the
+        clock, so an evicted counter never points back at an old document.
+        """
+        key = cls._revision_key(company_pk)
+        revision = cache.get(key)
+        if revision is None:
+            cache.add(key, time.time_ns(), None)
+            revision = cache.get(key)
+        return revision
+
+    @classmethod
+    def bump_revision(cls, company_pk):
+        """Invalidate the company's cached document once the write commits."""
+        def bump():
+            try:
+                cache.incr(cls._revision_key(company_pk))
+            except ValueError:
+                cache.add(cls._revision_key(company_pk), time.time_ns(), None)
+
+        transaction.on_commit(bump)
+
+    # =========================================================================
+    # ASSEMBLY
+    # =========================================================================
+
+    @classmethod
+    def get_company(cls, **lookup):
+        """Company for the document (query 1). Raises Company.DoesNotExist."""
+        return Company.objects.select_related('created_by', 'last_modified_by').get(**lookup)
+
+    @classmethod
+    def prefetch(cls, company):
+        """Attach sites, current versions, notes and history (queries 2-5)."""
+        from reports.company_serializers import VERSION_SNAPSHOT_FIELDS
+
+        prefetch_related_objects(
+            [company],
+            Prefetch(
+                'production_sites',
+                queryset=ProductionSite.objects.annotate(num_versions=Count('versions')).order_by('category'),
+            ),
+            Prefetch(
+                'production_sites__versions',
+                queryset=ProductionSiteVersion.objects.filter(is_current=True).defer(*VERSION_SNAPSHOT_FIELDS),
+                to_attr='prefetched_current_version',
+            ),
+        )
+        company.recent_notes = list(
+            company.notes.select_related('created_by')[:cls.NOTES_LIMIT]
+        )
+        company.recent_history = list(
+            company.history.select_related('performed_by')[:cls.HISTORY_LIMIT]
+        )
+        return company
+
+    @classmethod
+    def assemble(cls, company):
+        """Serialize the detail document without using the cache."""
+        from reports.company_serializers import CompanyDetailSerializer
+
+        return CompanyDetailSerializer(cls.prefetch(company)).data
+
+    @classmethod
+    def get_document(cls, company):
+        """
+        Company detail document, from the cache when the company has not
+        changed since it was assembled.
+
+        Args:
+            company: Company instance (ideally with created_by and
+                     last_modified_by selected, see get_company())
+        """
+        cache_key = cls._document_key(company, cls.get_revision(company.pk))
+        document = cache.get(cache_key)
+        if document is None:
+            document = dict(cls.assemble(company))
+            cache.set(cache_key, document, cls.CACHE_TTL)
+        return document
+
+    # =========================================================================
+    # CLIENT RECORDS
+    # =========================================================================
+
+    @classmethod
+    def build_site_record(cls, document, site_id):
+        """
+        Flatten one site of a company document into a client report record
+        (same shape as ClientReportRecordSerializer output).
+
+        Returns:
+            dict, or None when the site is not part of the document
+        """
+        site_id = str(site_id)
+        site = next((s for s in document['production_sites'] if str(s['site_id']) == site_id), None)
+        if site is None:
+            return None
+
+        from reports.client_serializers import ClientReportRecordSerializer
+        company_fields = [
+            name for name in ClientReportRecordSerializer._declared_fields
+            if name not in ('id', 'factory_id', 'category', 'categories', 'status')
+        ]
+
+        record = {'id': site_id, 'factory_id': site_id}
+        record.update({name: document.get(name) for name in company_fields})
+        record['category'] = site['category']
+        record['categories'] = [site['category']] if site['category'] else []
+        record['status'] = document['status']
+
+        for name, value in (site['current_version'] or {}).items():
+            if name not in cls.CLIENT_EXCLUDED_VERSION_FIELDS:
+                record[name] = value
+        return record
+
+    @classmethod
+    def get_site_record(cls, site_id):
+        """
+        Client record for a production site, served from its company's
+        cached document.
+
+        Returns:
+            (company, record): company is None when the site does not exist
+        """
+        site = ProductionSite.objects.select_related(
+            'company__created_by', 'company__last_modified_by'
+        ).filter(site_id=site_id).first()
+        if site is None:
+            return None, None
+
+        return site.company, cls.build_site_record(cls.get_document(site.company), site_id)
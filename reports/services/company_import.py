@@ -12,8 +12,9 @@ import hashlib
 import time
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from django.db import transaction, OperationalError
+from django.db import OperationalError
 from django.utils import timezone
+from reports.services.change_feed import ChangeFeedService
 from reports.company_models import (
     Company, ProductionSite, ProductionSiteVersion,
     CompanyStatus, CompanyHistory
@@ -559,7 +560,7 @@ class CompanyImportService:
                         company_data['status'] = CompanyStatus.COMPLETE
                         
                         def create_company():
-                            with transaction.atomic():
+                            with ChangeFeedService.atomic():
                                 comp = Company.objects.create(**company_data)
                                 CompanyHistory.objects.create(
                                     company=comp,
@@ -600,7 +601,7 @@ class CompanyImportService:
                     else:
                         # Create new production site and Initial Version (version_number=0)
                         def create_site_and_version():
-                            with transaction.atomic():
+                            with ChangeFeedService.atomic():
                                 site = ProductionSite.objects.create(
                                     company=company,
                                     category=category,
@@ -0,0 +1,533 @@
+# reports/services/company_research.py
+"""
+Company Research Service - AI company lookup for data collectors
+
+One research is one model call:
+    - no availability probes: the prompt goes straight to the model that
+      worked last (cached for MODEL_CACHE_TTL), other models are only
+      tried when that call fails
+    - a model that fails is skipped for a while: 404 for
+      MODEL_UNAVAILABLE_TTL, quota / other errors with an exponential
+      backoff per model (BACKOFF_BASE doubling up to BACKOFF_MAX)
+    - results are reused: the same company (normalized name + country,
+      CompanyResearchResult.query_key) researched within
+      COMPANY_RESEARCH_CACHE_DAYS is served from the database without a
+      model call
+
+Batches research their uncached companies in parallel
+(COMPANY_RESEARCH_MAX_PARALLEL threads).
+
+The model client is chosen by COMPANY_RESEARCH_CLIENT: 'gemini' (Google
+Generative AI) or 'stub', a local client answering with canned JSON for
+development and tests.
+
+Usage:
+    from reports.services.company_research import CompanyResearchService, ResearchError
+
+    cached = CompanyResearchService.find_cached('Acme Corp', 'Turkey')
+    try:
+        result = CompanyResearchService.research('Acme Corp', 'Turkey', user)
+    except ResearchError as e:
+        return Response({'error': e.error, 'details': e.details}, status=e.status_code)
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchError(Exception):
+    """A research that could not be completed, with the HTTP status to answer."""
+
+    def __init__(self, error, details, status_code=503, **extra):
+        super().__init__(f"{error}: {details}")
+        self.error = error
+        self.details = details
+        self.status_code = status_code
+        self.extra = extra
+
+
+# =============================================================================
+# MODEL CLIENTS
+# =============================================================================
+
+class GeminiResearchClient:
+    """Google Generative AI (Gemini)."""
+
+    def __init__(self):
+        api_key = getattr(settings, 'GEMINI_API_KEY', None)
+        if not api_key:
+            logger.error("GEMINI_API_KEY not configured in settings")
+            raise ResearchError(
+                'AI service not configured',
+                'Please contact administrator to configure AI service',
+            )
+        try:
+            import google.generativeai as genai
+        except ImportError:
+            logger.error("google-generativeai library not installed")
+            raise ResearchError(
+                'AI library not installed',
+                'Please contact administrator to install required packages',
+            )
+        genai.configure(api_key=api_key)
+        self.genai = genai
+
+    def generate(self, model_name, prompt):
+        response = self.genai.GenerativeModel(model_name).generate_content(prompt)
+        return response.text if response else ''
+
+
+class StubResearchClient:
+    """Local stand-in for the model: canned JSON for the prompted company, no network."""
+
+    calls = 0
+    _lock = threading.Lock()
+
+    def generate(self, model_name, prompt):
+        with self._lock:
+            StubResearchClient.calls += 1
+        company_name = re.search(r'^Company Name: (.*)$', prompt, re.MULTILINE).group(1)
+        country = re.search(r'^Country: (.*)$', prompt, re.MULTILINE).group(1)
+        return json.dumps({
+            'official_name': company_name,
+            'address': 'Not found',
+            'city': 'Not found',
+            'postal_code': 'Not found',
+            'country': country,
+            'phone': 'Not found',
+            'alternative_phones': [],
+            'email': 'Not found',
+            'website': 'Not found',
+            'contact_persons': [],
+            'industry': 'Not found',
+            'products_services': 'Not found',
+            'accreditation': [],
+            'branches': [],
+            'description': f'Stub research result for {company_name} ({country}).',
+            'confidence_score': 0.0,
+            'confidence_notes': 'Generated by the local stub client',
+            'sources': [],
+        })
+
+
+RESEARCH_CLIENTS = {
+    'gemini': GeminiResearchClient,
+    'stub': StubResearchClient,
+}
+
+
+# =============================================================================
+# PROMPT
+# =============================================================================
+
+RESEARCH_PROMPT = """You are a professional business research assistant. Find accurate, comprehensive, and up-to-date information about this company.
+
+Company Name: {company_name}
+Country: {country}
+
+CRITICAL INSTRUCTIONS:
+1. Prioritize the company's OFFICIAL WEBSITE as the primary source
+2. Verify the HEADQUARTERS address, not branch offices (unless specifically asking for branches)
+3. For phone numbers, ALWAYS include country codes (e.g., +90 for Turkey, +49 for Germany)
+4. If the company has multiple locations, clearly separate headquarters from branches
+5. Double-check city/location information - this is critical
+6. If you find conflicting information, mention it in additional_info
+7. Provide your confidence level for key information
+8. List the sources where you found the information
+
+Required information (use "Not found" if unavailable):
+
+COMPANY INFORMATION:
+- official_name: Exact legal/official company name
+- address: Full headquarters address with street, number, district
+- city: Headquarters city (VERIFY THIS CAREFULLY)
+- postal_code: Postal/ZIP code
+- country: Country name
+
+CONTACT INFORMATION:
+- phone: Primary phone number WITH country code (format: +XX XXX XXX XXXX)
+- alternative_phones: Array of other phone numbers WITH country codes
+- email: Company email address (official)
+- website: Company website URL (official)
+- contact_persons: Array of contact persons with names and roles if available, example: [{{"name": "John Doe", "role": "CEO", "email": "john@company.com", "linkedin": "https://linkedin.com/in/johndoe"}}]
+
+BUSINESS DETAILS:
+- parent_company: Parent company name if this is a subsidiary
+- industry: Primary industry/sector
+- products_services: Detailed description of main products or services
+- accreditation: Certifications, ISO standards, quality marks, awards (array of strings)
+- year_founded: Year the company was established
+- employee_count: Approximate number of employees
+
+BRANCHES & LOCATIONS:
+- branches: Array of branch offices/locations (IMPORTANT: Include ALL branches), example:
+  [
+    {{
+      "location_type": "Branch Office" or "Regional Office" or "Production Facility",
+      "address": "Full address",
+      "city": "City name",
+      "country": "Country name",
+      "phone": "Phone with country code",
+      "manager": "Branch manager name if available"
+    }}
+  ]
+
+ADDITIONAL INFORMATION:
+- description: Comprehensive company description (3-5 sentences)
+- linkedin: LinkedIn company page URL
+- additional_info: Any other relevant information, partnerships, certifications, notable projects
+
+CONFIDENCE & SOURCES:
+- confidence_score: Your confidence in the accuracy of headquarters location (0.0 to 1.0)
+- confidence_notes: Explain why you gave this confidence score
+- sources: Array of source URLs where you found this information, example:
+  [
+    {{
+      "url": "https://company-website.com",
+      "title": "Official Company Website",
+      "reliability": "high" or "medium" or "low"
+    }}
+  ]
+
+IMPORTANT FORMATTING:
+- Respond ONLY with valid JSON
+- No text before or after the JSON
+- No markdown code blocks
+- All arrays must be valid JSON arrays []
+- All objects must be valid JSON objects {{}}
+- Use "Not found" for unavailable information
+- For empty arrays, use []
+
+Example JSON structure:
+{{
+  "official_name": "ABC Company Ltd.",
+  "address": "123 Business Street, Industrial Zone",
+  "city": "Istanbul",
+  "postal_code": "34000",
+  "country": "{country}",
+  "phone": "+90 212 123 4567",
+  "alternative_phones": ["+90 212 123 4568", "+90 533 123 4567"],
+  "email": "info@abccompany.com",
+  "website": "https://www.abccompany.com",
+  "contact_persons": [
+    {{
+      "name": "Ahmet Yılmaz",
+      "role": "General Manager",
+      "email": "ahmet@abccompany.com",
+      "linkedin": "https://linkedin.com/in/ahmetyilmaz"
+    }}
+  ],
+  "parent_company": "XYZ Holdings",
+  "industry": "Manufacturing",
+  "products_services": "Industrial machinery, automation systems, custom solutions",
+  "accreditation": ["ISO 9001:2015", "CE Certified", "TSE Certified"],
+  "year_founded": "1995",
+  "employee_count": "150-200",
+  "branches": [
+    {{
+      "location_type": "Branch Office",
+      "address": "456 Commerce Ave, Business District",
+      "city": "Ankara",
+      "country": "Turkey",
+      "phone": "+90 312 456 7890",
+      "manager": "Mehmet Demir"
+    }},
+    {{
+      "location_type": "Regional Office",
+      "address": "789 Export Street",
+      "city": "Berlin",
+      "country": "Germany",
+      "phone": "+49 30 123 4567",
+      "manager": "Not found"
+    }}
+  ],
+  "description": "ABC Company is a leading manufacturer of industrial machinery with over 25 years of experience. They specialize in automation systems and provide custom solutions to clients across Europe and the Middle East.",
+  "linkedin": "https://www.linkedin.com/company/abc-company",
+  "additional_info": "Winner of Industry Excellence Award 2023. Major clients include automotive and electronics sectors. Exports to 15+ countries.",
+  "confidence_score": 0.85,
+  "confidence_notes": "High confidence - information verified from official website and business registry",
+  "sources": [
+    {{
+      "url": "https://www.abccompany.com",
+      "title": "Official Company Website",
+      "reliability": "high"
+    }},
+    {{
+      "url": "https://www.linkedin.com/company/abc-company",
+      "title": "LinkedIn Company Page",
+      "reliability": "high"
+    }},
+    {{
+      "url": "https://businessregistry.com/abc-company",
+      "title": "Business Registry Entry",
+      "reliability": "high"
+    }}
+  ]
+}}
+
+Now research {company_name} in {country} and provide the information in the exact JSON format above."""
+
+
+class CompanyResearchService:
+    """
+    Researches companies with the configured model client.
+    """
+
+    # Ordered by: Flash models first (faster, better quota), then Pro models
+    MODEL_NAMES = [
+        'models/gemini-2.0-flash',
+        'models/gemini-2.0-flash-001',
+        'models/gemini-flash-latest',
+        'models/gemini-2.5-flash',
+        'models/gemini-2.0-flash-lite',
+        'models/gemini-2.0-flash-lite-001',
+        'models/gemini-flash-lite-latest',
+        'models/gemini-2.5-pro',
+        'models/gemini-pro-latest',
+        'models/gemini-2.0-flash-exp',
+    ]
+
+    CACHE_PREFIX = 'company_research'
+    MODEL_CACHE_TTL = 3600             # seconds the last working model is preferred
+    MODEL_UNAVAILABLE_TTL = 86400      # seconds a model answering 404 is skipped
+    BACKOFF_BASE = 60                  # seconds, doubled per consecutive failure
+    BACKOFF_MAX = 3600
+
+    # =========================================================================
+    # MODEL SELECTION
+    # =========================================================================
+
+    @staticmethod
+    def get_client():
+        backend = getattr(settings, 'COMPANY_RESEARCH_CLIENT', 'gemini')
+        if backend not in RESEARCH_CLIENTS:
+            raise ResearchError('AI service not configured', f'Unknown research client: {backend}')
+        return RESEARCH_CLIENTS[backend]()
+
+    @classmethod
+    def _model_key(cls):
+        return f'{cls.CACHE_PREFIX}:model'
+
+    @classmethod
+    def _backoff_key(cls, model_name):
+        return f'{cls.CACHE_PREFIX}:backoff:{model_name}'
+
+    @classmethod
+    def candidate_models(cls):
+        """Models to try in order: the last working one first, backed off models skipped."""
+        now = time.time()
+        preferred = cache.get(cls._model_key())
+        names = [preferred] if preferred in cls.MODEL_NAMES else []
+        names += [name for name in cls.MODEL_NAMES if name != preferred]
+
+        backoffs = cache.get_many([cls._backoff_key(name) for name in names])
+        return [
+            name for name in names
+            if backoffs.get(cls._backoff_key(name), (0, 0))[1] <= now
+        ]
+
+    @classmethod
+    def _model_succeeded(cls, model_name):
+        cache.set(cls._model_key(), model_name, cls.MODEL_CACHE_TTL)
+        cache.delete(cls._backoff_key(model_name))
+
+    @classmethod
+    def _model_failed(cls, model_name, unavailable=False):
+        """Skip a failing model: for a day if it does not exist, else with exponential backoff."""
+        failures, _ = cache.get(cls._backoff_key(model_name), (0, 0))
+        failures += 1
+        if unavailable:
+            delay = cls.MODEL_UNAVAILABLE_TTL
+        else:
+            delay = min(cls.BACKOFF_BASE * 2 ** (failures - 1), cls.BACKOFF_MAX)
+        cache.set(cls._backoff_key(model_name), (failures, time.time() + delay), delay)
+        if cache.get(cls._model_key()) == model_name:
+            cache.delete(cls._model_key())
+
+    @classmethod
+    def generate(cls, prompt):
+        """
+        Run the prompt on the first working model.
+
+        Returns:
+            (response text, model name)
+        """
+        client = cls.get_client()
+        last_error = None
+        quota_exceeded = False
+
+        for model_name in cls.candidate_models():
+            try:
+                text = client.generate(model_name, prompt)
+            except Exception as model_error:
+                error_str = str(model_error)
+                last_error = error_str
+
+                if '429' in error_str or 'quota' in error_str.lower():
+                    quota_exceeded = True
+                    logger.warning(f"⚠ Model {model_name} - Quota exceeded, trying next...")
+                    cls._model_failed(model_name)
+                elif '404' in error_str:
+                    logger.warning(f"✗ Model {model_name} - Not found, trying next...")
+                    cls._model_failed(model_name, unavailable=True)
+                else:
+                    logger.warning(f"✗ Model {model_name} failed: {error_str[:100]}")
+                    cls._model_failed(model_name)
+                continue
+
+            cls._model_succeeded(model_name)
+            return text, model_name
+
+        logger.error(f"All Gemini models failed. Last error: {last_error}")
+        if quota_exceeded:
+            raise ResearchError(
+                'API Quota Exceeded',
+                'You have exceeded your Gemini API quota. This typically resets daily. Please try again later or consider upgrading your API plan.',
+                status_code=429,
+                quota_info='Free tier quota resets every 24 hours. Visit https://ai.google.dev/gemini-api/docs/rate-limits for more information.',
+            )
+        raise ResearchError(
+            'AI model not available',
+            f'Unable to initialize AI model. All models failed. Last error: {(last_error or "all models backed off")[:200]}. Please contact administrator.',
+        )
+
+    # =========================================================================
+    # RESEARCH
+    # =========================================================================
+
+    @staticmethod
+    def find_cached(company_name, country):
+        """Latest fresh result researched for this company and country, or None."""
+        from ..models import CompanyResearchResult
+
+        fresh_since = timezone.now() - timedelta(days=settings.COMPANY_RESEARCH_CACHE_DAYS)
+        return CompanyResearchResult.objects.filter(
+            query_key=CompanyResearchResult.make_query_key(company_name, country),
+            from_cache=False,
+            searched_at__gte=fresh_since,
+        ).order_by('-searched_at').first()
+
+    @staticmethod
+    def serve_cached(cached, user):
+        """The cached result as a research of this user (copied into their history)."""
+        from ..models import CompanyResearchResult
+
+        if cached.user_id == user.pk:
+            return cached
+        return CompanyResearchResult.objects.create(
+            user=user,
+            company_name=cached.company_name,
+            country=cached.country,
+            result_data=cached.result_data,
+            from_cache=True,
+        )
+
+    @classmethod
+    def research(cls, company_name, country, user):
+        """
+        Research a company with one model call and save the result.
+
+        Returns:
+            CompanyResearchResult
+
+        Raises:
+            ResearchError
+        """
+        from ..models import CompanyResearchResult
+
+        prompt = RESEARCH_PROMPT.format(company_name=company_name, country=country)
+        ai_text, model_used = cls.generate(prompt)
+
+        if not ai_text:
+            raise ResearchError(
+                'No response from AI',
+                'The AI did not return any results. Please try again.',
+                status_code=500,
+            )
+
+        # Remove markdown code blocks if present
+        if '```json' in ai_text:
+            ai_text = ai_text.split('```json')[1].split('```')[0]
+        elif '```' in ai_text:
+            ai_text = ai_text.split('```')[1].split('```')[0]
+
+        try:
+            company_info = json.loads(ai_text.strip())
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse AI response as JSON: {e}\nResponse: {ai_text}")
+            raise ResearchError(
+                'Failed to parse AI response',
+                'The AI returned malformed data. Please try again.',
+                status_code=500,
+            )
+
+        company_info['search_query'] = {
+            'company_name': company_name,
+            'country': country
+        }
+        company_info['searched_at'] = timezone.now().isoformat()
+        company_info['searched_by'] = user.get_full_name() or user.username
+        company_info['model_used'] = model_used
+
+        result = CompanyResearchResult.objects.create(
+            user=user,
+            company_name=company_name,
+            country=country,
+            result_data=company_info,
+        )
+        logger.info(f"Company research completed: {company_name} in {country} by {user.username} using model {model_used}")
+        return result
+
+    @classmethod
+    def research_batch(cls, queries, user, cached=None):
+        """
+        Research several (company_name, country) queries, uncached ones in
+        parallel. Identical queries are researched once.
+
+        Args:
+            cached: {query_key: CompanyResearchResult} from find_cached()
+
+        Returns:
+            {query_key: CompanyResearchResult or ResearchError}
+        """
+        from ..models import CompanyResearchResult
+
+        cached = cached or {}
+        results = {key: cls.serve_cached(result, user) for key, result in cached.items()}
+
+        pending = {}
+        for company_name, country in queries:
+            key = CompanyResearchResult.make_query_key(company_name, country)
+            if key not in results:
+                pending.setdefault(key, (company_name, country))
+
+        def run(query):
+            try:
+                return cls.research(*query, user)
+            except ResearchError as e:
+                return e
+            except Exception as e:
+                logger.error(f"Error researching company {query[0]}: {str(e)}", exc_info=True)
+                return ResearchError('Research failed', str(e)[:200], status_code=500)
+            finally:
+                # Worker threads open their own database connection
+                connection.close()
+
+        if pending:
+            max_workers = max(1, min(settings.COMPANY_RESEARCH_MAX_PARALLEL, len(pending)))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results.update(zip(pending, executor.map(run, pending.values())))
+
+        return results
@@ -0,0 +1,302 @@
+# reports/services/company_search.py
+"""
+Company Full-Text Search
+
+Indexed search over companies, replacing `icontains` scans across joins.
+Indexed text: company name, addresses, region, country, website and contact
+surnames. Every search word is prefix matched ("plast" finds "Plastics")
+and results can be ranked by relevance (name matches first).
+
+Backends (see migration 0033_company_search_index):
+
+    PostgreSQL  reports_company.search_vector (tsvector, 'simple' config),
+                maintained by a BEFORE INSERT/UPDATE trigger, GIN indexed
+    SQLite      reports_company_fts (FTS5 table, rowid = company id),
+                maintained by AFTER INSERT/UPDATE/DELETE triggers
+    other       icontains fallback over the same fields
+
+Both indexes are maintained by the database itself, so bulk_create(),
+update() and raw imports stay in sync. `rebuild_company_search` repopulates
+them from scratch.
+
+Usage:
+    CompanySearchService.filter(ProductionSite.objects.all(), 'acme plast', company_path='company')
+    CompanySearchService.rank(Company.objects.all(), 'acme plast').order_by('-search_rank')
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+
+from reports.company_models import Company
+
+
+# Indexed columns, grouped by weight (name > location > address/web > contacts)
+SEARCH_FIELD_WEIGHTS = {
+    'A': ['company_name'],
+    'B': ['region', 'country'],
+    'C': ['address_1', 'address_2', 'address_3', 'address_4', 'website'],
+    'D': ['surname_1', 'surname_2', 'surname_3', 'surname_4'],
+}
+SEARCH_FIELDS = [field for fields in SEARCH_FIELD_WEIGHTS.values() for field in fields]
+
+FTS_TABLE = 'reports_company_fts'
+
+# bm25() column weights for the FTS5 table, in SEARCH_FIELDS order
+FTS_COLUMN_WEIGHTS = {'A': 10.0, 'B': 4.0, 'C': 2.0, 'D': 1.0}
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def postgres_vector_sql(row='NEW'):
+    """tsvector expression over a company row (trigger body and backfill)."""
+    parts = []
+    for weight, fields in SEARCH_FIELD_WEIGHTS.items():
+        columns = ', '.join(f'{row}.{field}' if row else field for field in fields)
+        parts.append(f"setweight(to_tsvector('simple', concat_ws(' ', {columns})), '{weight}')")
+    return ' || '.join(parts)
+
+
+class SearchRank(Func):
+    """
+    Correlated relevance lookup for a company id expression. `sql` is the
+    backend specific subquery with a %s placeholder for the search query and
+    {company_id} for the compiled id expression.
+    """
+    output_field = FloatField()
+
+    def __init__(self, company_id, sql, query):
+        super().__init__(company_id)
+        self.sql = sql
+        self.query = query
+
+    def as_sql(self, compiler, connection, **extra_context):
+        id_sql, id_params = compiler.compile(self.source_expressions[0])
+        return self.sql.format(company_id=id_sql), (self.query, *id_params)
+
+
+class CompanySearchService:
+    """
+    Builds full-text search filters / rankings for Company querysets and
+    querysets related to companies.
+    """
+
+    MAX_TERMS = 8
+
+    @classmethod
+    def backend(cls):
+        return connection.vendor if connection.vendor in ('postgresql', 'sqlite') else 'fallback'
+
+    @classmethod
+    def terms(cls, search):
+        """Split user input into search words (punctuation is ignored)."""
+        return WORD_RE.findall((search or '').lower())[:cls.MAX_TERMS]
+
+    @classmethod
+    def _postgres_query(cls, terms):
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    @classmethod
+    def _fts_query(cls, terms):
+        return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+    # =========================================================================
+    # MATCHING
+    # =========================================================================
+
+    @classmethod
+    def matching_companies(cls, terms):
+        """Company queryset matching all terms (uses the index where available)."""
+        backend = cls.backend()
+
+        if backend == 'postgresql':
+            return Company.objects.filter(
+                id__in=RawSQL(
+                    "SELECT id FROM reports_company WHERE search_vector @@ to_tsquery('simple', %s)",
+                    (cls._postgres_query(terms),)
+                )
+            )
+
+        if backend == 'sqlite':
+            return Company.objects.filter(
+                id__in=RawSQL(
+                    f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+                    (cls._fts_query(terms),)
+                )
+            )
+
+        query = Q()
+        for term in terms:
+            term_query = Q()
+            for field in SEARCH_FIELDS:
+                term_query |= Q(**{f'{field}__icontains': term})
+            query &= term_query
+        return Company.objects.filter(query)
+
+    @classmethod
+    def filter(cls, queryset, search, company_path=''):
+        """
+        Restrict a queryset to rows whose company matches the search.
+
+        Args:
+            queryset: Company queryset, or a queryset of a model related to
+                      Company (e.g. ProductionSite, ProductionSiteVersion)
+            search: raw user input
+            company_path: lookup path from the queryset's model to Company
+                          ('' for Company itself, 'company', 'production_site__company')
+        """
+        terms = cls.terms(search)
+        if not terms:
+            return queryset
+
+        lookup = f'{company_path}__in' if company_path else 'pk__in'
+        return queryset.filter(**{lookup: cls.matching_companies(terms).values('id')})
+
+    # =========================================================================
+    # RANKING
+    # =========================================================================
+
+    @classmethod
+    def rank_expression(cls, terms, company_path=''):
+        """Relevance of the row's company (higher is better), or None."""
+        backend = cls.backend()
+        company_id = F(f'{company_path}_id' if company_path else 'pk')
+
+        if backend == 'postgresql':
+            return SearchRank(
+                company_id,
+                sql="(SELECT ts_rank(ranked.search_vector, to_tsquery('simple', %s)) "
+                    "FROM reports_company ranked WHERE ranked.id = {company_id})",
+                query=cls._postgres_query(terms),
+            )
+
+        if backend == 'sqlite':
+            weights = ', '.join(
+                str(FTS_COLUMN_WEIGHTS[weight])
+                for weight, fields in SEARCH_FIELD_WEIGHTS.items() for _ in fields
+            )
+            return SearchRank(
+                company_id,
+                sql=f'(SELECT -bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+                    f'WHERE {FTS_TABLE} MATCH %s AND rowid = {{company_id}})',
+                query=cls._fts_query(terms),
+            )
+
+        return None
+
+    @classmethod
+    def rank(cls, queryset, search, company_path=''):
+        """
+        Filter by the search and annotate `search_rank` (higher is more
+        relevant; 0 on backends without ranking).
+        """
+        terms = cls.terms(search)
+        if not terms:
+            return queryset
+
+        queryset = cls.filter(queryset, search, company_path)
+        expression = cls.rank_expression(terms, company_path)
+        if expression is None:
+            expression = Value(0.0, output_field=FloatField())
+        return queryset.annotate(search_rank=expression)
+
+    # =========================================================================
+    # MAINTENANCE
+    # =========================================================================
+
+    @classmethod
+    def install(cls, using_connection=None):
+        """
+        Create (or re-create) the search index, its maintenance triggers and
+        populate it. Idempotent.
+
+        On SQLite, Django rebuilds a table (dropping its triggers) when a
+        migration alters it, so run `rebuild_company_search` after such
+        migrations in development.
+        """
+        conn = using_connection or connection
+        columns = ', '.join(SEARCH_FIELDS)
+
+        with conn.cursor() as cursor:
+            if conn.vendor == 'postgresql':
+                cursor.execute('ALTER TABLE reports_company ADD COLUMN IF NOT EXISTS search_vector tsvector')
+                cursor.execute(
+                    'CREATE OR REPLACE FUNCTION reports_company_search_vector_update() RETURNS trigger AS $$ '
+                    f'BEGIN NEW.search_vector := {postgres_vector_sql()}; RETURN NEW; END '
+                    '$$ LANGUAGE plpgsql'
+                )
+                cursor.execute('DROP TRIGGER IF EXISTS reports_company_search_vector_trigger ON reports_company')
+                cursor.execute(
+                    'CREATE TRIGGER reports_company_search_vector_trigger '
+                    f'BEFORE INSERT OR UPDATE OF {columns} ON reports_company '
+                    'FOR EACH ROW EXECUTE FUNCTION reports_company_search_vector_update()'
+                )
+                cursor.execute(
+                    'CREATE INDEX IF NOT EXISTS reports_company_search_vector_gin '
+                    'ON reports_company USING gin (search_vector)'
+                )
+
+            elif conn.vendor == 'sqlite':
+                new_values = ', '.join(f'new.{field}' for field in SEARCH_FIELDS)
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+                    f"USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+                )
+                for trigger in ('ai', 'ad', 'au'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}')
+                cursor.execute(
+                    f'CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON reports_company BEGIN '
+                    f'INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {new_values}); END'
+                )
+                cursor.execute(
+                    f'CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON reports_company BEGIN '
+                    f'DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END'
+                )
+                cursor.execute(
+                    f'CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {columns} ON reports_company BEGIN '
+                    f'DELETE FROM {FTS_TABLE} WHERE rowid = old.id; '
+                    f'INSERT INTO {FTS_TABLE} (rowid, {columns}) VALUES (new.id, {new_values}); END'
+                )
+
+        return cls.rebuild(conn)
+
+    @classmethod
+    def uninstall(cls, using_connection=None):
+        """Drop the search index and its triggers."""
+        conn = using_connection or connection
+
+        with conn.cursor() as cursor:
+            if conn.vendor == 'postgresql':
+                cursor.execute('DROP TRIGGER IF EXISTS reports_company_search_vector_trigger ON reports_company')
+                cursor.execute('DROP FUNCTION IF EXISTS reports_company_search_vector_update()')
+                cursor.execute('DROP INDEX IF EXISTS reports_company_search_vector_gin')
+                cursor.execute('ALTER TABLE reports_company DROP COLUMN IF EXISTS search_vector')
+            elif conn.vendor == 'sqlite':
+                for trigger in ('ai', 'ad', 'au'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}')
+                cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+    @classmethod
+    def rebuild(cls, using_connection=None):
+        """
+        Repopulate the search index from reports_company.
+
+        Returns:
+            number of indexed companies
+        """
+        conn = using_connection or connection
+        columns = ', '.join(SEARCH_FIELDS)
+
+        with conn.cursor() as cursor:
+            if conn.vendor == 'postgresql':
+                cursor.execute(f'UPDATE reports_company SET search_vector = {postgres_vector_sql(row=None)}')
+            elif conn.vendor == 'sqlite':
+                cursor.execute(f'DELETE FROM {FTS_TABLE}')
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, {columns}) '
+                    f'SELECT id, {columns} FROM reports_company'
+                )
+            cursor.execute('SELECT COUNT(*) FROM reports_company')
+            return cursor.fetchone()[0]
@@ -0,0 +1,463 @@
+# reports/services/company_transfer.py
+"""
+Company Transfer Service
+
+Moves approved unverified sites into the Company Database in batches.
+
+Each chunk of CHUNK_SIZE sites is transferred in one transaction:
+
+    1. lock the sites and check they are APPROVED
+    2. resolve every target company in one query (normalized name + country)
+       and load their production sites / current versions / notes
+    3. walk the sites in order, merging into matched companies or building
+       new Company / ProductionSite / Initial Version objects (with their
+       snapshots) in memory; unique keys are allocated up front in one query
+    4. bulk_create / bulk_update each table, then mark the sites TRANSFERRED
+       with one UPDATE and bulk_create the CompanyHistory and
+       VerificationHistory rows
+
+The merge rules are the ones of the former per-site transfer: a site merges
+into the first company with the same normalized name and country unless
+both have an address_1 that differs; company fields are overwritten by the
+site; an existing production site of the same category has its current
+version updated, otherwise a new production site with an Initial Version is
+added. Sites later in a batch see the companies and production sites
+created by earlier ones.
+
+Bulk writes bypass model signals, so the derived data they maintain
+(facet index, company detail documents, dashboard snapshot, widget caches)
+is refreshed explicitly.
+
+Usage:
+    from reports.services.company_transfer import CompanyTransferService
+
+    results = CompanyTransferService.transfer(site_ids, request.user)
+    results['success'], results['failures']
+
+    # Single site (raises ValueError when the site cannot be transferred)
+    company, production_site, version = CompanyTransferService.transfer_site(site, user)
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Company-level fields copied from the unverified site
+COMPANY_FIELDS = [
+    'company_name', 'address_1', 'address_2', 'address_3', 'address_4',
+    'region', 'country', 'geographical_coverage', 'phone_number',
+    'company_email', 'website', 'accreditation', 'parent_company',
+    'title_1', 'initials_1', 'surname_1', 'position_1',
+    'title_2', 'initials_2', 'surname_2', 'position_2',
+    'title_3', 'initials_3', 'surname_3', 'position_3',
+    'title_4', 'initials_4', 'surname_4', 'position_4',
+]
+
+# Unverified site fields that are not production data
+NON_VERSION_FIELDS = {
+    'site_id', 'verification_status', 'collected_by', 'verified_by',
+    'collected_date', 'verified_date', 'source', 'priority',
+    'notes', 'rejection_reason', 'data_quality_score',
+    'assigned_to', 'is_duplicate', 'duplicate_of',
+    'created_at', 'updated_at', 'project', 'category',
+    'calling_status', 'calling_status_changed_at', 'calling_status_changed_by',
+    'is_pre_filled', 'pre_filled_by', 'pre_filled_at', 'total_calls'
+} | set(COMPANY_FIELDS)
+
+
+def version_field_names():
+    """ProductionSiteVersion fields filled from the unverified site"""
+    from ..models import UnverifiedSite
+    from ..company_models import ProductionSiteVersion
+
+    return [
+        field.name for field in ProductionSiteVersion._meta.concrete_fields
+        if field.name not in NON_VERSION_FIELDS and hasattr(UnverifiedSite, field.name)
+    ]
+
+
+class TransferChunk:
+    """
+    In-memory state of one chunk: companies and production sites created or
+    changed so far, so later sites merge into them.
+    """
+
+    def __init__(self, companies, production_sites, current_versions, unique_keys):
+        # (normalized name, lower-case country) -> [Company, ...] in match order
+        self.companies = {}
+        for company in companies:
+            self.companies.setdefault(self._company_key(company.company_name, company.country), []).append(company)
+
+        # (id(company), category) -> ProductionSite / current version
+        self.production_sites = {
+            (id(company), site.category): site
+            for company in companies
+            for site in production_sites.get(company.pk, [])
+        }
+        self.current_versions = current_versions
+
+        # Pre-allocated keys for new companies (the Initial Version snapshot
+        # includes the key, so it must be known before anything is written)
+        self.unique_keys = iter(unique_keys)
+
+        self.new_companies, self.new_sites, self.new_versions = [], [], []
+        self.changed_companies, self.changed_sites, self.changed_versions = {}, {}, {}
+        self.company_history = []
+        self.transferred = []
+
+    @staticmethod
+    def _company_key(company_name, country):
+        return ((company_name or '').lower().strip(), (country or '').lower())
+
+    def find_company(self, site):
+        candidates = self.companies.get(self._company_key(site.company_name, site.country))
+        company = candidates[0] if candidates else None
+
+        # Same name and country but a different address: a different company
+        if company and site.address_1:
+            if company.address_1.lower().strip() != site.address_1.lower().strip():
+                company = None
+        return company
+
+    def add_company(self, company):
+        company.unique_key = next(self.unique_keys)
+        self.companies.setdefault(self._company_key(company.company_name, company.country), []).append(company)
+        self.new_companies.append(company)
+
+    def add_production_site(self, company, production_site, version):
+        self.production_sites[(id(company), production_site.category)] = production_site
+        self.current_versions[id(production_site)] = version
+        self.new_sites.append(production_site)
+        self.new_versions.append(version)
+
+    def get_production_site(self, company, category):
+        production_site = self.production_sites.get((id(company), category))
+        if production_site is None:
+            return None, None
+        return production_site, self.current_versions.get(id(production_site))
+
+    def mark_changed(self, obj, changed):
+        """Track a saved object for bulk_update (new ones are bulk created)."""
+        if obj.pk is not None:
+            changed[obj.pk] = obj
+
+
+class CompanyTransferService:
+    """
+    Batch transfer of approved unverified sites into the Company Database.
+    """
+
+    CHUNK_SIZE = 500
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    @classmethod
+    def transfer(cls, site_ids, transferred_by, project=None, chunk_size=None):
+        """
+        Transfer sites in chunks; each chunk is atomic.
+
+        Args:
+            site_ids: site_id values
+            transferred_by: User performing the transfer
+            project: restrict to sites of this DataCollectionProject
+
+        Returns:
+            {
+                'success': int,
+                'failed': int,
+                'errors': [str, ...],
+                'failures': [{'site_id', 'company_name', 'error'}, ...],
+                'transferred': [{'site_id', 'company_id', 'company_key', 'production_site_id', 'category'}, ...]
+            }
+        """
+        site_ids = list(dict.fromkeys(str(site_id) for site_id in site_ids))
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+        transferred, failures = [], []
+
+        for start in range(0, len(site_ids), chunk_size):
+            chunk_ids = site_ids[start:start + chunk_size]
+            try:
+                chunk_transferred, chunk_failures = cls._transfer_chunk(chunk_ids, transferred_by, project)
+            except Exception as e:
+                logger.exception(f"Transfer of {len(chunk_ids)} sites failed")
+                failures.extend(
+                    cls._failure(site_id, '', f'Transfer failed: {str(e)}') for site_id in chunk_ids
+                )
+                continue
+
+            failures.extend(chunk_failures)
+            transferred.extend(
+                {
+                    'site_id': str(site.site_id),
+                    'company_id': str(company.company_id),
+                    'company_key': company.unique_key,
+                    'production_site_id': str(production_site.site_id),
+                    'category': production_site.category,
+                }
+                for site, company, production_site, version in chunk_transferred
+            )
+
+        logger.info(f"Transferred {len(transferred)} sites by {transferred_by}, {len(failures)} failed")
+        return {
+            'success': len(transferred),
+            'failed': len(failures),
+            'errors': [failure['error'] for failure in failures],
+            'failures': failures,
+            'transferred': transferred,
+        }
+
+    @classmethod
+    def transfer_site(cls, site, transferred_by):
+        """
+        Transfer a single site.
+
+        Returns:
+            tuple: (Company, ProductionSite, ProductionSiteVersion)
+
+        Raises:
+            ValueError: If site is already transferred or not approved
+        """
+        transferred, failures = cls._transfer_chunk([site.site_id], transferred_by)
+        if failures:
+            raise ValueError(failures[0]['error'])
+
+        site.refresh_from_db()
+        _, company, production_site, version = transferred[0]
+        return company, production_site, version
+
+    # =========================================================================
+    # CHUNK PIPELINE
+    # =========================================================================
+
+    @classmethod
+    def _transfer_chunk(cls, site_ids, transferred_by, project=None):
+        from ..models import UnverifiedSite, VerificationStatus
+        from .change_feed import ChangeFeedService
+
+        with ChangeFeedService.atomic():
+            sites = (
+                UnverifiedSite.objects.select_for_update(of=('self',))
+                .select_related('project')
+                .filter(site_id__in=site_ids)
+            )
+            if project is not None:
+                sites = sites.filter(project=project)
+            sites_by_id = {str(site.site_id): site for site in sites}
+
+            eligible, failures = [], []
+            for site_id in map(str, site_ids):
+                site = sites_by_id.get(site_id)
+                if site is None:
+                    failures.append(cls._failure(site_id, '', 'Site not found'))
+                elif site.verification_status == VerificationStatus.TRANSFERRED:
+                    failures.append(cls._failure(site_id, site.company_name, f"Site '{site.company_name}' already transferred"))
+                elif site.verification_status != VerificationStatus.APPROVED:
+                    failures.append(cls._failure(
+                        site_id, site.company_name,
+                        f"Site '{site.company_name}' not approved (current status: {site.get_verification_status_display()})"
+                    ))
+                else:
+                    eligible.append(site)
+
+            if not eligible:
+                return [], failures
+
+            chunk = cls._load_chunk(eligible)
+            for site in eligible:
+                cls._merge_site(chunk, site, transferred_by)
+            cls._write_chunk(chunk, transferred_by)
+
+        return chunk.transferred, failures
+
+    @classmethod
+    def _load_chunk(cls, sites):
+        """Resolve target companies, their production sites and current versions."""
+        from ..company_models import Company, ProductionSite, ProductionSiteVersion, CompanyNote
+
+        names = {(site.company_name or '').lower().strip() for site in sites}
+        companies = list(
+            Company.objects.filter(company_name_normalized__in=names)
+            .prefetch_related(Prefetch('notes', queryset=CompanyNote.objects.select_related('created_by')))
+            .order_by('company_name', 'pk')
+        )
+
+        production_sites = {}
+        for production_site in ProductionSite.objects.filter(company__in=companies):
+            production_sites.setdefault(production_site.company_id, []).append(production_site)
+
+        sites_by_pk = {site.pk: site for group in production_sites.values() for site in group}
+        current_versions = {}
+        for version in ProductionSiteVersion.objects.filter(production_site__in=sites_by_pk, is_current=True):
+            # Newest version wins when several are flagged current
+            current_versions.setdefault(id(sites_by_pk[version.production_site_id]), version)
+
+        # One key per site is an upper bound on the companies created
+        return TransferChunk(companies, production_sites, current_versions, Company.allocate_unique_keys(len(sites)))
+
+    @classmethod
+    def _merge_site(cls, chunk, site, transferred_by):
+        """Apply one site to the chunk state (mirrors the per-site transfer)."""
+        from ..company_models import Company, ProductionSite, CompanyHistory, CompanyStatus
+
+        company_data = {field_name: getattr(site, field_name) for field_name in COMPANY_FIELDS}
+        project_code = site.project.project_code if site.project and site.project.project_code else ''
+
+        company = chunk.find_company(site)
+        if company:
+            is_new_company = False
+            for field_name, value in company_data.items():
+                setattr(company, field_name, value)
+            company.company_name_normalized = company.company_name.lower().strip()
+            company.last_modified_by = transferred_by
+            if project_code and not company.project_code:
+                company.project_code = project_code
+                company.source_project = site.project
+            chunk.mark_changed(company, chunk.changed_companies)
+        else:
+            is_new_company = True
+            company = Company(
+                **company_data,
+                status=CompanyStatus.COMPLETE,
+                created_by=transferred_by,
+                last_modified_by=transferred_by,
+            )
+            company.company_name_normalized = company.company_name.lower().strip()
+            if site.project:
+                company.project_code = project_code
+                company.source_project = site.project
+            chunk.add_company(company)
+
+        category = site.category
+        version_data = {field_name: getattr(site, field_name) for field_name in version_field_names()}
+
+        production_site, version = chunk.get_production_site(company, category)
+        existing_site = production_site is not None
+        if existing_site:
+            if project_code and not production_site.source_project_code:
+                production_site.source_project_code = project_code
+                production_site.source_project = site.project
+                chunk.mark_changed(production_site, chunk.changed_sites)
+
+            if version is not None:
+                for field_name, value in version_data.items():
+                    setattr(version, field_name, value)
+                chunk.mark_changed(version, chunk.changed_versions)
+        else:
+            production_site = ProductionSite(company=company, category=category, created_by=transferred_by)
+            if project_code:
+                production_site.source_project_code = project_code
+                production_site.source_project = site.project
+            version = company.build_initial_version(production_site, transferred_by, version_data)
+            chunk.add_production_site(company, production_site, version)
+
+        if is_new_company:
+            action, description = 'CREATED', 'Created from Unverified Site transfer'
+        else:
+            action = 'SITE_ADDED' if not existing_site else 'UPDATED'
+            description = f'Updated from Unverified Site transfer ({category})'
+        chunk.company_history.append(CompanyHistory(
+            company=company,
+            action=action,
+            performed_by=transferred_by,
+            description=description,
+            related_production_site=production_site,
+            related_version=version,
+        ))
+
+        chunk.transferred.append((site, company, production_site, version))
+
+    @classmethod
+    def _write_chunk(cls, chunk, transferred_by):
+        from ..models import UnverifiedSite, VerificationHistory, VerificationStatus
+        from ..company_models import Company, ProductionSite, ProductionSiteVersion, CompanyHistory
+        from .site_counters import SiteCounterService
+
+        now = timezone.now()
+
+        # Companies
+        Company.objects.bulk_create(chunk.new_companies)
+        for company in chunk.changed_companies.values():
+            company.updated_at = now
+        Company.objects.bulk_update(
+            list(chunk.changed_companies.values()),
+            COMPANY_FIELDS + ['company_name_normalized', 'last_modified_by', 'project_code', 'source_project', 'updated_at'],
+        )
+
+        # Production sites and versions
+        ProductionSite.objects.bulk_create(chunk.new_sites)
+        for production_site in chunk.changed_sites.values():
+            production_site.updated_at = now
+        ProductionSite.objects.bulk_update(
+            list(chunk.changed_sites.values()),
+            ['source_project_code', 'source_project', 'updated_at'],
+        )
+
+        ProductionSiteVersion.objects.bulk_create(chunk.new_versions)
+        ProductionSiteVersion.objects.bulk_update(list(chunk.changed_versions.values()), version_field_names())
+
+        CompanyHistory.objects.bulk_create(chunk.company_history)
+
+        # Unverified sites
+        SiteCounterService.update_sites(
+            UnverifiedSite.objects.filter(site_id__in=[site.site_id for site, _, _, _ in chunk.transferred]),
+            verification_status=VerificationStatus.TRANSFERRED, updated_at=now
+        )
+
+        VerificationHistory.objects.bulk_create([
+            VerificationHistory(
+                site=site,
+                action='TRANSFERRED',
+                performed_by=transferred_by,
+                old_status=site.verification_status,
+                new_status=VerificationStatus.TRANSFERRED,
+                comments=f'Transferred to Company Database (Company: {company.unique_key})'
+            )
+            for site, company, _, _ in chunk.transferred
+        ])
+
+        cls._invalidate_derived_data(chunk)
+
+    # =========================================================================
+    # HELPERS
+    # =========================================================================
+
+    @staticmethod
+    def _failure(site_id, company_name, error):
+        return {'site_id': str(site_id), 'company_name': company_name, 'error': error}
+
+    @staticmethod
+    def _invalidate_derived_data(chunk):
+        """Signals do not fire for bulk writes; refresh what they would have."""
+        from .change_feed import ChangeFeedService
+        from .company_detail import CompanyDetailService
+        from .dashboard_snapshot import DashboardSnapshotService
+        from .facet_index import FacetIndexService
+        from .widget_cache import WidgetCacheService
+
+        companies = {company.pk for _, company, _, _ in chunk.transferred}
+        production_sites = {production_site.pk for _, _, production_site, _ in chunk.transferred}
+
+        for company_pk in companies:
+            FacetIndexService.record_change('company', company_pk)
+            CompanyDetailService.bump_revision(company_pk)
+        for site_pk in production_sites:
+            FacetIndexService.record_change('site', site_pk)
+        # Company fields feed every site record of the company
+        ChangeFeedService.record_companies(companies)
+
+        def invalidate():
+            DashboardSnapshotService.mark_stale()
+            for model_label in (
+                'reports.Company', 'reports.ProductionSite', 'reports.ProductionSiteVersion',
+                'reports.CompanyHistory', 'reports.UnverifiedSite', 'reports.VerificationHistory',
+            ):
+                WidgetCacheService.invalidate_for_model(model_label)
+
+        transaction.on_commit(invalidate)
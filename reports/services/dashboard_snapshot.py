@@ -0,0 +1,519 @@
+# reports/services/dashboard_snapshot.py
+"""
+Dashboard Snapshot Service
+
+Computes every admin dashboard metric in a handful of grouped queries and
+stores the result as a DashboardSnapshot row (mirrored into the cache).
+Dashboard endpoints read from the snapshot instead of recounting the database
+on every load.
+
+Freshness:
+- Writes to the underlying models only mark the snapshot as stale
+  (see reports/signals.py). The next read recomputes it, at most once every
+  DEBOUNCE_SECONDS, so bursts of writes trigger a single recomputation.
+- Snapshots older than MAX_AGE_SECONDS are always recomputed.
+- Admins can force a refresh with ?refresh=true, and the
+  `refresh_dashboard_snapshot` management command can be scheduled (cron).
+
+Usage:
+    from reports.services.dashboard_snapshot import DashboardSnapshotService
+
+    stats = DashboardSnapshotService.get_snapshot()
+    stats['total_companies'], stats['generated_at']
+"""
+
+import time
+import logging
+from datetime import timedelta
+from dateutil.relativedelta import relativedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q, OuterRef, Subquery, IntegerField
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+
+# Company statuses counted as "live" data
+LIVE_COMPANY_STATUSES = ['COMPLETE', 'INCOMPLETE', 'NONE']
+
+# Materials shown in the dashboard material charts
+SNAPSHOT_MATERIALS = [
+    'hdpe', 'ldpe', 'lldpe', 'pp', 'pvc', 'pet', 'ps', 'abs', 'pa', 'pc',
+    'eva', 'xlpe', 'pmma', 'pom', 'tpes', 'pbt', 'rigid_pvc', 'flexible_pvc'
+]
+
+CATEGORY_COLORS = {
+    'INJECTION': '#8B5CF6',
+    'BLOW': '#3B82F6',
+    'ROTO': '#10B981',
+    'PE_FILM': '#F59E0B',
+    'SHEET': '#EF4444',
+    'PIPE': '#EC4899',
+    'TUBE_HOSE': '#06B6D4',
+    'PROFILE': '#84CC16',
+    'CABLE': '#F97316',
+    'COMPOUNDER': '#6366F1',
+    'RECYCLER': '#14B8A6',
+}
+
+STATUS_COLORS = {
+    'COMPLETE': '#10B981',
+    'INCOMPLETE': '#F59E0B',
+    'DELETED': '#EF4444',
+    'NONE': '#6B7280',
+}
+
+
+class DashboardSnapshotService:
+    """
+    Builds, stores and serves the admin dashboard statistics snapshot.
+    """
+
+    SNAPSHOT_KEY = 'admin_dashboard'
+    CACHE_KEY = 'dashboard_snapshot_admin_dashboard'
+    STALE_KEY = 'dashboard_snapshot_stale'
+    LOCK_KEY = 'dashboard_snapshot_lock'
+
+    # Minimum time between two write-triggered recomputations
+    DEBOUNCE_SECONDS = 60
+    # Snapshots older than this are recomputed regardless of writes
+    MAX_AGE_SECONDS = 15 * 60
+    # How long a computation may hold the lock
+    LOCK_TIMEOUT = 120
+
+    # =========================================================================
+    # PUBLIC API
+    # =========================================================================
+
+    @classmethod
+    def get_snapshot(cls, force_refresh=False):
+        """
+        Return the current snapshot data, recomputing it if needed.
+
+        Args:
+            force_refresh: Recompute immediately (admin "refresh" button)
+
+        Returns:
+            dict: Snapshot data including 'generated_at' (ISO string)
+        """
+        if force_refresh:
+            return cls.refresh()
+
+        data = cache.get(cls.CACHE_KEY)
+        if data is None:
+            data = cls._load_from_db()
+            if data is not None:
+                cache.set(cls.CACHE_KEY, data, cls.MAX_AGE_SECONDS)
+
+        if data is None:
+            return cls.refresh()
+
+        # Only one process recomputes; the others keep serving the old snapshot
+        if cls._needs_refresh(data) and cache.add(cls.LOCK_KEY, True, cls.LOCK_TIMEOUT):
+            try:
+                return cls.refresh()
+            finally:
+                cache.delete(cls.LOCK_KEY)
+
+        return data
+
+    @classmethod
+    def get_for_request(cls, request):
+        """
+        Return the snapshot for an API request.
+        Staff admins and superadmins can force a recompute with ?refresh=true.
+        """
+        from accounts.models import UserRole
+
+        wants_refresh = request.query_params.get('refresh', '').lower() in ('1', 'true', 'yes')
+        is_admin = request.user.is_superuser or request.user.role in [
+            UserRole.SUPERADMIN, UserRole.STAFF_ADMIN
+        ]
+        return cls.get_snapshot(force_refresh=wants_refresh and is_admin)
+
+    @classmethod
+    def refresh(cls):
+        """Compute a new snapshot and persist it to the database and cache."""
+        from reports.models import DashboardSnapshot
+
+        # Clear the stale marker first so writes during computation re-mark it
+        cache.delete(cls.STALE_KEY)
+
+        started = time.monotonic()
+        data = cls.compute()
+        generation_ms = int((time.monotonic() - started) * 1000)
+
+        generated_at = timezone.now()
+        data['generated_at'] = generated_at.isoformat()
+        data['generation_ms'] = generation_ms
+
+        DashboardSnapshot.objects.update_or_create(
+            snapshot_key=cls.SNAPSHOT_KEY,
+            defaults={
+                'data': data,
+                'generated_at': generated_at,
+                'generation_ms': generation_ms,
+            }
+        )
+        cache.set(cls.CACHE_KEY, data, cls.MAX_AGE_SECONDS)
+
+        logger.info(f"Dashboard snapshot refreshed in {generation_ms}ms")
+        return data
+
+    @classmethod
+    def mark_stale(cls):
+        """
+        Flag the snapshot as outdated. Cheap enough to call from save hooks:
+        it only writes a cache key, recomputation happens on the next read.
+        """
+        cache.add(cls.STALE_KEY, timezone.now().isoformat(), None)
+
+    # =========================================================================
+    # INTERNAL HELPERS
+    # =========================================================================
+
+    @classmethod
+    def _load_from_db(cls):
+        from reports.models import DashboardSnapshot
+
+        snapshot = DashboardSnapshot.objects.filter(snapshot_key=cls.SNAPSHOT_KEY).first()
+        return snapshot.data if snapshot else None
+
+    @classmethod
+    def _needs_refresh(cls, data):
+        generated_at = parse_datetime(data.get('generated_at') or '')
+        if generated_at is None:
+            return True
+
+        age = (timezone.now() - generated_at).total_seconds()
+        if age >= cls.MAX_AGE_SECONDS:
+            return True
+
+        return cache.get(cls.STALE_KEY) is not None and age >= cls.DEBOUNCE_SECONDS
+
+    # =========================================================================
+    # COMPUTATION
+    # =========================================================================
+
+    @classmethod
+    def compute(cls):
+        """
+        Compute all dashboard metrics.
+        Each section issues one grouped/conditional aggregate query.
+        """
+        now = timezone.now()
+        data = {}
+        data.update(cls._company_stats(now))
+        data.update(cls._category_stats())
+        data.update(cls._material_stats())
+        data.update(cls._user_stats(now))
+        data.update(cls._subscription_stats(now))
+        data.update(cls._project_stats(now))
+        data.update(cls._security_stats(now))
+        return data
+
+    @staticmethod
+    def _company_stats(now):
+        from reports.company_models import Company, CompanyStatus, ProductionSite
+
+        thirty_days_ago = now - timedelta(days=30)
+        seven_days_ago = now - timedelta(days=7)
+        live = ~Q(status=CompanyStatus.DELETED)
+
+        totals = Company.objects.aggregate(
+            total_records=Count('id', filter=live),
+            recent_records=Count('id', filter=live & Q(created_at__gte=thirty_days_ago)),
+            recent_activity=Count('id', filter=live & Q(updated_at__gte=thirty_days_ago)),
+            recently_updated=Count('id', filter=live & Q(updated_at__gte=seven_days_ago)),
+        )
+
+        status_display = dict(CompanyStatus.choices)
+        companies_by_status = [
+            {
+                'status': item['status'],
+                'status_display': status_display.get(item['status'], item['status']),
+                'count': item['count'],
+                'color': STATUS_COLORS.get(item['status'], '#6B7280'),
+            }
+            for item in Company.objects.values('status').annotate(count=Count('id')).order_by()
+        ]
+
+        top_countries = [
+            {'country': item['country'], 'count': item['count']}
+            for item in Company.objects.filter(live).exclude(country__isnull=True).exclude(country='')
+            .values('country').annotate(count=Count('id')).order_by('-count')[:10]
+        ]
+
+        all_countries = list(
+            Company.objects.filter(live).exclude(country__isnull=True).exclude(country='')
+            .values_list('country', flat=True).distinct().order_by('country')
+        )
+
+        top_regions = [
+            {'region': item['region'], 'count': item['count']}
+            for item in Company.objects.filter(live).exclude(region__isnull=True).exclude(region='')
+            .values('region').annotate(count=Count('id')).order_by('-count')[:10]
+        ]
+
+        site_count = ProductionSite.objects.filter(
+            company=OuterRef('pk')
+        ).order_by().values('company').annotate(c=Count('id')).values('c')
+        multi_category_companies = Company.objects.filter(live).annotate(
+            site_count=Subquery(site_count, output_field=IntegerField())
+        ).filter(site_count__gt=1).count()
+
+        # Last 6 calendar months including the current one, empty months as 0
+        this_month = timezone.localtime(now).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        months = [this_month - relativedelta(months=offset) for offset in range(5, -1, -1)]
+        counts = {
+            (item['month'].year, item['month'].month): item['count']
+            for item in Company.objects.filter(live, created_at__gte=months[0])
+            .annotate(month=TruncMonth('created_at')).values('month')
+            .annotate(count=Count('id')).order_by('month')
+            if item['month']
+        }
+        monthly_trend = [
+            {
+                'month': month.strftime('%b %Y'),
+                'month_short': month.strftime('%b'),
+                'count': counts.get((month.year, month.month), 0),
+            }
+            for month in months
+        ]
+
+        return {
+            'total_companies': totals['total_records'],
+            'total_records': totals['total_records'],
+            'recent_records': totals['recent_records'],
+            'new_companies_this_month': totals['recent_records'],
+            'recent_activity': totals['recent_activity'],
+            'recently_updated': totals['recently_updated'],
+            'companies_by_status': companies_by_status,
+            'top_countries': top_countries,
+            'all_countries': all_countries,
+            'countries_count': len(all_countries),
+            'top_regions': top_regions,
+            'multi_category_companies': multi_category_companies,
+            'monthly_trend': monthly_trend,
+        }
+
+    @staticmethod
+    def _category_stats():
+        from reports.company_models import Company, CompanyStatus, CompanyCategory, ProductionSite
+
+        category_display = dict(CompanyCategory.choices)
+
+        site_counts = ProductionSite.objects.filter(
+            company__status__in=LIVE_COMPANY_STATUSES
+        ).values('category').annotate(count=Count('id')).order_by('-count')
+
+        records_by_category = [
+            {
+                'category': item['category'],
+                'category_display': category_display.get(item['category'], item['category']),
+                'count': item['count'],
+                'color': CATEGORY_COLORS.get(item['category'], '#6B7280'),
+            }
+            for item in site_counts if item['category']
+        ]
+
+        # Distinct companies with a current version per category (chart data)
+        company_counts = Company.objects.exclude(
+            status=CompanyStatus.DELETED
+        ).filter(
+            production_sites__versions__is_current=True
+        ).values('production_sites__category').annotate(
+            count=Count('id', distinct=True)
+        ).order_by('-count')
+
+        companies_by_category = [
+            {
+                'category': item['production_sites__category'],
+                'category_display': category_display.get(
+                    item['production_sites__category'], item['production_sites__category']
+                ),
+                'count': item['count'],
+            }
+            for item in company_counts if item['production_sites__category']
+        ]
+
+        return {
+            'total_production_sites': sum(item['count'] for item in site_counts),
+            'records_by_category': records_by_category,
+            'companies_by_category': companies_by_category,
+        }
+
+    @staticmethod
+    def _material_stats():
+        from reports.company_models import ProductionSiteVersion
+
+        aggregates = {}
+        for material in SNAPSHOT_MATERIALS:
+            aggregates[f'{material}__sites'] = Count('id', filter=Q(**{material: True}))
+            aggregates[f'{material}__companies'] = Count(
+                'production_site__company', filter=Q(**{material: True}), distinct=True
+            )
+
+        counts = ProductionSiteVersion.objects.filter(is_current=True).aggregate(**aggregates)
+
+        top_materials = []
+        for material in SNAPSHOT_MATERIALS:
+            if counts[f'{material}__sites'] > 0:
+                top_materials.append({
+                    'material': material.upper().replace('_', ' '),
+                    'field': material,
+                    'count': counts[f'{material}__sites'],
+                    'company_count': counts[f'{material}__companies'],
+                })
+
+        top_materials.sort(key=lambda x: x['count'], reverse=True)
+        return {'top_materials': top_materials}
+
+    @staticmethod
+    def _user_stats(now):
+        from django.contrib.auth import get_user_model
+        from accounts.models import UserRole
+
+        User = get_user_model()
+        thirty_days_ago = now - timedelta(days=30)
+
+        rows = User.objects.values('role').annotate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+            new_30d=Count('id', filter=Q(date_joined__gte=thirty_days_ago)),
+            new_30d_active=Count('id', filter=Q(date_joined__gte=thirty_days_ago, is_active=True)),
+        ).order_by()
+        by_role = {row['role']: row for row in rows}
+
+        def role_count(roles, key):
+            return sum(by_role.get(role, {}).get(key, 0) for role in roles)
+
+        staff_roles = [UserRole.STAFF_ADMIN, UserRole.SUPERADMIN]
+        all_roles = list(by_role.keys())
+
+        stats = {
+            # Active users only (comprehensive dashboard)
+            'total_users': role_count(all_roles, 'active'),
+            'total_clients': role_count([UserRole.CLIENT], 'active'),
+            'staff_members': role_count(staff_roles, 'active'),
+            'data_collectors': role_count([UserRole.DATA_COLLECTOR], 'active'),
+            'guest_users': role_count([UserRole.GUEST], 'active'),
+            'new_users_this_month': role_count(all_roles, 'new_30d_active'),
+            # All accounts including deactivated ones (legacy stats endpoints)
+            'all_clients': role_count([UserRole.CLIENT], 'total'),
+            'all_staff': role_count(staff_roles, 'total'),
+            'all_guests': role_count([UserRole.GUEST], 'total'),
+            'new_users': role_count(all_roles, 'new_30d'),
+            'new_clients': role_count([UserRole.CLIENT], 'new_30d'),
+        }
+        stats['users_by_role'] = [
+            {'role': 'Clients', 'count': stats['total_clients'], 'color': '#3B82F6'},
+            {'role': 'Staff', 'count': stats['staff_members'], 'color': '#8B5CF6'},
+            {'role': 'Data Collectors', 'count': stats['data_collectors'], 'color': '#10B981'},
+            {'role': 'Guests', 'count': stats['guest_users'], 'color': '#F59E0B'},
+        ]
+        return stats
+
+    @staticmethod
+    def _subscription_stats(now):
+        from reports.models import CustomReport, Subscription, SubscriptionStatus
+
+        today = now.date()
+        active_status = Q(status=SubscriptionStatus.ACTIVE)
+        currently_active = active_status & Q(start_date__lte=today, end_date__gte=today)
+
+        counts = Subscription.objects.aggregate(
+            total_subscriptions=Count('id'),
+            active_subscriptions=Count('id', filter=currently_active),
+            pending_subscriptions=Count('id', filter=Q(status=SubscriptionStatus.PENDING)),
+            expiring_soon=Count('id', filter=active_status & Q(
+                end_date__gt=today, end_date__lte=today + timedelta(days=30)
+            )),
+            expiring_7_days=Count('id', filter=active_status & Q(
+                end_date__gt=today, end_date__lte=today + timedelta(days=7)
+            )),
+        )
+        counts['expired_subscriptions'] = counts['total_subscriptions'] - counts['active_subscriptions']
+
+        total_reports = CustomReport.objects.count()
+        counts['total_reports'] = total_reports
+        counts['custom_reports'] = total_reports
+        return counts
+
+    @staticmethod
+    def _project_stats(now):
+        from reports.models import DataCollectionProject, UnverifiedSite, ProjectStatus
+        from reports.company_models import CompanyCategory
+
+        seven_days_ago = now - timedelta(days=7)
+        pending = Q(verification_status='PENDING')
+
+        project_counts = DataCollectionProject.objects.aggregate(
+            total_projects=Count('project_id'),
+            active_projects=Count('project_id', filter=Q(status=ProjectStatus.ACTIVE)),
+        )
+        site_counts = UnverifiedSite.objects.aggregate(
+            unverified_sites_pending=Count('site_id', filter=pending),
+            old_pending_verifications=Count('site_id', filter=pending & Q(created_at__lt=seven_days_ago)),
+        )
+
+        category_display = dict(CompanyCategory.choices)
+        verification_queue = [
+            {
+                'id': str(site.site_id),
+                'company_name': site.company_name,
+                'country': site.country,
+                'category': site.category,
+                'category_display': category_display.get(site.category, site.category),
+                'project': site.project.project_name if site.project else 'Unknown',
+                'created_at': site.created_at.isoformat(),
+                'days_pending': (now - site.created_at).days,
+            }
+            for site in UnverifiedSite.objects.filter(pending)
+            .select_related('project').order_by('-created_at')[:10]
+        ]
+
+        sites_by_project = [
+            {
+                'project': item['project__project_name'] or 'No Project',
+                'count': item['count'],
+            }
+            for item in UnverifiedSite.objects.values('project__project_name')
+            .annotate(count=Count('site_id')).order_by('-count')[:5]
+        ]
+
+        return {
+            **project_counts,
+            **site_counts,
+            'verification_queue': verification_queue,
+            'sites_by_project': sites_by_project,
+        }
+
+    @staticmethod
+    def _security_stats(now):
+        from accounts.security_models import AuditLog, FailedLoginAttempt
+
+        recent_logins = [
+            {
+                'user': log.user.username if log.user else 'Unknown',
+                'email': log.user.email if log.user else '',
+                'timestamp': log.timestamp.isoformat(),
+                'ip_address': log.ip_address or 'Unknown',
+            }
+            for log in AuditLog.objects.filter(
+                event_type='login_success',
+                timestamp__gte=now - timedelta(days=7)
+            ).select_related('user').order_by('-timestamp')[:10]
+        ]
+
+        failed_logins_24h = FailedLoginAttempt.objects.filter(
+            attempted_at__gte=now - timedelta(hours=24)
+        ).count()
+
+        return {
+            'recent_logins': recent_logins,
+            'failed_logins_24h': failed_logins_24h,
+        }
@@ -0,0 +1,612 @@
+# reports/services/facet_index.py
+"""
+Facet Bitmap Index
+
+In-memory bitmap index over the current version of every production site,
+used to evaluate report filters (filter groups, categories, countries,
+status) and facet counts with bitwise operations instead of SQL joins
+against ProductionSiteVersion's few hundred boolean columns.
+
+Layout (one bit per production site, Python ints as bitsets):
+
+    fields[name]             sites whose current version has `name` = True
+    site_categories[cat]     sites in a category
+    site_countries[country]  sites whose company is in a country
+    site_statuses[status]    sites whose company has a status
+    active_sites             sites whose current version is active
+
+plus per-company bitsets (one bit per company) for company level counts.
+
+Numeric (technical filter) columns are loaded lazily, the first time a
+filter or range statistic uses them.
+
+Every process keeps its own index. It is built on first use and kept in
+sync through a change log in the cache: saving or deleting a company,
+production site or version appends a change (see reports/signals.py), and
+each process re-reads only the changed sites before answering a query.
+If the log has a gap (expired entries) the process rebuilds its index.
+
+Usage:
+    index = FacetIndexService.get_index()
+    sites = index.filter_sites(filter_criteria)
+    index.count_fields(sites, ['hdpe', 'pp'])
+"""
+
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from reports.company_models import (
+    Company, ProductionSite, ProductionSiteVersion, CompanyStatus
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Boolean columns of ProductionSiteVersion that can be used as facets
+FACET_FIELDS = [
+    field.name for field in ProductionSiteVersion._meta.concrete_fields
+    if field.get_internal_type() == 'BooleanField' and field.name not in ('is_current', 'is_active')
+]
+
+NUMERIC_FIELD_TYPES = ('IntegerField', 'FloatField', 'PositiveIntegerField', 'DecimalField')
+
+
+def iter_bits(bits):
+    """Yield the positions of the set bits of a bitset, lowest first."""
+    binary = bin(bits)[:1:-1]
+    position = binary.find('1')
+    while position != -1:
+        yield position
+        position = binary.find('1', position + 1)
+
+
+def _as_list(value):
+    """Normalize a filter_criteria value (list or single string) to a list."""
+    if isinstance(value, list):
+        return [item for item in value if item]
+    if isinstance(value, str) and value:
+        return [value]
+    return []
+
+
+def _or_bits(bitsets, keys):
+    result = 0
+    for key in keys:
+        result |= bitsets.get(key, 0)
+    return result
+
+
+class FacetIndex:
+    """
+    A snapshot of the facet bitmaps. Built and patched by FacetIndexService;
+    query methods return bitsets or counts.
+
+    Once handed out by FacetIndexService a snapshot is never patched:
+    changes are applied to a copy() which then replaces it, so request
+    threads can keep reading the snapshot they got.
+    """
+
+    def __init__(self):
+        # Sites (rows)
+        self.site_rows = {}          # ProductionSite pk -> row
+        self.site_company = []       # row -> company row
+        self.all_sites = 0           # rows with a current version
+        self.active_sites = 0
+        self.fields = {name: 0 for name in FACET_FIELDS}
+        self.site_categories = {}
+        self.site_countries = {}
+        self.site_statuses = {}
+        self.numeric = {}            # field name -> {row: value}, lazy
+
+        # Companies
+        self.company_rows = {}       # Company pk -> company row
+        self.company_info = []       # company row -> (name_lower, region_lower, country_lower, country, status)
+        self.company_sites = []      # company row -> site bitset
+        self.company_countries = {}
+        self.company_statuses = {}
+
+        self.sequence = 0
+        self.built_at = None
+
+    # =========================================================================
+    # BUILD / PATCH
+    # =========================================================================
+
+    @staticmethod
+    def _version_rows(**filters):
+        return ProductionSiteVersion.objects.filter(is_current=True, **filters).values_list(
+            'production_site_id', 'production_site__company_id',
+            'production_site__category', 'is_active', *FACET_FIELDS
+        )
+
+    def _site_row(self, site_pk):
+        row = self.site_rows.get(site_pk)
+        if row is None:
+            row = len(self.site_company)
+            self.site_rows[site_pk] = row
+            self.site_company.append(None)
+        return row
+
+    def _company_row(self, company_pk):
+        row = self.company_rows.get(company_pk)
+        if row is None:
+            row = len(self.company_info)
+            self.company_rows[company_pk] = row
+            self.company_info.append(None)
+            self.company_sites.append(0)
+        return row
+
+    def _set_company(self, company_pk, name, region, country, status):
+        crow = self._company_row(company_pk)
+        previous = self.company_info[crow]
+        if previous is not None:
+            mask = ~(1 << crow)
+            self.company_countries[previous[3]] &= mask
+            self.company_statuses[previous[4]] &= mask
+            site_mask = ~self.company_sites[crow]
+            self.site_countries[previous[3]] = self.site_countries.get(previous[3], 0) & site_mask
+            self.site_statuses[previous[4]] = self.site_statuses.get(previous[4], 0) & site_mask
+
+        self.company_info[crow] = (
+            (name or '').lower(), (region or '').lower(), (country or '').lower(), country, status
+        )
+        bit = 1 << crow
+        self.company_countries[country] = self.company_countries.get(country, 0) | bit
+        self.company_statuses[status] = self.company_statuses.get(status, 0) | bit
+        sites = self.company_sites[crow]
+        self.site_countries[country] = self.site_countries.get(country, 0) | sites
+        self.site_statuses[status] = self.site_statuses.get(status, 0) | sites
+        return crow
+
+    def _clear_site(self, row):
+        mask = ~(1 << row)
+        self.all_sites &= mask
+        self.active_sites &= mask
+        for name, bits in self.fields.items():
+            if bits:
+                self.fields[name] = bits & mask
+        for mapping in (self.site_categories, self.site_countries, self.site_statuses):
+            for key in mapping:
+                mapping[key] &= mask
+        for values in self.numeric.values():
+            values.pop(row, None)
+
+        crow = self.site_company[row]
+        if crow is not None:
+            self.company_sites[crow] &= mask
+            self.site_company[row] = None
+
+    def _add_site(self, row, crow, category, is_active, flags):
+        bit = 1 << row
+        self.all_sites |= bit
+        if is_active:
+            self.active_sites |= bit
+        for name, flag in zip(FACET_FIELDS, flags):
+            if flag:
+                self.fields[name] |= bit
+        self.site_categories[category] = self.site_categories.get(category, 0) | bit
+
+        self.site_company[row] = crow
+        self.company_sites[crow] |= bit
+        _, _, _, country, status = self.company_info[crow]
+        self.site_countries[country] = self.site_countries.get(country, 0) | bit
+        self.site_statuses[status] = self.site_statuses.get(status, 0) | bit
+
+    def build(self):
+        """Load every company and current site version."""
+        for pk, name, region, country, status in Company.objects.values_list(
+            'id', 'company_name', 'region', 'country', 'status'
+        ).iterator(chunk_size=2000):
+            self._set_company(pk, name, region, country, status)
+
+        for site_pk, company_pk, category, is_active, *flags in self._version_rows().iterator(chunk_size=2000):
+            if company_pk not in self.company_rows:
+                continue
+            self._add_site(self._site_row(site_pk), self.company_rows[company_pk], category, is_active, flags)
+
+        self.built_at = time.time()
+
+    def copy(self):
+        """Copy to patch (containers are copied, the bitsets are immutable ints)."""
+        index = FacetIndex.__new__(FacetIndex)
+        index.__dict__.update(self.__dict__)
+        for name in ('site_rows', 'fields', 'site_categories', 'site_countries', 'site_statuses',
+                     'numeric', 'company_rows', 'company_countries', 'company_statuses'):
+            setattr(index, name, dict(getattr(self, name)))
+        for name in ('site_company', 'company_info', 'company_sites'):
+            setattr(index, name, list(getattr(self, name)))
+        return index
+
+    def patch(self, site_pks=(), company_pks=()):
+        """
+        Re-read the given sites and companies (and all sites of those companies).
+        Mutates the index in place: only call it on an unpublished copy().
+        """
+        site_pks = set(site_pks)
+        company_pks = set(company_pks)
+
+        # Companies of changed sites may have been renamed/moved too
+        company_pks |= set(
+            ProductionSite.objects.filter(pk__in=site_pks).values_list('company_id', flat=True)
+        )
+
+        existing = set()
+        for pk, name, region, country, status in Company.objects.filter(pk__in=company_pks).values_list(
+            'id', 'company_name', 'region', 'country', 'status'
+        ):
+            existing.add(pk)
+            self._set_company(pk, name, region, country, status)
+
+        # Deleted companies: drop their sites
+        for company_pk in company_pks - existing:
+            crow = self.company_rows.get(company_pk)
+            if crow is not None:
+                site_pks |= {pk for pk, row in self.site_rows.items() if self.site_company[row] == crow}
+
+        for company_pk in existing:
+            crow = self.company_rows[company_pk]
+            site_pks |= {pk for pk, row in self.site_rows.items() if self.company_sites[crow] >> row & 1}
+
+        for site_pk in site_pks:
+            if site_pk in self.site_rows:
+                self._clear_site(self.site_rows[site_pk])
+
+        rows = self._version_rows(production_site_id__in=site_pks) if site_pks else []
+        company_rows = list(self._version_rows(production_site__company_id__in=existing)) if existing else []
+        for site_pk, company_pk, category, is_active, *flags in list(rows) + company_rows:
+            if company_pk not in self.company_rows:
+                continue
+            row = self._site_row(site_pk)
+            if self.all_sites >> row & 1:
+                continue  # already added from the other query
+            self._add_site(row, self.company_rows[company_pk], category, is_active, flags)
+
+        # Numeric columns are cheap to reload on next use
+        self.numeric = {}
+
+    # =========================================================================
+    # FILTER PRIMITIVES
+    # =========================================================================
+
+    @staticmethod
+    def union(bitsets, keys):
+        """OR of the bitsets of the given keys (e.g. site_categories, ['PIPE', 'SHEET'])."""
+        return _or_bits(bitsets, keys)
+
+    def field_bits(self, field_name, value):
+        """Sites whose current version has field = value (None if not a facet)."""
+        bits = self.fields.get(field_name)
+        if bits is None:
+            return None
+        if value is True:
+            return bits
+        if value is False:
+            return self.all_sites & ~bits
+        return None
+
+    def numeric_columns(self, field_names):
+        """
+        {field: {row: value}} for numeric fields (nulls omitted). Columns not
+        loaded yet are fetched together in one query.
+        """
+        missing = [name for name in field_names if name not in self.numeric]
+        if missing:
+            columns = {name: {} for name in missing}
+            for site_pk, *values in ProductionSiteVersion.objects.filter(
+                is_current=True
+            ).values_list('production_site_id', *missing).iterator(chunk_size=5000):
+                row = self.site_rows.get(site_pk)
+                if row is None:
+                    continue
+                for name, value in zip(missing, values):
+                    if value is not None:
+                        columns[name][row] = value
+            # Rebind instead of update(): other threads may be reading this snapshot
+            self.numeric = {**self.numeric, **columns}
+        return {name: self.numeric[name] for name in field_names}
+
+    def _numeric_column(self, field_name):
+        return self.numeric_columns([field_name])[field_name]
+
+    def technical_bits(self, field_name, config, match_all_when_unbounded=True):
+        """
+        Sites matching a technical (numeric) filter config
+        {'mode': 'equals'|'range', 'equals', 'min', 'max'}.
+        Returns None when the filter does not apply.
+        """
+        try:
+            field = ProductionSiteVersion._meta.get_field(field_name)
+        except Exception:
+            return None
+        cast = float if field.get_internal_type() == 'FloatField' else int
+
+        def parse(raw):
+            if raw == '' or raw is None:
+                return None
+            try:
+                return cast(raw)
+            except (ValueError, TypeError):
+                return None
+
+        mode = config.get('mode', 'range')
+        if mode == 'equals':
+            target = parse(config.get('equals', ''))
+            if target is None:
+                return None
+            matches = (row for row, value in self._numeric_column(field_name).items() if value == target)
+        elif mode == 'range':
+            low, high = parse(config.get('min', '')), parse(config.get('max', ''))
+            if low is None and high is None:
+                return self.all_sites if match_all_when_unbounded else None
+            matches = (
+                row for row, value in self._numeric_column(field_name).items()
+                if (low is None or value >= low) and (high is None or value <= high)
+            )
+        else:
+            return None
+
+        bits = 0
+        for row in matches:
+            bits |= 1 << row
+        return bits & self.all_sites
+
+    def group_bits(self, group, match_all_when_unbounded=True):
+        """
+        Sites matching a filter group (OR within the group).
+        Returns None for empty groups.
+        """
+        if not isinstance(group, dict):
+            return None
+
+        result = None
+        for field_name, value in (group.get('filters') or {}).items():
+            bits = self.field_bits(field_name, value)
+            if bits is not None:
+                result = bits if result is None else result | bits
+
+        for field_name, config in (group.get('technicalFilters') or {}).items():
+            if not isinstance(config, dict):
+                continue
+            bits = self.technical_bits(field_name, config, match_all_when_unbounded)
+            if bits is not None:
+                result = bits if result is None else result | bits
+
+        return result
+
+    # =========================================================================
+    # PROJECTIONS & SEARCH
+    # =========================================================================
+
+    def sites_to_companies(self, site_bits):
+        companies = 0
+        site_company = self.site_company
+        for row in iter_bits(site_bits):
+            crow = site_company[row]
+            if crow is not None:
+                companies |= 1 << crow
+        return companies
+
+    def companies_to_sites(self, company_bits):
+        sites = 0
+        for crow in iter_bits(company_bits):
+            sites |= self.company_sites[crow]
+        return sites
+
+    def search_companies(self, text, attributes=('name',)):
+        """Companies whose name/region/country contains text (case-insensitive)."""
+        positions = {'name': 0, 'region': 1, 'country': 2}
+        indexes = [positions[attribute] for attribute in attributes]
+        text = text.lower()
+        bits = 0
+        for crow, info in enumerate(self.company_info):
+            if info and any(text in info[i] for i in indexes):
+                bits |= 1 << crow
+        return bits
+
+    def live_companies(self):
+        """All companies that are not deleted."""
+        bits = 0
+        for status, status_bits in self.company_statuses.items():
+            if status != CompanyStatus.DELETED:
+                bits |= status_bits
+        return bits
+
+    def live_sites(self):
+        """Current, active sites of companies that are not deleted."""
+        return self.active_sites & ~self.site_statuses.get(CompanyStatus.DELETED, 0)
+
+    # =========================================================================
+    # REPORT CRITERIA
+    # =========================================================================
+
+    def filter_sites(self, filter_criteria, sites=None, match_all_when_unbounded=False):
+        """
+        Apply a report's filter_criteria at site level (every condition must
+        hold for the same production site).
+        """
+        sites = self.live_sites() if sites is None else sites
+
+        statuses = _as_list(filter_criteria.get('status'))
+        if statuses:
+            sites &= _or_bits(self.site_statuses, statuses)
+
+        for group in filter_criteria.get('filter_groups') or []:
+            bits = self.group_bits(group, match_all_when_unbounded)
+            if bits is not None:
+                sites &= bits
+
+        categories = _as_list(filter_criteria.get('categories', filter_criteria.get('category')))
+        if categories:
+            sites &= _or_bits(self.site_categories, categories)
+
+        countries = _as_list(filter_criteria.get('country'))
+        if countries:
+            sites &= _or_bits(self.site_countries, countries)
+
+        return sites
+
+    def filter_companies(self, filter_criteria, companies=None):
+        """
+        Apply a report's filter_criteria at company level: each filter group
+        must be matched by some site of the company.
+        """
+        companies = self.live_companies() if companies is None else companies
+
+        statuses = _as_list(filter_criteria.get('status'))
+        if statuses:
+            companies &= _or_bits(self.company_statuses, statuses)
+
+        for group in filter_criteria.get('filter_groups') or []:
+            bits = self.group_bits(group)
+            if bits is not None:
+                companies &= self.sites_to_companies(bits)
+
+        categories = _as_list(filter_criteria.get('categories', filter_criteria.get('category')))
+        if categories:
+            companies &= self.sites_to_companies(_or_bits(self.site_categories, categories))
+
+        countries = _as_list(filter_criteria.get('country'))
+        if countries:
+            companies &= _or_bits(self.company_countries, countries)
+
+        return companies
+
+    # =========================================================================
+    # COUNTS
+    # =========================================================================
+
+    def count_fields(self, sites, field_names):
+        """{field: number of sites with field = True}"""
+        return {
+            name: (sites & self.fields[name]).bit_count()
+            for name in field_names if name in self.fields
+        }
+
+    def company_counts_by_category(self, companies, sites=None):
+        """
+        {category: number of companies having a site in that category}
+        (optionally restricted to the given sites).
+        """
+        sites = self.all_sites if sites is None else sites
+        result = {}
+        for category, category_sites in self.site_categories.items():
+            if not category:
+                continue
+            count = (self.sites_to_companies(category_sites & sites) & companies).bit_count()
+            if count:
+                result[category] = count
+        return result
+
+    def company_counts_by_country(self, companies):
+        """{country: number of companies}, including empty / null countries."""
+        result = {}
+        for country, country_bits in self.company_countries.items():
+            count = (companies & country_bits).bit_count()
+            if count:
+                result[country] = count
+        return result
+
+    def site_categories_present(self, sites):
+        return [category for category, bits in self.site_categories.items() if category and bits & sites]
+
+
+class FacetIndexService:
+    """
+    Per-process holder of the FacetIndex, kept in sync across processes
+    through a change log in the cache.
+    """
+
+    KEY_PREFIX = 'facet_index'
+    CHANGE_TTL = 60 * 60 * 24
+    # Rebuild instead of patching when this many changes are pending
+    MAX_PATCH_CHANGES = 500
+
+    _index = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _sequence_key(cls):
+        return f'{cls.KEY_PREFIX}:sequence'
+
+    @classmethod
+    def _change_key(cls, sequence):
+        return f'{cls.KEY_PREFIX}:change:{sequence}'
+
+    @classmethod
+    def _current_sequence(cls):
+        return cache.get(cls._sequence_key()) or 0
+
+    @classmethod
+    def record_change(cls, kind, pk):
+        """
+        Log a change to a 'site' or 'company' so every process patches it.
+        Called after the surrounding transaction commits.
+        """
+        def append():
+            cache.add(cls._sequence_key(), 0, None)
+            sequence = cache.incr(cls._sequence_key())
+            cache.set(cls._change_key(sequence), (kind, pk), cls.CHANGE_TTL)
+
+        transaction.on_commit(append)
+
+    @classmethod
+    def get_index(cls):
+        """
+        Return an up-to-date index snapshot, building or patching it as
+        needed. Callers must treat it as read-only.
+        """
+        with cls._lock:
+            sequence = cls._current_sequence()
+            index = cls._index
+
+            if index is None or sequence < index.sequence:
+                cls._index = cls._rebuild(sequence)
+            elif sequence > index.sequence:
+                cls._index = cls._apply_changes(index, sequence) or cls._rebuild(sequence)
+            return cls._index
+
+    @classmethod
+    def _rebuild(cls, sequence):
+        started = time.monotonic()
+        index = FacetIndex()
+        index.build()
+        index.sequence = sequence
+        logger.info(
+            f"Facet index built: {index.all_sites.bit_count()} sites, "
+            f"{len(index.company_info)} companies in {int((time.monotonic() - started) * 1000)}ms"
+        )
+        return index
+
+    @classmethod
+    def _apply_changes(cls, index, sequence):
+        """
+        A patched copy of the index with the logged changes (copy-on-write,
+        the given snapshot is left untouched); None if a rebuild is needed.
+        """
+        pending = range(index.sequence + 1, sequence + 1)
+        if len(pending) > cls.MAX_PATCH_CHANGES:
+            return None
+
+        changes = cache.get_many([cls._change_key(seq) for seq in pending])
+        if len(changes) < len(pending):
+            return None  # expired or lost entries
+
+        site_pks = {pk for kind, pk in changes.values() if kind == 'site'}
+        company_pks = {pk for kind, pk in changes.values() if kind == 'company'}
+        patched = index.copy()
+        patched.patch(site_pks, company_pks)
+        patched.sequence = sequence
+        return patched
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Force every process to rebuild its index, e.g. after bulk updates
+        that bypass model signals.
+        """
+        cache.add(cls._sequence_key(), 0, None)
+        cache.incr(cls._sequence_key(), cls.MAX_PATCH_CHANGES + 1)
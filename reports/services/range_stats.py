@@ -0,0 +1,178 @@
+# reports/services/range_stats.py
+"""
+Technical Range Statistics
+
+Min, max, null count and a histogram for every numeric (technical filter)
+field of a report, computed in one pass over the facet index instead of one
+aggregate(Min, Max) query per field:
+
+    {
+        'field': 'minimal_lock_tonnes',
+        'label': 'Minimal lock tonnes',
+        'type': 'IntegerField',
+        'min': 50, 'max': 4000,
+        'count': 812, 'null_count': 133,
+        'histogram': {'mode': 'equi_width', 'edges': [50, 445, ...], 'counts': [402, 211, ...]},
+    }
+
+Histograms are either equi-width (`edges` are bin boundaries between min and
+max) or quantile based (each bin holds roughly the same number of sites).
+
+Results are cached per report generation: the cache key contains the
+report's updated_at and the facet index sequence, so editing the report or
+any production site makes old entries unreachable.
+
+Usage:
+    RangeStatsService.get_stats(fields, filter_criteria=report.filter_criteria, report=report)
+"""
+
+import hashlib
+import math
+from bisect import bisect_right
+
+from django.core.cache import cache
+
+from reports.company_models import ProductionSiteVersion
+from reports.services.facet_index import FacetIndexService, iter_bits
+
+
+class RangeStatsService:
+    """
+    Range statistics for technical filter fields.
+    """
+
+    KEY_PREFIX = 'range_stats'
+    CACHE_TTL = 60 * 60
+    DEFAULT_BINS = 10
+    MAX_BINS = 50
+
+    MODE_EQUI_WIDTH = 'equi_width'
+    MODE_QUANTILE = 'quantile'
+    MODES = (MODE_EQUI_WIDTH, MODE_QUANTILE)
+
+    NUMERIC_TYPES = ('IntegerField', 'FloatField', 'PositiveIntegerField')
+
+    @classmethod
+    def _make_key(cls, report, categories, fields, bins, mode, sequence):
+        generation = f'{report.report_id}:{report.updated_at.timestamp()}' if report else 'all'
+        params = f"{','.join(sorted(categories or []))}|{','.join(fields)}|{bins}|{mode}"
+        params_hash = hashlib.md5(params.encode()).hexdigest()[:16]
+        return f'{cls.KEY_PREFIX}:{generation}:{sequence}:{params_hash}'
+
+    @classmethod
+    def get_stats(cls, fields, filter_criteria=None, categories=None, report=None,
+                  bins=DEFAULT_BINS, mode=MODE_EQUI_WIDTH):
+        """
+        Compute range statistics over the current, active sites matching
+        the filter criteria.
+
+        Args:
+            fields: technical field names, in response order
+            filter_criteria: report filter_criteria (optional)
+            categories: extra category restriction (optional)
+            report: CustomReport the criteria come from (cache generation)
+            bins: number of histogram bins
+            mode: 'equi_width' or 'quantile'
+
+        Returns:
+            list of per-field dicts (see module docstring)
+        """
+        bins = max(1, min(int(bins), cls.MAX_BINS))
+        if mode not in cls.MODES:
+            mode = cls.MODE_EQUI_WIDTH
+
+        index = FacetIndexService.get_index()
+        cache_key = cls._make_key(report, categories, fields, bins, mode, index.sequence)
+        stats = cache.get(cache_key)
+        if stats is not None:
+            return stats
+
+        sites = index.filter_sites(filter_criteria or {})
+        if categories:
+            sites &= index.union(index.site_categories, categories)
+        rows = list(iter_bits(sites))
+
+        model_fields = {}
+        for field_name in fields:
+            try:
+                model_fields[field_name] = ProductionSiteVersion._meta.get_field(field_name)
+            except Exception:
+                continue
+        numeric_fields = [
+            name for name, field in model_fields.items()
+            if field.get_internal_type() in cls.NUMERIC_TYPES
+        ]
+        columns = index.numeric_columns(numeric_fields)
+
+        stats = []
+        for field_name in fields:
+            model_field = model_fields.get(field_name)
+            if model_field is not None:
+                label = model_field.verbose_name or field_name
+                label = label[0].upper() + label[1:]
+                field_type = model_field.get_internal_type()
+            else:
+                label = field_name.replace('_', ' ').title()
+                field_type = 'IntegerField'
+
+            column = columns.get(field_name, {})
+            values = sorted(column[row] for row in rows if row in column)
+
+            stats.append({
+                'field': field_name,
+                'label': label,
+                'type': field_type,
+                'min': values[0] if values else None,
+                'max': values[-1] if values else None,
+                'count': len(values),
+                'null_count': len(rows) - len(values),
+                'histogram': cls.histogram(values, bins, mode, integer=field_type != 'FloatField'),
+            })
+
+        cache.set(cache_key, stats, cls.CACHE_TTL)
+        return stats
+
+    # =========================================================================
+    # HISTOGRAMS
+    # =========================================================================
+
+    @classmethod
+    def histogram(cls, values, bins, mode=MODE_EQUI_WIDTH, integer=True):
+        """
+        Bin sorted values.
+
+        Returns:
+            {'mode', 'edges', 'counts'}: len(edges) == len(counts) + 1, the
+            last bin includes its upper edge
+        """
+        if not values:
+            return {'mode': mode, 'edges': [], 'counts': []}
+
+        low, high = values[0], values[-1]
+        if low == high:
+            return {'mode': mode, 'edges': [low, high], 'counts': [len(values)]}
+
+        if mode == cls.MODE_QUANTILE:
+            edges = [values[0]]
+            for i in range(1, bins):
+                edge = values[round(i * (len(values) - 1) / bins)]
+                if edge > edges[-1]:
+                    edges.append(edge)
+            if high > edges[-1]:
+                edges.append(high)
+        elif integer:
+            # Whole-number bins, so no bin is narrower than one unit
+            width = max(1, math.ceil((high - low + 1) / bins))
+            edges = list(range(low, high + 1, width))
+            if edges[-1] < high:
+                edges.append(high)
+        else:
+            width = (high - low) / bins
+            edges = [low + i * width for i in range(bins)] + [high]
+
+        counts = [0] * (len(edges) - 1)
+        inner_edges = edges[1:-1]
+        for value in values:
+            counts[bisect_right(inner_edges, value)] += 1
+
+        return {'mode': mode, 'edges': edges, 'counts': counts}
@@ -0,0 +1,321 @@
+# reports/services/saved_search_alerts.py
+"""
+Saved Search Alert Service
+
+Notifies clients of production sites that newly match one of their saved
+searches (SavedSearch.alerts_enabled), run on a schedule by the
+run_saved_search_alerts command.
+
+Each run only looks at the sites changed since the previous run, read from
+the production site change log (ProductionSiteChange, see
+change_feed.py), so its cost follows the change volume, not
+searches x database size:
+
+    1. read the changed sites (latest change per site) in blocks
+    2. per report: which changed sites are in the report's set   (1 query)
+    3. per distinct filter set of the report's searches: which of
+       those match the saved filters                            (1 query)
+       - saved searches with identical filters share the query
+    4. per search: matches not recorded yet are new -> notify (in-app +
+       email); recorded sites that stopped matching are forgotten, so
+       they alert again if they match again later
+
+The matches of a search are recorded in SavedSearchMatch. A search whose
+alerts were just enabled (or whose filters changed) has no recorded
+matches yet: its first run records the current matches with one full
+query and notifies nothing.
+
+Usage:
+    from reports.services.saved_search_alerts import SavedSearchAlertService
+
+    stats = SavedSearchAlertService.run()
+"""
+
+import json
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .change_feed import ChangeFeedService
+from .company_search import CompanySearchService
+
+logger = logging.getLogger(__name__)
+
+
+def search_filters(filter_params):
+    """Normalized filters of a saved search's filter_params."""
+    filter_params = filter_params if isinstance(filter_params, dict) else {}
+
+    def as_list(value):
+        if isinstance(value, str):
+            value = value.split(',')
+        if not isinstance(value, list):
+            return []
+        return sorted({str(item).strip() for item in value if str(item).strip()})
+
+    filter_groups = filter_params.get('filter_groups') or []
+    if isinstance(filter_groups, str):
+        try:
+            filter_groups = json.loads(filter_groups)
+        except json.JSONDecodeError:
+            filter_groups = []
+
+    return {
+        'search': str(filter_params.get('search') or '').strip(),
+        'countries': as_list(filter_params.get('countries')),
+        'categories': as_list(filter_params.get('categories')),
+        'status': as_list(filter_params.get('status')),
+        'filter_groups': filter_groups if isinstance(filter_groups, list) else [],
+    }
+
+
+class SavedSearchAlertService:
+    """
+    Incremental evaluation of saved searches against changed sites.
+    """
+
+    # Change log rows read per block
+    CHANGE_BATCH = 5000
+
+    # Company names listed in a notification
+    MAX_LISTED = 5
+
+    # =========================================================================
+    # FILTERS
+    # =========================================================================
+
+    @staticmethod
+    def filter_key(filters):
+        """Identical filter sets share one evaluation."""
+        return json.dumps(filters, sort_keys=True)
+
+    @staticmethod
+    def apply_search(queryset, filters):
+        """Apply normalized saved search filters to a ProductionSite queryset."""
+        from ..filters import apply_site_filter_groups
+
+        if filters['countries']:
+            queryset = queryset.filter(company__country__in=filters['countries'])
+        if filters['categories']:
+            queryset = queryset.filter(category__in=filters['categories'])
+        if filters['status']:
+            queryset = queryset.filter(company__status__in=filters['status'])
+        if filters['filter_groups']:
+            queryset = apply_site_filter_groups(queryset, filters['filter_groups'])
+        if filters['search']:
+            queryset = CompanySearchService.filter(queryset, filters['search'], 'company')
+        return queryset
+
+    @classmethod
+    def matching_sites(cls, report, filters, site_pks=None):
+        """pks of the report's sites matching the filters (among site_pks if given)."""
+        from ..company_models import ProductionSite
+        from ..filters import filter_report_sites
+
+        queryset = ProductionSite.objects.all()
+        if site_pks is not None:
+            queryset = queryset.filter(pk__in=site_pks)
+        queryset = filter_report_sites(queryset, report.filter_criteria or {})
+        if filters is not None:
+            queryset = cls.apply_search(queryset, filters)
+        return set(queryset.order_by().values_list('pk', flat=True))
+
+    # =========================================================================
+    # RUN
+    # =========================================================================
+
+    @staticmethod
+    def alerting_searches():
+        """Saved searches with alerts on, of clients still subscribed to the report."""
+        from ..models import SavedSearch, Subscription, SubscriptionStatus
+
+        today = timezone.now().date()
+        active_subscription = Subscription.objects.filter(
+            client=OuterRef('user'),
+            report=OuterRef('report'),
+            status=SubscriptionStatus.ACTIVE,
+            start_date__lte=today,
+            end_date__gte=today,
+        )
+        return SavedSearch.objects.filter(
+            alerts_enabled=True, user__is_active=True
+        ).filter(Exists(active_subscription)).select_related('user', 'report')
+
+    @classmethod
+    def run(cls):
+        """
+        Evaluate every alerting saved search against the changes since its
+        last run and notify new matches.
+
+        Returns:
+            dict: run statistics
+        """
+        searches = list(cls.alerting_searches())
+        stats = {'searches': len(searches), 'recorded': 0, 'changed_sites': 0, 'notified': 0, 'new_matches': 0}
+        if not searches:
+            return stats
+
+        # Changes not readable by the feed yet are left for the next run
+        head = ChangeFeedService.readable_log().order_by('-change_id').values_list('change_id', flat=True).first() or 0
+
+        first_runs = [search for search in searches if search.alert_change_id is None]
+        for group in cls._group(first_runs).values():
+            cls._record_current_matches(group, head)
+            stats['recorded'] += len(group)
+
+        searches = [search for search in searches if search.alert_change_id is not None]
+        site_states, stats['changed_sites'] = cls._evaluate_changes(searches, head)
+
+        for search in searches:
+            new_sites = cls._update_matches(search, site_states.get(search.pk, {}), head)
+            if new_sites:
+                cls._notify(search, new_sites)
+                stats['notified'] += 1
+                stats['new_matches'] += len(new_sites)
+
+        return stats
+
+    @classmethod
+    def _group(cls, searches):
+        """{(report pk, filter key): [searches]}"""
+        groups = defaultdict(list)
+        for search in searches:
+            filters = search_filters(search.filter_params)
+            groups[(search.report_id, cls.filter_key(filters))].append(search)
+        return groups
+
+    @classmethod
+    def _record_current_matches(cls, searches, head):
+        """First run of searches sharing a filter set: record their current matches."""
+        from ..models import SavedSearch, SavedSearchMatch
+
+        report = searches[0].report
+        matches = cls.matching_sites(report, search_filters(searches[0].filter_params))
+
+        with transaction.atomic():
+            for search in searches:
+                search.alert_matches.all().delete()
+                SavedSearchMatch.objects.bulk_create(
+                    [SavedSearchMatch(saved_search=search, production_site_pk=pk) for pk in matches],
+                    batch_size=1000,
+                )
+                search.alert_change_id = head
+            SavedSearch.objects.filter(pk__in=[search.pk for search in searches]).update(alert_change_id=head)
+
+    @classmethod
+    def _evaluate_changes(cls, searches, head):
+        """
+        Match the sites changed since each search's last run.
+
+        Returns:
+            ({search pk: {site pk: matches now}}, number of changed sites)
+        """
+        from ..company_models import ProductionSiteChange
+
+        site_states = defaultdict(dict)
+        if not searches:
+            return site_states, 0
+
+        by_report = defaultdict(lambda: defaultdict(list))
+        reports = {}
+        for (report_pk, key), group in cls._group(searches).items():
+            by_report[report_pk][key] = group
+            reports[report_pk] = group[0].report
+
+        changed_sites = set()
+        last_id = min(search.alert_change_id for search in searches)
+        while last_id < head:
+            rows = list(
+                ProductionSiteChange.objects.filter(change_id__gt=last_id, change_id__lte=head)
+                .order_by('change_id')
+                .values_list('change_id', 'production_site_pk')[:cls.CHANGE_BATCH]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            latest = {}  # site pk -> its latest change id in this block
+            for change_id, site_pk in rows:
+                latest[site_pk] = change_id
+            changed_sites.update(latest)
+
+            for report_pk, groups in by_report.items():
+                report_searches = [search for group in groups.values() for search in group]
+                since = min(search.alert_change_id for search in report_searches)
+                candidates = [site_pk for site_pk, change_id in latest.items() if change_id > since]
+                if not candidates:
+                    continue
+
+                # Shared by every search of the report: the report's own filters
+                in_report = cls.matching_sites(reports[report_pk], None, candidates)
+
+                for key, group in groups.items():
+                    filters = json.loads(key)
+                    matches = cls.matching_sites(reports[report_pk], filters, in_report) if in_report else set()
+                    for search in group:
+                        for site_pk in candidates:
+                            if latest[site_pk] > search.alert_change_id:
+                                site_states[search.pk][site_pk] = site_pk in matches
+
+        return site_states, len(changed_sites)
+
+    @staticmethod
+    def _update_matches(search, site_states, head):
+        """Record new matches, forget sites that stopped matching. Returns the new site pks."""
+        from ..models import SavedSearch, SavedSearchMatch
+
+        with transaction.atomic():
+            recorded = set(
+                search.alert_matches.filter(production_site_pk__in=list(site_states))
+                .values_list('production_site_pk', flat=True)
+            ) if site_states else set()
+
+            new_sites = [pk for pk, matches in site_states.items() if matches and pk not in recorded]
+            gone = [pk for pk, matches in site_states.items() if not matches and pk in recorded]
+
+            SavedSearchMatch.objects.bulk_create(
+                [SavedSearchMatch(saved_search=search, production_site_pk=pk) for pk in new_sites],
+                batch_size=1000,
+                ignore_conflicts=True,
+            )
+            if gone:
+                search.alert_matches.filter(production_site_pk__in=gone).delete()
+
+            updates = {'alert_change_id': head}
+            if new_sites:
+                updates['last_alert_at'] = timezone.now()
+            SavedSearch.objects.filter(pk=search.pk).update(**updates)
+
+        return new_sites
+
+    @classmethod
+    def _notify(cls, search, site_pks):
+        """In-app notification and email listing the new matches."""
+        from notifications.services import NotificationService
+        from ..company_models import ProductionSite
+
+        names = list(
+            ProductionSite.objects.filter(pk__in=site_pks[:cls.MAX_LISTED])
+            .order_by('company__company_name')
+            .values_list('company__company_name', flat=True)
+        )
+        count = len(site_pks)
+        listed = ', '.join(names)
+        if count > len(names):
+            listed += f' and {count - len(names)} more'
+
+        title = f'New matches for "{search.name}"'
+        message = (
+            f'{count} new production site{"s" if count != 1 else ""} in "{search.report.title}" '
+            f'match{"es" if count == 1 else ""} your saved search "{search.name}": {listed}.'
+        )
+
+        try:
+            NotificationService.create_notification(user=search.user, notification_type='report', title=title, message=message)
+            if search.user.email:
+                NotificationService.send_email_notification(search.user, title, message, notification_type='report')
+        except Exception as e:
+            logger.error(f"Error sending saved search alert {search.pk}: {str(e)}")
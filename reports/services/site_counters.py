@@ -0,0 +1,421 @@
+# reports/services/site_counters.py
+"""
+Site Counter Service
+
+Incrementally maintained counts of unverified sites, per data collection
+project and overall, stored as SiteCounter rows:
+
+    (project, 'total', '')                  sites in the project
+    (project, 'status', 'APPROVED')         sites per verification status
+    (project, 'calling', 'GREEN')           sites per calling status
+    (project, 'category', 'INJECTION')      sites per category
+    (project, 'priority', 'HIGH')           sites per priority
+    (project, 'source', 'PHONE_CALL')       sites per data source
+    (project, 'duplicate', '')              sites flagged as duplicates
+    (project, 'sum', 'data_quality_score')  running sum in `amount`
+    (project, 'sum', 'total_calls')         running sum in `amount`
+
+Rows with project = NULL cover every site (the global row set).
+
+Every write path that changes one of these fields applies the difference
+(old contribution out, new contribution in) as `count = count + n` updates
+in the same transaction as the write itself:
+
+- UnverifiedSite.save() reads the stored state (SELECT ... FOR UPDATE)
+  before writing, so concurrent saves of the same site serialize
+- deleting a site removes its contribution (see reports/signals.py)
+- bulk writes go through update_sites() instead of queryset.update(), and
+  bulk inserts call record_created()
+
+Project lists and statistics endpoints read these rows instead of counting
+sites. `python manage.py reconcile_site_counters` recomputes the counters
+from the sites and corrects any drift.
+
+Usage:
+    from reports.services.site_counters import SiteCounterService
+
+    SiteCounterService.update_sites(queryset, verification_status='APPROVED')
+    counts = SiteCounterService.get_counts()
+    counts['status']['PENDING'], counts['sum']['total_calls']
+"""
+
+import logging
+from collections import defaultdict
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Count
+from django.db.models.expressions import Combinable
+from django.db.models.functions import Coalesce
+
+logger = logging.getLogger(__name__)
+
+
+# dimension -> UnverifiedSite field counted per value
+COUNTED_FIELDS = {
+    'status': 'verification_status',
+    'calling': 'calling_status',
+    'category': 'category',
+    'priority': 'priority',
+    'source': 'source',
+}
+
+# UnverifiedSite fields kept as running sums ('sum' rows)
+SUMMED_FIELDS = ('data_quality_score', 'total_calls')
+
+# Site attributes (attnames) the counters depend on
+STATE_FIELDS = ('project_id', *COUNTED_FIELDS.values(), 'is_duplicate', *SUMMED_FIELDS)
+
+# Verification statuses annotated on project querysets
+PROJECT_STATUS_ANNOTATIONS = {
+    'pending_sites': 'PENDING',
+    'approved_sites': 'APPROVED',
+    'rejected_sites': 'REJECTED',
+    'under_review_sites': 'UNDER_REVIEW',
+    'needs_revision_sites': 'NEEDS_REVISION',
+    'transferred_sites': 'TRANSFERRED',
+}
+
+
+def site_state(site):
+    """Counter relevant attributes of a site instance."""
+    return {field: getattr(site, field) for field in STATE_FIELDS}
+
+
+def contributions(state):
+    """Counter rows a site with this state adds to: {(dimension, value): (count, amount)}"""
+    rows = {('total', ''): (1, 0.0)}
+    for dimension, field in COUNTED_FIELDS.items():
+        rows[(dimension, state[field] or '')] = (1, 0.0)
+    if state['is_duplicate']:
+        rows[('duplicate', '')] = (1, 0.0)
+    for field in SUMMED_FIELDS:
+        rows[('sum', field)] = (0, float(state[field] or 0))
+    return rows
+
+
+class SiteCounterService:
+    """
+    Per-project and global site counters kept in step with site writes.
+    """
+
+    # Relative tolerance for running float sums when reconciling
+    AMOUNT_TOLERANCE = 1e-6
+
+    # =========================================================================
+    # DELTAS
+    # =========================================================================
+
+    @staticmethod
+    def add_state(deltas, state, sign):
+        """Add (sign=1) or remove (sign=-1) a site state's contribution."""
+        scopes = [None] if state['project_id'] is None else [None, state['project_id']]
+        for (dimension, value), (count, amount) in contributions(state).items():
+            for project_id in scopes:
+                delta = deltas[(project_id, dimension, value)]
+                delta[0] += sign * count
+                delta[1] += sign * amount
+
+    @classmethod
+    def diff(cls, pairs):
+        """Deltas for (old_state, new_state) pairs; None means no site."""
+        deltas = defaultdict(lambda: [0, 0.0])
+        for old_state, new_state in pairs:
+            if old_state is not None:
+                cls.add_state(deltas, old_state, -1)
+            if new_state is not None:
+                cls.add_state(deltas, new_state, 1)
+        return deltas
+
+    @classmethod
+    def apply(cls, deltas):
+        """
+        Apply deltas with `count = count + n` updates, creating missing rows.
+
+        Keys are applied in a fixed order so concurrent writers lock counter
+        rows in the same order.
+        """
+        from ..models import SiteCounter
+
+        changed = [
+            (key, delta) for key, delta in deltas.items()
+            if delta[0] or abs(delta[1]) > cls.AMOUNT_TOLERANCE
+        ]
+        changed.sort(key=lambda item: (str(item[0][0] or ''), item[0][1], item[0][2]))
+
+        for (project_id, dimension, value), (count, amount) in changed:
+            rows = SiteCounter.objects.filter(project_id=project_id, dimension=dimension, value=value)
+            if rows.update(count=F('count') + count, amount=F('amount') + amount):
+                continue
+            if count <= 0 and amount <= 0:
+                # Nothing to take away from - the counters drifted; reconcile fixes it
+                logger.warning(f"Site counter ({project_id}, {dimension}, {value}) missing for a decrement")
+                continue
+            try:
+                with transaction.atomic():
+                    SiteCounter.objects.create(
+                        project_id=project_id, dimension=dimension, value=value,
+                        count=count, amount=amount,
+                    )
+            except IntegrityError:
+                # Created concurrently - add to it instead
+                rows.update(count=F('count') + count, amount=F('amount') + amount)
+
+    # =========================================================================
+    # WRITE PATHS
+    # =========================================================================
+
+    @classmethod
+    def locked_state(cls, site):
+        """Stored state of a site, locking its row (None if not stored yet)."""
+        from ..models import UnverifiedSite
+
+        return (
+            UnverifiedSite.objects.select_for_update()
+            .filter(pk=site.pk)
+            .values(*STATE_FIELDS)
+            .first()
+        )
+
+    @classmethod
+    def record_save(cls, old_state, site, update_fields=None):
+        """
+        Apply a saved site's change.
+
+        Args:
+            old_state: locked_state() read before the save (None for inserts)
+            site: the saved instance
+            update_fields: the save's update_fields (None = every field)
+        """
+        new_state = site_state(site)
+        if old_state is not None and update_fields is not None:
+            written = {site._meta.get_field(name).attname for name in update_fields}
+            new_state = {
+                field: new_state[field] if field in written else old_state[field]
+                for field in STATE_FIELDS
+            }
+        if new_state != old_state:
+            cls.apply(cls.diff([(old_state, new_state)]))
+
+    @classmethod
+    def record_created(cls, sites):
+        """Add sites inserted with bulk_create (which skips save())."""
+        cls.apply(cls.diff((None, site_state(site)) for site in sites))
+
+    @classmethod
+    def record_delete(cls, site):
+        """Remove a deleted site's contribution."""
+        cls.apply(cls.diff([(site_state(site), None)]))
+
+    @classmethod
+    def update_sites(cls, queryset, **updates):
+        """
+        queryset.update(**updates) that keeps the counters in step.
+
+        Returns:
+            int: number of updated sites
+        """
+        from ..models import UnverifiedSite
+
+        meta = UnverifiedSite._meta
+        written = {}
+        for name, value in updates.items():
+            attname = meta.get_field(name).attname
+            if attname in STATE_FIELDS:
+                written[attname] = value.pk if isinstance(value, models.Model) else value
+        recheck = any(isinstance(value, Combinable) for value in written.values())
+
+        with transaction.atomic():
+            before = {
+                row.pop('pk'): row
+                for row in queryset.select_for_update().values('pk', *STATE_FIELDS)
+            }
+            if not before:
+                return 0
+            sites = UnverifiedSite.objects.filter(pk__in=list(before))
+            updated = sites.update(**updates)
+
+            if written:
+                if recheck:
+                    after = {row.pop('pk'): row for row in sites.values('pk', *STATE_FIELDS)}
+                else:
+                    after = {pk: {**state, **written} for pk, state in before.items()}
+                cls.apply(cls.diff((before[pk], after.get(pk)) for pk in before))
+
+        return updated
+
+    # =========================================================================
+    # READS
+    # =========================================================================
+
+    @classmethod
+    def get_counts(cls, projects=None):
+        """
+        Site counts of one scope.
+
+        Args:
+            projects: None for all sites, otherwise a project, project id,
+                or a queryset / list of projects whose counts are summed
+
+        Returns:
+            {
+                'total': int,
+                'duplicate': int,
+                'status': {value: int}, 'calling': {...}, 'category': {...},
+                'priority': {...}, 'source': {...},
+                'sum': {'data_quality_score': float, 'total_calls': float}
+            }
+        """
+        from ..models import SiteCounter, DataCollectionProject
+
+        rows = SiteCounter.objects.all()
+        if projects is None:
+            rows = rows.filter(project__isnull=True)
+        elif isinstance(projects, (models.QuerySet, list, tuple, set)):
+            rows = rows.filter(project__in=projects)
+        else:
+            project_id = projects.pk if isinstance(projects, DataCollectionProject) else projects
+            rows = rows.filter(project_id=project_id)
+
+        counts = {'total': 0, 'duplicate': 0, 'sum': {field: 0.0 for field in SUMMED_FIELDS}}
+        counts.update({dimension: {} for dimension in COUNTED_FIELDS})
+        for row in rows.values('dimension', 'value').annotate(n=Sum('count'), total=Sum('amount')):
+            dimension = row['dimension']
+            if dimension == 'sum':
+                counts['sum'][row['value']] = row['total'] or 0.0
+            elif dimension in COUNTED_FIELDS:
+                counts[dimension][row['value']] = row['n']
+            else:
+                counts[dimension] = row['n']
+        return counts
+
+    @classmethod
+    def annotate_projects(cls, queryset):
+        """
+        Annotate a DataCollectionProject queryset with its site counts:
+        total_sites, <status>_sites (see PROJECT_STATUS_ANNOTATIONS),
+        completion_percentage and approval_rate.
+        """
+        from django.db.models import Case, When, FloatField
+
+        queryset = queryset.annotate(
+            total_sites=cls._project_counter('total', ''),
+            **{
+                name: cls._project_counter('status', status)
+                for name, status in PROJECT_STATUS_ANNOTATIONS.items()
+            },
+        )
+        return queryset.annotate(
+            completion_percentage=Case(
+                When(target_count=0, then=0.0),
+                default=F('total_sites') * 100.0 / F('target_count'),
+                output_field=FloatField()
+            ),
+            approval_rate=Case(
+                When(total_sites=0, then=0.0),
+                default=F('approved_sites') * 100.0 / F('total_sites'),
+                output_field=FloatField()
+            )
+        )
+
+    @staticmethod
+    def _project_counter(dimension, value):
+        from ..models import SiteCounter
+
+        return Coalesce(
+            Subquery(
+                SiteCounter.objects.filter(
+                    project=OuterRef('pk'), dimension=dimension, value=value
+                ).values('count')[:1]
+            ),
+            0,
+            output_field=models.BigIntegerField(),
+        )
+
+    # =========================================================================
+    # RECONCILIATION
+    # =========================================================================
+
+    @classmethod
+    def compute(cls):
+        """
+        Counters recomputed from the sites with grouped queries.
+
+        Returns:
+            {(project_id, dimension, value): [count, amount]}
+        """
+        from ..models import UnverifiedSite
+
+        expected = defaultdict(lambda: [0, 0.0])
+
+        def add(project_id, dimension, value, count=0, amount=0.0):
+            scopes = [None] if project_id is None else [None, project_id]
+            for scope in scopes:
+                expected[(scope, dimension, value)][0] += count
+                expected[(scope, dimension, value)][1] += amount
+
+        totals = UnverifiedSite.objects.values('project_id').annotate(
+            n=Count('pk'), **{field: Sum(field) for field in SUMMED_FIELDS}
+        )
+        for row in totals:
+            add(row['project_id'], 'total', '', count=row['n'])
+            for field in SUMMED_FIELDS:
+                add(row['project_id'], 'sum', field, amount=float(row[field] or 0))
+
+        for dimension, field in COUNTED_FIELDS.items():
+            for row in UnverifiedSite.objects.values('project_id', field).annotate(n=Count('pk')):
+                add(row['project_id'], dimension, row[field] or '', count=row['n'])
+
+        duplicates = UnverifiedSite.objects.filter(is_duplicate=True).values('project_id').annotate(n=Count('pk'))
+        for row in duplicates:
+            add(row['project_id'], 'duplicate', '', count=row['n'])
+
+        return expected
+
+    @classmethod
+    def drift(cls, expected=None):
+        """
+        Differences between the stored counters and the sites.
+
+        Returns:
+            {(project_id, dimension, value): [count delta, amount delta]}
+        """
+        from ..models import SiteCounter
+
+        if expected is None:
+            expected = cls.compute()
+
+        deltas = defaultdict(lambda: [0, 0.0])
+        for key, (count, amount) in expected.items():
+            deltas[key] = [count, amount]
+        for row in SiteCounter.objects.values('project_id', 'dimension', 'value', 'count', 'amount'):
+            delta = deltas[(row['project_id'], row['dimension'], row['value'])]
+            delta[0] -= row['count']
+            delta[1] -= row['amount']
+
+        return {
+            key: delta for key, delta in deltas.items()
+            if delta[0] or abs(delta[1]) > cls.AMOUNT_TOLERANCE * max(1.0, abs(expected.get(key, (0, 0.0))[1]))
+        }
+
+    @classmethod
+    def reconcile(cls, dry_run=False):
+        """Correct drifted counters; returns the drift that was found."""
+        with transaction.atomic():
+            drift = cls.drift()
+            if drift and not dry_run:
+                cls.apply(drift)
+        return drift
+
+    @classmethod
+    def rebuild(cls):
+        """Replace every counter row with values recomputed from the sites."""
+        from ..models import SiteCounter
+
+        expected = cls.compute()
+        with transaction.atomic():
+            SiteCounter.objects.all().delete()
+            SiteCounter.objects.bulk_create([
+                SiteCounter(project_id=project_id, dimension=dimension, value=value, count=count, amount=amount)
+                for (project_id, dimension, value), (count, amount) in expected.items()
+            ], batch_size=1000)
+        return len(expected)
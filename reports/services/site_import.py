@@ -0,0 +1,561 @@
+# reports/services/site_import.py
+"""
+Site Import Service - Staged project site uploads
+
+An uploaded Excel / CSV file is parsed once, row by row, into a server side
+ImportSession with one ImportSessionRow per sheet row:
+
+    1. stage()    streams the file (openpyxl read-only / csv reader) and, per
+                  chunk of CHUNK_SIZE rows, converts the values to site
+                  fields, flags missing required fields and duplicates (one
+                  query per chunk) and bulk inserts the staged rows.
+                  Session counters are updated after every chunk.
+       start_staging() creates the session and stages it in a background
+                  thread (from a temporary copy of the upload), so the
+                  upload request returns the session id at once and the
+                  progress can be polled while a large file is staged.
+    2. summary()  preview / progress of a session (counts, errors, warnings)
+    3. confirm()  promotes the VALID rows to UnverifiedSite with bulk_create,
+                  chunk by chunk (each chunk is its own transaction, so an
+                  interrupted import can simply be confirmed again)
+
+Nothing is re-sent or re-validated at confirm time except the duplicate
+check, which is repeated against sites added since staging.
+
+Usage:
+    from reports.services.site_import import SiteImportService
+
+    session = SiteImportService.start_staging(uploaded_file, project, 'INJECTION', user, columns)
+    SiteImportService.summary(session)   # poll until status is no longer PARSING
+    SiteImportService.confirm(session, user)
+"""
+
+import csv
+import io
+import logging
+import os
+import tempfile
+import threading
+from datetime import timedelta
+
+import openpyxl
+from django.core.files import File
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# VALUE CONVERSION
+# =============================================================================
+
+def clean_value(field_type, value):
+    """
+    Convert a cell value to the site field value.
+    Blank booleans become False (never None) so NOT NULL columns accept them.
+    """
+    if field_type == 'boolean':
+        if value is None or value == '':
+            return False
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            value_stripped = value.strip().lower()
+            if value_stripped in ['yes', 'true', '1', 'y']:
+                return True
+            return False
+        if isinstance(value, (int, float)):
+            # Excel stores 1/0 as numbers
+            return value == 1
+        return False
+
+    if field_type == 'text':
+        if value is None:
+            return ''
+        if isinstance(value, str):
+            value_stripped = value.strip()
+            return '' if value_stripped.lower() == 'nan' else value_stripped
+        # Convert numbers/other types to string
+        return str(value).strip()
+
+    if field_type == 'number':
+        if value is None or value == '':
+            return None
+        try:
+            if isinstance(value, str) and value.strip().lower() == 'nan':
+                return None
+            return float(value) if '.' in str(value) else int(value)
+        except (TypeError, ValueError):
+            return None
+
+    # Other fields - keep as is, but handle "nan"
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.strip().lower() == 'nan':
+        return ''
+    return value
+
+
+# =============================================================================
+# FILE READING
+# =============================================================================
+
+SUPPORTED_FORMATS = ('xlsx', 'xls', 'csv')
+
+
+def file_format(file_name):
+    """
+    Extension of a supported upload.
+
+    Raises:
+        ValueError: unsupported file format
+    """
+    file_ext = file_name.split('.')[-1].lower()
+    if file_ext not in SUPPORTED_FORMATS:
+        raise ValueError('Invalid file format. Please upload .xlsx, .xls, or .csv file')
+    return file_ext
+
+
+def read_rows(uploaded_file):
+    """
+    Stream the rows of an uploaded sheet.
+
+    Returns:
+        (expected_rows or None, iterator of (row_number, {header: value}))
+
+    Raises:
+        ValueError: unsupported file format
+    """
+    file_ext = file_format(uploaded_file.name)
+    if file_ext == 'xlsx':
+        workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+        sheet = workbook.active
+        expected = sheet.max_row - 1 if sheet.max_row else None
+        return expected, _iter_sheet(sheet.iter_rows(values_only=True), workbook.close)
+    if file_ext == 'csv':
+        text = io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+        return None, _iter_sheet(csv.reader(text))
+    if file_ext == 'xls':
+        # Legacy binary format: openpyxl cannot read it, load it with pandas
+        import pandas as pd
+
+        df = pd.read_excel(uploaded_file, header=None, dtype=object)
+        df = df.astype(object).where(df.notna(), None)
+        return len(df) - 1, _iter_sheet(df.itertuples(index=False, name=None))
+
+
+def _iter_sheet(rows, close=None):
+    """Yield (row_number, {header: value}) for non-blank data rows."""
+    try:
+        headers = None
+        for row_number, values in enumerate(rows, start=1):
+            if headers is None:
+                headers = [str(header).strip() if header is not None else '' for header in values]
+                continue
+            if all(value is None or (isinstance(value, str) and not value.strip()) for value in values):
+                continue
+            yield row_number, dict(zip(headers, values))
+    finally:
+        if close:
+            close()
+
+
+class SiteImportService:
+    """
+    Staged import of project sites from Excel / CSV uploads.
+    """
+
+    CHUNK_SIZE = 1000
+    SESSION_TTL = timedelta(hours=1)  # confirm must follow staging within this time
+    PREVIEW_ROWS = 10
+    MAX_MESSAGES = 50
+
+    # =========================================================================
+    # STAGE
+    # =========================================================================
+
+    @classmethod
+    def stage(cls, uploaded_file, project, category, user, columns):
+        """
+        Parse and validate an upload into a new ImportSession.
+
+        Args:
+            uploaded_file: Excel / CSV UploadedFile
+            project: target DataCollectionProject
+            category: category code of the sites
+            user: uploading user
+            columns: [(field_name, header label, field type), ...] expected
+                     in the sheet (see import_export_views)
+
+        Returns:
+            ImportSession (status READY, or FAILED with error_message)
+
+        Raises:
+            ValueError: unsupported file format
+        """
+        file_format(uploaded_file.name)
+        session = cls.create_session(uploaded_file.name, project, category, user)
+        cls.stage_session(session, uploaded_file, columns)
+        return session
+
+    @classmethod
+    def start_staging(cls, uploaded_file, project, category, user, columns):
+        """
+        Create the ImportSession (status PARSING) and stage the upload in a
+        background thread. Poll summary() for the progress.
+
+        Returns:
+            ImportSession
+
+        Raises:
+            ValueError: unsupported file format
+        """
+        file_ext = file_format(uploaded_file.name)
+
+        # The upload is gone once the request ends: stage from a copy
+        with tempfile.NamedTemporaryFile(suffix=f'.{file_ext}', delete=False) as copy:
+            for data in uploaded_file.chunks():
+                copy.write(data)
+
+        session = cls.create_session(uploaded_file.name, project, category, user)
+        thread = threading.Thread(
+            target=cls._stage_copy,
+            args=(session, copy.name, uploaded_file.name, columns),
+            name=f'import-staging-{session.session_id}',
+            daemon=True,
+        )
+        transaction.on_commit(thread.start)
+        return session
+
+    @classmethod
+    def _stage_copy(cls, session, path, file_name, columns):
+        try:
+            with open(path, 'rb') as handle:
+                cls.stage_session(session, File(handle, name=file_name), columns)
+        except Exception as e:
+            logger.error(f"Error staging import {session.session_id}: {str(e)}")
+        finally:
+            os.remove(path)
+            connection.close()
+
+    @classmethod
+    def create_session(cls, file_name, project, category, user):
+        """A new ImportSession (status PARSING) replacing the user's unfinished ones."""
+        from ..models import ImportSession, ImportSessionStatus
+
+        # A new upload replaces the user's unfinished sessions for the project;
+        # expired sessions can no longer be confirmed and are dropped as well
+        unfinished = [ImportSessionStatus.PARSING, ImportSessionStatus.READY, ImportSessionStatus.FAILED]
+        ImportSession.objects.filter(
+            Q(project=project, created_by=user, status__in=unfinished)
+            | Q(created_at__lt=timezone.now() - cls.SESSION_TTL)
+        ).exclude(status=ImportSessionStatus.IMPORTING).delete()
+
+        return ImportSession.objects.create(
+            project=project,
+            category=category,
+            file_name=file_name[:255],
+            created_by=user,
+        )
+
+    @classmethod
+    def stage_session(cls, session, uploaded_file, columns):
+        """
+        Parse and validate an upload into a PARSING session; it ends READY,
+        or FAILED with error_message.
+        """
+        from ..models import ImportSession, ImportSessionStatus
+
+        label_to_field = {label: (field_name, field_type) for field_name, label, field_type in columns}
+        seen_names = {}  # lowercased company name -> first row number in the file
+        chunk = []
+
+        try:
+            expected_rows, rows = read_rows(uploaded_file)
+            session.expected_rows = expected_rows
+            ImportSession.objects.filter(pk=session.pk).update(expected_rows=expected_rows)
+            for row_number, values in rows:
+                chunk.append((row_number, values))
+                if len(chunk) >= cls.CHUNK_SIZE:
+                    cls._stage_chunk(session, chunk, label_to_field, seen_names)
+                    chunk = []
+            if chunk:
+                cls._stage_chunk(session, chunk, label_to_field, seen_names)
+        except Exception as e:
+            logger.error(f"Error staging import {session.session_id}: {str(e)}")
+            session.status = ImportSessionStatus.FAILED
+            session.error_message = f'Error reading file: {str(e)}'
+            session.save(update_fields=['status', 'error_message', 'updated_at'])
+            return session
+
+        session.status = ImportSessionStatus.READY
+        session.save(update_fields=['status', 'updated_at'])
+        return session
+
+    @classmethod
+    def _stage_chunk(cls, session, chunk, label_to_field, seen_names):
+        """Convert, validate and insert one chunk of rows; update the counters."""
+        from ..models import UnverifiedSite, ImportSession, ImportSessionRow, ImportRowStatus
+
+        staged = []
+        for row_number, values in chunk:
+            data = {}
+            for label, value in values.items():
+                if label in label_to_field:
+                    field_name, field_type = label_to_field[label]
+                    data[field_name] = clean_value(field_type, value)
+
+            company_name = str(data.get('company_name') or '').strip()
+            country = str(data.get('country') or '').strip()
+            if not company_name:
+                staged.append(ImportSessionRow(
+                    session=session, row_number=row_number, status=ImportRowStatus.INVALID, data=data,
+                    errors=[{'field': 'company_name', 'error': 'Company name is required'}],
+                ))
+            elif not country:
+                staged.append(ImportSessionRow(
+                    session=session, row_number=row_number, status=ImportRowStatus.INVALID, data=data,
+                    errors=[{'field': 'country', 'error': 'Country is required'}],
+                ))
+            else:
+                staged.append(ImportSessionRow(
+                    session=session, row_number=row_number, status=ImportRowStatus.VALID, data=data,
+                ))
+
+        # Duplicates: one query for the whole chunk, plus repeats within the file
+        names = {row.data['company_name'].lower() for row in staged if row.status == ImportRowStatus.VALID}
+        existing = dict(
+            UnverifiedSite.objects.filter(project=session.project)
+            .annotate(name_lower=Lower('company_name'))
+            .filter(name_lower__in=names)
+            .values_list('name_lower')
+            .annotate(count=Count('pk'))
+            .order_by()
+        ) if names else {}
+
+        for row in staged:
+            if row.status != ImportRowStatus.VALID:
+                continue
+            company_name = row.data['company_name']
+            name = company_name.lower()
+            if name in existing:
+                row.status = ImportRowStatus.DUPLICATE
+                row.message = (
+                    f'Duplicate: "{company_name}" already exists {existing[name]} time(s) in this project '
+                    f'- WILL BE SKIPPED'
+                )
+            elif name in seen_names:
+                row.status = ImportRowStatus.DUPLICATE
+                row.message = (
+                    f'Duplicate: "{company_name}" already appears in row {seen_names[name]} of this file '
+                    f'- WILL BE SKIPPED'
+                )
+            else:
+                seen_names[name] = row.row_number
+
+        counts = {status: 0 for status in ImportRowStatus.values}
+        for row in staged:
+            counts[row.status] += 1
+
+        with transaction.atomic():
+            ImportSessionRow.objects.bulk_create(staged)
+            ImportSession.objects.filter(pk=session.pk).update(
+                total_rows=F('total_rows') + len(staged),
+                valid_rows=F('valid_rows') + counts[ImportRowStatus.VALID],
+                invalid_rows=F('invalid_rows') + counts[ImportRowStatus.INVALID],
+                duplicate_rows=F('duplicate_rows') + counts[ImportRowStatus.DUPLICATE],
+                updated_at=timezone.now(),
+            )
+
+    # =========================================================================
+    # SUMMARY
+    # =========================================================================
+
+    @classmethod
+    def summary(cls, session):
+        """
+        Preview / progress of a session (the import preview response).
+
+        progress only covers staging: the percentage of the sheet's rows
+        parsed and validated so far (total_rows of expected_rows, blank rows
+        included in the latter), None while the row count is unknown (CSV),
+        100 once staging ended. The confirm step reports imported_rows.
+        """
+        from ..models import ImportRowStatus, ImportSessionStatus
+
+        session.refresh_from_db()
+        rows = session.rows.all()
+
+        errors = []
+        invalid = rows.filter(status=ImportRowStatus.INVALID).only('row_number', 'errors')
+        for row in invalid[:cls.MAX_MESSAGES + 1]:
+            for error in row.errors:
+                errors.append({'row': row.row_number, **error})
+
+        warnings = [
+            {'row': row_number, 'message': message}
+            for row_number, message in rows.filter(
+                status=ImportRowStatus.DUPLICATE
+            ).values_list('row_number', 'message')[:cls.MAX_MESSAGES + 1]
+        ]
+
+        preview_data = [
+            {
+                'company_name': data.get('company_name', ''),
+                'country': data.get('country', ''),
+                'address_1': data.get('address_1', ''),
+            }
+            for data in rows.filter(
+                status__in=[ImportRowStatus.VALID, ImportRowStatus.IMPORTED]
+            ).values_list('data', flat=True)[:cls.PREVIEW_ROWS]
+        ]
+
+        progress = None
+        if session.expected_rows:
+            progress = min(100, round(session.total_rows * 100 / session.expected_rows, 1))
+        if session.status != ImportSessionStatus.PARSING:
+            progress = 100
+
+        return {
+            'session_id': str(session.session_id),
+            'status': session.status,
+            'progress': progress,
+            'error_message': session.error_message,
+            'total_rows': session.total_rows,
+            'valid_rows': session.valid_rows,
+            'invalid_rows': session.invalid_rows,
+            'duplicate_rows': session.duplicate_rows,
+            'imported_rows': session.imported_rows,
+            'skipped_rows': session.skipped_rows,
+            'errors': errors[:cls.MAX_MESSAGES],
+            'preview_data': preview_data,
+            'warnings': warnings[:cls.MAX_MESSAGES],
+            'has_more_errors': session.invalid_rows > cls.MAX_MESSAGES,
+            'has_more_warnings': session.duplicate_rows > cls.MAX_MESSAGES,
+        }
+
+    # =========================================================================
+    # CONFIRM
+    # =========================================================================
+
+    @classmethod
+    def is_expired(cls, session):
+        return timezone.now() - session.created_at > cls.SESSION_TTL
+
+    @classmethod
+    def confirm(cls, session, user):
+        """
+        Promote the session's VALID rows to UnverifiedSite.
+
+        Returns:
+            {'imported': int, 'skipped': int}
+
+        Raises:
+            ValueError: the session is not ready to import (or already importing)
+        """
+        from ..models import ImportSession, ImportSessionStatus, ImportSessionRow, ImportRowStatus
+
+        # READY (or FAILED during a previous confirm) -> IMPORTING, exactly once
+        started = ImportSession.objects.filter(
+            pk=session.pk,
+            status__in=[ImportSessionStatus.READY, ImportSessionStatus.FAILED],
+            total_rows__gt=0,
+        ).update(status=ImportSessionStatus.IMPORTING, updated_at=timezone.now())
+        if not started:
+            raise ValueError('This import is not ready to be confirmed')
+
+        imported = skipped = 0
+        last_id = 0
+        try:
+            while True:
+                chunk = list(
+                    ImportSessionRow.objects.filter(
+                        session=session, status=ImportRowStatus.VALID, id__gt=last_id
+                    ).order_by('id')[:cls.CHUNK_SIZE]
+                )
+                if not chunk:
+                    break
+                last_id = chunk[-1].id
+                chunk_imported, chunk_skipped = cls._import_chunk(session, chunk, user)
+                imported += chunk_imported
+                skipped += chunk_skipped
+        except Exception as e:
+            logger.error(f"Error importing session {session.session_id}: {str(e)}")
+            ImportSession.objects.filter(pk=session.pk).update(
+                status=ImportSessionStatus.FAILED,
+                error_message=f'Error during import: {str(e)}',
+                updated_at=timezone.now(),
+            )
+            raise
+
+        ImportSession.objects.filter(pk=session.pk).update(
+            status=ImportSessionStatus.COMPLETED,
+            completed_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        transaction.on_commit(cls._invalidate_derived_data)
+        return {'imported': imported, 'skipped': skipped}
+
+    @classmethod
+    def _import_chunk(cls, session, chunk, user):
+        """Insert one chunk of staged rows (one transaction)."""
+        from ..models import UnverifiedSite, ImportSession, ImportSessionRow, ImportRowStatus
+        from .site_counters import SiteCounterService
+
+        names = {row.data.get('company_name', '').lower() for row in chunk}
+        with transaction.atomic():
+            # Sites added since staging (or earlier chunks of this import)
+            taken = set(
+                UnverifiedSite.objects.filter(project=session.project)
+                .annotate(name_lower=Lower('company_name'))
+                .filter(name_lower__in=names)
+                .values_list('name_lower', flat=True)
+            )
+
+            sites, imported_ids, skipped_ids = [], [], []
+            for row in chunk:
+                name = row.data.get('company_name', '').lower()
+                if name in taken:
+                    skipped_ids.append(row.id)
+                    continue
+                taken.add(name)
+
+                site = UnverifiedSite(
+                    project=session.project,
+                    collected_by=user,
+                    category=session.category,
+                    verification_status='PENDING',
+                )
+                for field_name, value in row.data.items():
+                    if hasattr(site, field_name):
+                        setattr(site, field_name, value)
+                # bulk_create skips save(): score and flag the sites here
+                site.calculate_data_quality_score()
+                sites.append(site)
+                imported_ids.append(row.id)
+
+            UnverifiedSite.check_for_duplicates_bulk(sites)
+            UnverifiedSite.objects.bulk_create(sites, batch_size=500)
+            SiteCounterService.record_created(sites)
+
+            ImportSessionRow.objects.filter(id__in=imported_ids).update(status=ImportRowStatus.IMPORTED)
+            ImportSessionRow.objects.filter(id__in=skipped_ids).update(status=ImportRowStatus.SKIPPED)
+            ImportSession.objects.filter(pk=session.pk).update(
+                imported_rows=F('imported_rows') + len(imported_ids),
+                skipped_rows=F('skipped_rows') + len(skipped_ids),
+                updated_at=timezone.now(),
+            )
+
+        return len(imported_ids), len(skipped_ids)
+
+    @staticmethod
+    def _invalidate_derived_data():
+        """Signals do not fire for bulk writes; refresh what they would have."""
+        from .dashboard_snapshot import DashboardSnapshotService
+        from .widget_cache import WidgetCacheService
+
+        DashboardSnapshotService.mark_stale()
+        WidgetCacheService.invalidate_for_model('reports.UnverifiedSite')
@@ -0,0 +1,225 @@
+# reports/services/widget_cache.py
+"""
+Widget Result Cache
+
+Caches dashboard widget endpoint results per (widget, query params), using
+the cache policy declared on each entry of widget_registry.AVAILABLE_WIDGETS:
+
+    'cache_ttl': 300,
+    'depends_on': ['accounts.AuditLog', 'accounts.User'],
+
+Invalidation is generation based: every widget has a generation token that is
+part of its cache keys. Saving or deleting a model listed in `depends_on`
+replaces the token (see reports/signals.py), so all cached results of the
+affected widgets become unreachable at once and simply expire.
+
+Compute time, hits and misses are recorded per widget so expensive widgets
+can be identified (GET /api/dashboard/widgets/cache-stats/).
+
+Usage:
+    @api_view(['GET'])
+    @permission_classes([IsAuthenticated])
+    @cached_widget('top_countries')
+    def widget_top_countries(request):
+        ...
+"""
+
+import time
+import uuid
+import hashlib
+import functools
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.response import Response
+
+from reports.widget_registry import AVAILABLE_WIDGETS
+
+
+# Widgets that declare a cache policy, keyed by widget_key
+WIDGET_CACHE_POLICIES = {
+    widget['widget_key']: {
+        'ttl': widget['cache_ttl'],
+        'depends_on': widget.get('depends_on', []),
+    }
+    for widget in AVAILABLE_WIDGETS
+    if 'cache_ttl' in widget
+}
+
+
+def _build_dependency_map():
+    """Map lowercased 'app_label.modelname' to the widgets depending on it."""
+    dependency_map = defaultdict(set)
+    for widget_key, policy in WIDGET_CACHE_POLICIES.items():
+        for model_label in policy['depends_on']:
+            dependency_map[model_label.lower()].add(widget_key)
+    return dict(dependency_map)
+
+
+MODEL_WIDGET_DEPENDENCIES = _build_dependency_map()
+
+
+class WidgetCacheService:
+    """
+    Per-widget result cache with dependency-based invalidation.
+    """
+
+    KEY_PREFIX = 'widget_cache'
+    DEFAULT_TTL = 60
+    # Query parameters that never change a widget's result
+    IGNORED_PARAMS = {'refresh', '_', 't'}
+
+    @classmethod
+    def get_policy(cls, widget_key):
+        return WIDGET_CACHE_POLICIES.get(widget_key, {'ttl': cls.DEFAULT_TTL, 'depends_on': []})
+
+    # =========================================================================
+    # KEYS & INVALIDATION
+    # =========================================================================
+
+    @classmethod
+    def _generation_key(cls, widget_key):
+        return f'{cls.KEY_PREFIX}:gen:{widget_key}'
+
+    @classmethod
+    def _stats_key(cls, widget_key):
+        return f'{cls.KEY_PREFIX}:stats:{widget_key}'
+
+    @classmethod
+    def get_generation(cls, widget_key):
+        generation = cache.get(cls._generation_key(widget_key))
+        if generation is None:
+            generation = uuid.uuid4().hex[:12]
+            # add() so concurrent first readers agree on one token
+            if not cache.add(cls._generation_key(widget_key), generation, None):
+                generation = cache.get(cls._generation_key(widget_key), generation)
+        return generation
+
+    @classmethod
+    def make_key(cls, widget_key, params):
+        """Build the cache key for a widget and its (normalized) query params."""
+        normalized = sorted(
+            (name, value) for name, value in params.items()
+            if name not in cls.IGNORED_PARAMS
+        )
+        params_hash = hashlib.md5(urlencode(normalized).encode()).hexdigest()[:16]
+        return f'{cls.KEY_PREFIX}:{widget_key}:{cls.get_generation(widget_key)}:{params_hash}'
+
+    @classmethod
+    def invalidate_widget(cls, widget_key):
+        """Drop every cached result of a widget by rotating its generation."""
+        cache.set(cls._generation_key(widget_key), uuid.uuid4().hex[:12], None)
+
+    @classmethod
+    def invalidate_for_model(cls, model_label):
+        """
+        Invalidate all widgets that depend on a model.
+
+        Args:
+            model_label: 'app_label.ModelName' (case-insensitive)
+        """
+        for widget_key in MODEL_WIDGET_DEPENDENCIES.get(model_label.lower(), ()):
+            cls.invalidate_widget(widget_key)
+
+    # =========================================================================
+    # METRICS
+    # =========================================================================
+
+    @classmethod
+    def record(cls, widget_key, hit, compute_ms=None):
+        """Record a cache hit, or a miss with the time it took to compute."""
+        stats_key = cls._stats_key(widget_key)
+        stats = cache.get(stats_key) or {
+            'hits': 0,
+            'misses': 0,
+            'total_compute_ms': 0,
+            'max_compute_ms': 0,
+            'last_compute_ms': None,
+            'last_computed_at': None,
+        }
+        if hit:
+            stats['hits'] += 1
+        else:
+            stats['misses'] += 1
+            stats['total_compute_ms'] += compute_ms
+            stats['max_compute_ms'] = max(stats['max_compute_ms'], compute_ms)
+            stats['last_compute_ms'] = compute_ms
+            stats['last_computed_at'] = timezone.now().isoformat()
+        cache.set(stats_key, stats, None)
+
+    @classmethod
+    def get_stats(cls):
+        """
+        Return per-widget cache statistics, most expensive widgets first.
+        """
+        stats_by_key = cache.get_many([cls._stats_key(key) for key in WIDGET_CACHE_POLICIES])
+
+        result = []
+        for widget_key, policy in WIDGET_CACHE_POLICIES.items():
+            stats = stats_by_key.get(cls._stats_key(widget_key)) or {}
+            hits = stats.get('hits', 0)
+            misses = stats.get('misses', 0)
+            requests = hits + misses
+            result.append({
+                'widget_key': widget_key,
+                'ttl': policy['ttl'],
+                'depends_on': policy['depends_on'],
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / requests * 100, 1) if requests else 0,
+                'avg_compute_ms': round(stats['total_compute_ms'] / misses, 1) if misses else None,
+                'max_compute_ms': stats.get('max_compute_ms'),
+                'last_compute_ms': stats.get('last_compute_ms'),
+                'last_computed_at': stats.get('last_computed_at'),
+            })
+
+        result.sort(key=lambda x: x['avg_compute_ms'] or 0, reverse=True)
+        return result
+
+
+def _wants_refresh(request):
+    """Staff admins and superadmins can bypass the cache with ?refresh=true."""
+    from accounts.models import UserRole
+
+    if request.query_params.get('refresh', '').lower() not in ('1', 'true', 'yes'):
+        return False
+    return request.user.is_superuser or request.user.role in [
+        UserRole.SUPERADMIN, UserRole.STAFF_ADMIN
+    ]
+
+
+def cached_widget(widget_key):
+    """
+    Decorator for widget data views (place it below @api_view).
+    Serves cached results and stores successful responses under the
+    widget's cache policy.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            policy = WidgetCacheService.get_policy(widget_key)
+            cache_key = WidgetCacheService.make_key(widget_key, request.query_params)
+
+            if not _wants_refresh(request):
+                data = cache.get(cache_key)
+                if data is not None:
+                    WidgetCacheService.record(widget_key, hit=True)
+                    response = Response(data)
+                    response['X-Widget-Cache'] = 'HIT'
+                    return response
+
+            started = time.monotonic()
+            response = view_func(request, *args, **kwargs)
+            compute_ms = int((time.monotonic() - started) * 1000)
+
+            if response.status_code == 200:
+                cache.set(cache_key, response.data, policy['ttl'])
+            WidgetCacheService.record(widget_key, hit=False, compute_ms=compute_ms)
+
+            response['X-Widget-Cache'] = 'MISS'
+            response['X-Widget-Compute-Ms'] = str(compute_ms)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,293 @@
+# reports/services/work_queue.py
+"""
+Work Queue Service
+
+Hands out "the next site to work on" to data collectors and reviewers, one
+site per user at a time, without two users ever getting the same site.
+
+Queues (WorkQueue):
+    CALLING              sites to call - pending / needs revision sites whose
+                         calling status is NOT_STARTED, then BLUE (call back)
+    ALTERNATIVE_NUMBERS  YELLOW sites waiting for an admin to find numbers
+    REVIEW               UNDER_REVIEW, then PENDING sites for reviewers
+
+Within a queue sites are handed out by priority (URGENT first), then by the
+queue's status order, oldest first. Each (priority, status) pair is one
+tier, read with an index on (status, priority, created_at), so a claim
+only looks at the head of the first non-empty tier instead of sorting the
+whole project.
+
+Claiming:
+    1. pick the first free site of the tier with
+       SELECT ... FOR UPDATE SKIP LOCKED (sites being claimed by someone
+       else are skipped, not waited for)
+    2. write a SiteLease (site, queue, holder, expires_at)
+
+On databases without SKIP LOCKED (SQLite) the candidates are read without
+locks and the lease write itself decides: a new lease must not violate the
+unique (site, queue) constraint and an existing one is only taken over once
+it has expired.
+
+A lease lasts WORK_QUEUE_LEASE_MINUTES and can be renewed by its holder
+while working. Expired leases need no cleanup - the next claim takes them
+over. Leases are released when the site leaves the queue (calling status
+or verification status changed) or explicitly by the holder.
+
+Usage:
+    from reports.services.work_queue import WorkQueueService
+
+    site, lease = WorkQueueService.claim_next(WorkQueue.CALLING, request.user)
+    WorkQueueService.renew(site.site_id, WorkQueue.CALLING, request.user)
+    WorkQueueService.release(site.site_id, WorkQueue.CALLING, request.user)
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from accounts.models import UserRole
+
+logger = logging.getLogger(__name__)
+
+
+ADMIN_ROLES = [UserRole.SUPERADMIN, UserRole.STAFF_ADMIN]
+
+# Priorities in the order sites are handed out
+PRIORITY_ORDER = ['URGENT', 'HIGH', 'MEDIUM', 'LOW']
+
+# queue -> who may claim, base filters, and the status field / order of its tiers
+QUEUES = {
+    'CALLING': {
+        'roles': [UserRole.DATA_COLLECTOR, *ADMIN_ROLES],
+        'filters': {'verification_status__in': ['PENDING', 'NEEDS_REVISION']},
+        'tier_field': 'calling_status',
+        'tiers': ['NOT_STARTED', 'BLUE'],
+    },
+    'ALTERNATIVE_NUMBERS': {
+        'roles': ADMIN_ROLES,
+        'filters': {},
+        'tier_field': 'calling_status',
+        'tiers': ['YELLOW'],
+    },
+    'REVIEW': {
+        'roles': ADMIN_ROLES,
+        'filters': {},
+        'tier_field': 'verification_status',
+        'tiers': ['UNDER_REVIEW', 'PENDING'],
+    },
+}
+
+
+class WorkQueueService:
+    """
+    Lease based work queues over unverified sites.
+    """
+
+    # Claim attempts per tier when a candidate is taken concurrently
+    CLAIM_ATTEMPTS = 3
+
+    @staticmethod
+    def lease_duration():
+        return timedelta(minutes=getattr(settings, 'WORK_QUEUE_LEASE_MINUTES', 15))
+
+    @staticmethod
+    def can_use(queue, user):
+        return queue in QUEUES and user.role in QUEUES[queue]['roles']
+
+    # =========================================================================
+    # QUEUE CONTENTS
+    # =========================================================================
+
+    @classmethod
+    def queue_sites(cls, queue, user, project=None):
+        """Every site of the queue the user may work on (leased or not)."""
+        from ..models import UnverifiedSite
+        from ..project_permissions import get_user_accessible_projects
+
+        config = QUEUES[queue]
+        sites = UnverifiedSite.objects.filter(
+            **config['filters'], **{f"{config['tier_field']}__in": config['tiers']}
+        )
+
+        if user.role not in ADMIN_ROLES:
+            sites = sites.filter(
+                Q(project__in=get_user_accessible_projects(user))
+                | Q(project__isnull=True, collected_by=user)
+            )
+        if queue == 'REVIEW':
+            # Sites assigned to a reviewer are only handed to that reviewer
+            sites = sites.filter(Q(assigned_to__isnull=True) | Q(assigned_to=user))
+        if project is not None:
+            sites = sites.filter(project=project)
+        return sites
+
+    @staticmethod
+    def active_leases(queue, now=None):
+        from ..models import SiteLease
+
+        return SiteLease.objects.filter(queue=queue, expires_at__gt=now or timezone.now())
+
+    @classmethod
+    def exclude_leased(cls, queryset, queue, user=None):
+        """Drop sites with an active lease in `queue` (other than the user's own)."""
+        leases = cls.active_leases(queue).filter(site=OuterRef('pk'))
+        if user is not None:
+            leases = leases.exclude(holder=user)
+        return queryset.exclude(Exists(leases))
+
+    # =========================================================================
+    # CLAIM
+    # =========================================================================
+
+    @classmethod
+    def claim_next(cls, queue, user, project=None):
+        """
+        Lease the next site of the queue to the user.
+
+        A user holds at most one site per queue: while their lease on a site
+        that is still in the queue is active, that site is returned again
+        (and the lease renewed).
+
+        Returns:
+            (UnverifiedSite, SiteLease), or (None, None) when the queue is empty
+        """
+        now = timezone.now()
+        sites = cls.queue_sites(queue, user, project)
+
+        with transaction.atomic():
+            current = cls.active_leases(queue, now).filter(holder=user, site__in=sites).first()
+            if current is not None:
+                lease = cls.renew(current.site_id, queue, user)
+                if lease is not None:
+                    return cls._load_site(lease.site_id), lease
+
+            free_sites = cls.exclude_leased(sites, queue)
+            config = QUEUES[queue]
+            for priority in PRIORITY_ORDER:
+                for tier in config['tiers']:
+                    candidates = free_sites.filter(
+                        priority=priority, **{config['tier_field']: tier}
+                    ).order_by('created_at')
+                    lease = cls._claim_from(candidates, queue, user, now)
+                    if lease is not None:
+                        return cls._load_site(lease.site_id), lease
+
+        return None, None
+
+    @classmethod
+    def _claim_from(cls, candidates, queue, user, now):
+        """Lease the first free candidate of one tier."""
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        tried = []
+
+        for _ in range(cls.CLAIM_ATTEMPTS):
+            pending = candidates.exclude(pk__in=tried) if tried else candidates
+            if skip_locked:
+                of = ('self',) if connection.features.has_select_for_update_of else ()
+                pending = pending.select_for_update(skip_locked=True, of=of)
+            site_id = pending.values_list('pk', flat=True).first()
+            if site_id is None:
+                return None
+
+            lease = cls._take(site_id, queue, user, now)
+            if lease is not None:
+                return lease
+            tried.append(site_id)
+
+        return None
+
+    @classmethod
+    def _take(cls, site_id, queue, user, now):
+        """
+        Write the user's lease on a site, unless someone else holds an
+        active one. Returns the lease or None.
+        """
+        from ..models import SiteLease
+
+        expires_at = now + cls.lease_duration()
+        try:
+            with transaction.atomic():
+                return SiteLease.objects.create(
+                    site_id=site_id, queue=queue, holder=user, claimed_at=now, expires_at=expires_at
+                )
+        except IntegrityError:
+            pass
+
+        # A lease row exists: take it over only if it expired (or is ours)
+        taken = SiteLease.objects.filter(site_id=site_id, queue=queue).filter(
+            Q(expires_at__lte=now) | Q(holder=user)
+        ).update(holder=user, claimed_at=now, expires_at=expires_at)
+        if not taken:
+            return None
+        return SiteLease.objects.get(site_id=site_id, queue=queue)
+
+    @staticmethod
+    def _load_site(site_id):
+        from ..models import UnverifiedSite
+
+        return UnverifiedSite.objects.select_related(
+            'project', 'collected_by', 'verified_by'
+        ).get(pk=site_id)
+
+    # =========================================================================
+    # LEASE LIFECYCLE
+    # =========================================================================
+
+    @classmethod
+    def renew(cls, site_id, queue, user):
+        """
+        Extend the user's lease. Returns the lease, or None when the user no
+        longer holds it (it expired and someone else took the site).
+        """
+        from ..models import SiteLease
+
+        now = timezone.now()
+        renewed = SiteLease.objects.filter(site_id=site_id, queue=queue, holder=user).update(
+            expires_at=now + cls.lease_duration()
+        )
+        if not renewed:
+            return None
+        return SiteLease.objects.get(site_id=site_id, queue=queue)
+
+    @staticmethod
+    def release(site_id, queue, user):
+        """Give up the user's lease. Returns True if there was one."""
+        from ..models import SiteLease
+
+        deleted, _ = SiteLease.objects.filter(site_id=site_id, queue=queue, holder=user).delete()
+        return bool(deleted)
+
+    @classmethod
+    def grant(cls, site, queue, user):
+        """Lease a site to a user regardless of who holds it (assignment)."""
+        from ..models import SiteLease
+
+        now = timezone.now()
+        lease, _ = SiteLease.objects.update_or_create(
+            site=site, queue=queue,
+            defaults={'holder': user, 'claimed_at': now, 'expires_at': now + cls.lease_duration()},
+        )
+        return lease
+
+    @staticmethod
+    def release_finished(site_ids):
+        """
+        Drop leases on sites that have left their queue (e.g. after a
+        calling status change or a verification action), in one DELETE.
+        """
+        from ..models import SiteLease
+
+        finished = Q()
+        for queue, config in QUEUES.items():
+            still_queued = Q(
+                **{f'site__{lookup}': value for lookup, value in config['filters'].items()},
+                **{f"site__{config['tier_field']}__in": config['tiers']},
+            )
+            finished |= Q(queue=queue) & ~still_queued
+
+        deleted, _ = SiteLease.objects.filter(site_id__in=site_ids).filter(finished).delete()
+        return deleted
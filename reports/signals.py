@@ -0,0 +1,151 @@
+# reports/signals.py
+"""
+Model signal handlers for the reports app.
+
+Keeps derived data (dashboard snapshot, ...) in sync with writes to the
+underlying models. Handlers must stay cheap: they run inside the request
+that performed the write.
+"""
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+
+from .models import CustomReport, Subscription, DataCollectionProject, UnverifiedSite
+from .company_models import Company, ProductionSite, ProductionSiteVersion, CompanyNote, CompanyHistory
+from .services.dashboard_snapshot import DashboardSnapshotService
+from .services.widget_cache import WidgetCacheService, MODEL_WIDGET_DEPENDENCIES
+from .services.facet_index import FacetIndexService
+from .services.company_detail import CompanyDetailService
+from .services.site_counters import SiteCounterService
+from .services.change_feed import ChangeFeedService
+
+
+# =============================================================================
+# DASHBOARD SNAPSHOT
+# =============================================================================
+
+DASHBOARD_SNAPSHOT_SENDERS = [
+    Company, ProductionSite, ProductionSiteVersion,
+    CustomReport, Subscription, DataCollectionProject, UnverifiedSite,
+    settings.AUTH_USER_MODEL,
+]
+
+
+def mark_dashboard_snapshot_stale(sender, **kwargs):
+    """Flag the dashboard snapshot for (debounced) recomputation."""
+    DashboardSnapshotService.mark_stale()
+
+
+for _sender in DASHBOARD_SNAPSHOT_SENDERS:
+    post_save.connect(mark_dashboard_snapshot_stale, sender=_sender, dispatch_uid=f'dashboard_snapshot_save_{_sender}')
+    post_delete.connect(mark_dashboard_snapshot_stale, sender=_sender, dispatch_uid=f'dashboard_snapshot_delete_{_sender}')
+
+
+# =============================================================================
+# WIDGET RESULT CACHE
+# =============================================================================
+
+def invalidate_dependent_widgets(sender, **kwargs):
+    """Invalidate cached results of widgets that depend on the sender model."""
+    WidgetCacheService.invalidate_for_model(sender._meta.label)
+
+
+for _model_label in MODEL_WIDGET_DEPENDENCIES:
+    post_save.connect(invalidate_dependent_widgets, sender=_model_label, dispatch_uid=f'widget_cache_save_{_model_label}')
+    post_delete.connect(invalidate_dependent_widgets, sender=_model_label, dispatch_uid=f'widget_cache_delete_{_model_label}')
+
+
+# =============================================================================
+# FACET BITMAP INDEX
+# =============================================================================
+
+def record_site_facet_change(sender, instance, **kwargs):
+    """Log a changed production site (or site version) for the facet index."""
+    site_id = instance.production_site_id if isinstance(instance, ProductionSiteVersion) else instance.pk
+    FacetIndexService.record_change('site', site_id)
+
+
+def record_company_facet_change(sender, instance, **kwargs):
+    """Log a changed company (name, country, status, sites) for the facet index."""
+    FacetIndexService.record_change('company', instance.pk)
+
+
+for _sender in (ProductionSite, ProductionSiteVersion):
+    post_save.connect(record_site_facet_change, sender=_sender, dispatch_uid=f'facet_index_save_{_sender.__name__}')
+    post_delete.connect(record_site_facet_change, sender=_sender, dispatch_uid=f'facet_index_delete_{_sender.__name__}')
+
+post_save.connect(record_company_facet_change, sender=Company, dispatch_uid='facet_index_save_Company')
+post_delete.connect(record_company_facet_change, sender=Company, dispatch_uid='facet_index_delete_Company')
+
+
+# =============================================================================
+# COMPANY DETAIL DOCUMENTS
+# =============================================================================
+
+def bump_company_detail_revision(sender, instance, **kwargs):
+    """Invalidate the cached detail document of the written object's company."""
+    if isinstance(instance, Company):
+        company_id = instance.pk
+    elif isinstance(instance, ProductionSiteVersion):
+        if ProductionSiteVersion.production_site.is_cached(instance):
+            company_id = instance.production_site.company_id
+        else:
+            company_id = ProductionSite.objects.filter(
+                pk=instance.production_site_id
+            ).values_list('company_id', flat=True).first()
+    else:
+        company_id = instance.company_id
+
+    if company_id is not None:
+        CompanyDetailService.bump_revision(company_id)
+
+
+for _sender in (Company, ProductionSite, ProductionSiteVersion, CompanyNote, CompanyHistory):
+    post_save.connect(bump_company_detail_revision, sender=_sender, dispatch_uid=f'company_detail_save_{_sender.__name__}')
+    post_delete.connect(bump_company_detail_revision, sender=_sender, dispatch_uid=f'company_detail_delete_{_sender.__name__}')
+
+
+# =============================================================================
+# SITE COUNTERS
+# =============================================================================
+# Saves are counted by UnverifiedSite.save() itself (it needs the stored
+# state before the write); deletes are counted here.
+
+def remove_deleted_site_from_counters(sender, instance, **kwargs):
+    """Take a deleted unverified site out of the project / global counters."""
+    SiteCounterService.record_delete(instance)
+
+
+post_delete.connect(remove_deleted_site_from_counters, sender=UnverifiedSite, dispatch_uid='site_counters_delete_UnverifiedSite')
+
+
+# =============================================================================
+# CLIENT CHANGE FEED
+# =============================================================================
+
+def record_site_change(sender, instance, **kwargs):
+    """Log a saved production site / site version for the change feed."""
+    if isinstance(instance, ProductionSiteVersion):
+        ChangeFeedService.record_site_pks([instance.production_site_id])
+    else:
+        ChangeFeedService.record_sites([instance])
+
+
+def record_site_deletion(sender, instance, **kwargs):
+    """Log a deleted production site for the change feed."""
+    ChangeFeedService.record_sites([instance], action='DELETE')
+
+
+def record_company_change(sender, instance, **kwargs):
+    """Log every production site of a saved company (name, country, status, ...)."""
+    ChangeFeedService.record_companies([instance.pk])
+
+
+for _sender in (ProductionSite, ProductionSiteVersion):
+    post_save.connect(record_site_change, sender=_sender, dispatch_uid=f'change_feed_save_{_sender.__name__}')
+
+# A deleted version changes its site; deleted sites (also when their company
+# is deleted) are logged as removals
+post_delete.connect(record_site_change, sender=ProductionSiteVersion, dispatch_uid='change_feed_delete_ProductionSiteVersion')
+post_delete.connect(record_site_deletion, sender=ProductionSite, dispatch_uid='change_feed_delete_ProductionSite')
+post_save.connect(record_company_change, sender=Company, dispatch_uid='change_feed_save_Company')
@@ -1,3 +1,118 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import UserRole
+from .models import CompanyResearchResult
+from .research_views import batch_research_companies, research_company
+from .services.company_research import CompanyResearchService, StubResearchClient
+
+
+RESEARCH_SETTINGS = {'COMPANY_RESEARCH_CLIENT': 'stub', 'COMPANY_RESEARCH_CACHE_DAYS': 30}
+
+
+class CompanyResearchTestMixin:
+    """Research with the local stub client, counting model calls."""
+
+    def setUp(self):
+        cache.clear()
+        StubResearchClient.calls = 0
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(
+            username='collector', email='collector@example.com', password='secret', role=UserRole.DATA_COLLECTOR
+        )
+
+    def post(self, view, data):
+        request = self.factory.post('/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return view(request)
+
+    def research(self, company_name, country):
+        return self.post(research_company, {'company_name': company_name, 'country': country})
+
+
+@override_settings(**RESEARCH_SETTINGS)
+class CompanyResearchTests(CompanyResearchTestMixin, TestCase):
+
+    def test_research_is_one_model_call(self):
+        response = self.research('Acme Corp', 'Turkey')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['cached'])
+        self.assertEqual(response.data['data']['official_name'], 'Acme Corp')
+        self.assertEqual(StubResearchClient.calls, 1)
+        self.assertEqual(response.data['quota']['searches_used'], 1)
+
+    def test_repeat_research_is_served_from_cache(self):
+        first = self.research('Acme Corp', 'Turkey')
+        second = self.research('  ACME corp.', 'turkey ')
+
+        self.assertEqual(second.status_code, 200)
+        self.assertTrue(second.data['cached'])
+        self.assertEqual(second.data['data'], first.data['data'])
+        self.assertEqual(StubResearchClient.calls, 1)
+        self.assertEqual(second.data['quota']['remaining'], first.data['quota']['remaining'])
+
+    def test_cached_result_expires(self):
+        self.research('Acme Corp', 'Turkey')
+        with override_settings(COMPANY_RESEARCH_CACHE_DAYS=0):
+            response = self.research('Acme Corp', 'Turkey')
+
+        self.assertFalse(response.data['cached'])
+        self.assertEqual(StubResearchClient.calls, 2)
+
+    def test_failing_model_is_backed_off(self):
+        failing, working = CompanyResearchService.MODEL_NAMES[:2]
+        attempts = []
+        generate = StubResearchClient.generate
+
+        def flaky_generate(client, model_name, prompt):
+            attempts.append(model_name)
+            if model_name == failing:
+                raise Exception('500 Internal error')
+            return generate(client, model_name, prompt)
+
+        with mock.patch.object(StubResearchClient, 'generate', flaky_generate):
+            self.assertEqual(self.research('Acme Corp', 'Turkey').status_code, 200)
+            self.assertEqual(attempts, [failing, working])
+
+            attempts.clear()
+            response = self.research('Globex', 'Germany')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['model_used'], working)
+        self.assertEqual(attempts, [working])
+        self.assertNotIn(failing, CompanyResearchService.candidate_models())
+
+
+@override_settings(**RESEARCH_SETTINGS)
+class CompanyBatchResearchTests(CompanyResearchTestMixin, TransactionTestCase):
+    # Uncached companies are researched in worker threads with their own connections
+
+    def test_duplicate_queries_are_researched_once(self):
+        response = self.post(batch_research_companies, {'companies': [
+            {'company_name': 'Acme Corp', 'country': 'Turkey'},
+            {'company_name': 'ACME corp.', 'country': 'turkey'},
+            {'company_name': 'Globex', 'country': 'Germany'},
+        ]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(result['success'] for result in response.data['results']))
+        self.assertEqual(StubResearchClient.calls, 2)
+        self.assertEqual(response.data['quota']['searches_used'], 2)
+        self.assertEqual(CompanyResearchResult.objects.filter(from_cache=False).count(), 2)
+
+    def test_cached_queries_take_no_model_call(self):
+        self.research('Acme Corp', 'Turkey')
+
+        response = self.post(batch_research_companies, {'companies': [
+            {'company_name': 'Acme Corp', 'country': 'Turkey'},
+            {'company_name': 'Globex', 'country': 'Germany'},
+        ]})
+
+        self.assertEqual([result['cached'] for result in response.data['results']], [True, False])
+        self.assertEqual(StubResearchClient.calls, 2)
+        self.assertEqual(response.data['quota']['searches_used'], 2)
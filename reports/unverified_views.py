@@ -18,7 +18,8 @@ from .models import (
     SuperdatabaseRecord,
     VerificationStatus,
     PriorityLevel,
-    DataSource
+    DataSource,
+    WorkQueue
 )
 
 from .unverified_serializers import (
@@ -46,6 +47,11 @@ from .email_notifications import (
     send_site_rejected_notification,
 )
 
+from .services.bulk_verification import BulkVerificationService
+from .services.company_transfer import CompanyTransferService
+from .services.site_counters import SiteCounterService
+from .services.work_queue import WorkQueueService
+
 
 User = get_user_model()
 
@@ -379,6 +385,9 @@ class AssignReviewerAPIView(APIView):
         site.assigned_to = assigned_to
         site.save()
         
+        # Hold the site in the review queue for the assignee
+        WorkQueueService.grant(site, WorkQueue.REVIEW, assigned_to)
+        
         # Create history entry
         VerificationHistory.objects.create(
             site=site,
@@ -528,88 +537,25 @@ class UnverifiedSiteBulkActionAPIView(APIView):
                 'error': 'No valid sites found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        results = {
-            'success': 0,
-            'failed': 0,
-            'errors': []
-        }
+        if BulkVerificationService.supports(action):
+            # One UPDATE + bulk history insert for all sites
+            results = BulkVerificationService.apply(
+                site_ids,
+                action,
+                request.user,
+                comments=comments,
+                review_note=comments if action == 'needs_revision' and comments else None,
+                # Marking for review does not record a reviewer on this endpoint
+                set_verified_by=action != 'under_review',
+            )
+            return Response({
+                'success': True,
+                'message': f'Bulk {action} completed',
+                'results': results
+            })
         
-        for site in sites:
-            try:
-                if action == 'approve':
-                    site.verification_status = VerificationStatus.APPROVED
-                    site.verified_by = request.user
-                    site.verified_date = timezone.now()
-                    site.save()
-                    action_label = 'APPROVED'
-                    
-                elif action == 'reject':
-                    site.verification_status = VerificationStatus.REJECTED
-                    site.verified_by = request.user
-                    site.verified_date = timezone.now()
-                    site.rejection_reason = comments
-                    site.save()
-                    action_label = 'REJECTED'
-                    
-                elif action == 'under_review':
-                    site.verification_status = VerificationStatus.UNDER_REVIEW
-                    site.save()
-                    action_label = 'UNDER_REVIEW'
-                
-                elif action == 'needs_revision':
-                    site.verification_status = VerificationStatus.NEEDS_REVISION
-                    site.verified_by = request.user
-                    site.verified_date = timezone.now()
-                    site.save()
-                    action_label = 'NEEDS_REVISION'
-                    
-                    # Create review note if comment provided
-                    if comments:
-                        from .models import ReviewNote
-                        ReviewNote.objects.create(
-                            site=site,
-                            note_text=comments,
-                            created_by=request.user,
-                            is_internal=False
-                        )
-                
-                elif action == 'transfer':
-                    # Check if already transferred
-                    if site.verification_status == VerificationStatus.TRANSFERRED:
-                        results['failed'] += 1
-                        results['errors'].append(f"Site '{site.company_name}' already transferred")
-                        continue
-                    
-                    # Only transfer approved sites
-                    if site.verification_status != VerificationStatus.APPROVED:
-                        results['failed'] += 1
-                        results['errors'].append(f"Site '{site.company_name}' not approved")
-                        continue
-                    
-                    # Transfer to Company Database (model method handles status update and history)
-                    try:
-                        site.transfer_to_company_database(transferred_by=request.user)
-                        # Skip history entry creation - model method already handles it
-                        results['success'] += 1
-                        continue
-                    except Exception as e:
-                        results['failed'] += 1
-                        results['errors'].append(f"Transfer failed for '{site.company_name}': {str(e)}")
-                        continue
-                
-                # Create history entry (for non-transfer actions)
-                VerificationHistory.objects.create(
-                    site=site,
-                    action=action_label,
-                    performed_by=request.user,
-                    comments=comments
-                )
-                
-                results['success'] += 1
-                
-            except Exception as e:
-                results['failed'] += 1
-                results['errors'].append(f"Error processing '{site.company_name}': {str(e)}")
+        # Transfer: batch pipeline, atomic per chunk
+        results = CompanyTransferService.transfer(site_ids, request.user)
         
         return Response({
             'success': True,
@@ -629,66 +575,25 @@ class UnverifiedSiteStatsAPIView(APIView):
     permission_classes = [IsAuthenticated, IsStaffOnly]
     
     def get(self, request):
-        # Count by status
-        by_status = {}
-        for status_choice in VerificationStatus.choices:
-            status_value = status_choice[0]
-            count = UnverifiedSite.objects.filter(
-                verification_status=status_value
-            ).count()
-            by_status[status_value] = count
-        
-        # Count by priority
-        by_priority = {}
-        for priority_choice in PriorityLevel.choices:
-            priority_value = priority_choice[0]
-            count = UnverifiedSite.objects.filter(priority=priority_value).count()
-            by_priority[priority_value] = count
-        
-        # Count by source
-        by_source = {}
-        for source_choice in DataSource.choices:
-            source_value = source_choice[0]
-            count = UnverifiedSite.objects.filter(source=source_value).count()
-            by_source[source_value] = count
-        
-        # Count by category
         from .models import CompanyCategory
-        by_category = {}
-        for category_choice in CompanyCategory.choices:
-            category_value = category_choice[0]
-            count = UnverifiedSite.objects.filter(category=category_value).count()
-            by_category[category_value] = count
-        
-        # Calculate average quality score
-        from django.db.models import Avg
-        avg_quality = UnverifiedSite.objects.aggregate(
-            avg=Avg('data_quality_score')
-        )['avg'] or 0
-        
-        # Count duplicates
-        duplicates_count = UnverifiedSite.objects.filter(is_duplicate=True).count()
-        
-        # Count pending review
-        pending_review = UnverifiedSite.objects.filter(
-            verification_status=VerificationStatus.PENDING
-        ).count()
-        
-        # Count approved not transferred
-        approved_not_transferred = UnverifiedSite.objects.filter(
-            verification_status=VerificationStatus.APPROVED
-        ).count()
+        
+        # All counts come from the global site counters
+        counts = SiteCounterService.get_counts()
+        total = counts['total']
+        
+        def by_choice(dimension, choices):
+            return {value: counts[dimension].get(value, 0) for value, _ in choices}
         
         stats = {
-            'total': UnverifiedSite.objects.count(),
-            'by_status': by_status,
-            'by_priority': by_priority,
-            'by_source': by_source,
-            'by_category': by_category,
-            'avg_quality_score': round(avg_quality, 2),
-            'duplicates_count': duplicates_count,
-            'pending_review': pending_review,
-            'approved_not_transferred': approved_not_transferred,
+            'total': total,
+            'by_status': by_choice('status', VerificationStatus.choices),
+            'by_priority': by_choice('priority', PriorityLevel.choices),
+            'by_source': by_choice('source', DataSource.choices),
+            'by_category': by_choice('category', CompanyCategory.choices),
+            'avg_quality_score': round(counts['sum']['data_quality_score'] / total, 2) if total else 0,
+            'duplicates_count': counts['duplicate'],
+            'pending_review': counts['status'].get(VerificationStatus.PENDING, 0),
+            'approved_not_transferred': counts['status'].get(VerificationStatus.APPROVED, 0),
         }
         
         serializer = UnverifiedSiteStatsSerializer(stats)
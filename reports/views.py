@@ -32,9 +32,15 @@ from .fields import (
     PIPE_FIELDS, TUBE_HOSE_FIELDS, PROFILE_FIELDS, CABLE_FIELDS, COMPOUNDER_FIELDS, RECYCLER_FIELDS, ALL_COMMONS
 )
 from notifications.services import NotificationService
+from .services.dashboard_snapshot import DashboardSnapshotService
+from .services.facet_index import FacetIndexService
+from .services.range_stats import RangeStatsService
 
 User = get_user_model()
 
+# Materials shown in the legacy dashboard stats endpoints
+DASHBOARD_MATERIAL_FIELDS = ['hdpe', 'ldpe', 'pp', 'pvc', 'pet', 'pa', 'abs', 'ps']
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -186,157 +192,30 @@ def report_preview(request):
     """
     filter_criteria = request.data.get('filter_criteria', {})
 
-    # Start with all non-deleted companies
-    queryset = Company.objects.exclude(status=CompanyStatus.DELETED)
-
-    # Handle status filters
-    if 'status' in filter_criteria:
-        status_list = filter_criteria['status']
-        if isinstance(status_list, list) and len(status_list) > 0:
-            queryset = queryset.filter(status__in=status_list)
-
-    # Handle filter groups (with OR logic within groups, AND between groups)
-    if 'filter_groups' in filter_criteria:
-        filter_groups = filter_criteria['filter_groups']
-        if isinstance(filter_groups, list):
-            for group in filter_groups:
-                if not isinstance(group, dict):
-                    continue
-
-                group_query = Q()
-
-                # Handle boolean filters (materials)
-                filters = group.get('filters', {})
-                if filters:
-                    for field_name, field_value in filters.items():
-                        try:
-                            ProductionSiteVersion._meta.get_field(field_name)
-                            if field_value is True:
-                                group_query |= Q(
-                                    production_sites__versions__is_current=True,
-                                    **{f'production_sites__versions__{field_name}': True}
-                                )
-                            elif field_value is False:
-                                group_query |= (
-                                    Q(
-                                        production_sites__versions__is_current=True,
-                                        **{f'production_sites__versions__{field_name}': False}
-                                    ) |
-                                    Q(
-                                        production_sites__versions__is_current=True,
-                                        **{f'production_sites__versions__{field_name}__isnull': True}
-                                    )
-                                )
-                        except Exception:
-                            continue
-
-                # Handle technical filters (equals and range modes)
-                technical_filters = group.get('technicalFilters', {})
-                if technical_filters:
-                    for field_name, filter_config in technical_filters.items():
-                        if not isinstance(filter_config, dict):
-                            continue
-
-                        try:
-                            field = ProductionSiteVersion._meta.get_field(field_name)
-                            mode = filter_config.get('mode', 'range')
-
-                            if mode == 'equals':
-                                equals_val = filter_config.get('equals', '')
-                                if equals_val != '' and equals_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            equals_val = float(equals_val)
-                                        else:
-                                            equals_val = int(equals_val)
-                                        group_query |= Q(
-                                            production_sites__versions__is_current=True,
-                                            **{f'production_sites__versions__{field_name}': equals_val}
-                                        )
-                                    except (ValueError, TypeError):
-                                        pass
-
-                            elif mode == 'range':
-                                min_val = filter_config.get('min', '')
-                                max_val = filter_config.get('max', '')
-                                range_query = Q(production_sites__versions__is_current=True)
-
-                                if min_val != '' and min_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            min_val = float(min_val)
-                                        else:
-                                            min_val = int(min_val)
-                                        range_query &= Q(**{f'production_sites__versions__{field_name}__gte': min_val})
-                                    except (ValueError, TypeError):
-                                        pass
-
-                                if max_val != '' and max_val is not None:
-                                    try:
-                                        if field.get_internal_type() == 'FloatField':
-                                            max_val = float(max_val)
-                                        else:
-                                            max_val = int(max_val)
-                                        range_query &= Q(**{f'production_sites__versions__{field_name}__lte': max_val})
-                                    except (ValueError, TypeError):
-                                        pass
-
-                                group_query |= range_query
-
-                        except Exception:
-                            continue
-
-                if group_query:
-                    queryset = queryset.filter(group_query).distinct()
-
-    # Handle categories (filter companies with production sites in these categories)
-    if 'categories' in filter_criteria:
-        categories = filter_criteria['categories']
-        if isinstance(categories, list) and len(categories) > 0:
-            queryset = queryset.filter(
-                production_sites__category__in=categories
-            ).distinct()
-        elif isinstance(categories, str) and categories:
-            queryset = queryset.filter(
-                production_sites__category=categories
-            ).distinct()
-    elif 'category' in filter_criteria and filter_criteria['category']:
-        queryset = queryset.filter(
-            production_sites__category=filter_criteria['category']
-        ).distinct()
-
-    # Apply country filter
-    if 'country' in filter_criteria:
-        countries = filter_criteria['country']
-        if isinstance(countries, list) and len(countries) > 0:
-            queryset = queryset.filter(country__in=countries)
-        elif isinstance(countries, str) and countries:
-            queryset = queryset.filter(country=countries)
+    # Evaluate the criteria on the facet bitmap index: status, filter groups
+    # (OR within groups, AND between groups), categories and countries
+    index = FacetIndexService.get_index()
+    companies = index.filter_companies(filter_criteria)
 
     # Get total count
-    total_records = queryset.count()
+    total_records = companies.bit_count()
 
     # Get breakdown by category (from production sites)
-    category_breakdown = list(
-        queryset.filter(
-            production_sites__versions__is_current=True
-        ).values('production_sites__category')
-        .annotate(count=Count('id', distinct=True))
-        .order_by('-count')
-    )
-    # Rename key for consistency
     category_breakdown = [
-        {'category': item['production_sites__category'], 'count': item['count']}
-        for item in category_breakdown if item['production_sites__category']
+        {'category': category, 'count': count}
+        for category, count in sorted(
+            index.company_counts_by_category(companies).items(), key=lambda x: (-x[1], x[0])
+        )
     ]
 
     # Get breakdown by country
-    country_breakdown = list(
-        queryset.values('country')
-        .annotate(count=Count('id'))
-        .filter(country__isnull=False)
-        .order_by('-count')[:10]
-    )
+    country_breakdown = [
+        {'country': country, 'count': count}
+        for country, count in sorted(
+            index.company_counts_by_country(companies).items(), key=lambda x: (-x[1], x[0] or '')
+        )
+        if country is not None
+    ][:10]
 
     return Response({
         'total_records': total_records,
@@ -582,135 +461,61 @@ def client_report_stats(request):
 class DashboardStatsAPIView(APIView):
     """
     Returns REAL dashboard statistics from Company Database
-    NOTE: Now queries Company Database instead of Superdatabase
+    NOTE: Served from the precomputed dashboard snapshot
+    (reports/services/dashboard_snapshot.py). Admins can pass ?refresh=true.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, format=None):
-        now = timezone.now()
-        thirty_days_ago = now - timedelta(days=30)
-
-        # REAL counts from Company Database
-        total_records = Company.objects.exclude(status=CompanyStatus.DELETED).count()
-        total_clients = User.objects.filter(role=UserRole.CLIENT).count()
-        total_staff = User.objects.filter(role__in=[UserRole.STAFF_ADMIN, UserRole.SUPERADMIN]).count()
-        total_guests = User.objects.filter(role=UserRole.GUEST).count()
-        total_reports = CustomReport.objects.count()
-
-        # Real active subscriptions count
-        today = timezone.now().date()
-        active_subscriptions = Subscription.objects.filter(
-            start_date__lte=today,
-            end_date__gte=today,
-            status=SubscriptionStatus.ACTIVE
-        ).count()
-
-        # Recent records added in last 30 days
-        recent_records = Company.objects.filter(
-            created_at__gte=thirty_days_ago
-        ).exclude(status=CompanyStatus.DELETED).count()
-
-        # Recent activity (updated records in last 30 days)
-        recent_activity = Company.objects.filter(
-            updated_at__gte=thirty_days_ago
-        ).exclude(status=CompanyStatus.DELETED).count()
-
-        # New clients in last 30 days
-        new_clients = User.objects.filter(
-            role=UserRole.CLIENT,
-            date_joined__gte=thirty_days_ago
-        ).count()
-
-        # Staff members count
-        staff_members = User.objects.filter(role__in=[UserRole.STAFF_ADMIN, UserRole.SUPERADMIN]).count()
-
-        # Guest users count
-        guest_users = User.objects.filter(role=UserRole.GUEST).count()
-
-        # Records by category - from production sites
-        from .models import CompanyCategory
-        records_by_category = list(
-            Company.objects.exclude(status=CompanyStatus.DELETED)
-            .filter(production_sites__versions__is_current=True)
-            .values('production_sites__category')
-            .annotate(count=Count('id', distinct=True))
-            .order_by('-count')
-        )
-
-        category_labels = []
-        category_data = []
-        for item in records_by_category:
-            cat = item['production_sites__category']
-            if cat:
-                category_display = dict(CompanyCategory.choices).get(cat, cat)
-                category_labels.append(category_display)
-                category_data.append(item['count'])
-
-        # Top countries - REAL DATA
-        top_countries = list(
-            Company.objects.exclude(status=CompanyStatus.DELETED)
-            .values('country')
-            .annotate(count=Count('id'))
-            .filter(country__isnull=False, country__gt='')
-            .order_by('-count')[:10]
-        )
-
-        # Top materials - from ProductionSiteVersion
-        material_fields = ['hdpe', 'ldpe', 'pp', 'pvc', 'pet', 'pa', 'abs', 'ps']
-        materials_data = []
-        for field in material_fields:
-            count = ProductionSiteVersion.objects.filter(
-                is_current=True,
-                **{field: True}
-            ).values('production_site__company').distinct().count()
-            if count > 0:
-                materials_data.append({
-                    'name': field.upper(),
-                    'count': count
-                })
-        materials_data = sorted(materials_data, key=lambda x: x['count'], reverse=True)[:8]
-
-        # Monthly trend - REAL DATA (last 6 months)
-        monthly_data = []
-        for i in range(5, -1, -1):
-            month_start = timezone.now().replace(day=1) - timedelta(days=30 * i)
-            month_end = (month_start + timedelta(days=32)).replace(day=1)
-
-            count = Company.objects.filter(
-                created_at__gte=month_start,
-                created_at__lt=month_end
-            ).exclude(status=CompanyStatus.DELETED).count()
-
-            monthly_data.append({
-                'month': month_start.strftime('%b'),
-                'count': count
-            })
+        snapshot = DashboardSnapshotService.get_for_request(request)
+
+        # Records by category - companies with a current production site
+        category_labels = [item['category_display'] for item in snapshot['companies_by_category']]
+        category_data = [item['count'] for item in snapshot['companies_by_category']]
+
+        # Top materials - counted per company
+        materials_data = sorted(
+            [
+                {'name': item['field'].upper(), 'count': item['company_count']}
+                for item in snapshot['top_materials']
+                if item['field'] in DASHBOARD_MATERIAL_FIELDS and item['company_count'] > 0
+            ],
+            key=lambda x: x['count'],
+            reverse=True
+        )[:8]
+
+        # Monthly trend (last 6 months)
+        monthly_data = [
+            {'month': item['month_short'], 'count': item['count']}
+            for item in snapshot['monthly_trend']
+        ]
 
         return Response({
             # Overview stats - ALL REAL
-            'total_records': total_records,
-            'total_clients': total_clients,
-            'total_staff': total_staff,
-            'staff_members': staff_members,
-            'total_guests': total_guests,
-            'guest_users': guest_users,
-            'total_reports': total_reports,
-            'custom_reports': total_reports,
-            'active_subscriptions': active_subscriptions,
+            'total_records': snapshot['total_records'],
+            'total_clients': snapshot['all_clients'],
+            'total_staff': snapshot['all_staff'],
+            'staff_members': snapshot['all_staff'],
+            'total_guests': snapshot['all_guests'],
+            'guest_users': snapshot['all_guests'],
+            'total_reports': snapshot['total_reports'],
+            'custom_reports': snapshot['total_reports'],
+            'active_subscriptions': snapshot['active_subscriptions'],
 
             # Activity stats - ALL REAL
-            'recent_records': recent_records,
-            'recent_activity': recent_activity,
-            'new_clients': new_clients,
+            'recent_records': snapshot['recent_records'],
+            'recent_activity': snapshot['recent_activity'],
+            'new_clients': snapshot['new_clients'],
 
             # Chart data - ALL REAL
             'records_by_category': {
                 'labels': category_labels,
                 'data': category_data
             },
-            'top_countries': top_countries,
+            'top_countries': snapshot['top_countries'],
             'top_materials': materials_data,
             'monthly_trend': monthly_data,
+            'generated_at': snapshot['generated_at'],
         })
 
 
@@ -756,11 +561,10 @@ class FilterOptionsAPIView(APIView):
     }
 
     def get(self, request, format=None):
-        from .company_models import ProductionSiteVersion, CompanyStatus
-        
-        # Get base queryset - only current AND active versions, excluding deleted companies
-        base_queryset = ProductionSiteVersion.objects.filter(is_current=True, is_active=True)
-        base_queryset = base_queryset.exclude(production_site__company__status=CompanyStatus.DELETED)
+        # Current AND active sites of non-deleted companies, as a bitset
+        # of the facet bitmap index
+        index = FacetIndexService.get_index()
+        sites = index.live_sites()
         
         # ========================================
         # CRITICAL FIX: Apply report's filter_criteria when report_id is provided
@@ -770,136 +574,20 @@ class FilterOptionsAPIView(APIView):
         if report_id:
             try:
                 report = CustomReport.objects.get(report_id=report_id)
-                filter_criteria = report.filter_criteria or {}
-                
-                # Apply report's status filter
-                if 'status' in filter_criteria:
-                    status_filter = filter_criteria['status']
-                    if isinstance(status_filter, list) and len(status_filter) > 0:
-                        base_queryset = base_queryset.filter(production_site__company__status__in=status_filter)
-                    elif isinstance(status_filter, str) and status_filter:
-                        base_queryset = base_queryset.filter(production_site__company__status=status_filter)
-                
-                # Apply report's filter groups
-                if 'filter_groups' in filter_criteria:
-                    filter_groups = filter_criteria['filter_groups']
-                    if isinstance(filter_groups, list):
-                        for group in filter_groups:
-                            if not isinstance(group, dict):
-                                continue
-                            
-                            filters = group.get('filters', {})
-                            technical_filters = group.get('technicalFilters', {})
-                            
-                            if not filters and not technical_filters:
-                                continue
-                            
-                            group_query = Q()
-                            
-                            # Handle boolean filters
-                            for field_name, field_value in filters.items():
-                                try:
-                                    ProductionSiteVersion._meta.get_field(field_name)
-                                    if field_value is True:
-                                        group_query |= Q(**{field_name: True})
-                                    elif field_value is False:
-                                        group_query |= Q(**{field_name: False}) | Q(**{f'{field_name}__isnull': True})
-                                except Exception:
-                                    continue
-                            
-                            # Handle technical filters
-                            for field_name, filter_config in technical_filters.items():
-                                if not isinstance(filter_config, dict):
-                                    continue
-                                
-                                try:
-                                    field = ProductionSiteVersion._meta.get_field(field_name)
-                                    mode = filter_config.get('mode', 'range')
-                                    
-                                    if mode == 'equals':
-                                        equals_val = filter_config.get('equals', '')
-                                        if equals_val != '' and equals_val is not None:
-                                            try:
-                                                if field.get_internal_type() == 'FloatField':
-                                                    equals_val = float(equals_val)
-                                                else:
-                                                    equals_val = int(equals_val)
-                                                group_query |= Q(**{field_name: equals_val})
-                                            except (ValueError, TypeError):
-                                                pass
-                                    
-                                    elif mode == 'range':
-                                        min_val = filter_config.get('min', '')
-                                        max_val = filter_config.get('max', '')
-                                        range_query = Q()
-                                        
-                                        if min_val != '' and min_val is not None:
-                                            try:
-                                                if field.get_internal_type() == 'FloatField':
-                                                    min_val = float(min_val)
-                                                else:
-                                                    min_val = int(min_val)
-                                                range_query &= Q(**{f'{field_name}__gte': min_val})
-                                            except (ValueError, TypeError):
-                                                pass
-                                        
-                                        if max_val != '' and max_val is not None:
-                                            try:
-                                                if field.get_internal_type() == 'FloatField':
-                                                    max_val = float(max_val)
-                                                else:
-                                                    max_val = int(max_val)
-                                                range_query &= Q(**{f'{field_name}__lte': max_val})
-                                            except (ValueError, TypeError):
-                                                pass
-                                        
-                                        if range_query:
-                                            group_query |= range_query
-                                except Exception:
-                                    continue
-                            
-                            if group_query:
-                                base_queryset = base_queryset.filter(group_query)
-                
-                # Apply report's category filters
-                report_categories = None
-                if 'categories' in filter_criteria:
-                    report_categories = filter_criteria['categories']
-                elif 'category' in filter_criteria:
-                    report_categories = filter_criteria['category']
-                
-                if report_categories:
-                    if isinstance(report_categories, list) and len(report_categories) > 0:
-                        base_queryset = base_queryset.filter(production_site__category__in=report_categories)
-                    elif isinstance(report_categories, str) and report_categories:
-                        base_queryset = base_queryset.filter(production_site__category=report_categories)
-                
-                # Apply report's country filters
-                if 'country' in filter_criteria:
-                    countries = filter_criteria['country']
-                    if isinstance(countries, list) and len(countries) > 0:
-                        base_queryset = base_queryset.filter(production_site__company__country__in=countries)
-                    elif isinstance(countries, str) and countries:
-                        base_queryset = base_queryset.filter(production_site__company__country=countries)
-                        
+                sites = index.filter_sites(report.filter_criteria or {}, sites)
             except CustomReport.DoesNotExist:
-                pass  # If report not found, continue with unfiltered queryset
+                pass  # If report not found, continue with unfiltered sites
         
         # Apply category filter from query params (may override/combine with report filter)
         category = request.query_params.get('category', 'ALL').upper()
         if category != 'ALL':
             categories = [c.strip() for c in category.split(',')]
-            base_queryset = base_queryset.filter(
-                production_site__category__in=categories
-            )
+            sites &= index.union(index.site_categories, categories)
         
         # Apply search filter if provided
         search = request.query_params.get('search', '')
         if search:
-            base_queryset = base_queryset.filter(
-                Q(production_site__company__company_name__icontains=search) |
-                Q(production_site__company__region__icontains=search)
-            )
+            sites &= index.companies_to_sites(index.search_companies(search, ('name', 'region')))
         
         # Get target fields for the category
         target_fields = self.CATEGORY_FIELD_MAP.get(category, [])
@@ -914,13 +602,8 @@ class FilterOptionsAPIView(APIView):
         if not fields_to_aggregate:
             return Response([])
         
-        # Build aggregation queries
-        aggregation_queries = {
-            f'{field}_count': Count('pk', filter=Q(**{f'{field}': True})) 
-            for field in fields_to_aggregate
-        }
-        
-        counts = base_queryset.aggregate(**aggregation_queries)
+        # One AND + popcount per field
+        counts = index.count_fields(sites, fields_to_aggregate)
         
         # Build response data
         response_data = []
@@ -935,7 +618,7 @@ class FilterOptionsAPIView(APIView):
             response_data.append({
                 "field": field_name, 
                 "label": label, 
-                "count": counts.get(f'{field_name}_count', 0)
+                "count": counts.get(field_name, 0)
             })
         
         return Response(response_data)
@@ -1223,6 +906,10 @@ class DatabaseStatsAPIView(APIView):
         import json
         from .company_models import Company, ProductionSiteVersion, CompanyStatus
         
+        # Unfiltered stats come straight from the dashboard snapshot
+        if not any(request.query_params.get(p) for p in ('categories', 'countries', 'filter_groups')):
+            return Response(self._snapshot_stats(request))
+        
         # Start with all non-deleted companies
         queryset = Company.objects.exclude(status=CompanyStatus.DELETED)
         
@@ -1390,139 +1077,87 @@ class DatabaseStatsAPIView(APIView):
             'by_category': categories,  # Alias for compatibility
         })
 
+    def _snapshot_stats(self, request):
+        """Build the unfiltered response from the dashboard snapshot."""
+        snapshot = DashboardSnapshotService.get_for_request(request)
+        categories = [
+            {'category': item['category'], 'count': item['count']}
+            for item in snapshot['companies_by_category']
+        ]
+        return {
+            'total_count': snapshot['total_records'],
+            'countries_count': snapshot['countries_count'],
+            'top_countries': [
+                {'name': item['country'], 'count': item['count']}
+                for item in snapshot['top_countries']
+            ],
+            'all_countries': snapshot['all_countries'],
+            'categories': categories,
+            'available_categories': [item['category'] for item in categories],
+            'by_category': categories,
+            'generated_at': snapshot['generated_at'],
+        }
+
 
 # --- Enhanced Dashboard Stats APIView Class ---
 class EnhancedDashboardStatsAPIView(APIView):
     """
     Comprehensive API view for staff dashboard statistics.
     Provides data for cards, charts, and insights.
-    NOTE: Now queries Company Database instead of Superdatabase.
+    NOTE: Served from the precomputed dashboard snapshot
+    (reports/services/dashboard_snapshot.py). Admins can pass ?refresh=true.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, format=None):
-        from .models import CompanyCategory
-        
-        # Basic counts from Company Database
-        total_records = Company.objects.exclude(status=CompanyStatus.DELETED).count()
-        total_clients = User.objects.filter(role=UserRole.CLIENT).count()
-        total_staff = User.objects.filter(role__in=[UserRole.STAFF_ADMIN, UserRole.SUPERADMIN]).count()
-        total_guests = User.objects.filter(role=UserRole.GUEST).count()
-        total_reports = CustomReport.objects.count()
-
-        # Active subscriptions (current date within start_date and end_date)
-        today = timezone.now().date()
-        active_subscriptions = Subscription.objects.filter(
-            start_date__lte=today,
-            end_date__gte=today,
-            status=SubscriptionStatus.ACTIVE
-        ).count()
-
-        # Records by category (from production sites)
-        records_by_category = list(
-            Company.objects.exclude(status=CompanyStatus.DELETED)
-            .filter(production_sites__versions__is_current=True)
-            .values('production_sites__category')
-            .annotate(count=Count('id', distinct=True))
-            .order_by('-count')
-        )
+        snapshot = DashboardSnapshotService.get_for_request(request)
 
         # Format category data for charts
-        category_labels = []
-        category_counts = []
-        for item in records_by_category:
-            cat = item['production_sites__category']
-            if cat:
-                category_display = dict(CompanyCategory.choices).get(cat, cat)
-                category_labels.append(category_display)
-                category_counts.append(item['count'])
-
-        # Top 10 countries by record count
-        top_countries = list(
-            Company.objects.exclude(status=CompanyStatus.DELETED)
-            .values('country')
-            .annotate(count=Count('id'))
-            .filter(country__isnull=False, country__gt='')
-            .order_by('-count')[:10]
-        )
-
-        # Recent activity - records added in last 30 days
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        recent_records = Company.objects.filter(
-            created_at__gte=thirty_days_ago
-        ).exclude(status=CompanyStatus.DELETED).count()
-
-        # Records updated in last 7 days
-        seven_days_ago = timezone.now() - timedelta(days=7)
-        recently_updated = Company.objects.filter(
-            updated_at__gte=seven_days_ago
-        ).exclude(status=CompanyStatus.DELETED).count()
-
-        # User growth - new users in last 30 days
-        new_users = User.objects.filter(
-            date_joined__gte=thirty_days_ago
-        ).count()
-
-        # Subscription status breakdown
-        all_subscriptions = Subscription.objects.all()
-        expired_subscriptions = sum(1 for sub in all_subscriptions if not sub.is_active)
-        total_subscriptions = all_subscriptions.count()
-
-        # Top materials from ProductionSiteVersion
-        material_fields = ['hdpe', 'ldpe', 'pp', 'pvc', 'pet', 'pa', 'abs', 'ps']
-        materials_data = []
-        for field in material_fields:
-            count = ProductionSiteVersion.objects.filter(
-                is_current=True,
-                **{field: True}
-            ).values('production_site__company').distinct().count()
-            if count > 0:
-                materials_data.append({
-                    'name': field.upper(),
-                    'count': count
-                })
-        materials_data = sorted(materials_data, key=lambda x: x['count'], reverse=True)[:8]
+        category_labels = [item['category_display'] for item in snapshot['companies_by_category']]
+        category_counts = [item['count'] for item in snapshot['companies_by_category']]
+
+        # Top materials - counted per company
+        materials_data = sorted(
+            [
+                {'name': item['field'].upper(), 'count': item['company_count']}
+                for item in snapshot['top_materials']
+                if item['field'] in DASHBOARD_MATERIAL_FIELDS and item['company_count'] > 0
+            ],
+            key=lambda x: x['count'],
+            reverse=True
+        )[:8]
 
         # Monthly trend - records added per month (last 6 months)
-        monthly_data = []
-        for i in range(5, -1, -1):
-            month_start = timezone.now().replace(day=1) - timedelta(days=30 * i)
-            month_end = (month_start + timedelta(days=32)).replace(day=1)
-
-            count = Company.objects.filter(
-                created_at__gte=month_start,
-                created_at__lt=month_end
-            ).exclude(status=CompanyStatus.DELETED).count()
-
-            monthly_data.append({
-                'month': month_start.strftime('%b %Y'),
-                'records': count
-            })
+        monthly_data = [
+            {'month': item['month'], 'records': item['count']}
+            for item in snapshot['monthly_trend']
+        ]
 
         return Response({
             # Overview stats
-            'total_records': total_records,
-            'total_clients': total_clients,
-            'total_staff': total_staff,
-            'total_guests': total_guests,
-            'total_reports': total_reports,
-            'active_subscriptions': active_subscriptions,
-            'total_subscriptions': total_subscriptions,
-            'expired_subscriptions': expired_subscriptions,
+            'total_records': snapshot['total_records'],
+            'total_clients': snapshot['all_clients'],
+            'total_staff': snapshot['all_staff'],
+            'total_guests': snapshot['all_guests'],
+            'total_reports': snapshot['total_reports'],
+            'active_subscriptions': snapshot['active_subscriptions'],
+            'total_subscriptions': snapshot['total_subscriptions'],
+            'expired_subscriptions': snapshot['expired_subscriptions'],
 
             # Activity stats
-            'recent_records': recent_records,
-            'recently_updated': recently_updated,
-            'new_users': new_users,
+            'recent_records': snapshot['recent_records'],
+            'recently_updated': snapshot['recently_updated'],
+            'new_users': snapshot['new_users'],
 
             # Chart data
             'records_by_category': {
                 'labels': category_labels,
                 'data': category_counts
             },
-            'top_countries': top_countries,
+            'top_countries': snapshot['top_countries'],
             'top_materials': materials_data,
             'monthly_trend': monthly_data,
+            'generated_at': snapshot['generated_at'],
         })
 
 
@@ -1729,199 +1364,86 @@ class TechnicalFilterOptionsAPIView(APIView):
         'twin_screws',
     ]
 
-    def get(self, request, format=None):
-        from .company_models import ProductionSiteVersion, CompanyStatus
-        
-        # Get the category from query params
-        category = request.query_params.get('category', 'ALL').upper()
-
-        # Get the fields that belong to this category
+    def get_relevant_fields(self, category):
+        """Technical fields of a category, in TECHNICAL_FIELDS order."""
         category_fields = self.CATEGORY_FIELD_MAP.get(category, [])
+        return [field for field in self.TECHNICAL_FIELDS if field in category_fields]
 
-        if not category_fields:
-            return Response([])
-
-        # Filter technical fields to only those in the category
-        relevant_technical_fields = [
-            field for field in self.TECHNICAL_FIELDS
-            if field in category_fields
-        ]
-
-        if not relevant_technical_fields:
-            return Response([])
-
-        # Get the base queryset - only current AND active versions, excluding deleted companies
-        base_queryset = ProductionSiteVersion.objects.filter(is_current=True, is_active=True)
-        base_queryset = base_queryset.exclude(production_site__company__status=CompanyStatus.DELETED)
-
-        # ========================================
-        # CRITICAL FIX: Apply report's filter_criteria when report_id is provided
-        # This ensures min/max values match the actual report data
-        # ========================================
+    def get_range_stats(self, request, category, fields, **options):
+        """
+        Range statistics for the given fields over current, active sites of
+        non-deleted companies, narrowed by the report (report_id) and category.
+        """
+        report = None
         report_id = request.query_params.get('report_id')
         if report_id:
-            try:
-                report = CustomReport.objects.get(report_id=report_id)
-                filter_criteria = report.filter_criteria or {}
-                
-                # Apply report's status filter
-                if 'status' in filter_criteria:
-                    status_filter = filter_criteria['status']
-                    if isinstance(status_filter, list) and len(status_filter) > 0:
-                        base_queryset = base_queryset.filter(production_site__company__status__in=status_filter)
-                    elif isinstance(status_filter, str) and status_filter:
-                        base_queryset = base_queryset.filter(production_site__company__status=status_filter)
-                
-                # Apply report's filter groups
-                if 'filter_groups' in filter_criteria:
-                    filter_groups = filter_criteria['filter_groups']
-                    if isinstance(filter_groups, list):
-                        for group in filter_groups:
-                            if not isinstance(group, dict):
-                                continue
-                            
-                            filters = group.get('filters', {})
-                            technical_filters = group.get('technicalFilters', {})
-                            
-                            if not filters and not technical_filters:
-                                continue
-                            
-                            group_query = Q()
-                            
-                            # Handle boolean filters
-                            for field_name, field_value in filters.items():
-                                try:
-                                    ProductionSiteVersion._meta.get_field(field_name)
-                                    if field_value is True:
-                                        group_query |= Q(**{field_name: True})
-                                    elif field_value is False:
-                                        group_query |= Q(**{field_name: False}) | Q(**{f'{field_name}__isnull': True})
-                                except Exception:
-                                    continue
-                            
-                            # Handle technical filters
-                            for field_name, filter_config in technical_filters.items():
-                                if not isinstance(filter_config, dict):
-                                    continue
-                                
-                                try:
-                                    field = ProductionSiteVersion._meta.get_field(field_name)
-                                    mode = filter_config.get('mode', 'range')
-                                    
-                                    if mode == 'equals':
-                                        equals_val = filter_config.get('equals', '')
-                                        if equals_val != '' and equals_val is not None:
-                                            try:
-                                                if field.get_internal_type() == 'FloatField':
-                                                    equals_val = float(equals_val)
-                                                else:
-                                                    equals_val = int(equals_val)
-                                                group_query |= Q(**{field_name: equals_val})
-                                            except (ValueError, TypeError):
-                                                pass
-                                    
-                                    elif mode == 'range':
-                                        min_val = filter_config.get('min', '')
-                                        max_val = filter_config.get('max', '')
-                                        range_query = Q()
-                                        
-                                        if min_val != '' and min_val is not None:
-                                            try:
-                                                if field.get_internal_type() == 'FloatField':
-                                                    min_val = float(min_val)
-                                                else:
-                                                    min_val = int(min_val)
-                                                range_query &= Q(**{f'{field_name}__gte': min_val})
-                                            except (ValueError, TypeError):
-                                                pass
-                                        
-                                        if max_val != '' and max_val is not None:
-                                            try:
-                                                if field.get_internal_type() == 'FloatField':
-                                                    max_val = float(max_val)
-                                                else:
-                                                    max_val = int(max_val)
-                                                range_query &= Q(**{f'{field_name}__lte': max_val})
-                                            except (ValueError, TypeError):
-                                                pass
-                                        
-                                        if range_query:
-                                            group_query |= range_query
-                                except Exception:
-                                    continue
-                            
-                            if group_query:
-                                base_queryset = base_queryset.filter(group_query)
-                
-                # Apply report's category filters
-                report_categories = None
-                if 'categories' in filter_criteria:
-                    report_categories = filter_criteria['categories']
-                elif 'category' in filter_criteria:
-                    report_categories = filter_criteria['category']
-                
-                if report_categories:
-                    if isinstance(report_categories, list) and len(report_categories) > 0:
-                        base_queryset = base_queryset.filter(production_site__category__in=report_categories)
-                    elif isinstance(report_categories, str) and report_categories:
-                        base_queryset = base_queryset.filter(production_site__category=report_categories)
-                
-                # Apply report's country filters
-                if 'country' in filter_criteria:
-                    countries = filter_criteria['country']
-                    if isinstance(countries, list) and len(countries) > 0:
-                        base_queryset = base_queryset.filter(production_site__company__country__in=countries)
-                    elif isinstance(countries, str) and countries:
-                        base_queryset = base_queryset.filter(production_site__company__country=countries)
-                        
-            except CustomReport.DoesNotExist:
-                pass  # If report not found, continue with unfiltered queryset
+            # If report not found, continue without report criteria
+            report = CustomReport.objects.filter(report_id=report_id).first()
 
-        # Apply category filter from query params (may override/combine with report filter)
+        categories = None
         if category != 'ALL':
             categories = [c.strip() for c in category.split(',')]
-            base_queryset = base_queryset.filter(
-                production_site__category__in=categories
-            )
 
-        # Build aggregation queries for min/max of each technical field
-        aggregation_queries = {}
-        for field in relevant_technical_fields:
-            aggregation_queries[f'{field}_min'] = Min(field)
-            aggregation_queries[f'{field}_max'] = Max(field)
+        return RangeStatsService.get_stats(
+            fields,
+            filter_criteria=(report.filter_criteria or {}) if report else None,
+            categories=categories,
+            report=report,
+            **options
+        )
 
-        # Get min/max values
-        ranges = base_queryset.aggregate(**aggregation_queries)
+    def get(self, request, format=None):
+        # Get the category from query params
+        category = request.query_params.get('category', 'ALL').upper()
 
-        # Build response data - ALWAYS include all relevant fields for the category
-        response_data = []
-        for field_name in relevant_technical_fields:
-            try:
-                # Get the field's verbose name and type from ProductionSiteVersion
-                model_field = ProductionSiteVersion._meta.get_field(field_name)
-                label = model_field.verbose_name or field_name
-                # Capitalize first letter
-                if label:
-                    label = label[0].upper() + label[1:]
+        # Filter technical fields to only those in the category
+        relevant_technical_fields = self.get_relevant_fields(category)
+        if not relevant_technical_fields:
+            return Response([])
 
-                # Get field type (IntegerField or FloatField)
-                field_type = model_field.get_internal_type()
+        # Min/max of every field in one pass (cached per report generation).
+        # ALWAYS include all relevant fields for the category, even without data
+        stats = self.get_range_stats(request, category, relevant_technical_fields)
+        response_data = [
+            {
+                'field': item['field'],
+                'label': item['label'],
+                'min': item['min'],
+                'max': item['max'],
+                'type': item['type'],
+            }
+            for item in stats
+        ]
 
-            except:
-                # Fallback to formatted field name
-                label = field_name.replace('_', ' ').title()
-                field_type = 'IntegerField'  # Default assumption
+        return Response(response_data)
 
-            min_val = ranges.get(f'{field_name}_min')
-            max_val = ranges.get(f'{field_name}_max')
 
-            # ALWAYS include fields for the category, even without data
-            response_data.append({
-                'field': field_name,
-                'label': label,
-                'min': min_val,
-                'max': max_val,
-                'type': field_type
-            })
+class RangeStatsAPIView(TechnicalFilterOptionsAPIView):
+    """
+    Range statistics for the technical filter fields of a category: min, max,
+    non-null / null counts and a histogram per field, in one request.
+
+    Query params:
+        category: category code or 'ALL' (default)
+        report_id: restrict to a report's filter_criteria
+        bins: number of histogram bins (default 10, max 50)
+        histogram: 'equi_width' (default) or 'quantile'
+    """
 
-        return Response(response_data)
\ No newline at end of file
+    def get(self, request, format=None):
+        category = request.query_params.get('category', 'ALL').upper()
+
+        relevant_technical_fields = self.get_relevant_fields(category)
+        if not relevant_technical_fields:
+            return Response([])
+
+        try:
+            bins = int(request.query_params.get('bins', RangeStatsService.DEFAULT_BINS))
+        except (TypeError, ValueError):
+            bins = RangeStatsService.DEFAULT_BINS
+
+        return Response(self.get_range_stats(
+            request, category, relevant_technical_fields,
+            bins=bins,
+            mode=request.query_params.get('histogram', RangeStatsService.MODE_EQUI_WIDTH),
+        ))
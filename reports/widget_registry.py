@@ -12,6 +12,13 @@ Categories:
 
 NOTE: Payment/revenue widgets have been removed as payment functionality 
 is not yet implemented in this platform.
+
+Caching:
+Widgets backed by a data endpoint declare a cache policy:
+- cache_ttl: seconds a computed result stays valid
+- depends_on: 'app_label.ModelName' labels; saving or deleting any of these
+  models invalidates the widget's cached results
+See reports/services/widget_cache.py.
 """
 
 AVAILABLE_WIDGETS = [
@@ -105,6 +112,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 8,
+        'cache_ttl': 300,
+        'depends_on': ['accounts.LoginHistory', 'accounts.User'],
     },
     {
         'widget_key': 'online_users',
@@ -116,6 +125,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 9,
+        'cache_ttl': 30,
+        'depends_on': ['accounts.User'],
     },
     {
         'widget_key': 'new_registrations',
@@ -127,6 +138,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 10,
+        'cache_ttl': 600,
+        'depends_on': ['accounts.User'],
     },
     {
         'widget_key': 'inactive_users',
@@ -138,6 +151,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 11,
+        'cache_ttl': 600,
+        'depends_on': ['accounts.User'],
     },
 
     # =========================================================================
@@ -208,6 +223,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 25,
+        'cache_ttl': 600,
+        'depends_on': ['reports.Subscription'],
     },
     {
         'widget_key': 'reports_by_category',
@@ -289,6 +306,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 35,
+        'cache_ttl': 600,
+        'depends_on': ['reports.Company'],
     },
     {
         'widget_key': 'multi_category_companies',
@@ -322,6 +341,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 38,
+        'cache_ttl': 600,
+        'depends_on': ['reports.ProductionSiteVersion'],
     },
     {
         'widget_key': 'monthly_trend',
@@ -333,6 +354,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 39,
+        'cache_ttl': 900,
+        'depends_on': ['reports.Company'],
     },
     {
         'widget_key': 'top_regions',
@@ -359,6 +382,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 50,
+        'cache_ttl': 60,
+        'depends_on': ['dashboard.UserActivity'],
     },
     {
         'widget_key': 'activity_feed',
@@ -392,6 +417,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 53,
+        'cache_ttl': 60,
+        'depends_on': ['accounts.AuditLog'],
     },
     {
         'widget_key': 'login_activity_trend',
@@ -403,6 +430,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 54,
+        'cache_ttl': 300,
+        'depends_on': ['accounts.AuditLog', 'accounts.LoginHistory'],
     },
     {
         'widget_key': 'activity_heatmap',
@@ -462,6 +491,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 63,
+        'cache_ttl': 120,
+        'depends_on': ['reports.UnverifiedSite'],
     },
     {
         'widget_key': 'sites_by_project',
@@ -489,6 +520,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 70,
+        'cache_ttl': 30,
+        'depends_on': [],
     },
     {
         'widget_key': 'system_resources',
@@ -567,6 +600,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 77,
+        'cache_ttl': 600,
+        'depends_on': ['accounts.User'],
     },
     {
         'widget_key': 'successful_logins',
@@ -578,6 +613,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 78,
+        'cache_ttl': 120,
+        'depends_on': ['accounts.AuditLog'],
     },
     {
         'widget_key': 'failed_logins_detail',
@@ -589,6 +626,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 79,
+        'cache_ttl': 60,
+        'depends_on': ['accounts.FailedLoginAttempt'],
     },
     {
         'widget_key': 'login_failure_rate',
@@ -600,6 +639,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 80,
+        'cache_ttl': 300,
+        'depends_on': ['accounts.AuditLog'],
     },
     {
         'widget_key': 'blocked_ips',
@@ -611,6 +652,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 81,
+        'cache_ttl': 120,
+        'depends_on': ['accounts.IPBlacklist'],
     },
     {
         'widget_key': 'suspicious_activity',
@@ -622,6 +665,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 82,
+        'cache_ttl': 120,
+        'depends_on': ['accounts.FailedLoginAttempt'],
     },
     {
         'widget_key': 'failed_logins_alert',
@@ -645,6 +690,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 84,
+        'cache_ttl': 60,
+        'depends_on': ['accounts.UserSession'],
     },
     {
         'widget_key': 'session_stats',
@@ -656,6 +703,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 85,
+        'cache_ttl': 60,
+        'depends_on': ['accounts.UserSession', 'accounts.AuditLog'],
     },
     {
         'widget_key': 'device_browser_stats',
@@ -667,6 +716,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 86,
+        'cache_ttl': 600,
+        'depends_on': ['accounts.AuditLog'],
     },
     {
         'widget_key': 'geographic_distribution',
@@ -678,6 +729,8 @@ AVAILABLE_WIDGETS = [
         'height': 1,
         'is_enabled': True,
         'display_order': 87,
+        'cache_ttl': 600,
+        'depends_on': ['accounts.LoginHistory', 'accounts.User'],
     },
     {
         'widget_key': 'pending_verifications_alert',
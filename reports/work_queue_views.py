@@ -0,0 +1,136 @@
+# reports/work_queue_views.py
+
+"""
+API Views for the calling / review work queues.
+
+Collectors and reviewers ask for their next site instead of picking one
+from a list; the site is leased to them for WORK_QUEUE_LEASE_MINUTES so
+nobody else is handed it meanwhile. See reports/services/work_queue.py.
+"""
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from .models import DataCollectionProject, SiteLease, WorkQueue
+from .project_serializers import UnverifiedSiteProjectSerializer, SiteLeaseSerializer
+from .project_permissions import user_can_access_project
+from .permissions import IsStaffOrDataCollector
+from .services.work_queue import WorkQueueService
+
+
+def _resolve_queue(request, queue):
+    """'alternative-numbers' -> 'ALTERNATIVE_NUMBERS'; error response if unknown or not allowed."""
+    queue = queue.upper().replace('-', '_')
+    if queue not in WorkQueue.values:
+        return None, Response(
+            {'error': f'Unknown work queue. Choose from: {", ".join(WorkQueue.values)}'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    if not WorkQueueService.can_use(queue, request.user):
+        return None, Response(
+            {'error': 'You cannot take work from this queue'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return queue, None
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsStaffOrDataCollector])
+def claim_next_site(request, queue):
+    """
+    POST: Lease the next site of a work queue to the current user.
+
+    Queues: calling, alternative-numbers, review
+
+    Body (optional):
+    {
+        "project_id": "<uuid>"  // only take sites of this project
+    }
+
+    Calling again while holding an active lease returns the same site.
+    """
+    queue, error = _resolve_queue(request, queue)
+    if error:
+        return error
+
+    project = None
+    project_id = request.data.get('project_id') or request.query_params.get('project_id')
+    if project_id:
+        project = get_object_or_404(DataCollectionProject, project_id=project_id)
+        if not user_can_access_project(request.user, project):
+            return Response(
+                {'error': 'You do not have access to this project'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+    site, lease = WorkQueueService.claim_next(queue, request.user, project=project)
+    if site is None:
+        return Response({
+            'site': None,
+            'lease': None,
+            'message': 'No sites waiting in this queue'
+        })
+
+    return Response({
+        'site': UnverifiedSiteProjectSerializer(site).data,
+        'lease': SiteLeaseSerializer(lease).data,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsStaffOrDataCollector])
+def my_leases(request):
+    """
+    GET: Active leases of the current user (one per queue at most)
+    """
+    leases = SiteLease.objects.filter(
+        holder=request.user,
+        expires_at__gt=timezone.now()
+    ).select_related('holder').order_by('queue')
+
+    serializer = SiteLeaseSerializer(leases, many=True)
+    return Response({
+        'leases': serializer.data,
+        'count': len(serializer.data)
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsStaffOrDataCollector])
+def renew_lease(request, queue, site_id):
+    """
+    POST: Extend the current user's lease on a site (heartbeat while working)
+    """
+    queue, error = _resolve_queue(request, queue)
+    if error:
+        return error
+
+    lease = WorkQueueService.renew(site_id, queue, request.user)
+    if lease is None:
+        return Response(
+            {'error': 'You no longer hold this site. Claim a new one.'},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    return Response(SiteLeaseSerializer(lease).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsStaffOrDataCollector])
+def release_lease(request, queue, site_id):
+    """
+    POST: Give a site back to the queue
+    """
+    queue, error = _resolve_queue(request, queue)
+    if error:
+        return error
+
+    released = WorkQueueService.release(site_id, queue, request.user)
+    return Response({
+        'success': released,
+        'message': 'Site released' if released else 'You did not hold this site'
+    })
@@ -0,0 +1,254 @@
+# zeugma_core/consumers.py
+"""
+Multiplexed WebSocket consumer (ws/stream/)
+
+One connection per browser tab instead of one per feature. The session is
+authenticated once on connect and the connection carries typed sub-streams:
+
+    notifications   notification / note events of the user (always on)
+    presence        user online / offline updates (always on)
+    chat            chat rooms, joined and left at runtime
+
+Client -> server frames (a single object or a list of objects):
+
+    {"stream": "chat", "action": "join",  "room_id": "<uuid>"}
+    {"stream": "chat", "action": "leave", "room_id": "<uuid>"}
+    {"stream": "chat", "room_id": "<uuid>", "type": "chat_message", "content": "..."}
+    {"stream": "chat", "room_id": "<uuid>", "type": "typing", "is_typing": true}
+    {"stream": "chat", "room_id": "<uuid>", "type": "mark_read", "message_id": "<uuid>"}
+
+Server -> client: every websocket message is a JSON list of frames
+
+    [{"stream": "chat", "room_id": "<uuid>", "payload": {...}}, ...]
+
+where `payload` is exactly what the dedicated consumers (ws/chat/<room>/,
+ws/notifications/, ws/user-status/) send, so existing handlers can be
+reused. Frames are batched for BATCH_WINDOW seconds (or MAX_BATCH frames)
+before they are written to the socket.
+
+The frontend client is frontend/src/utils/streamSocket.js; every hook and
+page of the app receives its notifications, presence and chat through it.
+"""
+
+import asyncio
+import json
+
+from accounts.presence import PresenceConsumerMixin
+from chat.consumers import ChatConsumer
+
+
+class MultiplexConsumer(PresenceConsumerMixin, ChatConsumer):
+    """
+    Single connection carrying notifications, presence and chat rooms.
+    Chat handling is shared with ChatConsumer.
+    """
+
+    STREAM_NOTIFICATIONS = 'notifications'
+    STREAM_PRESENCE = 'presence'
+    STREAM_CHAT = 'chat'
+
+    BATCH_WINDOW = 0.05
+    MAX_BATCH = 50
+    MAX_ROOMS = 20
+
+    USER_STATUS_GROUP = 'user_status'
+
+    # =========================================================================
+    # CONNECTION
+    # =========================================================================
+
+    async def connect(self):
+        self.user = self.scope['user']
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+
+        self.rooms = set()
+        self.outbox = []
+        self.flush_task = None
+        self.notifications_group = f'notifications_{self.user.id}'
+
+        await self.channel_layer.group_add(self.notifications_group, self.channel_name)
+        await self.channel_layer.group_add(self.USER_STATUS_GROUP, self.channel_name)
+        await self.accept()
+
+        await self.start_presence(self.user)
+        print(f"✅ {self.user.username} connected to stream")
+
+    async def disconnect(self, close_code):
+        if not hasattr(self, 'rooms'):
+            return
+
+        if self.flush_task:
+            self.flush_task.cancel()
+            self.flush_task = None
+
+        for room_id in list(self.rooms):
+            await self.leave_room(room_id, notify=False)
+
+        await self.channel_layer.group_discard(self.notifications_group, self.channel_name)
+        await self.channel_layer.group_discard(self.USER_STATUS_GROUP, self.channel_name)
+
+        await self.stop_presence(self.user)
+        print(f"❌ {self.user.username} disconnected from stream")
+
+    async def receive(self, text_data):
+        try:
+            data = json.loads(text_data)
+        except ValueError:
+            return
+
+        frames = data if isinstance(data, list) else [data]
+        for frame in frames:
+            if not isinstance(frame, dict):
+                continue
+            try:
+                await self.handle_frame(frame)
+            except Exception as e:
+                print(f"❌ Error in stream receive: {e}")
+
+    async def handle_frame(self, frame):
+        # notifications and presence are server -> client only
+        if frame.get('stream') != self.STREAM_CHAT:
+            return
+
+        room_id = str(frame.get('room_id') or '')
+        action = frame.get('action')
+
+        if action == 'join':
+            await self.join_room(room_id)
+        elif action == 'leave':
+            await self.leave_room(room_id)
+        elif room_id in self.rooms:
+            await self.handle_room_frame(room_id, frame)
+        else:
+            await self.push(self.STREAM_CHAT, {'type': 'error', 'error': 'Room not joined'}, room_id)
+
+    # =========================================================================
+    # CHAT ROOMS
+    # =========================================================================
+
+    async def join_room(self, room_id):
+        if room_id in self.rooms:
+            await self.push(self.STREAM_CHAT, {'type': 'joined'}, room_id)
+            return
+
+        if len(self.rooms) >= self.MAX_ROOMS or not room_id or not await self.check_room_access(room_id):
+            await self.push(self.STREAM_CHAT, {'type': 'error', 'error': 'Cannot join room'}, room_id)
+            return
+
+        await self.channel_layer.group_add(f'chat_{room_id}', self.channel_name)
+        self.rooms.add(room_id)
+        await self.push(self.STREAM_CHAT, {'type': 'joined'}, room_id)
+        await self.broadcast_room_presence(room_id, True)
+
+    async def leave_room(self, room_id, notify=True):
+        if room_id not in self.rooms:
+            return
+
+        self.rooms.discard(room_id)
+        await self.update_typing_status(False, room_id)
+        await self.broadcast_room_presence(room_id, False)
+        await self.channel_layer.group_discard(f'chat_{room_id}', self.channel_name)
+        if notify:
+            await self.push(self.STREAM_CHAT, {'type': 'left'}, room_id)
+
+    # =========================================================================
+    # OUTGOING FRAMES (batched)
+    # =========================================================================
+
+    async def push(self, stream, payload, room_id=None):
+        """Queue a frame; it is sent with the next batch."""
+        frame = {'stream': stream, 'payload': payload}
+        if room_id:
+            frame['room_id'] = room_id
+        self.outbox.append(frame)
+
+        if len(self.outbox) >= self.MAX_BATCH:
+            await self.flush()
+        elif self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(self.BATCH_WINDOW)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        if not self.outbox:
+            return
+        frames, self.outbox = self.outbox, []
+        await self.send(text_data=json.dumps(frames))
+
+    # =========================================================================
+    # CHANNEL LAYER HANDLERS - chat rooms
+    # =========================================================================
+
+    async def chat_message(self, event):
+        await self.push(self.STREAM_CHAT, {
+            'type': 'chat_message',
+            'message': event['message']
+        }, event.get('room_id'))
+
+    async def typing_indicator(self, event):
+        if event['user_id'] != self.user.id:
+            await self.push(self.STREAM_CHAT, {
+                'type': 'typing_indicator',
+                'user_id': event['user_id'],
+                'username': event['username'],
+                'is_typing': event['is_typing']
+            }, event.get('room_id'))
+
+    async def message_read(self, event):
+        await self.push(self.STREAM_CHAT, {
+            'type': 'message_read',
+            'message_id': event['message_id'],
+            'user_id': event['user_id']
+        }, event.get('room_id'))
+
+    async def user_status(self, event):
+        await self.push(self.STREAM_CHAT, {
+            'type': 'user_status',
+            'user_id': event['user_id'],
+            'username': event['username'],
+            'is_online': event['is_online']
+        }, event.get('room_id'))
+
+    # =========================================================================
+    # CHANNEL LAYER HANDLERS - notifications / presence
+    # =========================================================================
+
+    async def notification_message(self, event):
+        await self.push(self.STREAM_NOTIFICATIONS, {
+            'type': 'notification',
+            'notification': event['notification']
+        })
+
+    async def note_created(self, event):
+        await self.push(self.STREAM_NOTIFICATIONS, {
+            'type': 'note_created',
+            'note': event['note'],
+            'site_id': event['site_id']
+        })
+
+    async def note_updated(self, event):
+        await self.push(self.STREAM_NOTIFICATIONS, {
+            'type': 'note_updated',
+            'note': event['note'],
+            'site_id': event['site_id']
+        })
+
+    async def note_deleted(self, event):
+        await self.push(self.STREAM_NOTIFICATIONS, {
+            'type': 'note_deleted',
+            'note_id': event['note_id'],
+            'site_id': event['site_id']
+        })
+
+    async def user_status_update(self, event):
+        await self.push(self.STREAM_PRESENCE, {
+            'type': 'user_status',
+            'user_id': event['user_id'],
+            'username': event['username'],
+            'is_online': event['is_online']
+        })
@@ -143,6 +143,21 @@ LOGIN_URL = '/accounts/login/'
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+        # Integration clients: "Authorization: Api-Key <key>" (accounts/authentication.py)
+        'accounts.authentication.APIKeyAuthentication',
+    ],
+    # Token buckets per user / API key and view scope (accounts/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': ['accounts.throttling.TokenBucketThrottle'],
+    'DEFAULT_THROTTLE_RATES': {
+        'report_data': '600/min',      # 1 token per 100 requested rows
+        'report_stats': '120/min',
+        'report_changes': '600/hour',  # 1 token per 1,000 requested changes
+        'report_export': '100/hour',   # 1 token per 1,000 exported rows
+        'company_research': '20/day',
+    },
 }
 
 
@@ -221,6 +236,14 @@ CELERY_TIMEZONE = 'UTC'
 
 GEMINI_API_KEY = config('GEMINI_API_KEY', default='')
 
+# Company research (see reports/services/company_research.py)
+# 'gemini', or 'stub' for a local canned client (development / tests, no API calls)
+COMPANY_RESEARCH_CLIENT = config('COMPANY_RESEARCH_CLIENT', default='gemini')
+# Results younger than this are served again for the same company and country
+COMPANY_RESEARCH_CACHE_DAYS = config('COMPANY_RESEARCH_CACHE_DAYS', default=30, cast=int)
+# Companies of a batch researched in parallel
+COMPANY_RESEARCH_MAX_PARALLEL = config('COMPANY_RESEARCH_MAX_PARALLEL', default=3, cast=int)
+
 
 # =============================================================================
 # PUSH NOTIFICATIONS (VAPID)
@@ -231,6 +254,20 @@ VAPID_PRIVATE_KEY = config('VAPID_PRIVATE_KEY', default='')
 VAPID_CLAIMS_EMAIL = config('VAPID_CLAIMS_EMAIL', default='admin@zeugma.com')
 
 
+# =============================================================================
+# GEOIP (offline IP -> location database, see accounts/geoip.py)
+# =============================================================================
+
+GEOIP_DATABASE_PATH = config('GEOIP_DATABASE_PATH', default=str(BASE_DIR / 'geoip' / 'ip-city.csv'))
+
+
+# =============================================================================
+# WORK QUEUE (site leases for callers / reviewers, see reports/services/work_queue.py)
+# =============================================================================
+
+WORK_QUEUE_LEASE_MINUTES = config('WORK_QUEUE_LEASE_MINUTES', default=15, cast=int)
+
+
 # =============================================================================
 # FRONTEND URL
 # =============================================================================